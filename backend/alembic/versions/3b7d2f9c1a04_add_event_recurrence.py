@@ -0,0 +1,52 @@
+"""Add recurrence columns to events
+
+Revision ID: 3b7d2f9c1a04
+Revises: 6966bd4e4575
+Create Date: 2026-10-19 09:12:31.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d2f9c1a04'
+down_revision: Union[str, Sequence[str], None] = '6966bd4e4575'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_column(table: str, column: str, ddl: str) -> None:
+    """Add a column unless schema.sql already created it"""
+    existing = {row[1] for row in op.get_bind().exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _add_column("events", "rrule", "TEXT")
+    _add_column("events", "exdates", "TEXT")
+    _add_column("events", "recurring_event_id", "TEXT")
+    _add_column("events", "original_start_time", "TIMESTAMP")
+    _add_column("events", "series_end", "TIMESTAMP")
+
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_events_series ON events(start_time, series_end) WHERE rrule IS NOT NULL;
+""")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_events_recurring ON events(recurring_event_id, original_start_time);
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_events_recurring;")
+    op.execute("DROP INDEX IF EXISTS idx_events_series;")
+    op.drop_column("events", "series_end")
+    op.drop_column("events", "original_start_time")
+    op.drop_column("events", "recurring_event_id")
+    op.drop_column("events", "exdates")
+    op.drop_column("events", "rrule")
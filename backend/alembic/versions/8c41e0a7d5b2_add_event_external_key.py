@@ -0,0 +1,63 @@
+"""Add unique (calendar_id, external_id) key on events
+
+Existing duplicates are merged into their newest row first, and keyed rows
+without a calendar get their source as calendar_id.
+
+Revision ID: 8c41e0a7d5b2
+Revises: 3b7d2f9c1a04
+Create Date: 2026-10-19 11:40:02.611853
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e0a7d5b2'
+down_revision: Union[str, Sequence[str], None] = '3b7d2f9c1a04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL never conflicts in a unique index: key imported rows without a calendar by their source
+    op.execute("""
+UPDATE events SET calendar_id = source
+WHERE external_id IS NOT NULL AND calendar_id IS NULL;
+""")
+    # Earlier imports could store a key twice; keep the newest row and move links to it
+    op.execute("""
+CREATE TEMP TABLE event_duplicates AS
+SELECT id, keep_id FROM (
+  SELECT id,
+         FIRST_VALUE(id) OVER (PARTITION BY calendar_id, external_id ORDER BY updated_at DESC, rowid DESC) AS keep_id
+  FROM events
+  WHERE external_id IS NOT NULL
+)
+WHERE id != keep_id;
+""")
+    op.execute("""
+UPDATE OR IGNORE event_notes
+SET event_id = (SELECT keep_id FROM event_duplicates WHERE id = event_notes.event_id)
+WHERE event_id IN (SELECT id FROM event_duplicates);
+""")
+    op.execute("""
+UPDATE OR IGNORE event_tasks
+SET event_id = (SELECT keep_id FROM event_duplicates WHERE id = event_tasks.event_id)
+WHERE event_id IN (SELECT id FROM event_duplicates);
+""")
+    op.execute("DELETE FROM event_notes WHERE event_id IN (SELECT id FROM event_duplicates);")
+    op.execute("DELETE FROM event_tasks WHERE event_id IN (SELECT id FROM event_duplicates);")
+    op.execute("DELETE FROM events WHERE id IN (SELECT id FROM event_duplicates);")
+    op.execute("DROP TABLE event_duplicates;")
+    op.execute("""
+CREATE UNIQUE INDEX IF NOT EXISTS idx_events_external ON events(calendar_id, external_id);
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_events_external;")
@@ -0,0 +1,61 @@
+"""Add chat message token counts and rolling conversation summaries
+
+Revision ID: a3c8e5f1b742
+Revises: f2b9d04e6a13
+Create Date: 2026-10-19 19:42:11.506318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c8e5f1b742'
+down_revision: Union[str, Sequence[str], None] = 'f2b9d04e6a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_column(table: str, column: str, ddl: str) -> None:
+    """Add a column unless schema.sql already created it"""
+    existing = {row[1] for row in op.get_bind().exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _add_column("chat_messages", "token_count", "INTEGER")
+    op.execute("""
+UPDATE chat_messages SET token_count = (LENGTH(content) + 3) / 4 WHERE token_count IS NULL;
+""")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_time ON chat_messages(conversation_id, timestamp);
+""")
+    op.execute("""
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+  conversation_id  TEXT PRIMARY KEY,
+  summary          TEXT NOT NULL,
+  token_count      INTEGER NOT NULL,
+  covers_until     TIMESTAMP NOT NULL,
+  message_count    INTEGER NOT NULL,
+  model            TEXT NOT NULL,
+  updated_at       TIMESTAMP NOT NULL,
+  FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+);
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS conversations_ad AFTER DELETE ON conversations BEGIN
+  DELETE FROM conversation_summaries WHERE conversation_id = old.id;
+END;
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS conversations_ad;")
+    op.execute("DROP TABLE IF EXISTS conversation_summaries;")
+    op.execute("DROP INDEX IF EXISTS idx_chat_messages_conversation_time;")
+    op.drop_column("chat_messages", "token_count")
@@ -0,0 +1,432 @@
+"""Add per-row sync versions and tombstones
+
+Revision ID: a6d9e3b1c527
+Revises: f8c2d5e7a914
+Create Date: 2026-10-20 00:31:05.772140
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d9e3b1c527'
+down_revision: Union[str, Sequence[str], None] = 'f8c2d5e7a914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENTITY_ROWS = """
+SELECT 'note', id, 'insert' FROM notes
+UNION ALL SELECT 'task', id, 'insert' FROM tasks
+UNION ALL SELECT 'event', id, 'insert' FROM events
+UNION ALL SELECT 'project', id, 'insert' FROM projects
+UNION ALL SELECT 'conversation', id, 'insert' FROM conversations
+UNION ALL SELECT 'settings', id, 'insert' FROM settings
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The change-log triggers now also maintain row_versions
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_notes_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_project_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_project_notes_ad;")
+    op.execute("""
+CREATE TABLE IF NOT EXISTS row_versions (
+  entity     TEXT NOT NULL,
+  entity_id  TEXT NOT NULL,
+  version    INTEGER NOT NULL,   -- changes.version of the last write
+  deleted_at TIMESTAMP,
+  PRIMARY KEY (entity, entity_id)
+);
+""")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_row_versions_version ON row_versions(version);")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_row_versions_tombstones ON row_versions(deleted_at) WHERE deleted_at IS NOT NULL;")
+    op.execute("""
+CREATE TABLE IF NOT EXISTS tombstone_compaction (
+  id                INTEGER PRIMARY KEY CHECK (id = 1),
+  compacted_version INTEGER NOT NULL DEFAULT 0
+);
+""")
+    op.execute("INSERT OR IGNORE INTO tombstone_compaction (id) VALUES (1);")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_ai AFTER INSERT ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('note', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_au AFTER UPDATE ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('note', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_ad AFTER DELETE ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('note', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_ai AFTER INSERT ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('task', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_au AFTER UPDATE ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('task', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_ad AFTER DELETE ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('task', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_ai AFTER INSERT ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_au AFTER UPDATE ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_ad AFTER DELETE ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_ai AFTER INSERT ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_au AFTER UPDATE ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_ad AFTER DELETE ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_ai AFTER INSERT ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('conversation', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_au AFTER UPDATE ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('conversation', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_ad AFTER DELETE ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('conversation', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_ai AFTER INSERT ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('settings', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_au AFTER UPDATE ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('settings', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_ad AFTER DELETE ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('settings', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_notes_ai AFTER INSERT ON event_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.event_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', new.event_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_notes_ad AFTER DELETE ON event_notes
+WHEN EXISTS (SELECT 1 FROM events WHERE id = old.event_id) BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.event_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', old.event_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_tasks_ai AFTER INSERT ON event_tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.event_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', new.event_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_tasks_ad AFTER DELETE ON event_tasks
+WHEN EXISTS (SELECT 1 FROM events WHERE id = old.event_id) BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.event_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', old.event_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_project_notes_ai AFTER INSERT ON project_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.project_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', new.project_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_project_notes_ad AFTER DELETE ON project_notes
+WHEN EXISTS (SELECT 1 FROM projects WHERE id = old.project_id) BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', old.project_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', old.project_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+""")
+
+    # Existing rows get versions after everything already logged
+    before = op.get_bind().execute(
+        sa.text("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'changes'")
+    ).scalar()
+    op.execute(f"INSERT INTO changes (entity, entity_id, op) {ENTITY_ROWS}")
+    op.execute(sa.text(
+        "INSERT INTO row_versions (entity, entity_id, version) "
+        "SELECT entity, entity_id, MAX(version) FROM changes WHERE version > :before GROUP BY entity, entity_id"
+    ).bindparams(before=before))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_notes_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_project_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_project_notes_ad;")
+    op.execute("DROP TABLE IF EXISTS tombstone_compaction;")
+    op.execute("DROP INDEX IF EXISTS idx_row_versions_tombstones;")
+    op.execute("DROP INDEX IF EXISTS idx_row_versions_version;")
+    op.execute("DROP TABLE IF EXISTS row_versions;")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_ai AFTER INSERT ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_au AFTER UPDATE ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_ad AFTER DELETE ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_ai AFTER INSERT ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_au AFTER UPDATE ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_ad AFTER DELETE ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_ai AFTER INSERT ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_au AFTER UPDATE ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_ad AFTER DELETE ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_ai AFTER INSERT ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_au AFTER UPDATE ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_ad AFTER DELETE ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_ai AFTER INSERT ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_au AFTER UPDATE ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_ad AFTER DELETE ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_ai AFTER INSERT ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_au AFTER UPDATE ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_ad AFTER DELETE ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_notes_ai AFTER INSERT ON event_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.event_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_notes_ad AFTER DELETE ON event_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.event_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_tasks_ai AFTER INSERT ON event_tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.event_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_tasks_ad AFTER DELETE ON event_tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.event_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_project_notes_ai AFTER INSERT ON project_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.project_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_project_notes_ad AFTER DELETE ON project_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', old.project_id, 'update');
+END;
+""")
+
@@ -0,0 +1,39 @@
+"""Add events.local_exdates so synced EXDATEs can replace the stored ones
+
+Occurrences cancelled in Atlas, or by a cancelled instance during a sync,
+are kept across series upserts; the rest of `exdates` follows the source.
+Existing rows start without local cancellations.
+
+Revision ID: a9f4c6e2b813
+Revises: e3b8d1f6a297
+Create Date: 2026-10-20 02:47:36.218405
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f4c6e2b813'
+down_revision: Union[str, Sequence[str], None] = 'e3b8d1f6a297'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_column(table: str, column: str, ddl: str) -> None:
+    """Add a column unless schema.sql already created it"""
+    existing = {row[1] for row in op.get_bind().exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _add_column("events", "local_exdates", "TEXT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("events", "local_exdates")
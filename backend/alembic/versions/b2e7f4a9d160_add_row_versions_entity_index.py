@@ -0,0 +1,28 @@
+"""Add per-entity version index for collection ETags
+
+Revision ID: b2e7f4a9d160
+Revises: a6d9e3b1c527
+Create Date: 2026-10-20 01:12:40.318527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e7f4a9d160'
+down_revision: Union[str, Sequence[str], None] = 'a6d9e3b1c527'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE INDEX IF NOT EXISTS idx_row_versions_entity_version ON row_versions(entity, version);")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_row_versions_entity_version;")
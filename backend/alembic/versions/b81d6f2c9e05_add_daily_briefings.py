@@ -0,0 +1,90 @@
+"""Add precomputed daily briefings with staleness triggers
+
+Revision ID: b81d6f2c9e05
+Revises: a3c8e5f1b742
+Create Date: 2026-10-19 20:31:54.277104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81d6f2c9e05'
+down_revision: Union[str, Sequence[str], None] = 'a3c8e5f1b742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+CREATE TABLE IF NOT EXISTS daily_briefings (
+  date             TEXT PRIMARY KEY,   -- YYYY-MM-DD
+  markdown         TEXT NOT NULL,
+  references_json  TEXT NOT NULL,      -- JSON: { tasks: [...], events: [...], notes: [...] }
+  model            TEXT NOT NULL,
+  template_version INTEGER NOT NULL,
+  overview_hash    TEXT NOT NULL,      -- sha256 of the overview it was written from
+  generated_at     TIMESTAMP NOT NULL,
+  stale_since      TIMESTAMP           -- Last relevant task/event change since generation; NULL = fresh
+);
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS daily_briefings_tasks_ai AFTER INSERT ON tasks BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(new.due_date, 1, 10) <= date;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS daily_briefings_tasks_au AFTER UPDATE ON tasks BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(new.due_date, 1, 10) <= date OR substr(old.due_date, 1, 10) <= date;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS daily_briefings_tasks_ad AFTER DELETE ON tasks BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(old.due_date, 1, 10) <= date;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS daily_briefings_events_ai AFTER INSERT ON events BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(new.start_time, 1, 10) <= date
+    AND (substr(new.end_time, 1, 10) >= date
+         OR (new.rrule IS NOT NULL AND COALESCE(substr(new.series_end, 1, 10), '9999') >= date));
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS daily_briefings_events_au AFTER UPDATE ON events BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE (substr(new.start_time, 1, 10) <= date
+         AND (substr(new.end_time, 1, 10) >= date
+              OR (new.rrule IS NOT NULL AND COALESCE(substr(new.series_end, 1, 10), '9999') >= date)))
+     OR (substr(old.start_time, 1, 10) <= date
+         AND (substr(old.end_time, 1, 10) >= date
+              OR (old.rrule IS NOT NULL AND COALESCE(substr(old.series_end, 1, 10), '9999') >= date)));
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS daily_briefings_events_ad AFTER DELETE ON events BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(old.start_time, 1, 10) <= date
+    AND (substr(old.end_time, 1, 10) >= date
+         OR (old.rrule IS NOT NULL AND COALESCE(substr(old.series_end, 1, 10), '9999') >= date));
+END;
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS daily_briefings_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS daily_briefings_tasks_au;")
+    op.execute("DROP TRIGGER IF EXISTS daily_briefings_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS daily_briefings_events_ai;")
+    op.execute("DROP TRIGGER IF EXISTS daily_briefings_events_au;")
+    op.execute("DROP TRIGGER IF EXISTS daily_briefings_events_ad;")
+    op.execute("DROP TABLE IF EXISTS daily_briefings;")
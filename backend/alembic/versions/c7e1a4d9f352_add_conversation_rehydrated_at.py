@@ -0,0 +1,35 @@
+"""Add conversation rehydrated_at so opened threads are not re-archived
+
+Revision ID: c7e1a4d9f352
+Revises: b2e7f4a9d160
+Create Date: 2026-10-20 02:06:19.514873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1a4d9f352'
+down_revision: Union[str, Sequence[str], None] = 'b2e7f4a9d160'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_column(table: str, column: str, ddl: str) -> None:
+    """Add a column unless schema.sql already created it"""
+    existing = {row[1] for row in op.get_bind().exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _add_column("conversations", "rehydrated_at", "TIMESTAMP")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("conversations", "rehydrated_at")
@@ -0,0 +1,66 @@
+"""Add chat message cursor index and full-text search
+
+Revision ID: c94a7e2d5b18
+Revises: b81d6f2c9e05
+Create Date: 2026-10-19 21:08:37.214590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c94a7e2d5b18'
+down_revision: Union[str, Sequence[str], None] = 'b81d6f2c9e05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Both are prefixes of the cursor index
+    op.execute("DROP INDEX IF EXISTS idx_chat_messages_conversation;")
+    op.execute("DROP INDEX IF EXISTS idx_chat_messages_conversation_time;")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_cursor ON chat_messages(conversation_id, timestamp, id);
+""")
+    op.execute("""
+CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+  content,
+  content=chat_messages,
+  content_rowid=rowid
+);
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS chat_messages_ai AFTER INSERT ON chat_messages BEGIN
+  INSERT INTO chat_messages_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS chat_messages_ad AFTER DELETE ON chat_messages BEGIN
+  INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS chat_messages_au AFTER UPDATE OF content ON chat_messages BEGIN
+  INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+  INSERT INTO chat_messages_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+""")
+    # Index the messages stored before the table existed
+    op.execute("INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild');")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS chat_messages_au;")
+    op.execute("DROP TRIGGER IF EXISTS chat_messages_ad;")
+    op.execute("DROP TRIGGER IF EXISTS chat_messages_ai;")
+    op.execute("DROP TABLE IF EXISTS chat_messages_fts;")
+    op.execute("DROP INDEX IF EXISTS idx_chat_messages_conversation_cursor;")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation ON chat_messages(conversation_id);")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_time ON chat_messages(conversation_id, timestamp);
+""")
@@ -0,0 +1,37 @@
+"""Add conversation archived_at for the cold store
+
+Revision ID: d3f6b9a2c871
+Revises: c94a7e2d5b18
+Create Date: 2026-10-19 22:15:52.803114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f6b9a2c871'
+down_revision: Union[str, Sequence[str], None] = 'c94a7e2d5b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_column(table: str, column: str, ddl: str) -> None:
+    """Add a column unless schema.sql already created it"""
+    existing = {row[1] for row in op.get_bind().exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Messages of archived conversations live in atlas_archive.db, created by the app
+    _add_column("conversations", "archived_at", "TIMESTAMP")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Rehydrate archived conversations before downgrading; their messages stay in the cold store
+    op.drop_column("conversations", "archived_at")
@@ -0,0 +1,57 @@
+"""Add background jobs table and embeddings.content_hash
+
+Revision ID: d5e2a81c4f37
+Revises: 8c41e0a7d5b2
+Create Date: 2026-10-19 14:05:47.318220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e2a81c4f37'
+down_revision: Union[str, Sequence[str], None] = '8c41e0a7d5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_column(table: str, column: str, ddl: str) -> None:
+    """Add a column unless schema.sql already created it"""
+    existing = {row[1] for row in op.get_bind().exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _add_column("embeddings", "content_hash", "TEXT")
+
+    op.execute("""
+CREATE TABLE IF NOT EXISTS jobs (
+  id          INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind        TEXT NOT NULL,
+  key         TEXT NOT NULL,
+  payload     TEXT,
+  status      TEXT NOT NULL DEFAULT 'pending',
+  attempts    INTEGER NOT NULL DEFAULT 0,
+  generation  INTEGER NOT NULL DEFAULT 0,
+  run_after   TIMESTAMP NOT NULL,
+  last_error  TEXT,
+  created_at  TIMESTAMP NOT NULL,
+  updated_at  TIMESTAMP NOT NULL,
+  UNIQUE (kind, key)
+);
+""")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_after);
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_jobs_ready;")
+    op.execute("DROP TABLE IF EXISTS jobs;")
+    op.drop_column("embeddings", "content_hash")
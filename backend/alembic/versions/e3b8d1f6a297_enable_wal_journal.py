@@ -0,0 +1,35 @@
+"""Switch the database to WAL journaling
+
+Long read transactions (streamed sync pages, batch read runs) then keep
+their snapshot without blocking writers. The mode is stored in the file;
+init_db applies it as well.
+
+Revision ID: e3b8d1f6a297
+Revises: c7e1a4d9f352
+Create Date: 2026-10-20 02:31:52.087614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8d1f6a297'
+down_revision: Union[str, Sequence[str], None] = 'c7e1a4d9f352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The journal mode cannot change inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute("PRAGMA journal_mode=WAL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("PRAGMA journal_mode=DELETE")
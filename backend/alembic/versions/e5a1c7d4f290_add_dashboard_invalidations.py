@@ -0,0 +1,122 @@
+"""Add dashboard overview invalidation log and day-range indexes
+
+Revision ID: e5a1c7d4f290
+Revises: d3f6b9a2c871
+Create Date: 2026-10-19 23:02:46.119853
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c7d4f290'
+down_revision: Union[str, Sequence[str], None] = 'd3f6b9a2c871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE INDEX IF NOT EXISTS idx_notes_updated_at ON notes(updated_at);")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_tasks_open_due ON tasks(due_date) WHERE status IN ('todo', 'in_progress');
+""")
+    op.execute("""
+CREATE TABLE IF NOT EXISTS dashboard_invalidations (
+  id         INTEGER PRIMARY KEY AUTOINCREMENT,  -- Never reused, so readers can resume after pruning
+  first_date TEXT,                               -- YYYY-MM-DD; NULL = from the beginning
+  last_date  TEXT                                -- YYYY-MM-DD; NULL = no end
+);
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_tasks_ai AFTER INSERT ON tasks
+WHEN new.due_date IS NOT NULL AND new.status IN ('todo', 'in_progress') BEGIN
+  INSERT INTO dashboard_invalidations (first_date) VALUES (substr(new.due_date, 1, 10));
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_tasks_au AFTER UPDATE OF title, status, priority, due_date, tags ON tasks BEGIN
+  INSERT INTO dashboard_invalidations (first_date)
+  SELECT substr(old.due_date, 1, 10) WHERE old.due_date IS NOT NULL AND old.status IN ('todo', 'in_progress')
+  UNION
+  SELECT substr(new.due_date, 1, 10) WHERE new.due_date IS NOT NULL AND new.status IN ('todo', 'in_progress');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_tasks_ad AFTER DELETE ON tasks
+WHEN old.due_date IS NOT NULL AND old.status IN ('todo', 'in_progress') BEGIN
+  INSERT INTO dashboard_invalidations (first_date) VALUES (substr(old.due_date, 1, 10));
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_events_ai AFTER INSERT ON events BEGIN
+  INSERT INTO dashboard_invalidations (first_date, last_date) VALUES (
+    substr(min(new.start_time, COALESCE(new.original_start_time, new.start_time)), 1, 10),
+    CASE WHEN new.rrule IS NULL
+         THEN substr(max(new.end_time, COALESCE(new.original_start_time, new.end_time)), 1, 10)
+         ELSE substr(new.series_end, 1, 10) END
+  );
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_events_au AFTER UPDATE OF
+  title, start_time, end_time, location, source, rrule, exdates, recurring_event_id, original_start_time, series_end
+ON events BEGIN
+  INSERT INTO dashboard_invalidations (first_date, last_date) VALUES (
+    substr(min(old.start_time, COALESCE(old.original_start_time, old.start_time)), 1, 10),
+    CASE WHEN old.rrule IS NULL
+         THEN substr(max(old.end_time, COALESCE(old.original_start_time, old.end_time)), 1, 10)
+         ELSE substr(old.series_end, 1, 10) END
+  ), (
+    substr(min(new.start_time, COALESCE(new.original_start_time, new.start_time)), 1, 10),
+    CASE WHEN new.rrule IS NULL
+         THEN substr(max(new.end_time, COALESCE(new.original_start_time, new.end_time)), 1, 10)
+         ELSE substr(new.series_end, 1, 10) END
+  );
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_events_ad AFTER DELETE ON events BEGIN
+  INSERT INTO dashboard_invalidations (first_date, last_date) VALUES (
+    substr(min(old.start_time, COALESCE(old.original_start_time, old.start_time)), 1, 10),
+    CASE WHEN old.rrule IS NULL
+         THEN substr(max(old.end_time, COALESCE(old.original_start_time, old.end_time)), 1, 10)
+         ELSE substr(old.series_end, 1, 10) END
+  );
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_notes_ai AFTER INSERT ON notes BEGIN
+  INSERT INTO dashboard_invalidations (last_date) VALUES (date(new.updated_at, '+3 days'));
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_notes_au AFTER UPDATE OF title, tags, created_at, updated_at ON notes BEGIN
+  INSERT INTO dashboard_invalidations (last_date)
+  VALUES (max(date(old.updated_at, '+3 days'), date(new.updated_at, '+3 days')));
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS dashboard_notes_ad AFTER DELETE ON notes BEGIN
+  INSERT INTO dashboard_invalidations (last_date) VALUES (date(old.updated_at, '+3 days'));
+END;
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS dashboard_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS dashboard_tasks_au;")
+    op.execute("DROP TRIGGER IF EXISTS dashboard_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS dashboard_events_ai;")
+    op.execute("DROP TRIGGER IF EXISTS dashboard_events_au;")
+    op.execute("DROP TRIGGER IF EXISTS dashboard_events_ad;")
+    op.execute("DROP TRIGGER IF EXISTS dashboard_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS dashboard_notes_au;")
+    op.execute("DROP TRIGGER IF EXISTS dashboard_notes_ad;")
+    op.execute("DROP TABLE IF EXISTS dashboard_invalidations;")
+    op.execute("DROP INDEX IF EXISTS idx_tasks_open_due;")
+    op.execute("DROP INDEX IF EXISTS idx_notes_updated_at;")
@@ -0,0 +1,44 @@
+"""Add embedding_cache table
+
+Revision ID: e7a4c2d91b58
+Revises: d5e2a81c4f37
+Create Date: 2026-10-19 16:42:11.604512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a4c2d91b58'
+down_revision: Union[str, Sequence[str], None] = 'd5e2a81c4f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  model        TEXT NOT NULL,
+  text_hash    TEXT NOT NULL,
+  embedding    BLOB NOT NULL,
+  tokens       INTEGER NOT NULL,
+  size         INTEGER NOT NULL,
+  hits         INTEGER NOT NULL DEFAULT 0,
+  created_at   TIMESTAMP NOT NULL,
+  last_used_at REAL NOT NULL,
+  PRIMARY KEY (model, text_hash)
+);
+""")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_lru ON embedding_cache(last_used_at);
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_embedding_cache_lru;")
+    op.execute("DROP TABLE IF EXISTS embedding_cache;")
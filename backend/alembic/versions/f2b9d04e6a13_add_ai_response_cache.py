@@ -0,0 +1,115 @@
+"""Add AI response cache with invalidation triggers
+
+Revision ID: f2b9d04e6a13
+Revises: e7a4c2d91b58
+Create Date: 2026-10-19 18:20:37.915043
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9d04e6a13'
+down_revision: Union[str, Sequence[str], None] = 'e7a4c2d91b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+CREATE TABLE IF NOT EXISTS ai_response_cache (
+  key              TEXT PRIMARY KEY,
+  kind             TEXT NOT NULL,
+  model            TEXT NOT NULL,
+  template_version INTEGER NOT NULL,
+  response         TEXT NOT NULL,
+  hits             INTEGER NOT NULL DEFAULT 0,
+  created_at       TIMESTAMP NOT NULL,
+  expires_at       TIMESTAMP NOT NULL
+);
+""")
+    op.execute("""
+CREATE TABLE IF NOT EXISTS ai_response_deps (
+  key  TEXT NOT NULL,
+  dep  TEXT NOT NULL,
+  PRIMARY KEY (key, dep)
+);
+""")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_ai_response_deps_dep ON ai_response_deps(dep);
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_response_cache_ad AFTER DELETE ON ai_response_cache BEGIN
+  DELETE FROM ai_response_deps WHERE key = old.key;
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_notes_ai AFTER INSERT ON notes BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'notes');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_notes_au AFTER UPDATE ON notes BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (
+    SELECT key FROM ai_response_deps WHERE dep IN ('notes', 'note:' || old.id)
+  );
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_notes_ad AFTER DELETE ON notes BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (
+    SELECT key FROM ai_response_deps WHERE dep IN ('notes', 'note:' || old.id)
+  );
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_tasks_ai AFTER INSERT ON tasks BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'tasks');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_tasks_au AFTER UPDATE ON tasks BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'tasks');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_tasks_ad AFTER DELETE ON tasks BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'tasks');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_events_ai AFTER INSERT ON events BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'events');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_events_au AFTER UPDATE ON events BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'events');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS ai_cache_events_ad AFTER DELETE ON events BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'events');
+END;
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_events_ad;")
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_events_au;")
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_events_ai;")
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_tasks_au;")
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_notes_ad;")
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_notes_au;")
+    op.execute("DROP TRIGGER IF EXISTS ai_cache_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS ai_response_cache_ad;")
+    op.execute("DROP INDEX IF EXISTS idx_ai_response_deps_dep;")
+    op.execute("DROP TABLE IF EXISTS ai_response_deps;")
+    op.execute("DROP TABLE IF EXISTS ai_response_cache;")
@@ -0,0 +1,182 @@
+"""Add change log fed by entity triggers
+
+Revision ID: f8c2d5e7a914
+Revises: e5a1c7d4f290
+Create Date: 2026-10-19 23:48:12.406217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8c2d5e7a914'
+down_revision: Union[str, Sequence[str], None] = 'e5a1c7d4f290'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+CREATE TABLE IF NOT EXISTS changes (
+  version    INTEGER PRIMARY KEY AUTOINCREMENT,
+  entity     TEXT NOT NULL,      -- note | task | event | project | conversation | settings
+  entity_id  TEXT NOT NULL,
+  op         TEXT NOT NULL,      -- insert | update | delete
+  changed_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+);
+""")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_changes_changed_at ON changes(changed_at);")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_ai AFTER INSERT ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_au AFTER UPDATE ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_notes_ad AFTER DELETE ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_ai AFTER INSERT ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_au AFTER UPDATE ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_tasks_ad AFTER DELETE ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_ai AFTER INSERT ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_au AFTER UPDATE ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_events_ad AFTER DELETE ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_ai AFTER INSERT ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_au AFTER UPDATE ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_projects_ad AFTER DELETE ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_ai AFTER INSERT ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_au AFTER UPDATE ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_conversations_ad AFTER DELETE ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_ai AFTER INSERT ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', new.id, 'insert');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_au AFTER UPDATE ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', new.id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_settings_ad AFTER DELETE ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', old.id, 'delete');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_notes_ai AFTER INSERT ON event_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.event_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_notes_ad AFTER DELETE ON event_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.event_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_tasks_ai AFTER INSERT ON event_tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.event_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_event_tasks_ad AFTER DELETE ON event_tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.event_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_project_notes_ai AFTER INSERT ON project_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.project_id, 'update');
+END;
+""")
+    op.execute("""
+CREATE TRIGGER IF NOT EXISTS changes_project_notes_ad AFTER DELETE ON project_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', old.project_id, 'update');
+END;
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_notes_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_events_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_projects_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_conversations_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_au;")
+    op.execute("DROP TRIGGER IF EXISTS changes_settings_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_notes_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_tasks_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_event_tasks_ad;")
+    op.execute("DROP TRIGGER IF EXISTS changes_project_notes_ai;")
+    op.execute("DROP TRIGGER IF EXISTS changes_project_notes_ad;")
+    op.execute("DROP INDEX IF EXISTS idx_changes_changed_at;")
+    op.execute("DROP TABLE IF EXISTS changes;")
@@ -0,0 +1,313 @@
+"""
+Approximate nearest-neighbour search (IVF)
+
+`IVFVectorStore` partitions the memory-mapped vector store into `nlist`
+clusters with spherical k-means. A query scores only the rows of the
+`nprobe` clusters whose centroids are closest to it, then re-ranks the
+best candidates exactly like the flat store. Recall and latency are traded
+with `nprobe` (more clusters probed: higher recall, slower) and `rerank`.
+
+Files added to the sidecar directory:
+    centroids.npy  nlist x dimensions float32, unit length
+    lists.bin      int32 cluster per slot, -1 when unassigned
+
+In memory, the slots are also grouped by list (CSR: slots sorted by list
+plus per-list offsets), so a query gathers only its probed lists. Rows
+assigned since the grouping was built sit in a small pending array that
+each query filters; it is folded in once it outgrows `PENDING_FRACTION`
+of the store.
+
+New rows are assigned to their nearest centroid as the embedding pipeline
+writes them. Centroids are trained once the store holds `min_train_size`
+rows and retrained at load time when it has grown `retrain_growth` times
+since, or on demand via `train()`. Until then search is exhaustive.
+"""
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EMBEDDING_DTYPE
+from .retrieval import normalize
+from .vector_store import MmapVectorStore
+
+logger = logging.getLogger(__name__)
+
+TRAIN_SAMPLES_PER_LIST = 64
+ASSIGN_BLOCK = 16384
+PENDING_FRACTION = 1 / 16
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    k: int,
+    iterations: int = 10,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    k-means on the unit sphere (cosine similarity).
+
+    Seeds with k-means++ and returns k unit-length centroids. Empty
+    clusters are re-seeded from the points worst served by their centroid.
+    """
+    vectors = normalize(np.array(vectors, dtype=EMBEDDING_DTYPE, ndmin=2))
+    n = len(vectors)
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    centroids = _kmeans_pp(vectors, k, rng)
+    for _ in range(iterations):
+        assignments, similarity = assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=k)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts[present])[:-1]])
+        sums = np.add.reduceat(vectors[order], starts, axis=0)
+        centroids[present] = normalize(sums)
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            worst = np.argsort(similarity)[:len(empty)]
+            centroids[empty] = vectors[worst]
+    return centroids
+
+
+def _kmeans_pp(vectors: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding: each seed is drawn proportionally to its distance from the others"""
+    centroids = np.empty((k, vectors.shape[1]), dtype=vectors.dtype)
+    centroids[0] = vectors[rng.integers(len(vectors))]
+    distance = np.maximum(1 - vectors @ centroids[0], 0)
+    for i in range(1, k):
+        total = distance.sum()
+        pick = rng.choice(len(vectors), p=distance / total) if total > 0 else rng.integers(len(vectors))
+        centroids[i] = vectors[pick]
+        np.minimum(distance, np.maximum(1 - vectors @ centroids[i], 0), out=distance)
+    return centroids
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest centroid (and its similarity) per row, in blocks"""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    similarity = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK):
+        scores = vectors[start:start + ASSIGN_BLOCK] @ centroids.T
+        assignments[start:start + ASSIGN_BLOCK] = scores.argmax(axis=1)
+        similarity[start:start + ASSIGN_BLOCK] = scores.max(axis=1)
+    return assignments, similarity
+
+
+class IVFVectorStore(MmapVectorStore):
+    """
+    MmapVectorStore with an inverted-file (IVF) index.
+
+    Args:
+        nlist: Clusters; 0 picks ~sqrt(rows) at training time.
+        nprobe: Clusters scanned per query.
+        min_train_size: Rows needed before clustering is worth it.
+        retrain_growth: Retrain at load once the store has grown this much.
+        (other arguments as MmapVectorStore)
+    """
+
+    def __init__(
+        self,
+        *args,
+        nlist: int = 0,
+        nprobe: int = 16,
+        min_train_size: int = 10000,
+        retrain_growth: float = 4.0,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._lists: Optional[np.memmap] = None
+        self._list_slots: Optional[np.ndarray] = None  # CSR: slots grouped by list
+        self._list_offsets: Optional[np.ndarray] = None  # nlist + 1 bounds into _list_slots
+        self._pending: List[int] = []  # slots assigned since the grouping was built
+
+    # Files
+
+    def _shapes(self, capacity: int):
+        shapes = super()._shapes(capacity)
+        shapes["lists.bin"] = (np.dtype(np.int32), (capacity,))
+        return shapes
+
+    def _map(self, capacity: int, mode: str):
+        maps = super()._map(capacity, mode)
+        self._lists = maps["lists.bin"]
+        return maps
+
+    def _memmaps(self) -> List[np.memmap]:
+        return super()._memmaps() + [self._lists]
+
+    def _meta(self) -> Dict:
+        meta = super()._meta()
+        meta["nlist"] = 0 if self._centroids is None else len(self._centroids)
+        meta["trained_size"] = self._trained_size
+        return meta
+
+    def _clear_slots(self, start: int):
+        super()._clear_slots(start)
+        self._lists[start:] = -1
+
+    def _create(self, capacity: int):
+        self._centroids = None
+        self._trained_size = 0
+        self._drop_postings()
+        super()._create(capacity)
+
+    def _opened(self, meta: Dict):
+        self._centroids = None
+        self._trained_size = 0
+        self._drop_postings()
+        if meta.get("nlist"):
+            try:
+                centroids = np.load(self._file("centroids.npy"))
+            except (OSError, ValueError):
+                centroids = None
+            if centroids is not None and centroids.shape == (meta["nlist"], self.dimensions):
+                self._centroids = centroids.astype(EMBEDDING_DTYPE)
+                self._trained_size = meta.get("trained_size", 0)
+        if self._centroids is None:
+            self._lists[:] = -1
+
+    # Training
+
+    def _dequantized(self, slots: np.ndarray) -> np.ndarray:
+        rows = np.asarray(self._vectors[slots], dtype=EMBEDDING_DTYPE)
+        return rows * np.asarray(self._scales[slots])[:, None]
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10) -> int:
+        """
+        (Re)clusters the stored rows and assigns every row to its centroid.
+
+        k-means runs on a sample without holding the lock; only the final
+        assignment pass blocks writers. Returns the number of clusters.
+        """
+        with self._lock:
+            live = np.flatnonzero(np.asarray(self._types[:self._size]) >= 0)
+            if not len(live):
+                return 0
+            nlist = nlist or self.nlist or max(int(math.sqrt(len(live))), 1)
+            rng = np.random.default_rng(len(live))
+            sample_size = min(len(live), nlist * TRAIN_SAMPLES_PER_LIST)
+            sample = self._dequantized(np.sort(rng.choice(live, sample_size, replace=False)))
+
+        centroids = spherical_kmeans(sample, nlist, iterations)
+
+        with self._lock:
+            for start in range(0, self._size, ASSIGN_BLOCK):
+                stop = min(start + ASSIGN_BLOCK, self._size)
+                self._lists[start:stop] = assign(self._dequantized(np.arange(start, stop)), centroids)[0]
+            self._clear_free_lists()
+            self._centroids = centroids
+            self._drop_postings()
+            self._trained_size = len(self)
+            tmp = self._file("centroids.tmp.npy")
+            np.save(tmp, centroids)
+            os.replace(tmp, self._file("centroids.npy"))
+            self._dirty = True
+            self.flush()
+        logger.info("Clustered %d vectors into %d lists", self._trained_size, len(centroids))
+        return len(centroids)
+
+    # Posting lists
+
+    def _drop_postings(self):
+        self._list_slots = None
+        self._list_offsets = None
+        self._pending = []
+
+    def _build_postings(self):
+        """Groups assigned slots by list (stale entries are filtered at query time)"""
+        lists = np.asarray(self._lists[:self._size])
+        assigned = np.flatnonzero(lists >= 0)
+        self._list_slots = assigned[np.argsort(lists[assigned], kind="stable")]
+        counts = np.bincount(lists[assigned], minlength=len(self._centroids))
+        self._list_offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._pending = []
+
+    def _probed_slots(self, probe: np.ndarray) -> np.ndarray:
+        """Live-list slots of the probed clusters (may include freed slots)"""
+        if self._list_slots is None or len(self._pending) > max(len(self._list_slots) * PENDING_FRACTION, 1024):
+            self._build_postings()
+        # One extra False entry so unassigned slots (list -1) index past the clusters
+        probed = np.zeros(len(self._centroids) + 1, dtype=bool)
+        probed[probe] = True
+        slots = np.concatenate(
+            [self._list_slots[self._list_offsets[c]:self._list_offsets[c + 1]] for c in probe]
+            + [np.asarray(self._pending, dtype=np.int64)]
+        )
+        # Slots reused since the grouping was built may have moved to another list
+        slots = slots[probed[np.asarray(self._lists[slots])]]
+        return np.unique(slots) if self._pending else slots
+
+    def _clear_free_lists(self):
+        free = np.flatnonzero(np.asarray(self._types[:self._size]) < 0)
+        self._lists[free] = -1
+
+    def load(self, conn, model: Optional[str] = None, batch_size: int = 10000) -> int:
+        count = super().load(conn, model, batch_size)
+        untrained = self._centroids is None
+        if count >= self.min_train_size and (
+            untrained or count > self._trained_size * self.retrain_growth
+        ):
+            self.train()
+        return count
+
+    # Writes and search
+
+    def add(
+        self,
+        ids: Sequence[str],
+        source_types: Sequence[str],
+        source_ids: Sequence[str],
+        vectors: np.ndarray,
+    ):
+        if not len(ids):
+            return
+        with self._lock:
+            super().add(ids, source_types, source_ids, vectors)
+            if self._centroids is not None:
+                slots = np.asarray([self._slots[row_id.encode("utf-8")] for row_id in ids])
+                rows = normalize(np.array(vectors, dtype=EMBEDDING_DTYPE, ndmin=2))
+                self._lists[slots] = assign(rows, self._centroids)[0]
+                if self._list_slots is not None:
+                    self._pending.extend(slots.tolist())
+
+    def _candidates(self, q: np.ndarray, k: int, codes: Optional[np.ndarray]) -> np.ndarray:
+        if self._centroids is None:
+            return super()._candidates(q, k, codes)
+        nprobe = min(self.nprobe, len(self._centroids))
+        centroid_scores = self._centroids @ q
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        slots = self._probed_slots(probe)
+
+        types = np.asarray(self._types[slots])
+        slots = slots[types >= 0 if codes is None else np.isin(types, codes)]
+        if not len(slots):
+            return slots
+        scores = np.asarray(self._vectors[slots], dtype=EMBEDDING_DTYPE) @ q
+        scores *= np.asarray(self._scales[slots])
+        if len(slots) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            slots, scores = slots[top], scores[top]
+        return slots[np.argsort(-scores, kind="stable")]
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        with self._lock:
+            stats["index"] = "ivf"
+            stats["nlist"] = 0 if self._centroids is None else len(self._centroids)
+            stats["nprobe"] = self.nprobe
+            stats["trained_size"] = self._trained_size
+            if self._centroids is not None and self._size:
+                lists = np.asarray(self._lists[:self._size])
+                sizes = np.bincount(lists[lists >= 0], minlength=len(self._centroids))
+                stats["list_sizes"] = {"min": int(sizes.min()), "max": int(sizes.max()), "mean": float(sizes.mean())}
+        return stats
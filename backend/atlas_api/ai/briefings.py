@@ -0,0 +1,208 @@
+"""
+Daily briefings generated ahead of time
+
+`BriefingScheduler` keeps a stored briefing for today and the next
+`days_ahead` days in `daily_briefings`, built from the same overview as the
+dashboard. The daily briefing endpoint then reads it instead of calling a
+model when the app opens.
+
+Triggers mark a briefing stale (`stale_since`) when a task due by that day
+or an event on that day changes. Once changes have been quiet for
+`debounce` seconds, the scheduler rebuilds the overview. It calls the model
+again only if the overview actually differs from the one the briefing was
+written from. Recent notes are as of generation time; note edits do not
+make a briefing stale.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from .orchestrator import AIOrchestrator, get_orchestrator
+from .prompts import PROMPT_VERSIONS
+from ..database import get_db_connection
+from ..services.background import BackgroundLoop
+from ..services.dashboard import today_overview
+
+logger = logging.getLogger(__name__)
+
+KEEP_DAYS = 30
+
+
+def overview_hash(overview: Dict) -> str:
+    return hashlib.sha256(json.dumps(overview, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def get_stored_briefing(conn: sqlite3.Connection, day: date) -> Optional[Dict]:
+    """Stored briefing of a day, with its freshness"""
+    row = conn.execute(
+        "SELECT markdown, references_json, model, generated_at, stale_since FROM daily_briefings WHERE date = ?",
+        (day.isoformat(),)
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        "markdown": row[0],
+        "references": json.loads(row[1]),
+        "model": row[2],
+        "generated_at": row[3],
+        "stale": row[4] is not None,
+    }
+
+
+class BriefingScheduler(BackgroundLoop):
+    """
+    Args:
+        days_ahead: Days after today to keep a briefing ready for.
+        interval: Seconds between checks when not woken.
+        debounce: Quiet seconds after the last relevant change before regenerating.
+        orchestrator_factory: Returns the orchestrator writing briefings.
+        connection_factory: Returns a new sqlite3 connection.
+    """
+
+    def __init__(
+        self,
+        days_ahead: int = 1,
+        interval: float = 300.0,
+        debounce: float = 60.0,
+        orchestrator_factory: Callable[[], AIOrchestrator] = get_orchestrator,
+        connection_factory: Callable[[], sqlite3.Connection] = get_db_connection,
+    ):
+        super().__init__()
+        self.days_ahead = days_ahead
+        self.interval = interval
+        self.debounce = debounce
+        self.orchestrator_factory = orchestrator_factory
+        self.connection_factory = connection_factory
+        self.generated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self._generating: Dict[date, asyncio.Task] = {}
+
+    round_failed_message = "Briefing scheduler round failed"
+
+    # Generation
+
+    async def run_once(self, now: Optional[datetime] = None) -> List[str]:
+        """Generates missing briefings and refreshes settled stale ones; returns the dates refreshed"""
+        now = now or datetime.now()
+        days = [now.date() + timedelta(days=i) for i in range(self.days_ahead + 1)]
+        settled = (now - timedelta(seconds=self.debounce)).isoformat()
+        conn = self.connection_factory()
+        try:
+            rows = {
+                row[0]: row[1] for row in conn.execute(
+                    f"SELECT date, stale_since FROM daily_briefings WHERE date IN ({', '.join('?' for _ in days)})",
+                    [d.isoformat() for d in days]
+                )
+            }
+            with conn:
+                conn.execute(
+                    "DELETE FROM daily_briefings WHERE date < ?",
+                    ((now.date() - timedelta(days=KEEP_DAYS)).isoformat(),)
+                )
+        finally:
+            conn.close()
+
+        refreshed = []
+        for day in days:
+            key = day.isoformat()
+            if key in rows and (rows[key] is None or rows[key] > settled):
+                continue
+            try:
+                await self.generate(day)
+                refreshed.append(key)
+            except Exception:
+                self.failed += 1
+                logger.exception("Generating the briefing for %s failed", key)
+        return refreshed
+
+    async def generate(self, day: date) -> Dict:
+        """(Re)builds a day's briefing; concurrent calls for the same day share one generation"""
+        task = self._generating.get(day)
+        if task is None:
+            task = asyncio.ensure_future(self._generate(day))
+            self._generating[day] = task
+            task.add_done_callback(lambda _: self._generating.pop(day, None))
+        return await asyncio.shield(task)
+
+    async def _generate(self, day: date) -> Dict:
+        orchestrator = self.orchestrator_factory()
+        model = orchestrator.model("daily_briefing")
+        version = PROMPT_VERSIONS["daily_briefing"]
+        started = datetime.now().isoformat()
+        conn = self.connection_factory()
+        try:
+            # Reuse the stored briefing when the overview it was written from is unchanged
+            overview = today_overview(conn, day)
+            digest = overview_hash(overview)
+            row = conn.execute(
+                "SELECT overview_hash, model, template_version FROM daily_briefings WHERE date = ?",
+                (day.isoformat(),)
+            ).fetchone()
+            if row is not None and tuple(row) == (digest, model, version):
+                # Changes that were not visible in the overview (e.g. descriptions)
+                with conn:
+                    conn.execute(
+                        "UPDATE daily_briefings SET stale_since = NULL WHERE date = ? AND stale_since <= ?",
+                        (day.isoformat(), started)
+                    )
+                self.unchanged += 1
+                return get_stored_briefing(conn, day)
+        finally:
+            conn.close()
+
+        briefing = await orchestrator.generate_daily_briefing(overview)
+
+        conn = self.connection_factory()
+        try:
+            with conn:
+                # A change made while the model was writing keeps the briefing stale
+                conn.execute(
+                    """
+                    INSERT INTO daily_briefings
+                    (date, markdown, references_json, model, template_version, overview_hash, generated_at, stale_since)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, NULL)
+                    ON CONFLICT(date) DO UPDATE SET
+                        markdown = excluded.markdown,
+                        references_json = excluded.references_json,
+                        model = excluded.model,
+                        template_version = excluded.template_version,
+                        overview_hash = excluded.overview_hash,
+                        generated_at = excluded.generated_at,
+                        stale_since = CASE WHEN daily_briefings.stale_since > ? THEN daily_briefings.stale_since END
+                    """,
+                    (day.isoformat(), briefing["markdown"], json.dumps(briefing["references"]), model, version,
+                     digest, datetime.now().isoformat(), started)
+                )
+            self.generated += 1
+            return get_stored_briefing(conn, day)
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        return {
+            "generated": self.generated,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "running": self._task is not None,
+        }
+
+
+_scheduler: Optional[BriefingScheduler] = None
+
+
+def get_briefing_scheduler() -> BriefingScheduler:
+    global _scheduler
+    if _scheduler is None:
+        from ..config import settings
+
+        _scheduler = BriefingScheduler(
+            days_ahead=settings.briefing_days_ahead,
+            interval=settings.briefing_refresh_seconds,
+            debounce=settings.briefing_debounce_seconds,
+        )
+    return _scheduler
@@ -0,0 +1,155 @@
+"""
+Markdown-aware chunking for embeddings
+
+Notes are split along their heading structure first, then into paragraph,
+list and code blocks, which are packed into chunks of up to `max_chars`.
+Each chunk carries its heading path so it embeds with its context, and a
+content hash so unchanged chunks can be skipped on re-index.
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+DEFAULT_MAX_CHARS = 1500
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+
+
+@dataclass
+class Chunk:
+    """A piece of a document, ready to embed"""
+    index: int
+    text: str            # What gets embedded (context prefix + body)
+    heading: Optional[str]
+
+    @property
+    def content_hash(self) -> str:
+        return content_hash(self.text)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _blocks(lines: List[str]) -> Iterator[str]:
+    """Splits a section body into paragraphs, lists and fenced code blocks"""
+    block: List[str] = []
+    in_fence = False
+    in_list = False
+    for line in lines:
+        if _FENCE.match(line):
+            if in_fence:
+                block.append(line)
+                yield "\n".join(block)
+                block, in_fence = [], False
+                continue
+            if block:
+                yield "\n".join(block)
+            block, in_fence, in_list = [line], True, False
+            continue
+        if in_fence:
+            block.append(line)
+            continue
+        if not line.strip():
+            if block and not in_list:
+                yield "\n".join(block)
+                block = []
+            continue
+        is_item = bool(_LIST_ITEM.match(line))
+        if block and is_item != in_list and not (in_list and line.startswith((" ", "\t"))):
+            # Lists stay together; a list starting or ending closes the block
+            yield "\n".join(block)
+            block = []
+        in_list = is_item or (in_list and line.startswith((" ", "\t")))
+        block.append(line)
+    if block:
+        yield "\n".join(block)
+
+
+def _split_long(block: str, max_chars: int) -> Iterator[str]:
+    """Splits an oversized block on line, then word boundaries"""
+    if len(block) <= max_chars:
+        yield block
+        return
+    current = ""
+    for piece in re.split(r"(?<=\n)|(?<=[.!?] )", block):
+        while len(piece) > max_chars:
+            cut = piece.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                yield current
+                current = ""
+            yield piece[:cut]
+            piece = piece[cut:].lstrip()
+        if len(current) + len(piece) > max_chars and current:
+            yield current
+            current = ""
+        current += piece
+    if current.strip():
+        yield current
+
+
+def _sections(text: str) -> Iterator[tuple]:
+    """Yields (heading path, body lines) per markdown section"""
+    path: List[tuple] = []
+    body: List[str] = []
+    in_fence = False
+    for line in text.splitlines():
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match:
+            if body:
+                yield " > ".join(title for _, title in path), body
+            level = len(match.group(1))
+            path = [(lvl, title) for lvl, title in path if lvl < level] + [(level, match.group(2))]
+            body = []
+        else:
+            body.append(line)
+    if body:
+        yield " > ".join(title for _, title in path), body
+
+
+def chunk_markdown(
+    text: str,
+    title: Optional[str] = None,
+    max_chars: int = DEFAULT_MAX_CHARS,
+) -> List[Chunk]:
+    """
+    Chunks a markdown document.
+
+    Blocks are packed greedily into chunks no larger than `max_chars` and
+    never straddle a heading, so editing one section only changes the
+    chunks of that section.
+    """
+    chunks: List[Chunk] = []
+
+    def emit(heading: str, parts: List[str]):
+        body = "\n\n".join(parts).strip()
+        if not body:
+            return
+        prefix = " > ".join(p for p in (title, heading) if p)
+        chunks.append(Chunk(
+            index=len(chunks),
+            text=f"{prefix}\n\n{body}" if prefix else body,
+            heading=heading or None,
+        ))
+
+    for heading, lines in _sections(text):
+        parts: List[str] = []
+        size = 0
+        for block in _blocks(lines):
+            for piece in _split_long(block, max_chars):
+                if parts and size + len(piece) + 2 > max_chars:
+                    emit(heading, parts)
+                    parts, size = [], 0
+                parts.append(piece)
+                size += len(piece) + 2
+        emit(heading, parts)
+
+    if not chunks and title:
+        chunks.append(Chunk(index=0, text=title, heading=None))
+    return chunks
@@ -0,0 +1,384 @@
+"""
+Async AI client
+
+One shared HTTP connection pool to an OpenAI-compatible API
+(`/chat/completions`, `/embeddings`), with per-model limits so that a burst
+of requests queues locally instead of piling up 429s upstream:
+
+- a concurrency limit (requests in flight per model);
+- a tokens-per-minute budget, charged with an estimate up front and
+  corrected with the reported usage afterwards.
+
+429, 5xx and transport errors are retried with jittered exponential
+backoff, honoring Retry-After. Chat replies can be streamed as tokens
+arrive; embedding calls made close together are coalesced into one request
+per model. benchmarks/mock_ai_server.py implements the same API offline.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from .tokens import estimate_tokens
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class AIClientError(Exception):
+    """The API rejected a request or kept failing after retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """
+    Tokens-per-minute budget.
+
+    Waiters are served in arrival order, so a large request is not starved
+    by a stream of small ones. A request larger than the whole budget waits
+    for a full bucket and then drives it negative.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: int) -> float:
+        """Takes `tokens` from the budget; returns the seconds spent waiting"""
+        needed = min(float(tokens), self.capacity)
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < needed:
+                delay = (needed - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= tokens
+        return waited
+
+    def adjust(self, tokens: int):
+        """Charges (or refunds, if negative) the difference from an estimate"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - tokens)
+
+
+@dataclass
+class ModelStats:
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    tokens: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    queued_seconds: float = 0.0
+
+
+class ModelLimiter:
+    """Concurrency and tokens-per-minute limits of one model"""
+
+    def __init__(self, max_concurrency: int, tokens_per_minute: int = 0):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.stats = ModelStats()
+
+    async def __aenter__(self):
+        started = time.monotonic()
+        await self.semaphore.acquire()
+        self.stats.queued_seconds += time.monotonic() - started
+        self.stats.in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.stats.in_flight)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.stats.in_flight -= 1
+        self.semaphore.release()
+
+    async def reserve(self, tokens: int):
+        if self.bucket is not None:
+            self.stats.queued_seconds += await self.bucket.acquire(tokens)
+
+    def settle(self, estimated: int, actual: Optional[int]):
+        self.stats.tokens += actual if actual is not None else estimated
+        if self.bucket is not None and actual is not None:
+            self.bucket.adjust(actual - estimated)
+
+
+def _message_tokens(messages: List[Dict[str, str]]) -> int:
+    # ~4 tokens of framing per message on top of its content
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
+
+
+@dataclass
+class _EmbeddingBatch:
+    texts: List[str] = field(default_factory=list)
+    waiters: List[Tuple[int, int, asyncio.Future]] = field(default_factory=list)  # (start, end, future)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class AIClient:
+    """
+    Args:
+        base_url: Root of the OpenAI-compatible API (e.g. https://api.openai.com/v1).
+        api_key: Bearer token; None for servers that need none.
+        max_concurrency: Requests in flight per model.
+        tokens_per_minute: Token budget per model; 0 disables it.
+        model_limits: Per-model overrides, {model: {"max_concurrency": .., "tokens_per_minute": ..}}.
+        max_retries: Retries of a failed request before giving up.
+        embedding_batch_window: Seconds embedding calls wait for others to share a request.
+        embedding_batch_size: Most inputs sent in one embeddings request.
+        client: HTTP client to use instead of a new pool (tests, mock transports).
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://api.openai.com/v1",
+        api_key: Optional[str] = None,
+        max_concurrency: int = 8,
+        tokens_per_minute: int = 0,
+        model_limits: Optional[Dict[str, Dict[str, int]]] = None,
+        max_retries: int = 4,
+        timeout: float = 60.0,
+        embedding_batch_window: float = 0.01,
+        embedding_batch_size: int = 512,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.model_limits = model_limits or {}
+        self.max_retries = max_retries
+        self.embedding_batch_window = embedding_batch_window
+        self.embedding_batch_size = embedding_batch_size
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = client or httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+        )
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._batches: Dict[str, _EmbeddingBatch] = {}
+        self._batch_tasks: Set[asyncio.Task] = set()
+
+    def limiter(self, model: str) -> ModelLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limits = self.model_limits.get(model, {})
+            limiter = ModelLimiter(
+                limits.get("max_concurrency", self.max_concurrency),
+                limits.get("tokens_per_minute", self.tokens_per_minute),
+            )
+            self._limiters[model] = limiter
+        return limiter
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(60.0, float(retry_after)) * random.uniform(1.0, 1.2)
+                except ValueError:
+                    pass
+        return min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    async def _send(self, path: str, payload: Dict, limiter: ModelLimiter, stream: bool = False) -> httpx.Response:
+        """POSTs with retries; a streamed response must be closed by the caller"""
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                request = self._client.build_request("POST", path, json=payload)
+                response = await self._client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    limiter.stats.errors += 1
+                    raise AIClientError(f"{path}: {e!r}") from e
+            else:
+                if response.status_code < 400:
+                    return response
+                if stream:
+                    await response.aread()
+                    await response.aclose()
+                if response.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    limiter.stats.errors += 1
+                    raise AIClientError(f"{path}: HTTP {response.status_code} {response.text[:200]}", response.status_code)
+            limiter.stats.retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+        raise RuntimeError("unreachable")
+
+    # ------------------------------------------------------------------
+    # Chat
+    # ------------------------------------------------------------------
+
+    async def chat(self, messages: List[Dict[str, str]], model: str, temperature: float = 0.3, **params) -> str:
+        """Complete reply text of a chat completion"""
+        limiter = self.limiter(model)
+        estimated = _message_tokens(messages)
+        await limiter.reserve(estimated)
+        async with limiter:
+            limiter.stats.requests += 1
+            payload = {"model": model, "messages": messages, "temperature": temperature, **params}
+            response = await self._send("/chat/completions", payload, limiter)
+        data = response.json()
+        limiter.settle(estimated, (data.get("usage") or {}).get("total_tokens"))
+        return data["choices"][0]["message"].get("content") or ""
+
+    async def stream_chat(
+        self, messages: List[Dict[str, str]], model: str, temperature: float = 0.3, **params
+    ) -> AsyncIterator[str]:
+        """
+        Reply text deltas as the server produces them.
+
+        Failures before the first delta are retried; once text has been
+        yielded, an interrupted stream raises AIClientError.
+        """
+        limiter = self.limiter(model)
+        estimated = _message_tokens(messages)
+        await limiter.reserve(estimated)
+        produced = []
+        async with limiter:
+            limiter.stats.requests += 1
+            payload = {"model": model, "messages": messages, "temperature": temperature, "stream": True, **params}
+            response = await self._send("/chat/completions", payload, limiter, stream=True)
+            try:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        produced.append(delta)
+                        yield delta
+            except httpx.TransportError as e:
+                limiter.stats.errors += 1
+                raise AIClientError(f"stream interrupted: {e!r}") from e
+            finally:
+                await response.aclose()
+        limiter.settle(estimated, estimated + estimate_tokens("".join(produced)))
+
+    # ------------------------------------------------------------------
+    # Embeddings
+    # ------------------------------------------------------------------
+
+    async def _embed_request(self, texts: List[str], model: str) -> List[List[float]]:
+        limiter = self.limiter(model)
+        estimated = sum(estimate_tokens(t) for t in texts)
+        await limiter.reserve(estimated)
+        async with limiter:
+            limiter.stats.requests += 1
+            response = await self._send("/embeddings", {"model": model, "input": texts}, limiter)
+        data = response.json()
+        limiter.settle(estimated, (data.get("usage") or {}).get("total_tokens"))
+        return [item["embedding"] for item in sorted(data["data"], key=lambda d: d["index"])]
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """
+        Embeddings of `texts`, in order.
+
+        Calls arriving within `embedding_batch_window` of each other share
+        requests of up to `embedding_batch_size` inputs.
+        """
+        if not texts:
+            return []
+        if len(texts) >= self.embedding_batch_size:
+            vectors: List[List[float]] = []
+            for i in range(0, len(texts), self.embedding_batch_size):
+                vectors.extend(await self._embed_request(texts[i:i + self.embedding_batch_size], model))
+            return vectors
+
+        batch = self._batches.get(model)
+        if batch is not None and len(batch.texts) + len(texts) > self.embedding_batch_size:
+            self._flush(model)
+            batch = None
+        if batch is None:
+            batch = self._batches[model] = _EmbeddingBatch()
+            batch.timer = asyncio.get_running_loop().call_later(self.embedding_batch_window, self._flush, model)
+        future = asyncio.get_running_loop().create_future()
+        batch.waiters.append((len(batch.texts), len(batch.texts) + len(texts), future))
+        batch.texts.extend(texts)
+        if len(batch.texts) >= self.embedding_batch_size:
+            self._flush(model)
+        return await future
+
+    def _flush(self, model: str):
+        batch = self._batches.pop(model, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch, model))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: _EmbeddingBatch, model: str):
+        try:
+            vectors = await self._embed_request(batch.texts, model)
+        except Exception as e:
+            for _, _, future in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for start, end, future in batch.waiters:
+            if not future.done():
+                future.set_result(vectors[start:end])
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            model: {
+                **asdict(limiter.stats),
+                "max_concurrency": limiter.max_concurrency,
+                "tokens_per_minute": int(limiter.bucket.capacity) if limiter.bucket else 0,
+                "tokens_available": int(limiter.bucket.tokens) if limiter.bucket else None,
+            }
+            for model, limiter in self._limiters.items()
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_client: Optional[AIClient] = None
+
+
+def get_ai_client() -> AIClient:
+    """Process-wide client configured from settings"""
+    global _client
+    if _client is None:
+        _client = AIClient(
+            base_url=settings.ai_api_base_url,
+            api_key=settings.openai_api_key,
+            max_concurrency=settings.ai_max_concurrency,
+            tokens_per_minute=settings.ai_tokens_per_minute,
+            model_limits=settings.ai_model_limits,
+            max_retries=settings.ai_max_retries,
+            timeout=settings.ai_request_timeout_seconds,
+            embedding_batch_window=settings.ai_embedding_batch_window_ms / 1000,
+        )
+    return _client
+
+
+async def close_ai_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
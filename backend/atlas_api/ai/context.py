@@ -0,0 +1,277 @@
+"""
+Token-budgeted chat context
+
+Each chat turn sends the model, in this order:
+
+1. the system prompt, plus the conversation's rolling summary if it has one;
+2. the messages since the summary, oldest first;
+3. retrieved excerpts (notes, tasks), placed just before the newest user message.
+
+The stable parts come first. Consecutive turns therefore share a long
+identical prefix, which providers with prompt caching serve faster and
+cheaper. The rendered prefix is also cached here, per conversation. Token
+counts are stored per message in chat_messages.token_count, so history is
+never re-tokenized: assembly reads only the newest rows that fit the budget.
+
+When the messages since the summary outgrow their share of the budget,
+`refresh_summary` folds the oldest of them into the summary. The work per
+turn therefore stays bounded however long a conversation gets.
+"""
+import logging
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .prompts import CONTEXT_PROMPT, SYSTEM_PROMPT
+from .tokens import CHARS_PER_TOKEN, estimate_tokens
+from ..config import settings
+from ..database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD = 4  # role and separators added around each message
+EXCERPT_CHARS = 1200
+REFERENCE_KEYS = {"note": "notes", "task": "tasks", "event": "events"}
+
+# SQL expression matching estimate_tokens() for rows stored before token_count existed
+_TOKENS_SQL = "COALESCE(token_count, (LENGTH(content) + 3) / 4)"
+
+
+@dataclass
+class ChatContext:
+    messages: List[Dict[str, str]]
+    references: Dict[str, List[str]] = field(default_factory=dict)
+    tokens: int = 0
+    history_messages: int = 0
+    excerpts: int = 0
+    truncated: bool = False      # Messages since the summary did not all fit
+    needs_summary: bool = False  # The summary should absorb older turns
+
+
+def _excerpt(chunk: Dict) -> str:
+    text = " ".join(chunk["content"].split())
+    if len(text) > EXCERPT_CHARS:
+        text = text[:EXCERPT_CHARS].rsplit(" ", 1)[0] + "…"
+    return f"[{chunk['source_type'].capitalize()} {chunk['source_id']}] {text}"
+
+
+def fold_turns(summary: Optional[str], turns: List[Dict[str, str]], max_words: int) -> str:
+    """Extractive rolling summary (first sentence per turn), used when no model is configured"""
+    lines = [summary] if summary else []
+    for turn in turns:
+        sentence = turn["content"].strip().split("\n", 1)[0].split(". ", 1)[0]
+        lines.append(f"{turn['role'].capitalize()}: {sentence}")
+    words = " ".join(lines).split()
+    return " ".join(words[-max_words:])
+
+
+class ContextAssembler:
+    """
+    Args:
+        budget_tokens: Prompt tokens per turn (system prompt, summary, history, excerpts).
+        retrieval_tokens: Most of the budget given to retrieved excerpts.
+        summary_tokens: Size cap of the rolling summary.
+        prefix_cache_size: Conversations whose rendered prefix is kept.
+        connection_factory: Connections used by refresh_summary.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int = 6000,
+        retrieval_tokens: int = 1500,
+        summary_tokens: int = 400,
+        prefix_cache_size: int = 256,
+        connection_factory: Callable[[], sqlite3.Connection] = get_db_connection,
+    ):
+        self.budget_tokens = budget_tokens
+        self.retrieval_tokens = retrieval_tokens
+        self.summary_tokens = summary_tokens
+        self.prefix_cache_size = prefix_cache_size
+        self.connection_factory = connection_factory
+        self._prefixes: "OrderedDict[str, Tuple[Optional[str], Dict[str, str], int, str]]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+
+    @property
+    def history_tokens(self) -> int:
+        """Share of the budget the messages since the summary may grow to"""
+        return self.budget_tokens - self.retrieval_tokens - self.summary_tokens - estimate_tokens(SYSTEM_PROMPT)
+
+    def _prefix(self, conn: sqlite3.Connection, conversation_id: str) -> Tuple[Dict[str, str], int, str]:
+        """System message (with the summary), its tokens, and the timestamp the summary covers"""
+        row = conn.execute(
+            "SELECT summary, covers_until, updated_at FROM conversation_summaries WHERE conversation_id = ?",
+            (conversation_id,)
+        ).fetchone()
+        version = row[2] if row else None
+        cached = self._prefixes.get(conversation_id)
+        if cached is not None and cached[0] == version:
+            self._prefixes.move_to_end(conversation_id)
+            self.prefix_hits += 1
+            return cached[1:]
+
+        self.prefix_misses += 1
+        content = SYSTEM_PROMPT
+        if row:
+            content += f"\nSummary of the earlier conversation:\n{row[0]}\n"
+        message = {"role": "system", "content": content}
+        entry = (version, message, estimate_tokens(content) + MESSAGE_OVERHEAD, row[1] if row else "")
+        self._prefixes[conversation_id] = entry
+        if len(self._prefixes) > self.prefix_cache_size:
+            self._prefixes.popitem(last=False)
+        return entry[1:]
+
+    def select_excerpts(self, chunks: Iterable[Dict], budget: int) -> Tuple[List[str], Dict[str, List[str]], int]:
+        """Best-scoring excerpts, one per source, that fit `budget` tokens"""
+        excerpts: List[str] = []
+        references: Dict[str, List[str]] = {}
+        used = estimate_tokens(CONTEXT_PROMPT.format(excerpts="")) + MESSAGE_OVERHEAD
+        seen = set()
+        for chunk in sorted(chunks, key=lambda c: c.get("score", 0.0), reverse=True):
+            source = (chunk["source_type"], chunk["source_id"])
+            if source in seen:
+                continue
+            text = _excerpt(chunk)
+            cost = estimate_tokens(text) + 1
+            if used + cost > budget:
+                continue    # A shorter excerpt further down may still fit
+            seen.add(source)
+            excerpts.append(text)
+            references.setdefault(REFERENCE_KEYS.get(chunk["source_type"], chunk["source_type"]), []).append(
+                chunk["source_id"]
+            )
+            used += cost
+        return excerpts, references, used if excerpts else 0
+
+    def assemble(self, conn: sqlite3.Connection, conversation_id: str, retrieved: Iterable[Dict] = ()) -> ChatContext:
+        """Messages for the next assistant turn (the user's message must already be stored)"""
+        prefix, prefix_tokens, covers_until = self._prefix(conn, conversation_id)
+        excerpts, references, excerpt_tokens = self.select_excerpts(retrieved, self.retrieval_tokens)
+        history_budget = self.budget_tokens - prefix_tokens - excerpt_tokens
+
+        # Newest first; the cursor stops reading once the budget is spent
+        cursor = conn.execute(
+            f"""
+            SELECT role, content, {_TOKENS_SQL} FROM chat_messages
+            WHERE conversation_id = ? AND timestamp > ?
+            ORDER BY timestamp DESC
+            """,
+            (conversation_id, covers_until)
+        )
+        history: List[Dict[str, str]] = []
+        used = 0
+        truncated = False
+        for role, content, tokens in cursor:
+            cost = tokens + MESSAGE_OVERHEAD
+            if history and used + cost > history_budget:
+                truncated = True
+                break
+            history.append({"role": role, "content": content})
+            used += cost
+        cursor.close()
+        history.reverse()
+
+        messages = [prefix, *history]
+        if excerpts:
+            context = {"role": "system", "content": CONTEXT_PROMPT.format(excerpts="\n\n".join(excerpts))}
+            at = len(messages) - 1 if history and history[-1]["role"] == "user" else len(messages)
+            messages.insert(at, context)
+        return ChatContext(
+            messages=messages,
+            references=references,
+            tokens=prefix_tokens + excerpt_tokens + used,
+            history_messages=len(history),
+            excerpts=len(excerpts),
+            truncated=truncated,
+            needs_summary=truncated or used > self.history_tokens,
+        )
+
+    async def refresh_summary(self, conversation_id: str, orchestrator) -> bool:
+        """
+        Folds the oldest turns since the summary into it, until the rest
+        fits half of the history share. Returns whether the summary changed.
+        """
+        if conversation_id in self._refreshing:
+            return False
+        self._refreshing.add(conversation_id)
+        try:
+            conn = self.connection_factory()
+            try:
+                row = conn.execute(
+                    "SELECT summary, covers_until, message_count FROM conversation_summaries WHERE conversation_id = ?",
+                    (conversation_id,)
+                ).fetchone()
+                previous, covers_until, count = row if row else (None, "", 0)
+                rows = conn.execute(
+                    f"""
+                    SELECT role, content, {_TOKENS_SQL}, timestamp FROM chat_messages
+                    WHERE conversation_id = ? AND timestamp > ?
+                    ORDER BY timestamp ASC
+                    """,
+                    (conversation_id, covers_until)
+                ).fetchall()
+            finally:
+                conn.close()
+
+            remaining = sum(r[2] + MESSAGE_OVERHEAD for r in rows)
+            if remaining <= self.history_tokens:
+                return False
+            fold = []
+            for r in rows[:-1]:     # The newest message always stays verbatim
+                if remaining <= self.history_tokens // 2:
+                    break
+                fold.append(r)
+                remaining -= r[2] + MESSAGE_OVERHEAD
+            if not fold:
+                return False
+
+            max_words = self.summary_tokens * CHARS_PER_TOKEN // 6
+            turns = [{"role": r[0], "content": r[1]} for r in fold]
+            summary = await orchestrator.summarize_conversation(previous, turns, max_words)
+            summary = summary.strip()[:self.summary_tokens * CHARS_PER_TOKEN]
+
+            conn = self.connection_factory()
+            try:
+                with conn:
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO conversation_summaries
+                        (conversation_id, summary, token_count, covers_until, message_count, model, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (conversation_id, summary, estimate_tokens(summary), fold[-1][3], count + len(fold),
+                         orchestrator.model("conversation_summary"), datetime.now().isoformat())
+                    )
+            finally:
+                conn.close()
+            self._prefixes.pop(conversation_id, None)
+            return True
+        finally:
+            self._refreshing.discard(conversation_id)
+
+    def stats(self) -> Dict:
+        lookups = self.prefix_hits + self.prefix_misses
+        return {
+            "budget_tokens": self.budget_tokens,
+            "retrieval_tokens": self.retrieval_tokens,
+            "summary_tokens": self.summary_tokens,
+            "cached_prefixes": len(self._prefixes),
+            "prefix_hit_rate": self.prefix_hits / lookups if lookups else 0.0,
+        }
+
+
+_assembler: Optional[ContextAssembler] = None
+
+
+def get_context_assembler() -> ContextAssembler:
+    global _assembler
+    if _assembler is None:
+        _assembler = ContextAssembler(
+            settings.chat_context_tokens,
+            settings.chat_retrieval_tokens,
+            settings.chat_summary_tokens,
+        )
+    return _assembler
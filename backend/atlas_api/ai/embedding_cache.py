@@ -0,0 +1,265 @@
+"""
+Content-addressed embedding cache
+
+Provider responses are stored in `embedding_cache` keyed by (model, sha256
+of the normalized text), so a paragraph embedded once -- in a note, a task,
+a chat message or a search query -- is never sent to the provider again.
+`CachedEmbeddingProvider` wraps any EmbeddingProvider, which puts the cache
+in front of both the ingestion pipeline and query-time embedding.
+
+The table is bounded by size: once it exceeds `max_bytes`, the least
+recently used rows are evicted down to 90% of the budget. Hits are read-only:
+their LRU touches are buffered in memory and written in one batch every
+TOUCH_FLUSH_ROWS rows or TOUCH_FLUSH_SECONDS, before an eviction pass, and
+at shutdown. A crash loses at most those recency updates.
+"""
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EmbeddingProvider, from_blob, to_blob
+from .tokens import cost_usd, estimate_tokens
+from ..database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+ROW_OVERHEAD = 160      # Key, columns and index entry, roughly
+EVICT_TO = 0.9
+LOOKUP_BATCH = 500
+TOUCH_FLUSH_ROWS = 1000
+TOUCH_FLUSH_SECONDS = 30.0
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC with whitespace runs collapsed, so cosmetic edits still hit"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed LRU cache of embeddings.
+
+    Args:
+        max_bytes: Size budget across all models.
+        connection_factory: Connections to the database holding the table.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 2**20,
+        connection_factory: Callable[[], sqlite3.Connection] = get_db_connection,
+    ):
+        self.max_bytes = max_bytes
+        self.connection_factory = connection_factory
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self._touched: Dict[Tuple[str, str], List] = {}  # (model, hash) -> [last used, hits]
+        self._flushed_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.dollars_saved = 0.0
+        self.evictions = 0
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors by hash; refreshes their LRU position (buffered)"""
+        found: Dict[str, np.ndarray] = {}
+        if not hashes:
+            return found
+        unique = list(dict.fromkeys(hashes))
+        tokens = 0
+        conn = self.connection_factory()
+        try:
+            for start in range(0, len(unique), LOOKUP_BATCH):
+                batch = unique[start:start + LOOKUP_BATCH]
+                rows = conn.execute(
+                    f"SELECT text_hash, embedding, tokens FROM embedding_cache"
+                    f" WHERE model = ? AND text_hash IN ({', '.join('?' for _ in batch)})",
+                    [model, *batch]
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = from_blob(row[1])
+                    tokens += row[2]
+            now = time.time()
+            with self._lock:
+                for h in found:
+                    touch = self._touched.setdefault((model, h), [now, 0])
+                    touch[0] = now
+                    touch[1] += 1
+                due = len(self._touched) >= TOUCH_FLUSH_ROWS or (
+                    self._touched and time.monotonic() - self._flushed_at >= TOUCH_FLUSH_SECONDS
+                )
+            if due:
+                self._write_touches(conn)
+                conn.commit()
+        except sqlite3.OperationalError:
+            # The cache is an optimization; a busy database must not fail embedding
+            logger.warning("Embedding cache lookup failed", exc_info=True)
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.hits += sum(1 for h in hashes if h in found)
+            self.misses += sum(1 for h in hashes if h not in found)
+            self.tokens_saved += tokens
+            self.dollars_saved += cost_usd(model, tokens)
+        return found
+
+    def _write_touches(self, conn: sqlite3.Connection):
+        """Writes buffered hits (the caller commits)"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._flushed_at = time.monotonic()
+        if not touched:
+            return
+        try:
+            conn.executemany(
+                "UPDATE embedding_cache SET last_used_at = MAX(last_used_at, ?), hits = hits + ?"
+                " WHERE model = ? AND text_hash = ?",
+                [(used, hits, model, h) for (model, h), (used, hits) in touched.items()]
+            )
+        except sqlite3.OperationalError:
+            with self._lock:
+                for key, (used, hits) in touched.items():
+                    touch = self._touched.setdefault(key, [used, 0])
+                    touch[0] = max(touch[0], used)
+                    touch[1] += hits
+            raise
+
+    def flush(self):
+        """Writes buffered hits now (shutdown, stats)"""
+        conn = self.connection_factory()
+        try:
+            self._write_touches(conn)
+            conn.commit()
+        except sqlite3.OperationalError:
+            logger.warning("Embedding cache flush failed", exc_info=True)
+        finally:
+            conn.close()
+
+    def put_many(self, model: str, entries: Dict[str, tuple]):
+        """Stores {hash: (text, vector)} and evicts if over budget"""
+        if not entries:
+            return
+        now = time.time()
+        created = datetime.now().isoformat()
+        rows = []
+        added = 0
+        for h, (text, vector) in entries.items():
+            blob = to_blob(vector)
+            size = len(blob) + ROW_OVERHEAD
+            added += size
+            rows.append((model, h, blob, estimate_tokens(text), size, created, now))
+        conn = self.connection_factory()
+        try:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO embedding_cache
+                (model, text_hash, embedding, tokens, size, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            with self._lock:
+                if self._size is None:
+                    self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache").fetchone()[0]
+                else:
+                    self._size += added
+                over = self._size > self.max_bytes
+            if over:
+                # Evict by up-to-date recency
+                self._write_touches(conn)
+                self._evict(conn)
+            conn.commit()
+        except sqlite3.OperationalError:
+            logger.warning("Embedding cache write failed", exc_info=True)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Deletes least recently used rows down to EVICT_TO of the budget"""
+        target = int(self.max_bytes * EVICT_TO)
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache").fetchone()[0]
+        excess = total - target
+        if excess <= 0:
+            with self._lock:
+                self._size = total
+            return
+        # Oldest rows whose cumulative size covers the excess
+        cutoff = conn.execute(
+            """
+            SELECT last_used_at FROM (
+              SELECT last_used_at, SUM(size) OVER (ORDER BY last_used_at, rowid) AS running
+              FROM embedding_cache
+            ) WHERE running >= ? ORDER BY running LIMIT 1
+            """,
+            (excess,)
+        ).fetchone()
+        deleted = conn.execute("DELETE FROM embedding_cache WHERE last_used_at <= ?", (cutoff[0],)).rowcount
+        remaining = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache").fetchone()[0]
+        with self._lock:
+            self._size = remaining
+            self.evictions += deleted
+        logger.info("Evicted %d cached embeddings (%d bytes left)", deleted, remaining)
+
+    def stats(self) -> Dict:
+        self.flush()
+        conn = self.connection_factory()
+        try:
+            row = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM embedding_cache"
+            ).fetchone()
+        finally:
+            conn.close()
+        lookups = self.hits + self.misses
+        return {
+            "entries": row[0],
+            "bytes": row[1],
+            "max_bytes": self.max_bytes,
+            "lifetime_hits": row[2],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "dollars_saved": self.dollars_saved,
+            "evictions": self.evictions,
+        }
+
+
+class CachedEmbeddingProvider:
+    """EmbeddingProvider that only sends texts missing from the cache upstream"""
+
+    def __init__(self, provider: EmbeddingProvider, cache: EmbeddingCache):
+        self.provider = provider
+        self.cache = cache
+        self.model = provider.model
+        self.dimensions = provider.dimensions
+        self.max_batch_size = provider.max_batch_size
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        hashes = [text_hash(text) for text in texts]
+        found = await asyncio.to_thread(self.cache.get_many, self.model, hashes)
+
+        # Texts identical after normalization go upstream once
+        missing: Dict[str, str] = {}
+        for h, text in zip(hashes, texts):
+            if h not in found:
+                missing.setdefault(h, text)
+        if missing:
+            vectors = await self.provider.embed(list(missing.values()))
+            fresh = {h: np.asarray(v, dtype=np.float32) for h, v in zip(missing, vectors)}
+            await asyncio.to_thread(self.cache.put_many, self.model, {h: (missing[h], fresh[h]) for h in fresh})
+            found.update(fresh)
+        return [found[h] for h in hashes]
@@ -0,0 +1,104 @@
+"""
+Embedding providers
+
+Providers turn a batch of texts into vectors. `LocalHashEmbeddingProvider`
+is deterministic and needs no network, which makes it the default when no
+OpenAI key is configured and the provider used by tests.
+"""
+import hashlib
+import re
+from typing import List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from ..config import settings
+
+EMBEDDING_DTYPE = np.float32
+
+
+def to_blob(vector: Sequence[float]) -> bytes:
+    """Serializes a vector for the embeddings.embedding column"""
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+class EmbeddingProvider(Protocol):
+    """Turns texts into vectors"""
+    model: str
+    dimensions: int
+    max_batch_size: int
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+
+class LocalHashEmbeddingProvider:
+    """
+    Deterministic offline embeddings via feature hashing.
+
+    Word unigrams and bigrams are hashed (blake2b, so results are stable
+    across processes) into signed buckets and L2-normalized. Texts sharing
+    vocabulary score as similar, which is enough for offline development
+    and tests.
+    """
+
+    max_batch_size = 2048
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.model = f"local-hash-{dimensions}"
+        self.calls = 0
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=EMBEDDING_DTYPE)
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self.embed_one(text) for text in texts]
+
+
+class OpenAIEmbeddingProvider:
+    """OpenAI embeddings API, through the shared AI client"""
+
+    max_batch_size = 512
+
+    def __init__(self, model: Optional[str] = None, dimensions: Optional[int] = None, client=None):
+        from .client import get_ai_client
+
+        self.model = model or settings.embedding_model
+        self.dimensions = dimensions or (3072 if self.model.endswith("-large") else 1536)
+        self._client = client or get_ai_client()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return await self._client.embed(texts, self.model)
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """
+    Provider selected by settings.embedding_provider (auto | openai | local),
+    behind the embedding cache unless EMBEDDING_CACHE_MAX_MB is 0.
+    """
+    choice = settings.embedding_provider
+    if choice == "openai" or (choice == "auto" and settings.openai_api_key):
+        provider = OpenAIEmbeddingProvider()
+    else:
+        provider = LocalHashEmbeddingProvider(settings.local_embedding_dimensions)
+
+    if settings.embedding_cache_max_mb > 0 and settings.database_path != ":memory:":
+        from .embedding_cache import CachedEmbeddingProvider, EmbeddingCache
+
+        return CachedEmbeddingProvider(provider, EmbeddingCache(settings.embedding_cache_max_mb * 2**20))
+    return provider
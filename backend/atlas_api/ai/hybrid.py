@@ -0,0 +1,226 @@
+"""
+Hybrid (lexical + semantic) note search
+
+The FTS5 query over `notes_fts` and the vector top-k run concurrently, each
+on its own connection, and their note rankings are combined with
+reciprocal-rank fusion (RRF): a note scores sum(1 / (k + rank)) over the
+rankings it appears in, so neither bm25 nor cosine scores need to be
+calibrated against each other.
+
+The vector side gets whatever is left of the latency budget. If it cannot
+answer in time, or the index is still warming up after startup, results
+are lexical-only and the response says why.
+"""
+import asyncio
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+SNIPPET_CHARS = 240
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turns free text into a safe FTS5 query.
+
+    Terms are quoted (so operators and punctuation in user input are inert)
+    and OR-ed, letting bm25 rank notes matching more terms first; the last
+    term also matches as a prefix for search-as-you-type.
+    """
+    terms = _TOKEN.findall(text.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in dict.fromkeys(terms)]
+    quoted[-1] += "*"
+    return " OR ".join(quoted)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = RRF_K,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[str, float]]:
+    """Fuses best-first id lists into (id, score), best first"""
+    scores: Dict[str, float] = {}
+    for position, ranking in enumerate(rankings):
+        weight = weights[position] if weights else 1.0
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+@dataclass
+class LexicalHit:
+    note_id: str
+    title: str
+    snippet: str
+
+
+@dataclass
+class VectorHit:
+    note_id: str
+    chunk_id: str
+    score: float
+
+
+@dataclass
+class HybridResult:
+    results: List[Dict] = field(default_factory=list)
+    mode: str = "hybrid"               # hybrid | lexical
+    fallback_reason: Optional[str] = None  # index_warming | timeout | error
+    elapsed_ms: float = 0.0
+
+
+def lexical_search(conn: sqlite3.Connection, query: str, limit: int) -> List[LexicalHit]:
+    """bm25-ranked notes (title matches weigh 5x) with highlighted snippets"""
+    match = fts_query(query)
+    if not match:
+        return []
+    rows = conn.execute(
+        """
+        SELECT n.id, n.title, snippet(notes_fts, 1, '<mark>', '</mark>', '…', 24)
+        FROM notes_fts JOIN notes n ON n.rowid = notes_fts.rowid
+        WHERE notes_fts MATCH ?
+        ORDER BY bm25(notes_fts, 5.0, 1.0)
+        LIMIT ?
+        """,
+        (match, limit)
+    ).fetchall()
+    return [LexicalHit(row[0], row[1], row[2]) for row in rows]
+
+
+def vector_search(index, query_vector, limit: int) -> List[VectorHit]:
+    """Best chunk per note, best first"""
+    hits: List[VectorHit] = []
+    seen = set()
+    for chunk_id, _, note_id, score in index.search(query_vector, limit * 4, ["note"]):
+        if note_id not in seen:
+            seen.add(note_id)
+            hits.append(VectorHit(note_id, chunk_id, score))
+    return hits[:limit]
+
+
+def _trim(text: str, limit: int = SNIPPET_CHARS) -> str:
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit] + "…"
+
+
+def _chunk_body(content: str, title: str) -> str:
+    """Drops the "Title > Heading" context line chunks are embedded with"""
+    head, sep, body = content.partition("\n\n")
+    return body if sep and head.startswith(title) else content
+
+
+def _in_thread(connection_factory: Callable[[], sqlite3.Connection], fn, *args):
+    def run():
+        conn = connection_factory()
+        try:
+            return fn(conn, *args)
+        finally:
+            conn.close()
+    return asyncio.to_thread(run)
+
+
+async def hybrid_search(
+    query: str,
+    limit: int = 10,
+    budget_ms: float = 300,
+    index=None,
+    provider=None,
+    connection_factory: Callable[[], sqlite3.Connection] = get_db_connection,
+    rrf_k: int = RRF_K,
+) -> HybridResult:
+    """
+    Notes matching a query, lexically and/or semantically.
+
+    Each result has the note id and title, a snippet (FTS highlight when
+    the note matched lexically, otherwise the start of its best chunk), the
+    fused score and the rank the note had in each list.
+    """
+    from .indexing import get_indexer
+    from .retrieval import get_vector_index
+
+    started = time.perf_counter()
+    index = index if index is not None else get_vector_index()
+    provider = provider or get_indexer().provider
+    depth = limit * 2
+    result = HybridResult()
+
+    lexical_task = asyncio.ensure_future(_in_thread(connection_factory, lexical_search, query, depth))
+
+    vector_hits: List[VectorHit] = []
+    if not index.ready:
+        result.mode, result.fallback_reason = "lexical", "index_warming"
+    else:
+        async def semantic():
+            [query_vector] = await provider.embed([query])
+            return await asyncio.to_thread(vector_search, index, query_vector, depth)
+
+        remaining = budget_ms / 1000 - (time.perf_counter() - started)
+        try:
+            vector_hits = await asyncio.wait_for(semantic(), timeout=max(remaining, 0))
+        except asyncio.TimeoutError:
+            result.mode, result.fallback_reason = "lexical", "timeout"
+        except Exception:
+            logger.exception("Vector search failed; falling back to lexical results")
+            result.mode, result.fallback_reason = "lexical", "error"
+
+    lexical_hits = await lexical_task
+
+    lexical_by_id = {hit.note_id: (rank, hit) for rank, hit in enumerate(lexical_hits, start=1)}
+    vector_by_id = {hit.note_id: (rank, hit) for rank, hit in enumerate(vector_hits, start=1)}
+    fused = reciprocal_rank_fusion(
+        [[hit.note_id for hit in lexical_hits], [hit.note_id for hit in vector_hits]], k=rrf_k
+    )[:limit]
+
+    # Titles and chunk text for notes only the vector side found
+    missing = [note_id for note_id, _ in fused if note_id not in lexical_by_id]
+    details: Dict[str, Tuple[str, str]] = {}
+    if missing:
+        def load(conn: sqlite3.Connection):
+            chunk_ids = [vector_by_id[note_id][1].chunk_id for note_id in missing]
+            rows = conn.execute(
+                f"""
+                SELECT n.id, n.title, e.content FROM embeddings e JOIN notes n ON n.id = e.source_id
+                WHERE e.id IN ({", ".join("?" for _ in chunk_ids)})
+                """,
+                chunk_ids
+            ).fetchall()
+            return {row[0]: (row[1], row[2]) for row in rows}
+        details = await _in_thread(connection_factory, load)
+
+    for note_id, score in fused:
+        lexical = lexical_by_id.get(note_id)
+        vector = vector_by_id.get(note_id)
+        if lexical:
+            title, snippet = lexical[1].title, lexical[1].snippet
+        elif note_id in details:
+            title, content = details[note_id]
+            snippet = _trim(_chunk_body(content, title))
+        else:
+            continue    # Deleted since the index was updated
+        result.results.append({
+            "note_id": note_id,
+            "title": title,
+            "snippet": snippet,
+            "score": score,
+            "lexical_rank": lexical[0] if lexical else None,
+            "vector_rank": vector[0] if vector else None,
+            "similarity": vector[1].score if vector else None,
+        })
+
+    result.elapsed_ms = (time.perf_counter() - started) * 1000
+    return result
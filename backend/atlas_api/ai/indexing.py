@@ -0,0 +1,224 @@
+"""
+Embedding ingestion pipeline
+
+Note and task writes enqueue an `embed_note` / `embed_task` job in the same
+transaction. The job worker hands batches of those jobs to
+`EmbeddingIndexer.handle`, which re-chunks each source, keeps the rows of
+chunks whose content hash is unchanged, embeds only the new chunks (many
+per provider call) and deletes the rows of chunks that disappeared.
+"""
+import asyncio
+import json
+import sqlite3
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .chunking import DEFAULT_MAX_CHARS, Chunk, chunk_markdown
+from .embeddings import EmbeddingProvider, to_blob
+from ..services.job_queue import Job, JobWorker, enqueue_job
+
+JOB_KINDS = {"note": "embed_note", "task": "embed_task"}
+SOURCE_TYPES = {kind: source_type for source_type, kind in JOB_KINDS.items()}
+
+
+def enqueue_embedding(conn: sqlite3.Connection, source_type: str, source_id: str):
+    """Schedules (re-)embedding of a note or task; the caller commits"""
+    enqueue_job(conn, JOB_KINDS[source_type], source_id)
+
+
+def source_chunks(
+    conn: sqlite3.Connection,
+    source_type: str,
+    source_id: str,
+    max_chars: int = DEFAULT_MAX_CHARS,
+) -> Optional[List[Chunk]]:
+    """Current chunks of a source, or None if it no longer exists"""
+    if source_type == "note":
+        row = conn.execute("SELECT title, content FROM notes WHERE id = ?", (source_id,)).fetchone()
+        if not row:
+            return None
+        return chunk_markdown(row[1] or "", title=row[0], max_chars=max_chars)
+
+    if source_type == "task":
+        row = conn.execute(
+            "SELECT title, description, tags FROM tasks WHERE id = ?", (source_id,)
+        ).fetchone()
+        if not row:
+            return None
+        tags = json.loads(row[2] or "[]")
+        body = "\n\n".join(part for part in (row[1], " ".join(f"#{t}" for t in tags)) if part)
+        return chunk_markdown(body, title=row[0], max_chars=max_chars)
+
+    raise ValueError(f"Unknown source type: {source_type}")
+
+
+@dataclass
+class SourcePlan:
+    """What to write for one source"""
+    source_type: str
+    source_id: str
+    keep: List[Tuple[str, Chunk]] = field(default_factory=list)   # (row id, chunk)
+    embed: List[Chunk] = field(default_factory=list)
+    delete: List[str] = field(default_factory=list)                # row ids
+
+
+@dataclass
+class IndexedRow:
+    """A newly written embedding"""
+    id: str
+    source_type: str
+    source_id: str
+    vector: List[float]
+
+
+@dataclass
+class IndexChanges:
+    """Rows written by one indexing round"""
+    upserted: List[IndexedRow] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)    # embeddings.id
+
+
+class EmbeddingIndexer:
+    """
+    Keeps `embeddings` in sync with notes and tasks.
+
+    Args:
+        provider: Embedding provider.
+        batch_size: Texts per provider call (capped by the provider's limit).
+        max_concurrency: Provider calls in flight at once.
+        max_chars: Target chunk size.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        batch_size: int = 64,
+        max_concurrency: int = 2,
+        max_chars: int = DEFAULT_MAX_CHARS,
+    ):
+        self.provider = provider
+        self.batch_size = min(batch_size, provider.max_batch_size)
+        self.max_chars = max_chars
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.chunks_embedded = 0
+        self.chunks_reused = 0
+        self.provider_calls = 0
+        # Called with the IndexChanges of every committed round
+        self.listeners: List[Callable[[IndexChanges], None]] = []
+
+    def plan(self, conn: sqlite3.Connection, source_type: str, source_id: str) -> SourcePlan:
+        plan = SourcePlan(source_type, source_id)
+        existing: Dict[str, List[str]] = {}
+        for row in conn.execute(
+            "SELECT id, content_hash, model FROM embeddings WHERE source_type = ? AND source_id = ?"
+            " ORDER BY chunk_index",
+            (source_type, source_id)
+        ):
+            if row[1] and row[2] == self.provider.model:
+                existing.setdefault(row[1], []).append(row[0])
+            else:
+                plan.delete.append(row[0])
+
+        for chunk in source_chunks(conn, source_type, source_id, self.max_chars) or []:
+            reusable = existing.get(chunk.content_hash)
+            if reusable:
+                plan.keep.append((reusable.pop(0), chunk))
+            else:
+                plan.embed.append(chunk)
+        plan.delete.extend(row_id for ids in existing.values() for row_id in ids)
+        return plan
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embeds texts in provider-sized batches with bounded concurrency"""
+        async def run(batch: List[str]):
+            async with self._semaphore:
+                self.provider_calls += 1
+                return await self.provider.embed(batch)
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [vector for batch in results for vector in batch]
+
+    def apply(self, conn: sqlite3.Connection, plans: List[SourcePlan], vectors: Dict[str, List[float]]) -> IndexChanges:
+        """Writes planned changes (the caller commits)"""
+        now = datetime.now().isoformat()
+        changes = IndexChanges()
+        for plan in plans:
+            if plan.delete:
+                conn.executemany("DELETE FROM embeddings WHERE id = ?", [(i,) for i in plan.delete])
+                changes.deleted.extend(plan.delete)
+            conn.executemany(
+                "UPDATE embeddings SET chunk_index = ?, content = ? WHERE id = ?",
+                [(chunk.index, chunk.text, row_id) for row_id, chunk in plan.keep]
+            )
+            rows = []
+            for chunk in plan.embed:
+                row_id = str(uuid.uuid4())
+                vector = vectors[chunk.content_hash]
+                rows.append((
+                    row_id, plan.source_type, plan.source_id, chunk.index, chunk.text,
+                    to_blob(vector), self.provider.model, now, chunk.content_hash
+                ))
+                changes.upserted.append(IndexedRow(row_id, plan.source_type, plan.source_id, vector))
+            conn.executemany(
+                """
+                INSERT INTO embeddings
+                (id, source_type, source_id, chunk_index, content, embedding, model, created_at, content_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            self.chunks_reused += len(plan.keep)
+        return changes
+
+    async def index_sources(self, conn: sqlite3.Connection, sources: List[Tuple[str, str]]) -> IndexChanges:
+        """Re-indexes (source_type, source_id) pairs; the caller commits"""
+        plans = [self.plan(conn, source_type, source_id) for source_type, source_id in sources]
+        # Identical chunks (within or across sources) are embedded once
+        pending = {chunk.content_hash: chunk.text for plan in plans for chunk in plan.embed}
+        vectors: Dict[str, List[float]] = {}
+        if pending:
+            embedded = await self.embed_texts(list(pending.values()))
+            vectors = dict(zip(pending.keys(), embedded))
+            self.chunks_embedded += len(pending)
+        return self.apply(conn, plans, vectors)
+
+    async def handle(self, conn: sqlite3.Connection, jobs: List[Job]) -> None:
+        """Job handler for embed_note / embed_task batches"""
+        changes = await self.index_sources(conn, [(SOURCE_TYPES[job.kind], job.key) for job in jobs])
+        # Commit before notifying so listeners never see rows that could roll back
+        conn.commit()
+        for listener in self.listeners:
+            listener(changes)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_reused": self.chunks_reused,
+            "provider_calls": self.provider_calls,
+        }
+
+
+def build_worker(indexer: EmbeddingIndexer, **kwargs) -> JobWorker:
+    """Job worker running the embedding pipeline"""
+    return JobWorker({kind: indexer.handle for kind in JOB_KINDS.values()}, **kwargs)
+
+
+_indexer: Optional[EmbeddingIndexer] = None
+
+
+def get_indexer() -> EmbeddingIndexer:
+    """Process-wide indexer using the configured provider"""
+    global _indexer
+    if _indexer is None:
+        from .embeddings import get_embedding_provider
+        from ..config import settings
+
+        _indexer = EmbeddingIndexer(
+            get_embedding_provider(),
+            batch_size=settings.embedding_batch_size,
+            max_concurrency=settings.embedding_max_concurrency,
+        )
+    return _indexer
@@ -0,0 +1,232 @@
+"""
+AI orchestrator
+
+Turns gathered context (a note, a day overview) into prompts and model
+output. Without an OpenAI key the orchestrator falls back to deterministic
+local renderings, so the endpoints stay useful offline and in tests.
+"""
+import json
+import logging
+import re
+import statistics
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from .client import AIClient, get_ai_client
+from .context import fold_turns
+from .prompts import CONVERSATION_SUMMARY_PROMPT, DAILY_BRIEFING_PROMPT, NOTE_SUMMARY_PROMPT, SYSTEM_PROMPT
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MODEL = "local"
+
+_ACTION_ITEM = re.compile(r"^\s*(?:[-*]\s*\[ \]|TODO:?|Action:)\s*(.+)$", re.IGNORECASE)
+_ISO_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+
+
+def _time_of(value: Optional[str]) -> str:
+    return value[11:16] if value and len(value) >= 16 else "all day"
+
+
+def briefing_context(overview: Dict) -> str:
+    """Overview rendered as the context block of the briefing prompt"""
+    parts: List[str] = []
+    tasks = overview["tasks"]
+    if tasks["overdue"]:
+        parts.append("## Overdue Tasks")
+        parts.extend(f"- {t['title']} (due {t['due_date'][:10]}, {t['priority']})" for t in tasks["overdue"])
+    if tasks["due_today"]:
+        parts.append("## Due Today")
+        parts.extend(f"- {t['title']} ({t['priority']})" for t in tasks["due_today"])
+    if overview["events"]:
+        parts.append("## Events")
+        parts.extend(f"- {_time_of(e['start_time'])} {e['title']}" for e in overview["events"])
+    if overview["recent_notes"]:
+        parts.append("## Recent Notes")
+        parts.extend(f"- {n['title']}" for n in overview["recent_notes"])
+    return "\n".join(parts) or "(nothing scheduled)"
+
+
+def briefing_references(overview: Dict) -> Dict[str, List[Dict]]:
+    tasks = overview["tasks"]["overdue"] + overview["tasks"]["due_today"]
+    return {
+        "tasks": [{"task_id": t["id"], "title": t["title"]} for t in tasks],
+        "events": [{"event_id": e["id"], "title": e["title"]} for e in overview["events"]],
+        "notes": [{"note_id": n["id"], "title": n["title"]} for n in overview["recent_notes"]],
+    }
+
+
+def render_briefing(overview: Dict) -> str:
+    """Deterministic briefing used when no model is configured"""
+    tasks = overview["tasks"]
+    lines = [
+        "## Overview",
+        f"{len(tasks['due_today'])} tasks due, {len(tasks['overdue'])} overdue "
+        f"and {len(overview['events'])} events on {overview['date']}.",
+        "",
+        "## Top Priorities",
+    ]
+    priorities = tasks["overdue"] + tasks["due_today"]
+    lines.extend(f"- {t['title']}" for t in priorities[:5])
+    if not priorities:
+        lines.append("- Nothing due")
+    lines += ["", "## Today's Schedule"]
+    lines.extend(f"- {_time_of(e['start_time'])} {e['title']}" for e in overview["events"])
+    if not overview["events"]:
+        lines.append("- No events")
+    if overview["recent_notes"]:
+        lines += ["", "## Notes to Review"]
+        lines.extend(f"- {n['title']}" for n in overview["recent_notes"][:5])
+    return "\n".join(lines)
+
+
+def extract_summary(title: str, content: str) -> Dict[str, Any]:
+    """Extractive summary and checklist items, used when no model is configured"""
+    summary: List[str] = []
+    action_items: List[Dict] = []
+    for line in content.splitlines():
+        match = _ACTION_ITEM.match(line)
+        if match:
+            due = _ISO_DATE.search(match.group(1))
+            action_items.append({"title": match.group(1).strip(), "due_date": due.group(1) if due else None})
+    for paragraph in re.split(r"\n\s*\n", content):
+        text = " ".join(
+            line for line in paragraph.splitlines()
+            if not line.lstrip().startswith(("#", "-", "*", "```")) and not _ACTION_ITEM.match(line)
+        )
+        sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+        if sentence:
+            summary.append(sentence)
+        if len(summary) == 3:
+            break
+    return {"summary": summary or [title], "action_items": action_items}
+
+
+def local_reply(history: List[Dict[str, str]]) -> str:
+    """Canned reply used when no model is configured"""
+    question = next((m["content"] for m in reversed(history) if m["role"] == "user"), "")
+    return (
+        "No AI model is configured, so this is an offline reply. "
+        f"Set OPENAI_API_KEY to get real answers. You asked: {question.strip()[:200]}"
+    )
+
+
+def _parse_json(text: str) -> Dict[str, Any]:
+    """JSON object from a model reply, tolerating a surrounding code fence"""
+    start, end = text.find("{"), text.rfind("}")
+    return json.loads(text[start:end + 1])
+
+
+class AIOrchestrator:
+    """
+    Args:
+        client: AI client answering prompts; None for local output.
+    """
+
+    def __init__(self, client: Optional[AIClient] = None):
+        self.client = client
+
+    def model(self, kind: str) -> str:
+        """Model answering a request kind ("local" when offline)"""
+        if self.client is None:
+            return LOCAL_MODEL
+        return settings.heavy_model if kind == "daily_briefing" else settings.chat_model
+
+    async def generate_daily_briefing(self, overview: Dict) -> Dict[str, Any]:
+        """Briefing markdown plus the tasks, events and notes it covers"""
+        if self.client is None:
+            markdown = render_briefing(overview)
+        else:
+            messages = [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": DAILY_BRIEFING_PROMPT.format(
+                    date=overview["date"], context=briefing_context(overview)
+                )},
+            ]
+            markdown = await self.client.chat(messages, self.model("daily_briefing"))
+        return {"markdown": markdown, "references": briefing_references(overview)}
+
+    async def summarize_note(self, title: str, content: str) -> Dict[str, Any]:
+        """Summary bullets and action items of a note"""
+        if self.client is None:
+            return extract_summary(title, content)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": NOTE_SUMMARY_PROMPT.format(title=title, content=content)},
+        ]
+        reply = await self.client.chat(messages, self.model("note_summary"))
+        try:
+            result = _parse_json(reply)
+        except ValueError:
+            logger.warning("Note summary was not valid JSON; returning it as a single bullet")
+            return {"summary": [reply.strip()], "action_items": []}
+        return {"summary": result.get("summary", []), "action_items": result.get("action_items", [])}
+
+    async def stream_chat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Assistant reply to assembled chat messages (see context.py), as text deltas"""
+        if self.client is None:
+            for i, word in enumerate(local_reply(messages).split(" ")):
+                yield word if i == 0 else " " + word
+            return
+        async for delta in self.client.stream_chat(messages, self.model("chat")):
+            yield delta
+
+    async def summarize_conversation(
+        self, summary: Optional[str], turns: List[Dict[str, str]], max_words: int
+    ) -> str:
+        """Rolling conversation summary with `turns` folded in"""
+        if self.client is None:
+            return fold_turns(summary, turns, max_words)
+        transcript = "\n".join(f"{t['role'].capitalize()}: {t['content']}" for t in turns)
+        messages = [{"role": "user", "content": CONVERSATION_SUMMARY_PROMPT.format(
+            summary=summary or "(none yet)", turns=transcript, max_words=max_words
+        )}]
+        return await self.client.chat(messages, self.model("conversation_summary"))
+
+
+class StreamMetrics:
+    """Time to first token and duration of recent streamed replies"""
+
+    def __init__(self, window: int = 500):
+        self.ttft_ms: Deque[float] = deque(maxlen=window)
+        self.duration_ms: Deque[float] = deque(maxlen=window)
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def record(self, status: str, ttft_ms: Optional[float], duration_ms: float):
+        setattr(self, status, getattr(self, status) + 1)
+        if ttft_ms is not None:
+            self.ttft_ms.append(ttft_ms)
+        self.duration_ms.append(duration_ms)
+
+    @staticmethod
+    def _percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+        if len(samples) < 2:
+            value = samples[0] if samples else None
+            return {"p50": value, "p95": value}
+        cuts = statistics.quantiles(samples, n=20)
+        return {"p50": round(statistics.median(samples), 1), "p95": round(cuts[18], 1)}
+
+    def stats(self) -> Dict:
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "ttft_ms": self._percentiles(self.ttft_ms),
+            "duration_ms": self._percentiles(self.duration_ms),
+        }
+
+
+stream_metrics = StreamMetrics()
+
+_orchestrator: Optional[AIOrchestrator] = None
+
+
+def get_orchestrator() -> AIOrchestrator:
+    """Process-wide orchestrator (OpenAI when a key is configured)"""
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = AIOrchestrator(get_ai_client() if settings.openai_api_key else None)
+    return _orchestrator
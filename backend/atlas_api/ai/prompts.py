@@ -0,0 +1,83 @@
+"""
+Prompt templates
+
+Bump a template's entry in PROMPT_VERSIONS whenever its wording changes:
+the version is part of the response cache key, so old answers are not
+served for the new prompt.
+"""
+
+PROMPT_VERSIONS = {
+    "daily_briefing": 1,
+    "note_summary": 1,
+    "conversation_summary": 1,
+}
+
+SYSTEM_PROMPT = """You are Atlas, a local-first personal knowledge and productivity assistant.
+
+You have access to the user's notes, tasks, calendar, and (optionally) coding projects.
+Always:
+- Prefer concrete, actionable suggestions.
+- When referencing notes/tasks/events, mention them explicitly.
+- If some information is not present in the provided context, say you don't know rather than inventing details.
+"""
+
+DAILY_BRIEFING_PROMPT = """The user wants a concise daily briefing for {date}.
+You are given:
+- A list of overdue tasks
+- A list of tasks due today
+- A list of events scheduled today
+- A list of recent notes with brief excerpts
+
+1. Start with a short greeting and a one-sentence overview.
+2. List the top 3–5 priorities as bullets, referencing task titles.
+3. Mention today's events with times.
+4. Optionally highlight any important themes from recent notes.
+
+Return your output as Markdown with headings:
+- "## Overview"
+- "## Top Priorities"
+- "## Today's Schedule"
+- "## Notes to Review" (optional)
+
+Context:
+{context}
+"""
+
+NOTE_SUMMARY_PROMPT = """The user wrote the following note titled "{title}".
+
+1. Produce a concise summary in 2–4 bullet points.
+2. Identify any clear action items in the note. For each, return:
+   - A short title
+   - Optional due date if explicitly mentioned (otherwise null)
+
+Return JSON with this shape:
+{{
+  "summary": ["bullet 1", "bullet 2", ...],
+  "action_items": [
+    {{ "title": "...", "due_date": "YYYY-MM-DD or null" }}
+  ]
+}}
+
+Note content:
+{content}
+"""
+
+CONTEXT_PROMPT = """You are given excerpts from the user's personal notes and tasks that may be relevant to their next message. Each excerpt shows where it comes from.
+
+1. Use these excerpts when they help answer; do not invent details they lack.
+2. Mention which notes/tasks you used by title.
+
+Excerpts:
+{excerpts}
+"""
+
+CONVERSATION_SUMMARY_PROMPT = """Update the running summary of a conversation between the user and Atlas.
+
+Keep decisions, facts about the user, open questions and commitments; drop small talk. Write at most {max_words} words of plain prose.
+
+Summary so far:
+{summary}
+
+New turns to fold in:
+{turns}
+"""
@@ -0,0 +1,264 @@
+"""
+LLM response cache with request coalescing
+
+Responses are stored in `ai_response_cache` under a key hashed from the
+request kind, the model, the prompt template version and the exact inputs
+sent to the model, and expire after a TTL. Each entry lists what it was
+derived from in `ai_response_deps` (`note:<id>`, `notes`, `tasks`,
+`events`); triggers on those tables delete dependent entries in the same
+transaction as the change, whichever code path makes it.
+
+Because inputs are part of the key, a response computed while its source
+was being edited is stored under the old inputs' key and is never served
+for the new content.
+
+Concurrent identical requests share one upstream call. The first caller
+starts it in a task owned by the cache, and every caller, the first one
+included, awaits that task through a shield. A caller that is cancelled
+(a client disconnecting) leaves the call running for the others, and its
+result is still cached.
+
+Lookups and writes run in a worker thread, off the event loop. Hits are
+read-only: per-entry hit counts are buffered in memory and written in one
+batch every HIT_FLUSH_KEYS entries or HIT_FLUSH_SECONDS, and at shutdown.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from ..database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+HIT_FLUSH_KEYS = 1000
+HIT_FLUSH_SECONDS = 30.0
+
+
+def cache_key(kind: str, model: str, template_version: int, inputs: Any) -> str:
+    payload = json.dumps([kind, model, template_version, inputs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Args:
+        ttl: Lifetime of a cached response.
+        connection_factory: Connections to the database holding the cache.
+    """
+
+    def __init__(
+        self,
+        ttl: timedelta = timedelta(hours=24),
+        connection_factory: Callable[[], sqlite3.Connection] = get_db_connection,
+    ):
+        self.ttl = ttl
+        self.connection_factory = connection_factory
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._hit_counts: Dict[str, int] = {}
+        self._flushed_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _load(self, key: str) -> Optional[Any]:
+        conn = self.connection_factory()
+        try:
+            row = conn.execute(
+                "SELECT response FROM ai_response_cache WHERE key = ? AND expires_at > ?",
+                (key, datetime.now().isoformat())
+            ).fetchone()
+            if row is None:
+                return None
+            with self._lock:
+                self._hit_counts[key] = self._hit_counts.get(key, 0) + 1
+                due = len(self._hit_counts) >= HIT_FLUSH_KEYS or (
+                    time.monotonic() - self._flushed_at >= HIT_FLUSH_SECONDS
+                )
+            if due:
+                self._write_hits(conn)
+                conn.commit()
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def _write_hits(self, conn: sqlite3.Connection):
+        """Writes buffered hit counts (the caller commits)"""
+        with self._lock:
+            counts, self._hit_counts = self._hit_counts, {}
+            self._flushed_at = time.monotonic()
+        if not counts:
+            return
+        try:
+            conn.executemany(
+                "UPDATE ai_response_cache SET hits = hits + ? WHERE key = ?",
+                [(hits, key) for key, hits in counts.items()]
+            )
+        except sqlite3.OperationalError:
+            with self._lock:
+                for key, hits in counts.items():
+                    self._hit_counts[key] = self._hit_counts.get(key, 0) + hits
+            raise
+
+    def flush(self):
+        """Writes buffered hit counts now (shutdown, stats)"""
+        conn = self.connection_factory()
+        try:
+            self._write_hits(conn)
+            conn.commit()
+        except sqlite3.OperationalError:
+            logger.warning("AI response cache flush failed", exc_info=True)
+        finally:
+            conn.close()
+
+    def _store(self, key: str, kind: str, model: str, template_version: int, deps: Iterable[str], value: Any):
+        now = datetime.now()
+        conn = self.connection_factory()
+        try:
+            conn.execute("DELETE FROM ai_response_cache WHERE key = ?", (key,))
+            conn.execute(
+                """
+                INSERT INTO ai_response_cache (key, kind, model, template_version, response, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, kind, model, template_version, json.dumps(value), now.isoformat(), (now + self.ttl).isoformat())
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO ai_response_deps (key, dep) VALUES (?, ?)",
+                [(key, dep) for dep in deps]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    async def get_or_compute(
+        self,
+        kind: str,
+        model: str,
+        template_version: int,
+        inputs: Any,
+        deps: Iterable[str],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, str]:
+        """
+        Cached response for these inputs, computing it at most once.
+
+        Returns (response, status) with status "hit", "miss" or "coalesced".
+        Failures are not cached and propagate to every waiting caller.
+        """
+        key = cache_key(kind, model, template_version, inputs)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), "coalesced"
+
+        try:
+            cached = await asyncio.to_thread(self._load, key)
+        except sqlite3.Error:
+            logger.warning("AI response cache lookup failed", exc_info=True)
+            cached = None
+        if cached is not None:
+            self.hits += 1
+            return cached, "hit"
+
+        # Another caller may have missed and started the call during the lookup
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), "coalesced"
+
+        self.misses += 1
+        task = asyncio.create_task(self._compute(key, kind, model, template_version, deps, compute))
+        # Marked retrieved when every caller was cancelled before a failure
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._inflight[key] = task
+        return await asyncio.shield(task), "miss"
+
+    async def _compute(
+        self,
+        key: str,
+        kind: str,
+        model: str,
+        template_version: int,
+        deps: Iterable[str],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        try:
+            try:
+                value = await compute()
+            except Exception:
+                self.errors += 1
+                raise
+            try:
+                await asyncio.to_thread(self._store, key, kind, model, template_version, deps, value)
+            except sqlite3.Error:
+                logger.warning("AI response cache write failed", exc_info=True)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def purge(self, kind: Optional[str] = None, expired_only: bool = False) -> int:
+        """Deletes cached responses (all, one kind, and/or only expired ones)"""
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if expired_only:
+            clauses.append("expires_at <= ?")
+            params.append(datetime.now().isoformat())
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self.connection_factory()
+        try:
+            deleted = conn.execute(f"DELETE FROM ai_response_cache{where}", params).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        return deleted
+
+    def stats(self) -> Dict:
+        self.flush()
+        conn = self.connection_factory()
+        try:
+            rows = conn.execute(
+                """
+                SELECT kind, COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(LENGTH(response)), 0),
+                       SUM(expires_at <= ?)
+                FROM ai_response_cache GROUP BY kind
+                """,
+                (datetime.now().isoformat(),)
+            ).fetchall()
+        finally:
+            conn.close()
+        lookups = self.hits + self.misses
+        return {
+            "entries": {
+                row[0]: {"count": row[1], "lifetime_hits": row[2], "bytes": row[3], "expired": row[4]}
+                for row in rows
+            },
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "inflight": len(self._inflight),
+            "ttl_seconds": int(self.ttl.total_seconds()),
+        }
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        from ..config import settings
+
+        _cache = ResponseCache(timedelta(seconds=settings.ai_response_cache_ttl_seconds))
+    return _cache
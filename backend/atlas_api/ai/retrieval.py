@@ -0,0 +1,425 @@
+"""
+Semantic retrieval over the embeddings table
+
+`VectorIndex` keeps every embedding of the active model in one contiguous,
+L2-normalized float32 matrix, so a query is a single matrix-vector product
+followed by `argpartition` for the top k. Rows carry a source-type code;
+per-type boolean masks are maintained alongside the matrix so filtered
+searches cost no extra passes. Inserts and deletes from the embedding
+pipeline are applied in place (deleted slots are reused) without reloading.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EMBEDDING_DTYPE
+from ..database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH = 10000
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalizes rows in place (zero rows stay zero)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+class VectorIndex:
+    """
+    In-memory cosine-similarity index.
+
+    Args:
+        dimensions: Vector width; fixed by the first vector added if None.
+        model: Embedding model whose rows are indexed.
+        initial_capacity: Rows preallocated; the matrix doubles as needed.
+    """
+
+    def __init__(self, dimensions: Optional[int] = None, model: Optional[str] = None, initial_capacity: int = 1024):
+        self.dimensions = dimensions
+        self.model = model
+        self.ready = False
+        self._lock = threading.RLock()
+        self._capacity = initial_capacity
+        self._size = 0                                   # High-water mark of used slots
+        self._matrix: Optional[np.ndarray] = None
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._type_codes = np.full(initial_capacity, -1, dtype=np.int16)
+        self._type_masks: Dict[str, np.ndarray] = {}
+        self._type_names: List[str] = []
+        self._type_index: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = [None] * initial_capacity
+        self._source_ids: List[Optional[str]] = [None] * initial_capacity
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._loading = False
+        self._replay: List[Tuple[str, tuple]] = []   # Changes made while a reload runs
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # Storage
+
+    def _ensure_matrix(self, dimensions: int):
+        if self.dimensions is None:
+            self.dimensions = dimensions
+        if dimensions != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {dimensions}")
+        if self._matrix is None:
+            self._matrix = np.zeros((self._capacity, self.dimensions), dtype=EMBEDDING_DTYPE)
+
+    def _grow(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dimensions), dtype=EMBEDDING_DTYPE)
+        matrix[:self._capacity] = self._matrix
+        self._matrix = matrix
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - self._capacity, dtype=bool)])
+        self._type_codes = np.concatenate(
+            [self._type_codes, np.full(capacity - self._capacity, -1, dtype=np.int16)]
+        )
+        for name, mask in self._type_masks.items():
+            self._type_masks[name] = np.concatenate([mask, np.zeros(capacity - self._capacity, dtype=bool)])
+        extra = [None] * (capacity - self._capacity)
+        self._ids.extend(extra)
+        self._source_ids.extend(extra)
+        self._capacity = capacity
+
+    def _type_code(self, source_type: str) -> int:
+        code = self._type_index.get(source_type)
+        if code is None:
+            code = self._type_index[source_type] = len(self._type_names)
+            self._type_names.append(source_type)
+            self._type_masks[source_type] = np.zeros(self._capacity, dtype=bool)
+        return code
+
+    def add(
+        self,
+        ids: Sequence[str],
+        source_types: Sequence[str],
+        source_ids: Sequence[str],
+        vectors: np.ndarray,
+    ):
+        """Inserts or replaces rows (vectors are normalized on the way in)"""
+        vectors = np.asarray(vectors, dtype=EMBEDDING_DTYPE)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if not len(ids):
+            return
+        with self._lock:
+            if self._loading:
+                self._replay.append(("add", (ids, source_types, source_ids, vectors)))
+            self._ensure_matrix(vectors.shape[1])
+            slots = []
+            for row_id in ids:
+                slot = self._slots.get(row_id)
+                if slot is None:
+                    if self._free:
+                        slot = self._free.pop()
+                    else:
+                        slot = self._size
+                        self._size += 1
+                    self._slots[row_id] = slot
+                slots.append(slot)
+            self._grow(self._size)
+
+            slots_array = np.asarray(slots)
+            self._matrix[slots_array] = normalize(vectors.copy())
+
+            codes = np.fromiter((self._type_code(t) for t in source_types), dtype=np.int16, count=len(slots))
+            previous = self._type_codes[slots_array]
+            for code in np.unique(previous[previous >= 0]):
+                self._type_masks[self._type_names[code]][slots_array[previous == code]] = False
+            for code in np.unique(codes):
+                self._type_masks[self._type_names[code]][slots_array[codes == code]] = True
+            self._type_codes[slots_array] = codes
+            self._alive[slots_array] = True
+            for slot, row_id, source_id in zip(slots, ids, source_ids):
+                self._ids[slot] = row_id
+                self._source_ids[slot] = source_id
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Deletes rows; their slots are reused by later inserts"""
+        ids = list(ids)
+        removed = 0
+        with self._lock:
+            if self._loading:
+                self._replay.append(("remove", (ids,)))
+            for row_id in ids:
+                slot = self._slots.pop(row_id, None)
+                if slot is None:
+                    continue
+                code = self._type_codes[slot]
+                if code >= 0:
+                    self._type_masks[self._type_names[code]][slot] = False
+                self._type_codes[slot] = -1
+                self._alive[slot] = False
+                self._ids[slot] = None
+                self._source_ids[slot] = None
+                self._matrix[slot] = 0
+                self._free.append(slot)
+                removed += 1
+        return removed
+
+    # Search
+
+    def _mask(self, source_types: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        if not source_types:
+            return self._alive[:self._size]
+        masks = [self._type_masks[t][:self._size] for t in source_types if t in self._type_masks]
+        if not masks:
+            return None
+        mask = masks[0].copy()
+        for other in masks[1:]:
+            mask |= other
+        return mask
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 10,
+        source_types: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, str, str, float]]:
+        """
+        Top-k rows by cosine similarity.
+
+        Returns (embedding id, source_type, source_id, score), best first.
+        """
+        with self._lock:
+            if self._matrix is None or not self._slots or k <= 0:
+                return []
+            q = np.asarray(query, dtype=EMBEDDING_DTYPE).reshape(-1)
+            if q.shape[0] != self.dimensions:
+                raise ValueError(f"Expected a {self.dimensions}-dimensional query, got {q.shape[0]}")
+            norm = np.linalg.norm(q)
+            if norm:
+                q = q / norm
+
+            mask = self._mask(source_types)
+            if mask is None:
+                return []
+            candidates = int(mask.sum())
+            if candidates == 0:
+                return []
+
+            scores = self._matrix[:self._size] @ q
+            if candidates < self._size:
+                scores[~mask] = -np.inf
+            k = min(k, candidates)
+            if k < len(scores):
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                (self._ids[i], self._type_names[self._type_codes[i]], self._source_ids[i], float(scores[i]))
+                for i in top
+            ]
+
+    # Persistence
+
+    def load(self, conn: sqlite3.Connection, model: Optional[str] = None, batch_size: int = LOAD_BATCH) -> int:
+        """
+        Loads every embedding of `model` from SQLite, replacing the contents.
+
+        Rows are read in short rowid-keyed pages so writers are never blocked
+        for the whole load. Changes applied while loading are replayed onto
+        the new state before it is swapped in; searches keep using the old
+        state until then.
+        """
+        model = model or self.model
+        with self._lock:
+            self._loading = True
+            self._replay = []
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)).fetchone()[0]
+            fresh = VectorIndex(self.dimensions, model, max(count, 1024))
+            last_rowid = 0
+            while True:
+                rows = conn.execute(
+                    """
+                    SELECT rowid, id, source_type, source_id, embedding FROM embeddings
+                    WHERE model = ? AND rowid > ? ORDER BY rowid LIMIT ?
+                    """,
+                    (model, last_rowid, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                last_rowid = rows[-1][0]
+                vectors = np.frombuffer(b"".join(row[4] for row in rows), dtype=EMBEDDING_DTYPE)
+                fresh.add(
+                    [r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows],
+                    vectors.reshape(len(rows), -1)
+                )
+
+            with self._lock:
+                replay = self._replay
+                self.__dict__.update({
+                    key: value for key, value in fresh.__dict__.items()
+                    if key not in ("_lock", "_loading", "_replay")
+                })
+                self._loading = False
+                self._replay = []
+                for op, args in replay:
+                    getattr(self, op)(*args)
+                self.ready = True
+        finally:
+            with self._lock:
+                self._loading = False
+                self._replay = []
+        return len(self)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "model": self.model,
+                "dimensions": self.dimensions,
+                "vectors": len(self),
+                "capacity": self._capacity,
+                "free_slots": len(self._free),
+                "memory_bytes": 0 if self._matrix is None else self._matrix.nbytes,
+                "ready": self.ready,
+                "by_source_type": {
+                    name: int(mask[:self._size].sum()) for name, mask in self._type_masks.items()
+                },
+            }
+
+
+# ----------------------------------------------------------------------------
+# Service
+# ----------------------------------------------------------------------------
+
+_index: Optional[VectorIndex] = None
+
+
+def get_vector_index():
+    """
+    Process-wide index for the configured embedding model.
+
+    settings.vector_store selects the in-memory float32 index ("memory"),
+    the quantized memory-mapped sidecar ("mmap", see vector_store.py) or
+    the sidecar with an IVF approximate index on top ("ivf", see ann.py).
+    """
+    global _index
+    if _index is None:
+        from .ann import IVFVectorStore
+        from .indexing import get_indexer
+        from .vector_store import MmapVectorStore, sidecar_path
+        from ..config import settings
+
+        provider = get_indexer().provider
+        args = (sidecar_path(settings.database_path), provider.dimensions, provider.model)
+        if settings.database_path == ":memory:" or settings.vector_store == "memory":
+            _index = VectorIndex(provider.dimensions, provider.model)
+        elif settings.vector_store == "ivf":
+            _index = IVFVectorStore(
+                *args,
+                dtype=settings.vector_store_dtype,
+                rerank=settings.vector_rerank,
+                nlist=settings.vector_ivf_nlist,
+                nprobe=settings.vector_ivf_nprobe,
+                min_train_size=settings.vector_ivf_min_train_size,
+            )
+        else:
+            _index = MmapVectorStore(*args, dtype=settings.vector_store_dtype, rerank=settings.vector_rerank)
+    return _index
+
+
+def warm_vector_index(connection_factory: Callable[[], sqlite3.Connection] = get_db_connection) -> int:
+    """Loads the index from SQLite (run off the event loop at startup)"""
+    index = get_vector_index()
+    try:
+        conn = connection_factory()
+        try:
+            count = index.load(conn)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        logger.exception("Could not load the vector index")
+        return 0
+    logger.info("Vector index loaded %d vectors", count)
+    return count
+
+
+def apply_index_changes(index: VectorIndex, changes) -> None:
+    """Embedding-pipeline listener keeping the index in step with the table"""
+    if changes.deleted:
+        index.remove(changes.deleted)
+    if changes.upserted:
+        rows = changes.upserted
+        index.add(
+            [r.id for r in rows],
+            [r.source_type for r in rows],
+            [r.source_id for r in rows],
+            np.stack([r.vector for r in rows]),
+        )
+    if hasattr(index, "flush"):
+        index.flush()
+
+
+async def semantic_search(
+    conn: sqlite3.Connection,
+    query: str,
+    source_types: Optional[Sequence[str]] = None,
+    limit: int = 10,
+    index: Optional[VectorIndex] = None,
+) -> List[Dict]:
+    """
+    Best-matching chunk per source for a natural-language query.
+
+    Oversamples chunks so that several hits in one note still leave
+    `limit` distinct sources.
+    """
+    from .indexing import get_indexer
+
+    index = index or get_vector_index()
+    [query_vector] = await get_indexer().provider.embed([query])
+
+    hits: List[Tuple[str, str, str, float]] = []
+    seen = set()
+    k = limit * 4
+    while True:
+        candidates = await asyncio.to_thread(index.search, query_vector, k, source_types)
+        hits, seen = [], set()
+        for hit in candidates:
+            key = (hit[1], hit[2])
+            if key not in seen:
+                seen.add(key)
+                hits.append(hit)
+        if len(hits) >= limit or len(candidates) < k:
+            break
+        k *= 4
+    hits = hits[:limit]
+    if not hits:
+        return []
+
+    placeholders = ", ".join("?" for _ in hits)
+    rows = {
+        row["id"]: row for row in conn.execute(
+            f"SELECT id, chunk_index, content FROM embeddings WHERE id IN ({placeholders})",
+            [hit[0] for hit in hits]
+        )
+    }
+    results = []
+    for embedding_id, source_type, source_id, score in hits:
+        row = rows.get(embedding_id)
+        if row is None:
+            continue
+        results.append({
+            "source_type": source_type,
+            "source_id": source_id,
+            "chunk_index": row["chunk_index"],
+            "content": row["content"],
+            "score": score,
+        })
+    return results
@@ -0,0 +1,30 @@
+"""
+Token estimates and model pricing
+
+Counts are estimates (about four characters per token for English, per
+OpenAI's rule of thumb): good enough for budgets, rate limits and cost
+reporting without pulling in a tokenizer.
+"""
+import math
+from typing import Dict
+
+CHARS_PER_TOKEN = 4
+
+# USD per million input tokens
+MODEL_PRICES: Dict[str, float] = {
+    "text-embedding-3-small": 0.02,
+    "text-embedding-3-large": 0.13,
+    "text-embedding-ada-002": 0.10,
+    "gpt-4o-mini": 0.15,
+    "gpt-4o": 2.50,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def cost_usd(model: str, tokens: int) -> float:
+    """Input cost of `tokens` for a model (0 for local or unknown models)"""
+    return MODEL_PRICES.get(model, 0.0) * tokens / 1_000_000
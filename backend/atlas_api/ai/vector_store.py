@@ -0,0 +1,460 @@
+"""
+Memory-mapped, quantized vector store
+
+A sidecar directory next to the database (`atlas.db` -> `atlas.vectors/`)
+holds the embeddings of the active model as float16 or int8 rows in
+memory-mapped files, so opening it costs a few small reads instead of
+deserializing every BLOB, and resident memory is whatever the OS keeps
+paged in (2-4x smaller than float32 to begin with).
+
+Files:
+    meta.json    model, dimensions, dtype, capacity, source-type names,
+                 count and checksum of the stored embedding ids
+    vectors.bin  capacity x dimensions, float16 or int8 (row-normalized)
+    scales.bin   float32 per row (int8 dequantization scale, 1.0 for float16)
+    types.bin    int8 source-type code per row, -1 for free slots
+    ids.bin      S64 per row, the embeddings.id the row belongs to
+
+Search scans the quantized rows block by block (zero-copy over the mmap),
+then re-ranks the best candidates exactly against their float32 BLOBs in
+SQLite. Slot assignment mirrors VectorIndex: deleted slots are reused.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EMBEDDING_DTYPE
+from .retrieval import normalize
+from ..database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+ID_DTYPE = np.dtype("S64")
+SCAN_BLOCK_BYTES = 8 << 20  # float32 scratch buffer per scan block
+FORMAT_VERSION = 2
+CHECKSUM_MASK = (1 << 64) - 1
+
+
+def sidecar_path(database_path: str) -> Path:
+    """`data/atlas.db` -> `data/atlas.vectors`"""
+    path = Path(database_path)
+    return path.with_name(path.stem + ".vectors")
+
+
+def _id_hash(key: bytes) -> int:
+    return zlib.crc32(key) << 32 | zlib.adler32(key)
+
+
+def id_checksum(ids: Iterable[bytes]) -> int:
+    """
+    Order-independent 64-bit checksum of embedding ids.
+
+    Embedding rows are never rewritten in place (a changed chunk gets a
+    new id), so the set of ids identifies the stored vectors.
+    """
+    return sum(_id_hash(key) for key in ids) & CHECKSUM_MASK
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalized rows -> (quantized rows, per-row scales)"""
+    vectors = normalize(np.array(vectors, dtype=EMBEDDING_DTYPE, ndmin=2))
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    if dtype == "int8":
+        peak = np.abs(vectors).max(axis=1)
+        scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+        quantized = np.round(vectors / scales[:, None]).clip(-127, 127).astype(np.int8)
+        return quantized, scales
+    raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+
+class MmapVectorStore:
+    """
+    Quantized on-disk counterpart of VectorIndex (same add/remove/search API).
+
+    Args:
+        path: Sidecar directory.
+        dimensions: Vector width.
+        model: Embedding model whose rows are stored.
+        dtype: "int8" (4x smaller) or "float16" (2x smaller).
+        rerank: Candidates re-scored exactly, as a multiple of k (at least 100).
+        connection_factory: SQLite connections for exact re-ranking and rebuilds.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        dimensions: int,
+        model: str,
+        dtype: str = "int8",
+        rerank: int = 10,
+        connection_factory: Callable[[], sqlite3.Connection] = get_db_connection,
+    ):
+        if dtype not in ("int8", "float16"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.path = Path(path)
+        self.dimensions = dimensions
+        self.model = model
+        self.dtype = dtype
+        self.rerank = rerank
+        self.connection_factory = connection_factory
+        self.ready = False
+        self._lock = threading.RLock()
+        self._capacity = 0
+        self._type_names: List[str] = []
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._types: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._slots: Dict[bytes, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+        self._checksum = 0
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # Files
+
+    def _file(self, name: str) -> Path:
+        return self.path / name
+
+    def _shapes(self, capacity: int) -> Dict[str, Tuple[np.dtype, Tuple[int, ...]]]:
+        """Per-slot files: name -> (dtype, shape)"""
+        return {
+            "vectors.bin": (np.dtype(self.dtype), (capacity, self.dimensions)),
+            "scales.bin": (np.dtype(np.float32), (capacity,)),
+            "types.bin": (np.dtype(np.int8), (capacity,)),
+            "ids.bin": (ID_DTYPE, (capacity,)),
+        }
+
+    def _map(self, capacity: int, mode: str) -> Dict[str, np.memmap]:
+        maps = {}
+        for name, (dtype, shape) in self._shapes(capacity).items():
+            file = self._file(name)
+            size = int(np.prod(shape)) * dtype.itemsize
+            if mode == "r+" and file.stat().st_size < size:
+                with open(file, "r+b") as f:
+                    f.truncate(size)
+            if mode == "w+":
+                with open(file, "wb") as f:
+                    f.truncate(size)
+            maps[name] = np.memmap(file, dtype=dtype, mode="r+", shape=shape)
+        self._vectors = maps["vectors.bin"]
+        self._scales = maps["scales.bin"]
+        self._types = maps["types.bin"]
+        self._ids = maps["ids.bin"]
+        self._capacity = capacity
+        return maps
+
+    def _meta(self) -> Dict:
+        return {
+            "version": FORMAT_VERSION,
+            "model": self.model,
+            "dimensions": self.dimensions,
+            "dtype": self.dtype,
+            "capacity": self._capacity,
+            "size": self._size,
+            "source_types": self._type_names,
+            "count": len(self._slots),
+            "checksum": self._checksum,
+        }
+
+    def _write_meta(self):
+        tmp = self._file("meta.json.tmp")
+        tmp.write_text(json.dumps(self._meta()))
+        os.replace(tmp, self._file("meta.json"))
+
+    def _memmaps(self) -> List[np.memmap]:
+        return [self._vectors, self._scales, self._types, self._ids]
+
+    def flush(self):
+        """Persists pending writes (called after each batch of changes)"""
+        with self._lock:
+            if not self._dirty or self._vectors is None:
+                return
+            for mm in self._memmaps():
+                mm.flush()
+            self._write_meta()
+            self._dirty = False
+
+    def _create(self, capacity: int):
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._type_names = []
+        self._slots = {}
+        self._free = []
+        self._size = 0
+        self._checksum = 0
+        self._map(capacity, "w+")
+        self._clear_slots(0)
+        self._dirty = True
+
+    def _clear_slots(self, start: int):
+        """Marks slots from `start` on as free"""
+        self._types[start:] = -1
+
+    def _compatible(self, meta: Dict) -> bool:
+        return (meta.get("version"), meta.get("model"), meta.get("dimensions"), meta.get("dtype")) == (
+            FORMAT_VERSION, self.model, self.dimensions, self.dtype
+        )
+
+    def _open(self) -> bool:
+        """Maps existing files; False if missing, torn, or built for another model/format"""
+        try:
+            meta = json.loads(self._file("meta.json").read_text())
+        except (OSError, ValueError):
+            return False
+        if not self._compatible(meta):
+            return False
+        try:
+            self._map(meta["capacity"], "r+")
+        except (OSError, ValueError):
+            return False
+        self._type_names = meta["source_types"]
+        self._size = meta["size"]
+        types = np.asarray(self._types[:self._size])
+        live = np.flatnonzero(types >= 0)
+        self._slots = dict(zip(np.asarray(self._ids[live]).tolist(), live.tolist()))
+        self._free = np.flatnonzero(types < 0).tolist()
+        # Slot files flushed without the meta.json that goes with them
+        self._checksum = id_checksum(self._slots)
+        if (len(self._slots), self._checksum) != (meta.get("count"), meta.get("checksum")):
+            return False
+        self._opened(meta)
+        return True
+
+    def _opened(self, meta: Dict):
+        """Hook for subclasses restoring their own state from meta.json"""
+
+    def _grow(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = max(self._capacity, 1024)
+        while capacity < needed:
+            capacity *= 2
+        for mm in self._memmaps():
+            mm.flush()
+        old = self._capacity
+        self._map(capacity, "r+")
+        self._clear_slots(old)
+        self._write_meta()
+
+    # Writes
+
+    def _type_code(self, source_type: str) -> int:
+        if source_type not in self._type_names:
+            if len(self._type_names) >= 127:
+                raise ValueError("Too many source types")
+            self._type_names.append(source_type)
+        return self._type_names.index(source_type)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        source_types: Sequence[str],
+        source_ids: Sequence[str],
+        vectors: np.ndarray,
+    ):
+        """Inserts or replaces rows (source_ids are resolved from SQLite at query time)"""
+        if not len(ids):
+            return
+        quantized, scales = quantize(vectors, self.dtype)
+        if quantized.shape[1] != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {quantized.shape[1]}")
+        keys = [row_id.encode("utf-8") for row_id in ids]
+        if any(len(key) > ID_DTYPE.itemsize for key in keys):
+            raise ValueError(f"Embedding ids longer than {ID_DTYPE.itemsize} bytes are not supported")
+        with self._lock:
+            slots = []
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is None:
+                    if self._free:
+                        slot = self._free.pop()
+                    else:
+                        slot = self._size
+                        self._size += 1
+                    self._slots[key] = slot
+                    self._checksum = (self._checksum + _id_hash(key)) & CHECKSUM_MASK
+                slots.append(slot)
+            self._grow(self._size)
+            slots_array = np.asarray(slots)
+            self._vectors[slots_array] = quantized
+            self._scales[slots_array] = scales
+            self._types[slots_array] = [self._type_code(t) for t in source_types]
+            self._ids[slots_array] = keys
+            self._dirty = True
+
+    def remove(self, ids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for row_id in ids:
+                slot = self._slots.pop(row_id.encode("utf-8"), None)
+                if slot is None:
+                    continue
+                self._checksum = (self._checksum - _id_hash(row_id.encode("utf-8"))) & CHECKSUM_MASK
+                self._types[slot] = -1
+                self._ids[slot] = b""
+                self._free.append(slot)
+                removed += 1
+            self._dirty = self._dirty or removed > 0
+        return removed
+
+    # Search
+
+    def _candidates(self, q: np.ndarray, k: int, codes: Optional[np.ndarray]) -> np.ndarray:
+        """Best k slots by approximate score, scanning the mmap block by block"""
+        best_slots = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        rows = max(SCAN_BLOCK_BYTES // (4 * self.dimensions), 256)
+        buffer = np.empty((min(rows, self._size), self.dimensions), dtype=np.float32)
+        for start in range(0, self._size, rows):
+            stop = min(start + rows, self._size)
+            block = buffer[:stop - start]
+            np.copyto(block, self._vectors[start:stop], casting="unsafe")
+            scores = block @ q
+            scores *= self._scales[start:stop]
+            types = self._types[start:stop]
+            valid = types >= 0 if codes is None else np.isin(types, codes)
+            scores[~valid] = -np.inf
+
+            take = min(k, stop - start)
+            top = np.argpartition(-scores, take - 1)[:take] if take < len(scores) else np.arange(len(scores))
+            top = top[np.isfinite(scores[top])]
+            best_slots = np.concatenate([best_slots, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if len(best_slots) > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_slots, best_scores = best_slots[keep], best_scores[keep]
+        return best_slots[np.argsort(-best_scores, kind="stable")]
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 10,
+        source_types: Optional[Sequence[str]] = None,
+        conn: Optional[sqlite3.Connection] = None,
+    ) -> List[Tuple[str, str, str, float]]:
+        """
+        Top-k rows by cosine similarity: quantized scan, then exact re-rank.
+
+        Returns (embedding id, source_type, source_id, score), best first.
+        """
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        if q.shape[0] != self.dimensions:
+            raise ValueError(f"Expected a {self.dimensions}-dimensional query, got {q.shape[0]}")
+        norm = np.linalg.norm(q)
+        if norm:
+            q = q / norm
+
+        with self._lock:
+            if not self._slots or k <= 0:
+                return []
+            codes = None
+            if source_types:
+                codes = np.asarray(
+                    [self._type_names.index(t) for t in source_types if t in self._type_names], dtype=np.int8
+                )
+                if not len(codes):
+                    return []
+            pool = max(k * self.rerank, 100)
+            slots = self._candidates(q, pool, codes)
+            candidate_ids = [key.decode("utf-8") for key in np.asarray(self._ids[slots]).tolist()]
+        return self._rerank(q, candidate_ids, k, conn)
+
+    def _rerank(
+        self,
+        q: np.ndarray,
+        candidate_ids: List[str],
+        k: int,
+        conn: Optional[sqlite3.Connection],
+    ) -> List[Tuple[str, str, str, float]]:
+        """Exact scores of candidates from their float32 BLOBs"""
+        if not candidate_ids:
+            return []
+        own = conn is None
+        conn = conn or self.connection_factory()
+        try:
+            placeholders = ", ".join("?" for _ in candidate_ids)
+            rows = conn.execute(
+                f"SELECT id, source_type, source_id, embedding FROM embeddings WHERE id IN ({placeholders})",
+                candidate_ids
+            ).fetchall()
+        finally:
+            if own:
+                conn.close()
+        if not rows:
+            return []
+
+        exact = normalize(np.frombuffer(b"".join(r[3] for r in rows), dtype=EMBEDDING_DTYPE)
+                          .reshape(len(rows), -1).copy())
+        scores = exact @ q
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(rows[i][0], rows[i][1], rows[i][2], float(scores[i])) for i in order]
+
+    # Lifecycle
+
+    def load(self, conn: sqlite3.Connection, model: Optional[str] = None, batch_size: int = 10000) -> int:
+        """
+        Opens the sidecar, rebuilding it from SQLite only when it is missing,
+        was built for another model or format, or holds other ids than the
+        table (count and checksum; the vectors themselves are not re-read).
+        """
+        ids = [row[0].encode("utf-8") for row in conn.execute(
+            "SELECT id FROM embeddings WHERE model = ?", (self.model,)
+        )]
+        expected = (len(ids), id_checksum(ids))
+        with self._lock:
+            if self._open() and (len(self), self._checksum) == expected:
+                self.ready = True
+                return len(self)
+            logger.info("Rebuilding vector store at %s", self.path)
+            self._create(max(expected[0], 1024))
+
+        # Pages are added under the lock one at a time, so pipeline changes
+        # can interleave; add/remove are idempotent and re-ranking reads
+        # SQLite, so a row deleted mid-rebuild can never be returned.
+        last_rowid = 0
+        while True:
+            rows = conn.execute(
+                """
+                SELECT rowid, id, source_type, source_id, embedding FROM embeddings
+                WHERE model = ? AND rowid > ? ORDER BY rowid LIMIT ?
+                """,
+                (self.model, last_rowid, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            vectors = np.frombuffer(b"".join(r[4] for r in rows), dtype=EMBEDDING_DTYPE)
+            self.add([r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows],
+                     vectors.reshape(len(rows), -1))
+        self.flush()
+        self.ready = True
+        return len(self)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            types = np.asarray(self._types[:self._size]) if self._types is not None else np.empty(0)
+            return {
+                "model": self.model,
+                "dimensions": self.dimensions,
+                "dtype": self.dtype,
+                "vectors": len(self),
+                "capacity": self._capacity,
+                "free_slots": len(self._free),
+                "file_bytes": 0 if self._vectors is None else self._vectors.nbytes,
+                "path": str(self.path),
+                "ready": self.ready,
+                "by_source_type": {
+                    name: int((types == code).sum()) for code, name in enumerate(self._type_names)
+                },
+            }
@@ -0,0 +1,134 @@
+"""
+Conditional requests: ETag, If-None-Match and If-Match
+
+Validators come from `row_versions` (see services/sync.py). A row's
+version changes with every write to it, and the highest version of an
+entity type changes with every write to any row of that type. Both are
+single index lookups. So a conditional GET that ends in 304 costs a
+couple of B-tree probes and never runs the endpoint: no queries, no
+serialization.
+
+Tags:
+- one row: `"<row version>.<dependencies>"`. The dependencies part is
+  the highest version of the entity types the response also draws on,
+  such as a note's backlinks or an event's linked notes and tasks.
+- a collection: `"<highest version of its entity types>"`.
+
+The version is read before the endpoint runs. A write in between can
+only pair an older tag with newer data. That costs the client one more
+download later, but never a stale 304.
+
+If-Match compares the row version part only. An edit elsewhere that
+changes nothing but a note's backlinks does not fail a concurrent PATCH.
+
+A gzipped response carries its tag with a `-gzip` suffix (see
+responses.py). Both checks accept either variant.
+"""
+import sqlite3
+from datetime import date
+from typing import Callable, Optional, Sequence
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from .database import get_db_connection
+from .responses import GZIP_ETAG_SUFFIX
+from .services.sync import compacted_version, row_version
+
+
+def entity_version(conn: sqlite3.Connection, entities: Sequence[str]) -> int:
+    """Changes with every insert, update or delete of the given entity types"""
+    # Compaction can drop the newest tombstone; its version must not fall out of the max
+    version = compacted_version(conn)
+    for entity in entities:
+        latest = conn.execute("SELECT MAX(version) FROM row_versions WHERE entity = ?", (entity,)).fetchone()[0]
+        version = max(version, latest or 0)
+    return version
+
+
+def row_etag(conn: sqlite3.Connection, entity: str, entity_id: str, depends_on: Sequence[str] = ()) -> Optional[str]:
+    """Tag of one row's representation; None if the row does not exist"""
+    row = conn.execute(
+        "SELECT version, deleted_at FROM row_versions WHERE entity = ? AND entity_id = ?", (entity, entity_id)
+    ).fetchone()
+    if row is None or row[1] is not None:
+        return None
+    if depends_on:
+        return f'"{row[0]}.{entity_version(conn, depends_on)}"'
+    return f'"{row[0]}"'
+
+
+def _tags(header: str):
+    return [_identity_tag(tag.strip()) for tag in header.split(",")]
+
+
+def _identity_tag(tag: str) -> str:
+    """The tag of the uncompressed representation"""
+    suffix = GZIP_ETAG_SUFFIX + '"'
+    return tag[:-len(suffix)] + '"' if tag.endswith(suffix) else tag
+
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """False when If-None-Match lists the current tag (weak comparison)"""
+    if not header:
+        return True
+    return not any(tag == "*" or tag.replace("W/", "", 1) == etag for tag in _tags(header))
+
+
+def conditional(
+    entity: str,
+    path_param: Optional[str] = None,
+    depends_on: Sequence[str] = (),
+    vary: Optional[Callable[[Request], Optional[str]]] = None,
+):
+    """
+    Route dependency: sets ETag and answers If-None-Match hits with 304.
+
+    Args:
+        entity: Entity type of the resource.
+        path_param: Path parameter holding the row id; None for collections.
+        depends_on: Other entity types the response includes data from.
+        vary: Extra tag component for inputs other than stored rows (e.g. the current day).
+    """
+    async def check(request: Request, response: Response):
+        conn = get_db_connection()
+        try:
+            if path_param:
+                etag = row_etag(conn, entity, request.path_params[path_param], depends_on)
+            else:
+                etag = f'"{entity_version(conn, (entity, *depends_on))}"'
+        finally:
+            conn.close()
+        if etag is None:
+            return    # Not a stored row (404, or a virtual id); the endpoint decides
+        extra = vary(request) if vary else None
+        if extra:
+            etag = f'{etag[:-1]}.{extra}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if not none_match(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(check)
+
+
+def if_match(conn: sqlite3.Connection, request: Request, entity: str, entity_id: str) -> bool:
+    """
+    Checks If-Match against the row's current version.
+
+    With the header present, opens the write transaction first so the
+    check and the caller's UPDATE are atomic; the caller commits.
+    """
+    header = request.headers.get("if-match")
+    if not header:
+        return True
+    conn.execute("BEGIN IMMEDIATE")
+    current = row_version(conn, entity, entity_id)
+    for tag in _tags(header):
+        if tag == "*" or (not tag.startswith("W/") and tag.strip('"').split(".")[0] == str(current)):
+            return True
+    return False
+
+
+def today_tag(request: Request) -> str:
+    """`vary` for resources that default to the current day"""
+    return request.query_params.get("target_date") or date.today().isoformat()
@@ -3,7 +3,7 @@ Configuration management for Atlas API
 """
 from pydantic_settings import BaseSettings
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -23,11 +23,77 @@ class Settings(BaseSettings):
     google_client_id: Optional[str] = None
     google_client_secret: Optional[str] = None
 
+    # Calendar sync
+    calendar_api_url: str = "https://www.googleapis.com/calendar/v3"
+    calendar_access_token: Optional[str] = None
+    calendar_sync_concurrency: int = 4
+
     # AI Models
     chat_model: str = "gpt-4o-mini"
     heavy_model: str = "gpt-4o"
     embedding_model: str = "text-embedding-3-large"
 
+    # AI client
+    ai_api_base_url: str = "https://api.openai.com/v1"  # any OpenAI-compatible API, e.g. benchmarks/mock_ai_server.py
+    ai_max_concurrency: int = 8  # requests in flight per model
+    ai_tokens_per_minute: int = 0  # per model; 0 = no client-side budget
+    ai_model_limits: Dict[str, Dict[str, int]] = {}  # {"gpt-4o": {"max_concurrency": 2, "tokens_per_minute": 30000}}
+    ai_max_retries: int = 4
+    ai_request_timeout_seconds: float = 60.0
+    ai_embedding_batch_window_ms: int = 10  # embedding calls this close together share a request
+
+    # AI responses
+    ai_response_cache_ttl_seconds: int = 86400
+
+    # Chat context (tokens per turn)
+    chat_context_tokens: int = 6000  # system prompt + rolling summary + history + retrieved excerpts
+    chat_retrieval_tokens: int = 1500  # most of it spent on retrieved excerpts
+    chat_summary_tokens: int = 400  # size cap of the rolling summary of older turns
+
+    # Daily briefings generated ahead of time
+    briefing_scheduler_enabled: bool = True
+    briefing_days_ahead: int = 1  # today plus this many days are kept ready
+    briefing_refresh_seconds: float = 300.0
+    briefing_debounce_seconds: float = 60.0  # quiet time after a task/event change before regenerating
+
+    # Conversation archive (cold store)
+    archive_enabled: bool = True
+    archive_database_path: Optional[str] = None  # default: atlas_archive.db next to the database
+    archive_idle_days: int = 90  # unpinned conversations untouched this long are archived
+    archive_batch_size: int = 200
+    archive_interval_hours: float = 6.0
+    archive_compact_ratio: float = 0.25  # VACUUM once free pages reach this share of a file
+
+    # Change feed
+    changes_poll_interval_ms: int = 250  # how often the log is checked while clients listen
+    changes_retention_days: float = 7.0  # clients further behind must reload
+    changes_heartbeat_seconds: float = 15.0  # SSE keepalive comment interval
+    sync_tombstone_retention_days: float = 30.0  # clients offline longer get a full snapshot from /api/sync
+
+    # Responses
+    compression_enabled: bool = False  # gzip costs more than it saves over loopback; enable when served across a network
+    compression_min_bytes: int = 1024  # smaller responses, and streamed ones, are sent as is
+    compression_level: int = 1  # gzip level; higher levels save little on JSON and cost CPU on both ends
+    batch_max_requests: int = 50  # sub-requests per POST /api/batch
+
+    # Embeddings pipeline
+    embedding_provider: str = "auto"  # auto | openai | local
+    local_embedding_dimensions: int = 256
+    embedding_batch_size: int = 64
+    embedding_max_concurrency: int = 2
+    embedding_worker_enabled: bool = True
+    embedding_max_pending_jobs: int = 50000
+    embedding_cache_max_mb: int = 256  # 0 disables the embedding cache
+
+    # Vector search
+    vector_store: str = "mmap"  # mmap (quantized sidecar file) | ivf (mmap + approximate index) | memory
+    vector_store_dtype: str = "int8"  # int8 | float16
+    vector_rerank: int = 10  # candidates re-scored exactly, as a multiple of k
+    vector_ivf_nlist: int = 0  # 0 = ~sqrt(vectors)
+    vector_ivf_nprobe: int = 16  # clusters scanned per query: higher = better recall, slower
+    vector_ivf_min_train_size: int = 10000
+    hybrid_search_budget_ms: int = 300  # beyond this, /api/ai/search/hybrid answers lexical-only
+
     class Config:
         env_file = ".env"
         case_sensitive = False
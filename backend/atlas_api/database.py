@@ -3,8 +3,9 @@ Database connection and session management
 """
 import sqlite3
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Optional
 from contextlib import contextmanager
+from contextvars import ContextVar
 from .config import settings, get_data_dir
 
 
@@ -33,6 +34,9 @@ def init_db():
     conn = sqlite3.connect(str(db_path))
     conn.executescript(schema_sql)
     conn.commit()
+    # Persistent: readers keep their snapshot without blocking writers (streamed
+    # sync pages, batch read runs), and a writer never waits for a reader
+    conn.execute("PRAGMA journal_mode=WAL")
     conn.close()
 
     print(f"Database initialized at {db_path}")
@@ -86,8 +90,108 @@ def get_db() -> Generator[sqlite3.Connection, None, None]:
         conn.close()
 
 
+class SharedConnection:
+    """
+    A connection lent to every get_db_connection() call in a scope.
+
+    Callers treat it as their own, so it ignores the calls that end the
+    scope's transaction: close(), commit() and BEGIN. In a write scope,
+    rollback() undoes the current savepoint only.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, write: bool):
+        self._conn = conn
+        self._write = write
+        self.active = True
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql: str, *args):
+        if sql.lstrip()[:5].upper() == "BEGIN":
+            return self._conn.cursor()    # Already inside the scope's transaction
+        return self._conn.execute(sql, *args)
+
+    def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        if self._write:
+            self._conn.execute("ROLLBACK TO batch_item")
+
+    def savepoint(self):
+        if self._write:
+            self._conn.execute("SAVEPOINT batch_item")
+
+    def release(self):
+        if self._write:
+            self._conn.execute("RELEASE batch_item")
+
+    def abort(self):
+        """Rolls back the whole transaction; the scope's exit then has nothing to commit"""
+        self._conn.rollback()
+
+
+_shared_connection: ContextVar[Optional[SharedConnection]] = ContextVar("shared_connection", default=None)
+
+
+@contextmanager
+def shared_connection(write: bool = False) -> Generator[SharedConnection, None, None]:
+    """
+    Serves one connection and transaction to all code running in the block.
+
+    Read scopes see a single snapshot. Write scopes take the write lock
+    up front. Both are committed on a clean exit, unless aborted, and
+    rolled back on an error.
+    Calls must not overlap: the connection is used by one caller at a time.
+    """
+    db_path = get_db_path()
+
+    if not db_path.exists():
+        init_db()
+
+    # Callers may hop to worker threads; they still never use it concurrently
+    conn = sqlite3.connect(str(db_path), check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+    shared = SharedConnection(conn, write)
+    token = _shared_connection.set(shared)
+    try:
+        yield shared
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _shared_connection.reset(token)
+        shared.active = False    # Tasks spawned in the scope keep its context
+        conn.close()
+
+
+def in_shared_scope() -> bool:
+    """Whether get_db_connection() currently lends a shared_connection"""
+    shared = _shared_connection.get()
+    return shared is not None and shared.active
+
+
 def get_db_connection() -> sqlite3.Connection:
     """Get a database connection (for dependency injection)"""
+    if in_shared_scope():
+        return _shared_connection.get()
+    return connect_db()
+
+
+def connect_db() -> sqlite3.Connection:
+    """A connection of its own, also inside a shared_connection scope"""
     db_path = get_db_path()
 
     if not db_path.exists():
@@ -0,0 +1,69 @@
+"""
+Sparse fieldsets for list endpoints
+
+`?fields=id,title,updated_at`, or a preset name such as `summary`, picks
+what each item carries. Stored columns go into the SELECT list. Computed
+fields (parsed links, task counts, backlinks) are only derived when
+requested; the columns they read are fetched for them but not returned
+unless also requested.
+"""
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    fields: Tuple[str, ...]      # Returned, in declaration order
+    columns: Tuple[str, ...]     # Selected from the table
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.fields
+
+    def select(self, alias: str = "") -> str:
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(prefix + column for column in self.columns)
+
+    def stored(self, row) -> Dict:
+        """The requested stored columns of a row"""
+        return {column: row[column] for column in self.columns if column in self.fields}
+
+
+def parse_fields(
+    fields: Optional[str],
+    columns: Sequence[str],
+    computed: Mapping[str, Sequence[str]] = {},
+    presets: Mapping[str, Sequence[str]] = {},
+    default: Optional[Sequence[str]] = None,
+) -> Fieldset:
+    """
+    Resolves a `fields` parameter; `id` is always included.
+
+    Args:
+        columns: Stored columns, in output order.
+        computed: Computed field -> columns it is derived from.
+        presets: Named fieldsets.
+        default: Fields when the parameter is omitted (all of them if None).
+
+    Raises ValueError for unknown fields.
+    """
+    known = list(columns) + list(computed)
+    if fields is None:
+        wanted = set(default if default is not None else known)
+    else:
+        wanted = set()
+        for name in (f.strip() for f in fields.split(",")):
+            if name in presets:
+                wanted.update(presets[name])
+            elif name in known:
+                wanted.add(name)
+            elif name:
+                raise ValueError(f"Unknown field: {name}")
+    wanted.add("id")
+
+    needed = set(wanted)
+    for name in wanted & set(computed):
+        needed.update(computed[name])
+    return Fieldset(
+        fields=tuple(f for f in known if f in wanted),
+        columns=tuple(c for c in columns if c in needed),
+    )
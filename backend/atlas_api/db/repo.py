@@ -0,0 +1,106 @@
+"""
+Batched loaders for link tables
+
+Each loader resolves a relation for a whole page of parent rows with one
+grouped query (chunked to stay under SQLite's bound-parameter limit), so
+list endpoints avoid issuing a query per row.
+"""
+import sqlite3
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence
+
+# Keeps IN (...) lists well below SQLITE_MAX_VARIABLE_NUMBER on older builds
+CHUNK_SIZE = 500
+
+
+def _grouped(conn: sqlite3.Connection, query: str, ids: Iterable[str]) -> Dict[str, List[Dict]]:
+    """Runs `query` (with a single {placeholders} slot) and groups rows by their first column"""
+    ids = list(dict.fromkeys(i for i in ids if i))
+    grouped: Dict[str, List[Dict]] = defaultdict(list)
+    for i in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[i:i + CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in conn.execute(query.format(placeholders=placeholders), chunk):
+            item = dict(row)
+            grouped[item.pop("parent_id")].append(item)
+    return grouped
+
+
+def load_event_notes(conn: sqlite3.Connection, event_ids: Iterable[str]) -> Dict[str, List[Dict]]:
+    """Note summaries linked to each event"""
+    return _grouped(conn, """
+        SELECT en.event_id AS parent_id, n.id, n.title, n.updated_at
+        FROM event_notes en
+        JOIN notes n ON n.id = en.note_id
+        WHERE en.event_id IN ({placeholders})
+        ORDER BY n.title
+    """, event_ids)
+
+
+def load_event_tasks(conn: sqlite3.Connection, event_ids: Iterable[str]) -> Dict[str, List[Dict]]:
+    """Task summaries linked to each event"""
+    return _grouped(conn, """
+        SELECT et.event_id AS parent_id, t.id, t.title, t.status, t.priority, t.due_date
+        FROM event_tasks et
+        JOIN tasks t ON t.id = et.task_id
+        WHERE et.event_id IN ({placeholders})
+        ORDER BY t.due_date IS NULL, t.due_date, t.title
+    """, event_ids)
+
+
+def load_project_notes(conn: sqlite3.Connection, project_ids: Iterable[str]) -> Dict[str, List[Dict]]:
+    """Note summaries linked to each project"""
+    return _grouped(conn, """
+        SELECT pn.project_id AS parent_id, n.id, n.title, n.updated_at
+        FROM project_notes pn
+        JOIN notes n ON n.id = pn.note_id
+        WHERE pn.project_id IN ({placeholders})
+        ORDER BY n.title
+    """, project_ids)
+
+
+def load_backlinks(conn: sqlite3.Connection, titles: Iterable[str]) -> Dict[str, List[Dict]]:
+    """Notes linking to each title via [[wiki links]]"""
+    return _grouped(conn, """
+        SELECT nl.target_note_title AS parent_id, n.id AS note_id, n.title
+        FROM note_links nl
+        JOIN notes n ON n.id = nl.source_note_id
+        WHERE nl.target_note_title IN ({placeholders})
+    """, titles)
+
+
+def _merge(*groups: Sequence[Dict]) -> List[Dict]:
+    seen = set()
+    merged = []
+    for group in groups:
+        for item in group:
+            if item["id"] not in seen:
+                seen.add(item["id"])
+                merged.append(item)
+    return merged
+
+
+def attach_event_links(conn: sqlite3.Connection, events: List[Dict]) -> List[Dict]:
+    """
+    Sets `linked_notes` and `linked_tasks` on a page of events.
+
+    Occurrences of a recurring series (and its overrides) also inherit the
+    links of the series itself.
+    """
+    keys = [e["id"] for e in events] + [e.get("recurring_event_id") for e in events]
+    notes = load_event_notes(conn, keys)
+    tasks = load_event_tasks(conn, keys)
+    for event in events:
+        series_id = event.get("recurring_event_id")
+        event["linked_notes"] = _merge(notes.get(event["id"], ()), notes.get(series_id, ()))
+        event["linked_tasks"] = _merge(tasks.get(event["id"], ()), tasks.get(series_id, ()))
+    return events
+
+
+def attach_project_notes(conn: sqlite3.Connection, projects: List[Dict]) -> List[Dict]:
+    """Sets `linked_notes` on a page of projects"""
+    notes = load_project_notes(conn, [p["id"] for p in projects])
+    for project in projects:
+        project["linked_notes"] = notes.get(project["id"], [])
+    return projects
+
@@ -14,6 +14,8 @@ CREATE TABLE IF NOT EXISTS notes (
   updated_at    TIMESTAMP NOT NULL
 );
 
+CREATE INDEX IF NOT EXISTS idx_notes_updated_at ON notes(updated_at);
+
 -- Full-text search index for notes
 CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
   title,
@@ -63,6 +65,7 @@ CREATE TABLE IF NOT EXISTS tasks (
 
 CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
 CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_open_due ON tasks(due_date) WHERE status IN ('todo', 'in_progress');
 CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project_id);
 
 -- ============================================================================
@@ -80,11 +83,20 @@ CREATE TABLE IF NOT EXISTS events (
   external_id TEXT,
   calendar_id TEXT,
   created_at  TIMESTAMP NOT NULL,
-  updated_at  TIMESTAMP NOT NULL
+  updated_at  TIMESTAMP NOT NULL,
+  rrule               TEXT,           -- RFC 5545 RRULE; set on recurring series only
+  exdates             TEXT,           -- JSON array of cancelled occurrence starts
+  recurring_event_id  TEXT,           -- Series this row overrides an occurrence of
+  original_start_time TIMESTAMP,      -- Occurrence start replaced by this override
+  series_end          TIMESTAMP,      -- End of the last occurrence (NULL = unbounded)
+  local_exdates       TEXT            -- JSON array of the exdates cancelled here rather than in the source's EXDATE list
 );
 
 CREATE INDEX IF NOT EXISTS idx_events_start_time ON events(start_time);
 CREATE INDEX IF NOT EXISTS idx_events_source ON events(source);
+CREATE INDEX IF NOT EXISTS idx_events_series ON events(start_time, series_end) WHERE rrule IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_events_recurring ON events(recurring_event_id, original_start_time);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_events_external ON events(calendar_id, external_id);
 
 -- Event Links
 CREATE TABLE IF NOT EXISTS event_notes (
@@ -134,7 +146,9 @@ CREATE TABLE IF NOT EXISTS conversations (
   created_at            TIMESTAMP NOT NULL,
   updated_at            TIMESTAMP NOT NULL,
   last_message_preview  TEXT,
-  pinned                INTEGER NOT NULL DEFAULT 0
+  pinned                INTEGER NOT NULL DEFAULT 0,
+  archived_at           TIMESTAMP,          -- Messages moved to the cold store (NULL = hot)
+  rehydrated_at         TIMESTAMP           -- Last moved back by opening it; idle time counts from here too
 );
 
 CREATE TABLE IF NOT EXISTS chat_messages (
@@ -145,10 +159,48 @@ CREATE TABLE IF NOT EXISTS chat_messages (
   model           TEXT,
   timestamp       TIMESTAMP NOT NULL,
   references_json TEXT,               -- JSON: { notes: [...], tasks: [...] }
+  token_count     INTEGER,            -- Estimated tokens of content (NULL for older rows)
+  FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+);
+
+-- Keyset pagination within a conversation; id breaks timestamp ties
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_cursor ON chat_messages(conversation_id, timestamp, id);
+
+-- Full-text search index for chat messages
+CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+  content,
+  content=chat_messages,
+  content_rowid=rowid
+);
+
+CREATE TRIGGER IF NOT EXISTS chat_messages_ai AFTER INSERT ON chat_messages BEGIN
+  INSERT INTO chat_messages_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS chat_messages_ad AFTER DELETE ON chat_messages BEGIN
+  INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS chat_messages_au AFTER UPDATE OF content ON chat_messages BEGIN
+  INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+  INSERT INTO chat_messages_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+
+-- Rolling summary of the turns that no longer fit the chat context window
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+  conversation_id  TEXT PRIMARY KEY,
+  summary          TEXT NOT NULL,
+  token_count      INTEGER NOT NULL,
+  covers_until     TIMESTAMP NOT NULL,  -- Messages up to this timestamp are folded into the summary
+  message_count    INTEGER NOT NULL,
+  model            TEXT NOT NULL,
+  updated_at       TIMESTAMP NOT NULL,
   FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
 );
 
-CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation ON chat_messages(conversation_id);
+CREATE TRIGGER IF NOT EXISTS conversations_ad AFTER DELETE ON conversations BEGIN
+  DELETE FROM conversation_summaries WHERE conversation_id = old.id;
+END;
 
 -- ============================================================================
 -- EMBEDDINGS
@@ -162,11 +214,256 @@ CREATE TABLE IF NOT EXISTS embeddings (
   content     TEXT NOT NULL,
   embedding   BLOB NOT NULL,        -- Serialized float array
   model       TEXT NOT NULL,
-  created_at  TIMESTAMP NOT NULL
+  created_at  TIMESTAMP NOT NULL,
+  content_hash TEXT                 -- sha256 of the embedded text
 );
 
 CREATE INDEX IF NOT EXISTS idx_embeddings_source ON embeddings(source_type, source_id);
 
+-- Provider responses keyed by normalized text, shared by every source type
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  model        TEXT NOT NULL,
+  text_hash    TEXT NOT NULL,         -- sha256 of the normalized text
+  embedding    BLOB NOT NULL,
+  tokens       INTEGER NOT NULL,      -- Estimated tokens the provider would bill
+  size         INTEGER NOT NULL,      -- Bytes counted against the cache budget
+  hits         INTEGER NOT NULL DEFAULT 0,
+  created_at   TIMESTAMP NOT NULL,
+  last_used_at REAL NOT NULL,         -- Unix time, for LRU eviction
+  PRIMARY KEY (model, text_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_lru ON embedding_cache(last_used_at);
+
+-- ============================================================================
+-- BACKGROUND JOBS
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS jobs (
+  id          INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind        TEXT NOT NULL,        -- embed_note | embed_task | ...
+  key         TEXT NOT NULL,        -- Deduplication key (usually the source id)
+  payload     TEXT,                 -- JSON blob
+  status      TEXT NOT NULL DEFAULT 'pending',  -- pending | running | failed
+  attempts    INTEGER NOT NULL DEFAULT 0,
+  generation  INTEGER NOT NULL DEFAULT 0,       -- Bumped on every re-enqueue
+  run_after   TIMESTAMP NOT NULL,
+  last_error  TEXT,
+  created_at  TIMESTAMP NOT NULL,
+  updated_at  TIMESTAMP NOT NULL,
+  UNIQUE (kind, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_after);
+
+-- ============================================================================
+-- AI RESPONSE CACHE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS ai_response_cache (
+  key              TEXT PRIMARY KEY,   -- sha256 of kind, model, template version, inputs
+  kind             TEXT NOT NULL,      -- note_summary | daily_briefing
+  model            TEXT NOT NULL,
+  template_version INTEGER NOT NULL,
+  response         TEXT NOT NULL,      -- JSON
+  hits             INTEGER NOT NULL DEFAULT 0,
+  created_at       TIMESTAMP NOT NULL,
+  expires_at       TIMESTAMP NOT NULL
+);
+
+-- What each cached response was derived from: note:<id>, notes, tasks, events
+CREATE TABLE IF NOT EXISTS ai_response_deps (
+  key  TEXT NOT NULL,
+  dep  TEXT NOT NULL,
+  PRIMARY KEY (key, dep)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_response_deps_dep ON ai_response_deps(dep);
+
+CREATE TRIGGER IF NOT EXISTS ai_response_cache_ad AFTER DELETE ON ai_response_cache BEGIN
+  DELETE FROM ai_response_deps WHERE key = old.key;
+END;
+
+-- Invalidate in the same transaction as the change, whichever code path writes
+CREATE TRIGGER IF NOT EXISTS ai_cache_notes_ai AFTER INSERT ON notes BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'notes');
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_cache_notes_au AFTER UPDATE ON notes BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (
+    SELECT key FROM ai_response_deps WHERE dep IN ('notes', 'note:' || old.id)
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_cache_notes_ad AFTER DELETE ON notes BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (
+    SELECT key FROM ai_response_deps WHERE dep IN ('notes', 'note:' || old.id)
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_cache_tasks_ai AFTER INSERT ON tasks BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'tasks');
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_cache_tasks_au AFTER UPDATE ON tasks BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'tasks');
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_cache_tasks_ad AFTER DELETE ON tasks BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'tasks');
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_cache_events_ai AFTER INSERT ON events BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'events');
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_cache_events_au AFTER UPDATE ON events BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'events');
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_cache_events_ad AFTER DELETE ON events BEGIN
+  DELETE FROM ai_response_cache WHERE key IN (SELECT key FROM ai_response_deps WHERE dep = 'events');
+END;
+
+-- ============================================================================
+-- DAILY BRIEFINGS
+-- ============================================================================
+
+-- Briefings generated ahead of time by the scheduler (ai/briefings.py)
+CREATE TABLE IF NOT EXISTS daily_briefings (
+  date             TEXT PRIMARY KEY,   -- YYYY-MM-DD
+  markdown         TEXT NOT NULL,
+  references_json  TEXT NOT NULL,      -- JSON: { tasks: [...], events: [...], notes: [...] }
+  model            TEXT NOT NULL,
+  template_version INTEGER NOT NULL,
+  overview_hash    TEXT NOT NULL,      -- sha256 of the overview it was written from
+  generated_at     TIMESTAMP NOT NULL,
+  stale_since      TIMESTAMP           -- Last relevant task/event change since generation; NULL = fresh
+);
+
+-- Tasks matter to a day once they are due by then (overdue or due that day)
+CREATE TRIGGER IF NOT EXISTS daily_briefings_tasks_ai AFTER INSERT ON tasks BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(new.due_date, 1, 10) <= date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_briefings_tasks_au AFTER UPDATE ON tasks BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(new.due_date, 1, 10) <= date OR substr(old.due_date, 1, 10) <= date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_briefings_tasks_ad AFTER DELETE ON tasks BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(old.due_date, 1, 10) <= date;
+END;
+
+-- Events matter to the days they span (any day until the series ends, for recurring ones)
+CREATE TRIGGER IF NOT EXISTS daily_briefings_events_ai AFTER INSERT ON events BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(new.start_time, 1, 10) <= date
+    AND (substr(new.end_time, 1, 10) >= date
+         OR (new.rrule IS NOT NULL AND COALESCE(substr(new.series_end, 1, 10), '9999') >= date));
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_briefings_events_au AFTER UPDATE ON events BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE (substr(new.start_time, 1, 10) <= date
+         AND (substr(new.end_time, 1, 10) >= date
+              OR (new.rrule IS NOT NULL AND COALESCE(substr(new.series_end, 1, 10), '9999') >= date)))
+     OR (substr(old.start_time, 1, 10) <= date
+         AND (substr(old.end_time, 1, 10) >= date
+              OR (old.rrule IS NOT NULL AND COALESCE(substr(old.series_end, 1, 10), '9999') >= date)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_briefings_events_ad AFTER DELETE ON events BEGIN
+  UPDATE daily_briefings SET stale_since = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+  WHERE substr(old.start_time, 1, 10) <= date
+    AND (substr(old.end_time, 1, 10) >= date
+         OR (old.rrule IS NOT NULL AND COALESCE(substr(old.series_end, 1, 10), '9999') >= date));
+END;
+
+-- ============================================================================
+-- DASHBOARD
+-- ============================================================================
+
+-- Date ranges whose day overview a write may have changed, read by the
+-- in-process overview cache (services/dashboard.py) to evict exactly those
+-- days. NULL bounds are open-ended. Writes to columns the overview does not
+-- show (descriptions, note content without a new updated_at) log nothing.
+CREATE TABLE IF NOT EXISTS dashboard_invalidations (
+  id         INTEGER PRIMARY KEY AUTOINCREMENT,  -- Committed ids are never reused (readers resume after pruning); rolled-back ones are
+  first_date TEXT,                               -- YYYY-MM-DD; NULL = from the beginning
+  last_date  TEXT                                -- YYYY-MM-DD; NULL = no end
+);
+
+-- Open tasks show from their due date on (due that day, then overdue)
+CREATE TRIGGER IF NOT EXISTS dashboard_tasks_ai AFTER INSERT ON tasks
+WHEN new.due_date IS NOT NULL AND new.status IN ('todo', 'in_progress') BEGIN
+  INSERT INTO dashboard_invalidations (first_date) VALUES (substr(new.due_date, 1, 10));
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_tasks_au AFTER UPDATE OF title, status, priority, due_date, tags ON tasks BEGIN
+  INSERT INTO dashboard_invalidations (first_date)
+  SELECT substr(old.due_date, 1, 10) WHERE old.due_date IS NOT NULL AND old.status IN ('todo', 'in_progress')
+  UNION
+  SELECT substr(new.due_date, 1, 10) WHERE new.due_date IS NOT NULL AND new.status IN ('todo', 'in_progress');
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_tasks_ad AFTER DELETE ON tasks
+WHEN old.due_date IS NOT NULL AND old.status IN ('todo', 'in_progress') BEGIN
+  INSERT INTO dashboard_invalidations (first_date) VALUES (substr(old.due_date, 1, 10));
+END;
+
+-- Events show on the days they span; series until they end, and overrides
+-- also on the day of the occurrence they replace
+CREATE TRIGGER IF NOT EXISTS dashboard_events_ai AFTER INSERT ON events BEGIN
+  INSERT INTO dashboard_invalidations (first_date, last_date) VALUES (
+    substr(min(new.start_time, COALESCE(new.original_start_time, new.start_time)), 1, 10),
+    CASE WHEN new.rrule IS NULL
+         THEN substr(max(new.end_time, COALESCE(new.original_start_time, new.end_time)), 1, 10)
+         ELSE substr(new.series_end, 1, 10) END
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_events_au AFTER UPDATE OF
+  title, start_time, end_time, location, source, rrule, exdates, recurring_event_id, original_start_time, series_end
+ON events BEGIN
+  INSERT INTO dashboard_invalidations (first_date, last_date) VALUES (
+    substr(min(old.start_time, COALESCE(old.original_start_time, old.start_time)), 1, 10),
+    CASE WHEN old.rrule IS NULL
+         THEN substr(max(old.end_time, COALESCE(old.original_start_time, old.end_time)), 1, 10)
+         ELSE substr(old.series_end, 1, 10) END
+  ), (
+    substr(min(new.start_time, COALESCE(new.original_start_time, new.start_time)), 1, 10),
+    CASE WHEN new.rrule IS NULL
+         THEN substr(max(new.end_time, COALESCE(new.original_start_time, new.end_time)), 1, 10)
+         ELSE substr(new.series_end, 1, 10) END
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_events_ad AFTER DELETE ON events BEGIN
+  INSERT INTO dashboard_invalidations (first_date, last_date) VALUES (
+    substr(min(old.start_time, COALESCE(old.original_start_time, old.start_time)), 1, 10),
+    CASE WHEN old.rrule IS NULL
+         THEN substr(max(old.end_time, COALESCE(old.original_start_time, old.end_time)), 1, 10)
+         ELSE substr(old.series_end, 1, 10) END
+  );
+END;
+
+-- Notes are recent on the days up to three days after their last update
+CREATE TRIGGER IF NOT EXISTS dashboard_notes_ai AFTER INSERT ON notes BEGIN
+  INSERT INTO dashboard_invalidations (last_date) VALUES (date(new.updated_at, '+3 days'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_notes_au AFTER UPDATE OF title, tags, created_at, updated_at ON notes BEGIN
+  INSERT INTO dashboard_invalidations (last_date)
+  VALUES (max(date(old.updated_at, '+3 days'), date(new.updated_at, '+3 days')));
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_notes_ad AFTER DELETE ON notes BEGIN
+  INSERT INTO dashboard_invalidations (last_date) VALUES (date(old.updated_at, '+3 days'));
+END;
+
 -- ============================================================================
 -- SYNC STATE
 -- ============================================================================
@@ -203,6 +500,220 @@ CREATE TABLE IF NOT EXISTS settings (
   updated_at TIMESTAMP NOT NULL
 );
 
+-- ============================================================================
+-- CHANGES (change-data capture)
+-- ============================================================================
+
+-- Append-only log of entity writes, filled by the triggers below in the
+-- writing transaction. `version` is the offset clients resume from
+-- (services/changes.py prunes rows past the retention window).
+CREATE TABLE IF NOT EXISTS changes (
+  version    INTEGER PRIMARY KEY AUTOINCREMENT,
+  entity     TEXT NOT NULL,      -- note | task | event | project | conversation | settings
+  entity_id  TEXT NOT NULL,
+  op         TEXT NOT NULL,      -- insert | update | delete
+  changed_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_changes_changed_at ON changes(changed_at);
+
+-- Latest version of every row, the compacted form of `changes`. A deleted
+-- row stays as a tombstone (deleted_at set) until services/sync.py
+-- compacts it, so delta sync can report deletes.
+CREATE TABLE IF NOT EXISTS row_versions (
+  entity     TEXT NOT NULL,
+  entity_id  TEXT NOT NULL,
+  version    INTEGER NOT NULL,   -- changes.version of the last write
+  deleted_at TIMESTAMP,
+  PRIMARY KEY (entity, entity_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_row_versions_version ON row_versions(version);
+-- Highest version per entity type: collection ETags (atlas_api/conditional.py)
+CREATE INDEX IF NOT EXISTS idx_row_versions_entity_version ON row_versions(entity, version);
+CREATE INDEX IF NOT EXISTS idx_row_versions_tombstones ON row_versions(deleted_at) WHERE deleted_at IS NOT NULL;
+
+-- Highest tombstone version compacted so far; clients synced before it must resync
+CREATE TABLE IF NOT EXISTS tombstone_compaction (
+  id                INTEGER PRIMARY KEY CHECK (id = 1),
+  compacted_version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO tombstone_compaction (id) VALUES (1);
+
+CREATE TRIGGER IF NOT EXISTS changes_notes_ai AFTER INSERT ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('note', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_notes_au AFTER UPDATE ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('note', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_notes_ad AFTER DELETE ON notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('note', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('note', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_tasks_ai AFTER INSERT ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('task', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_tasks_au AFTER UPDATE ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('task', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_tasks_ad AFTER DELETE ON tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('task', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('task', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_events_ai AFTER INSERT ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_events_au AFTER UPDATE ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_events_ad AFTER DELETE ON events BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_projects_ai AFTER INSERT ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_projects_au AFTER UPDATE ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_projects_ad AFTER DELETE ON projects BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_conversations_ai AFTER INSERT ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('conversation', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_conversations_au AFTER UPDATE ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('conversation', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_conversations_ad AFTER DELETE ON conversations BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('conversation', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('conversation', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_settings_ai AFTER INSERT ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', new.id, 'insert');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('settings', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_settings_au AFTER UPDATE ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', new.id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('settings', new.id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_settings_ad AFTER DELETE ON settings BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('settings', old.id, 'delete');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('settings', old.id, last_insert_rowid(), strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+-- Linking a note or task changes the event or project it is linked to
+-- (unless that is being deleted itself)
+CREATE TRIGGER IF NOT EXISTS changes_event_notes_ai AFTER INSERT ON event_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.event_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', new.event_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_event_notes_ad AFTER DELETE ON event_notes
+WHEN EXISTS (SELECT 1 FROM events WHERE id = old.event_id) BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.event_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', old.event_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_event_tasks_ai AFTER INSERT ON event_tasks BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', new.event_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', new.event_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_event_tasks_ad AFTER DELETE ON event_tasks
+WHEN EXISTS (SELECT 1 FROM events WHERE id = old.event_id) BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('event', old.event_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('event', old.event_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_project_notes_ai AFTER INSERT ON project_notes BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', new.project_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', new.project_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS changes_project_notes_ad AFTER DELETE ON project_notes
+WHEN EXISTS (SELECT 1 FROM projects WHERE id = old.project_id) BEGIN
+  INSERT INTO changes (entity, entity_id, op) VALUES ('project', old.project_id, 'update');
+  INSERT INTO row_versions (entity, entity_id, version, deleted_at)
+  VALUES ('project', old.project_id, last_insert_rowid(), NULL)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET version = excluded.version, deleted_at = excluded.deleted_at;
+END;
+
 -- Initialize default settings
 INSERT OR IGNORE INTO settings (id, data, updated_at)
 VALUES (1, '{}', CURRENT_TIMESTAMP);
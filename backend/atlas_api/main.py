@@ -4,10 +4,19 @@ FastAPI main application
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
-from .routers import notes, tasks, events, projects, conversations, ai, settings as settings_router, dashboard, search
+from .routers import notes, tasks, events, projects, conversations, ai, settings as settings_router, dashboard, search, changes, sync, batch
 from .database import init_db
 from .config import settings
+from .ai.briefings import get_briefing_scheduler
+from .ai.client import close_ai_client
+from .ai.response_cache import get_response_cache
+from .ai.indexing import build_worker, get_indexer
+from .services.archive import get_conversation_archive
+from .services.changes import get_change_hub
+from .responses import CompressionMiddleware, FastJSONResponse, JSONRoute
+from .ai.retrieval import apply_index_changes, get_vector_index, warm_vector_index
 
 
 @asynccontextmanager
@@ -17,17 +26,53 @@ async def lifespan(app: FastAPI):
     print("Starting Atlas API...")
     init_db()
     print(f"Database initialized at {settings.database_path}")
+    # Load vectors off the event loop; changes made meanwhile are replayed
+    index = get_vector_index()
+    get_indexer().listeners.append(lambda changes: apply_index_changes(index, changes))
+    index_warmup = asyncio.create_task(asyncio.to_thread(warm_vector_index))
+    embedding_worker = None
+    if settings.embedding_worker_enabled:
+        embedding_worker = build_worker(get_indexer())
+        embedding_worker.start()
+    app.state.embedding_worker = embedding_worker
+    briefing_scheduler = None
+    if settings.briefing_scheduler_enabled:
+        briefing_scheduler = get_briefing_scheduler()
+        briefing_scheduler.start()
+    conversation_archive = None
+    if settings.archive_enabled:
+        conversation_archive = get_conversation_archive()
+        conversation_archive.start()
+    change_hub = get_change_hub()
+    change_hub.start()
     yield
     # Shutdown
     print("Shutting down Atlas API...")
+    if embedding_worker:
+        await embedding_worker.stop()
+    if briefing_scheduler:
+        await briefing_scheduler.stop()
+    if conversation_archive:
+        await conversation_archive.stop()
+    await change_hub.stop()
+    get_indexer().listeners.clear()
+    embedding_cache = getattr(get_indexer().provider, "cache", None)
+    if embedding_cache:
+        embedding_cache.flush()
+    get_response_cache().flush()
+    if not index_warmup.done():
+        index_warmup.cancel()
+    await close_ai_client()
 
 
 app = FastAPI(
     title="Atlas API",
     version="1.0.0",
     description="Local-first personal OS backend",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
+app.router.route_class = JSONRoute
 
 # CORS for Electron renderer
 app.add_middleware(
@@ -41,6 +86,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Gzips large responses when COMPRESSION_ENABLED is set and the client accepts it
+app.add_middleware(CompressionMiddleware)
+
 
 # Health check
 @app.get("/health")
@@ -73,3 +121,6 @@ app.include_router(ai.router, prefix="/api")
 app.include_router(settings_router.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
 app.include_router(search.router, prefix="/api")
+app.include_router(changes.router, prefix="/api")
+app.include_router(sync.router, prefix="/api")
+app.include_router(batch.router, prefix="/api")
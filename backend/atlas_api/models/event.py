@@ -4,6 +4,8 @@ Event models
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+from .note import NoteSummary
+from .task import TaskSummary
 
 
 class EventBase(BaseModel):
@@ -20,6 +22,10 @@ class EventCreate(EventBase):
     source: str = "local"  # local | google
     external_id: Optional[str] = None
     calendar_id: Optional[str] = None
+    rrule: Optional[str] = None  # e.g. "FREQ=WEEKLY;BYDAY=MO,WE"
+    exdates: List[datetime] = []
+    recurring_event_id: Optional[str] = None  # Set when overriding an occurrence
+    original_start_time: Optional[datetime] = None
 
 
 class EventUpdate(BaseModel):
@@ -29,6 +35,8 @@ class EventUpdate(BaseModel):
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     location: Optional[str] = None
+    rrule: Optional[str] = None
+    exdates: Optional[List[datetime]] = None
 
 
 class Event(EventBase):
@@ -37,10 +45,15 @@ class Event(EventBase):
     source: str
     external_id: Optional[str] = None
     calendar_id: Optional[str] = None
+    rrule: Optional[str] = None
+    exdates: List[datetime] = []
+    recurring_event_id: Optional[str] = None
+    original_start_time: Optional[datetime] = None
+    series_end: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
-    linked_notes: List[str] = []  # Note IDs
-    linked_tasks: List[str] = []  # Task IDs
+    linked_notes: List[NoteSummary] = []
+    linked_tasks: List[TaskSummary] = []
 
     class Config:
         from_attributes = True
@@ -38,6 +38,13 @@ class Backlink(BaseModel):
     title: str
 
 
+class NoteSummary(BaseModel):
+    """Lightweight note reference used in link lists"""
+    id: str
+    title: str
+    updated_at: datetime
+
+
 class Note(NoteBase):
     """Full note model with computed fields"""
     id: str
@@ -4,6 +4,7 @@ Project models
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+from .note import NoteSummary
 
 
 class ProjectBase(BaseModel):
@@ -30,7 +31,7 @@ class Project(ProjectBase):
     id: str
     created_at: datetime
     updated_at: datetime
-    linked_notes: List[str] = []  # Note IDs
+    linked_notes: List[NoteSummary] = []
 
     class Config:
         from_attributes = True
@@ -34,6 +34,15 @@ class TaskUpdate(BaseModel):
     project_id: Optional[str] = None
 
 
+class TaskSummary(BaseModel):
+    """Lightweight task reference used in link lists"""
+    id: str
+    title: str
+    status: str
+    priority: str
+    due_date: Optional[datetime] = None
+
+
 class Task(TaskBase):
     """Full task model"""
     id: str
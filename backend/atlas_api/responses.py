@@ -0,0 +1,184 @@
+"""
+Response pipeline: JSON encoding and compression
+
+Endpoints return plain dicts that are already JSON-shaped. For each
+one, FastAPI would first rebuild a copy with `jsonable_encoder`, then
+serialize that copy with the stdlib encoder. On a 500-note page, the
+copy alone costs more than the query. `JSONRoute` serializes a result
+once, with orjson when it is installed, and hands FastAPI the finished
+text. Values neither encoder knows, such as pydantic models or sets,
+fall back to `jsonable_encoder`.
+
+`CompressionMiddleware` gzips complete responses above a size
+threshold, for clients that accept gzip. Streamed responses (SSE,
+/api/sync) pass through untouched, so their chunks are not held back.
+A gzipped response is another representation, so its ETag gets a
+`-gzip` suffix; conditional.py strips it when comparing.
+"""
+import functools
+import gzip
+import inspect
+import json
+from typing import Any, Callable
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+GZIP_ETAG_SUFFIX = "-gzip"
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes JSON-shaped content to UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=jsonable_encoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class Encoded(str):
+    """Serialized JSON; `jsonable_encoder` passes str instances through as is"""
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with `dumps`; `Encoded` content is sent unchanged"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, Encoded):
+            return content.encode("utf-8")
+        return dumps(content)
+
+
+def _encode(result: Any) -> Any:
+    if isinstance(result, (Response, Encoded)):
+        return result
+    return Encoded(dumps(result).decode("utf-8"))
+
+
+def _encoding(endpoint: Callable) -> Callable:
+    """Wraps an endpoint to return its result serialized; the signature is kept for FastAPI"""
+    if getattr(endpoint, "encodes_result", False):
+        return endpoint    # Routes are rebuilt from .endpoint when included
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def encoded(*args, **kwargs):
+            return _encode(await endpoint(*args, **kwargs))
+    else:
+        @functools.wraps(endpoint)
+        def encoded(*args, **kwargs):
+            return _encode(endpoint(*args, **kwargs))
+    encoded.encodes_result = True
+    return encoded
+
+
+class JSONRoute(APIRoute):
+    """
+    Route that serializes the endpoint's result itself.
+
+    Applies to endpoints without a response model, whose results are not
+    validated anyway. Endpoints that declare one keep FastAPI's path.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        response_model = kwargs.get("response_model")
+        if isinstance(response_model, DefaultPlaceholder):
+            response_model = None
+        response_class = kwargs.get("response_class")
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        plain = response_class is None or response_class in (JSONResponse, FastJSONResponse)
+        if response_model is None and plain and "return" not in getattr(endpoint, "__annotations__", {}):
+            kwargs["response_class"] = FastJSONResponse
+            endpoint = _encoding(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (q > 0, directly or via *)"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, param = part.partition(";")
+        name, _, value = param.strip().partition("=")
+        try:
+            weights[coding.strip()] = float(value) if name == "q" else 1.0
+        except ValueError:
+            weights[coding.strip()] = 0.0
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+def gzip_etag(etag: str) -> str:
+    """`"v"` -> `"v-gzip"` (weak tags keep their W/ prefix)"""
+    return etag[:-1] + GZIP_ETAG_SUFFIX + '"' if etag.endswith('"') else etag
+
+
+def _compressible(headers: Headers) -> bool:
+    media_type = headers.get("content-type", "").split(";")[0].strip()
+    return "content-encoding" not in headers and (
+        media_type.startswith("text/") or media_type.endswith("json") or media_type.endswith("javascript")
+    )
+
+
+class CompressionMiddleware:
+    """
+    Gzips single-chunk responses of at least COMPRESSION_MIN_BYTES.
+
+    The decision is per request: the setting, the client's
+    Accept-Encoding, the response's size and media type. Streaming
+    responses are not buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or not settings.compression_enabled
+            or not accepts_gzip(Headers(scope=scope).get("accept-encoding", ""))
+        ):
+            await self.app(scope, receive, send)
+            return
+        minimum_size, level = settings.compression_min_bytes, settings.compression_level
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+
+        start: Message = {}
+
+        async def send_compressed(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if not start:
+                await send(message)
+                return
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            etag = headers.get("etag")
+            if not message.get("more_body") and len(body) >= minimum_size and _compressible(headers):
+                body = gzip.compress(body, compresslevel=level, mtime=0)
+                headers["Content-Encoding"] = "gzip"
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                if etag:
+                    headers["ETag"] = gzip_etag(etag)
+                message = {**message, "body": body}
+            elif start["status"] == 304 and etag and gzip_etag(etag) in if_none_match:
+                # Revalidating the gzipped copy: echo the tag the client holds
+                headers["ETag"] = gzip_etag(etag)
+            await send(start)
+            start = {}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
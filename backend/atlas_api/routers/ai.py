@@ -2,11 +2,25 @@
 AI API endpoints
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from ..database import get_db_connection
+from ..config import settings
+from ..ai import hybrid, retrieval
+from ..ai.briefings import get_briefing_scheduler, get_stored_briefing
+from ..ai.client import get_ai_client
+from ..ai.indexing import JOB_KINDS, get_indexer
+from ..ai.orchestrator import get_orchestrator
+from ..ai.prompts import PROMPT_VERSIONS
+from ..ai.response_cache import get_response_cache
+from ..ai.retrieval import get_vector_index
+from ..services.dashboard import today_overview
+from ..services.job_queue import QueueFull, enqueue_jobs, queue_stats, retry_failed
+from ..responses import JSONRoute
 
-router = APIRouter(prefix="/ai", tags=["ai"])
+router = APIRouter(prefix="/ai", tags=["ai"], route_class=JSONRoute)
 
 
 class DailyBriefingRequest(BaseModel):
@@ -18,6 +32,7 @@ class DailyBriefingRequest(BaseModel):
 class SummarizeNoteRequest(BaseModel):
     """Summarize note request"""
     note_id: str
+    include_action_items: bool = True
 
 
 class SemanticSearchRequest(BaseModel):
@@ -27,6 +42,18 @@ class SemanticSearchRequest(BaseModel):
     limit: int = 10
 
 
+class HybridSearchRequest(BaseModel):
+    """Hybrid (full-text + semantic) note search request"""
+    query: str
+    limit: int = 10
+    budget_ms: Optional[int] = None
+
+
+class ReindexRequest(BaseModel):
+    """Embedding backfill request"""
+    source_types: List[str] = ["note", "task"]
+
+
 class DevAssistRequest(BaseModel):
     """Dev assistance request"""
     mode: str  # explain_code | interpret_terminal | refactor
@@ -37,40 +64,223 @@ class DevAssistRequest(BaseModel):
     terminal_output: Optional[str] = None
 
 
+BRIEFING_FLAGS = ("include_overdue_tasks", "include_events", "include_recent_notes")
+
+
 @router.post("/daily-briefing")
 async def daily_briefing(req: DailyBriefingRequest):
     """Generate AI-powered daily briefing"""
-    # TODO: Implement AI orchestrator integration
-    return {
-        "markdown": "# Daily Briefing\n\nAI integration coming soon...",
-        "references": {
-            "tasks": [],
-            "events": [],
-            "notes": []
-        }
-    }
+    try:
+        day = datetime.fromisoformat(req.date).date()
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid date")
+    options = req.options or {}
+
+    # Default briefings are kept ready by the scheduler
+    if all(options.get(flag, True) for flag in BRIEFING_FLAGS):
+        scheduler = get_briefing_scheduler()
+        conn = get_db_connection()
+        try:
+            briefing = get_stored_briefing(conn, day)
+        finally:
+            conn.close()
+        if briefing is None:
+            return {**await scheduler.generate(day), "cache": "generated"}
+        if briefing["stale"]:
+            scheduler.wake()
+        return {**briefing, "cache": "stored"}
+
+    conn = get_db_connection()
+    try:
+        overview = today_overview(conn, day)
+    finally:
+        conn.close()
+
+    # Cached briefings are dropped when anything they were built from changes
+    deps = ["tasks"]
+    if not options.get("include_overdue_tasks", True):
+        overview["tasks"]["overdue"] = []
+    if options.get("include_events", True):
+        deps.append("events")
+    else:
+        overview["events"] = []
+    if options.get("include_recent_notes", True):
+        deps.append("notes")
+    else:
+        overview["recent_notes"] = []
+
+    orchestrator = get_orchestrator()
+    briefing, cache_status = await get_response_cache().get_or_compute(
+        "daily_briefing",
+        orchestrator.model("daily_briefing"),
+        PROMPT_VERSIONS["daily_briefing"],
+        overview,
+        deps,
+        lambda: orchestrator.generate_daily_briefing(overview),
+    )
+    return {**briefing, "cache": cache_status}
 
 
 @router.post("/summarize-note")
 async def summarize_note(req: SummarizeNoteRequest):
     """Generate note summary and action items"""
-    # TODO: Implement AI orchestrator integration
+    conn = get_db_connection()
+    note = conn.execute("SELECT title, content FROM notes WHERE id = ?", (req.note_id,)).fetchone()
+    conn.close()
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    orchestrator = get_orchestrator()
+    summary, cache_status = await get_response_cache().get_or_compute(
+        "note_summary",
+        orchestrator.model("note_summary"),
+        PROMPT_VERSIONS["note_summary"],
+        {"title": note["title"], "content": note["content"]},
+        [f"note:{req.note_id}"],
+        lambda: orchestrator.summarize_note(note["title"], note["content"]),
+    )
     return {
-        "summary": ["AI integration coming soon..."],
-        "action_items": []
+        "summary": summary["summary"],
+        "action_items": summary["action_items"] if req.include_action_items else [],
+        "cache": cache_status,
     }
 
 
+@router.get("/cache")
+async def response_cache_stats():
+    """AI response cache size, hit rate and coalesced requests"""
+    return get_response_cache().stats()
+
+
+@router.delete("/cache")
+async def purge_response_cache(kind: Optional[str] = None, expired_only: bool = False):
+    """Drop cached AI responses (optionally one kind, or only expired ones)"""
+    return {"deleted": get_response_cache().purge(kind, expired_only)}
+
+
+@router.get("/client")
+async def ai_client_stats():
+    """Requests, retries, tokens and queueing per model of the shared AI client"""
+    return {"models": get_ai_client().stats()}
+
+
 @router.post("/search")
 async def semantic_search(req: SemanticSearchRequest):
     """Semantic search across notes/tasks"""
-    # TODO: Implement retrieval service integration
+    index = get_vector_index()
+    conn = get_db_connection()
+    try:
+        results = await retrieval.semantic_search(conn, req.query, req.source_types, req.limit, index=index)
+    finally:
+        conn.close()
+
+    return {
+        "results": results,
+        "query": req.query,
+        "index_ready": index.ready
+    }
+
+
+@router.post("/search/hybrid")
+async def hybrid_search(req: HybridSearchRequest):
+    """Notes ranked by fused full-text and semantic relevance, with snippets"""
+    result = await hybrid.hybrid_search(
+        req.query,
+        limit=req.limit,
+        budget_ms=req.budget_ms or settings.hybrid_search_budget_ms,
+    )
     return {
-        "results": [],
-        "query": req.query
+        "results": result.results,
+        "query": req.query,
+        "mode": result.mode,
+        "fallback_reason": result.fallback_reason,
+        "elapsed_ms": round(result.elapsed_ms, 1),
     }
 
 
+@router.get("/search/index")
+async def vector_index_stats():
+    """Vector index size and memory use"""
+    return get_vector_index().stats()
+
+
+@router.post("/search/index/train")
+async def train_vector_index():
+    """Re-clusters the approximate (IVF) index, e.g. after a large import"""
+    index = get_vector_index()
+    if not hasattr(index, "train"):
+        raise HTTPException(status_code=400, detail="The configured vector store has no approximate index")
+    nlist = await run_in_threadpool(index.train)
+    return {"nlist": nlist, "vectors": len(index)}
+
+
+@router.post("/embeddings/reindex")
+async def reindex_embeddings(req: ReindexRequest):
+    """
+    Queue every note and/or task for embedding (unchanged chunks are skipped).
+
+    Sources beyond the queue's free capacity are reported as `deferred`;
+    call again once the backlog has drained.
+    """
+    unknown = set(req.source_types) - set(JOB_KINDS)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown source types: {sorted(unknown)}")
+
+    conn = get_db_connection()
+    queued, deferred = {}, {}
+    full = None
+    try:
+        for source_type in req.source_types:
+            table = "notes" if source_type == "note" else "tasks"
+            ids = [row[0] for row in conn.execute(f"SELECT id FROM {table}")]
+            try:
+                queued[source_type] = enqueue_jobs(
+                    conn, JOB_KINDS[source_type], ids, max_pending=settings.embedding_max_pending_jobs
+                )
+            except QueueFull as e:
+                queued[source_type], full = 0, e
+            deferred[source_type] = len(ids) - queued[source_type]
+        conn.commit()
+    finally:
+        conn.close()
+
+    if full is not None and not any(queued.values()):
+        raise HTTPException(status_code=429, detail=f"Embedding queue is full ({full})")
+    return {"queued": queued, "deferred": deferred}
+
+
+@router.get("/embeddings/status")
+async def embeddings_status():
+    """Embedding coverage, queue depth and pipeline counters"""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT source_type, model, COUNT(*) AS chunks, COUNT(DISTINCT source_id) AS sources"
+        " FROM embeddings GROUP BY source_type, model"
+    ).fetchall()
+    jobs = queue_stats(conn)
+    conn.close()
+
+    indexer = get_indexer()
+    cache = getattr(indexer.provider, "cache", None)
+    return {
+        "model": indexer.provider.model,
+        "embeddings": [dict(row) for row in rows],
+        "jobs": jobs,
+        "pipeline": indexer.stats(),
+        "cache": cache.stats() if cache else None,
+    }
+
+
+@router.post("/embeddings/retry-failed")
+async def retry_failed_embeddings():
+    """Re-queue embedding jobs that exhausted their retries"""
+    conn = get_db_connection()
+    count = sum(retry_failed(conn, kind) for kind in JOB_KINDS.values())
+    conn.commit()
+    conn.close()
+    return {"requeued": count}
+
+
 @router.post("/dev/assist")
 async def dev_assist(req: DevAssistRequest):
     """Dev workspace AI assistance"""
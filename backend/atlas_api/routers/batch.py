@@ -0,0 +1,184 @@
+"""
+Batch API endpoint
+
+Runs several API calls in one round trip. Each sub-request goes through
+the app in-process, so it gets the same routing, validation,
+conditional headers and errors as a direct call. Sub-requests run in
+order, one at a time:
+- consecutive reads share one connection and one read transaction, so
+  they see a single snapshot;
+- mutations run as separate calls and commit on their own, unless the
+  batch is atomic;
+- an atomic batch runs everything in one write transaction. The first
+  item that fails rolls the whole batch back, and the items after it are
+  not run (424).
+
+Locking: the transactions stay open across the sub-requests' awaits. In
+WAL mode (see database.init_db), a read run's snapshot blocks nobody. An
+atomic batch holds the database's single write lock from its first item
+to its last. Other writers wait for it, up to SQLite's busy timeout (5 s)
+and then fail with "database is locked". Keep atomic batches to quick
+local calls, not AI endpoints that await a provider.
+
+Work that commits outside the hot database cannot join the shared
+transaction. Moving conversations to or from the cold store (opening,
+archiving or deleting an archived conversation) answers 409 inside a
+batch.
+"""
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+import asyncio
+import json
+from ..config import settings
+from ..database import shared_connection
+from ..responses import JSONRoute, dumps
+
+router = APIRouter(prefix="/batch", tags=["batch"], route_class=JSONRoute)
+
+READ_METHODS = {"GET", "HEAD"}
+METHODS = READ_METHODS | {"POST", "PUT", "PATCH", "DELETE"}
+UNBATCHABLE = ("/api/batch", "/api/changes")  # Recursion, and a stream that never ends
+
+
+class BatchItem(BaseModel):
+    """One sub-request"""
+    id: Optional[str] = None  # echoed back; defaults to the item's index
+    method: str = "GET"
+    path: str  # /api/..., with an optional query string
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    """Batch request"""
+    requests: List[BatchItem]
+    atomic: bool = False  # all mutations commit together, or none does
+
+
+def _check(index: int, item: BatchItem):
+    path = urlsplit(item.path).path
+    if item.method.upper() not in METHODS:
+        raise ValueError(f"requests[{index}]: unsupported method {item.method}")
+    if not path.startswith("/api/") or path.rstrip("/").startswith(UNBATCHABLE):
+        raise ValueError(f"requests[{index}]: {path} cannot be batched")
+
+
+async def _dispatch(request: Request, index: int, item: BatchItem) -> Dict:
+    """Runs one sub-request through the app and captures its response"""
+    url = urlsplit(item.path)
+    body = b"" if item.body is None else dumps(item.body)
+    headers = {name.lower(): value for name, value in item.headers.items()}
+    if item.body is not None:
+        headers.setdefault("content-type", "application/json")
+    headers["content-length"] = str(len(body))
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": item.method.upper(),
+        "scheme": request.url.scheme,
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": "",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+    }
+
+    finished = asyncio.Event()
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    response: Dict[str, Any] = {"status": 500, "headers": {}}
+    chunks: List[bytes] = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                name.decode("latin-1"): value.decode("latin-1") for name, value in message.get("headers", [])
+            }
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        pass    # The error middleware has already sent the 500
+    finally:
+        finished.set()
+
+    content = b"".join(chunks)
+    response["headers"].pop("content-length", None)
+    if not content:
+        parsed = None
+    elif response["headers"].get("content-type", "").startswith("application/json"):
+        parsed = json.loads(content)
+    else:
+        parsed = content.decode("utf-8", "replace")
+    return {"id": item.id if item.id is not None else str(index), **response, "body": parsed}
+
+
+def _not_run(index: int, item: BatchItem) -> Dict:
+    return {
+        "id": item.id if item.id is not None else str(index),
+        "status": 424,
+        "headers": {},
+        "body": {"detail": "Not run: an earlier request in the atomic batch failed"},
+    }
+
+
+@router.post("")
+async def batch(payload: BatchRequest, request: Request):
+    """Run several API calls in one request"""
+    items = payload.requests
+    try:
+        if len(items) > settings.batch_max_requests:
+            raise ValueError(f"At most {settings.batch_max_requests} requests per batch")
+        for index, item in enumerate(items):
+            _check(index, item)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    responses: List[Dict] = []
+    if payload.atomic:
+        with shared_connection(write=True) as conn:
+            for index, item in enumerate(items):
+                conn.savepoint()
+                result = await _dispatch(request, index, item)
+                conn.release()
+                responses.append(result)
+                if result["status"] >= 400:
+                    conn.abort()
+                    break
+        committed = all(result["status"] < 400 for result in responses)
+        if not committed:
+            # Rolled-back versions are reused by the next writes: these tags could match other content
+            for result in responses:
+                result["headers"].pop("etag", None)
+        ran = len(responses)
+        responses += [_not_run(index, item) for index, item in enumerate(items[ran:], ran)]
+        return {"atomic": True, "committed": committed, "responses": responses}
+
+    index = 0
+    while index < len(items):
+        if items[index].method.upper() not in READ_METHODS:
+            responses.append(await _dispatch(request, index, items[index]))
+            index += 1
+            continue
+        # A run of reads: one snapshot
+        with shared_connection():
+            while index < len(items) and items[index].method.upper() in READ_METHODS:
+                responses.append(await _dispatch(request, index, items[index]))
+                index += 1
+    return {"atomic": False, "responses": responses}
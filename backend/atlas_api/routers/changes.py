@@ -0,0 +1,114 @@
+"""
+Change feed API endpoints
+"""
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional, Set
+import asyncio
+import json
+from ..database import get_db_connection
+from ..config import settings
+from ..services.changes import ENTITIES, ResetRequired, get_change_hub, latest_version, read_changes
+from ..responses import JSONRoute
+
+router = APIRouter(prefix="/changes", tags=["changes"], route_class=JSONRoute)
+
+
+def _parse_entities(entities: Optional[str]) -> Optional[Set[str]]:
+    if not entities:
+        return None
+    wanted = {e.strip() for e in entities.split(",") if e.strip()}
+    unknown = wanted - set(ENTITIES)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown entities: {', '.join(sorted(unknown))}")
+    return wanted
+
+
+def _sse(event: str, data, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def change_events(
+    request: Request,
+    since: Optional[int],
+    entities: Optional[Set[str]],
+    heartbeat: float,
+) -> AsyncIterator[str]:
+    """Server-sent events: one `change` per change (id = version), `reset` when the offset was pruned"""
+    hub = get_change_hub()
+    stream = hub.subscribe(since, entities)
+    next_batch = None
+    try:
+        yield "retry: 2000\n\n"
+        while not await request.is_disconnected():
+            if next_batch is None:
+                next_batch = asyncio.ensure_future(stream.__anext__())
+            done, _ = await asyncio.wait({next_batch}, timeout=heartbeat)
+            if not done:
+                yield ": keepalive\n\n"
+                continue
+            try:
+                batch = next_batch.result()
+            except ResetRequired as reset:
+                yield _sse("reset", {"version": reset.version}, reset.version)
+                return
+            finally:
+                next_batch = None
+            yield "".join(_sse("change", change.to_dict(), change.version) for change in batch)
+    finally:
+        if next_batch is not None:
+            next_batch.cancel()
+            await asyncio.gather(next_batch, return_exceptions=True)
+        await stream.aclose()
+
+
+@router.get("")
+async def list_changes(since: int = 0, limit: int = 500, entities: Optional[str] = None):
+    """Changes after `since`, oldest first; `reset` means reload everything and resume from `version`"""
+    wanted = _parse_entities(entities)
+    conn = get_db_connection()
+    try:
+        try:
+            changes = read_changes(conn, since, limit)
+        except ResetRequired as reset:
+            return {"changes": [], "version": reset.version, "reset": True, "has_more": False}
+        version = latest_version(conn)
+    finally:
+        conn.close()
+    # Filtered-out changes still advance the offset
+    next_since = changes[-1].version if changes else max(since, version)
+    return {
+        "changes": [c.to_dict() for c in changes if not wanted or c.entity in wanted],
+        "version": next_since,
+        "reset": False,
+        "has_more": next_since < version,
+    }
+
+
+@router.get("/stream")
+async def stream_changes(request: Request, since: Optional[int] = None, entities: Optional[str] = None):
+    """
+    Server-sent change events, resumable.
+
+    Resumes after the `Last-Event-ID` header (sent by EventSource on
+    reconnect) or `since`; without either, starts from now.
+    """
+    wanted = _parse_entities(entities)
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return StreamingResponse(
+        change_events(request, since, wanted, settings.changes_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stats")
+async def change_feed_stats():
+    """Connected subscribers and polling counters of the change feed"""
+    return get_change_hub().stats()
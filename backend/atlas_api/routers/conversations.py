@@ -1,9 +1,16 @@
 """
 Conversations API endpoints
 """
-from fastapi import APIRouter, HTTPException, WebSocket
-from typing import Optional
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from contextlib import aclosing
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+import asyncio
+import base64
+import logging
+import sqlite3
+import time
 import uuid
 import json
 from ..models.conversation import (
@@ -12,12 +19,95 @@ from ..models.conversation import (
     ChatMessage,
     MessageCreate
 )
-from ..database import get_db_connection
+from ..database import get_db_connection, in_shared_scope
+from ..conditional import conditional
+from ..ai import retrieval
+from ..ai.client import AIClientError
+from ..ai.context import get_context_assembler
+from ..ai.hybrid import fts_query
+from ..ai.orchestrator import get_orchestrator, stream_metrics
+from ..ai.tokens import estimate_tokens
+from ..services.archive import get_conversation_archive
+from ..responses import JSONRoute
 
-router = APIRouter(prefix="/conversations", tags=["conversations"])
+logger = logging.getLogger(__name__)
 
+router = APIRouter(prefix="/conversations", tags=["conversations"], route_class=JSONRoute)
 
-@router.get("")
+
+def _add_message(
+    conn: sqlite3.Connection,
+    conversation_id: str,
+    role: str,
+    content: str,
+    model: Optional[str] = None,
+    references: Optional[Dict[str, List[str]]] = None,
+) -> Dict:
+    """Stores a message and updates the conversation preview in one transaction"""
+    message = {
+        "id": str(uuid.uuid4()),
+        "conversation_id": conversation_id,
+        "role": role,
+        "content": content,
+        "model": model,
+        "timestamp": datetime.now().isoformat(),
+        "references": references,
+    }
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO chat_messages
+            (id, conversation_id, role, content, model, timestamp, references_json, token_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (message["id"], conversation_id, role, content, model, message["timestamp"],
+             json.dumps(references) if references else None, estimate_tokens(content))
+        )
+        conn.execute(
+            "UPDATE conversations SET updated_at = ?, last_message_preview = ? WHERE id = ?",
+            (message["timestamp"], content[:100], conversation_id)
+        )
+    return message
+
+
+def _outside_batch(action: str):
+    """
+    Moves to or from the cold store commit in two files; inside a batch's
+    shared transaction (see routers/batch.py) a rollback would undo only
+    the hot side.
+    """
+    if in_shared_scope():
+        raise HTTPException(status_code=409, detail=f"Archived conversations cannot be {action} inside a batch")
+
+
+async def _open_conversation(conn: sqlite3.Connection, conversation_id: str) -> bool:
+    """Whether the conversation exists, moving its messages back from the archive if needed"""
+    row = conn.execute("SELECT archived_at FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+    if row is None:
+        return False
+    if row[0] is not None:
+        _outside_batch("opened")
+        # Decompressing and re-inserting a long thread would stall the event loop
+        await run_in_threadpool(get_conversation_archive().rehydrate, conversation_id)
+    return True
+
+
+async def _retrieve(query: str) -> List[Dict]:
+    """Note and task chunks relevant to a chat message (none while the index warms up)"""
+    index = retrieval.get_vector_index()
+    if not index.ready:
+        return []
+    conn = get_db_connection()
+    try:
+        return await retrieval.semantic_search(conn, query, ["note", "task"], limit=8, index=index)
+    except Exception:
+        logger.exception("Retrieval for chat failed; answering without context")
+        return []
+    finally:
+        conn.close()
+
+
+@router.get("", dependencies=[conditional("conversation")])
 async def list_conversations(limit: int = 20, offset: int = 0):
     """List all conversations"""
     conn = get_db_connection()
@@ -33,6 +123,7 @@ async def list_conversations(limit: int = 20, offset: int = 0):
     conversations = [dict(row) for row in rows]
     for conv in conversations:
         conv['pinned'] = bool(conv.get('pinned', 0))
+        conv['archived'] = conv.get('archived_at') is not None
 
     return {
         "conversations": conversations,
@@ -73,7 +164,60 @@ async def create_conversation(conv: ConversationCreate):
     }
 
 
-@router.get("/{conversation_id}")
+@router.get("/search")
+async def search_messages(q: str, limit: int = 20, conversation_id: Optional[str] = None):
+    """bm25-ranked chat messages across conversations, with highlighted snippets"""
+    match = fts_query(q)
+    if not match:
+        return {"query": q, "results": [], "total": 0}
+    where, params = "", [match]
+    if conversation_id:
+        where, params = "AND m.conversation_id = ?", [match, conversation_id]
+
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            f"""
+            SELECT m.id, m.conversation_id, c.title AS conversation_title, m.role, m.timestamp,
+                   snippet(chat_messages_fts, 0, '<mark>', '</mark>', '…', 24) AS snippet,
+                   bm25(chat_messages_fts) AS rank
+            FROM chat_messages_fts
+            JOIN chat_messages m ON m.rowid = chat_messages_fts.rowid
+            JOIN conversations c ON c.id = m.conversation_id
+            WHERE chat_messages_fts MATCH ? {where}
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (*params, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    results = [dict(row) for row in rows]
+    for result in results:
+        result["score"] = -result.pop("rank")
+    return {"query": q, "results": results, "total": len(results)}
+
+
+@router.get("/archive/stats")
+async def archive_stats():
+    """Archived conversations and cold store size"""
+    return get_conversation_archive().stats()
+
+
+@router.post("/{conversation_id}/archive")
+async def archive_conversation(conversation_id: str):
+    """Move a conversation's messages to the cold store now (it is rehydrated when opened)"""
+    conn = get_db_connection()
+    exists = conn.execute("SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+    conn.close()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    _outside_batch("archived")
+    return {"id": conversation_id, "archived": get_conversation_archive().archive(conversation_id)}
+
+
+@router.get("/{conversation_id}", dependencies=[conditional("conversation", "conversation_id")])
 async def get_conversation(conversation_id: str):
     """Get a conversation by ID"""
     conn = get_db_connection()
@@ -90,56 +234,107 @@ async def get_conversation(conversation_id: str):
 
     conv_dict = dict(row)
     conv_dict['pinned'] = bool(conv_dict.get('pinned', 0))
+    conv_dict['archived'] = conv_dict.get('archived_at') is not None
     return conv_dict
 
 
+def _message_dict(row) -> Dict:
+    msg_dict = dict(row)
+    if msg_dict.get('references_json'):
+        msg_dict['references'] = json.loads(msg_dict['references_json'])
+    else:
+        msg_dict['references'] = None
+    del msg_dict['references_json']
+    return msg_dict
+
+
+def _encode_cursor(message: Dict) -> str:
+    raw = json.dumps([message["timestamp"], message["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        timestamp, message_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(timestamp), str(message_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/{conversation_id}/messages")
 async def get_messages(
     conversation_id: str,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    latest: bool = False
 ):
-    """Get messages for a conversation"""
+    """
+    Get messages for a conversation, oldest first.
+
+    Pages are keyset-paginated on (timestamp, id): pass `before` with the
+    `older` cursor of a page to load the messages preceding it, or `after`
+    with its `newer` cursor to load the ones following it. `latest` starts
+    at the newest messages. Without a cursor, `offset` still pages from
+    the start of the conversation.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after")
     conn = get_db_connection()
     cursor = conn.cursor()
 
     # Verify conversation exists
-    conv = cursor.execute(
-        "SELECT id FROM conversations WHERE id = ?", (conversation_id,)
-    ).fetchone()
-
-    if not conv:
+    if not await _open_conversation(conn, conversation_id):
         conn.close()
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Fetch messages
-    rows = cursor.execute(
-        """
-        SELECT * FROM chat_messages
-        WHERE conversation_id = ?
-        ORDER BY timestamp ASC
-        LIMIT ? OFFSET ?
-        """,
-        (conversation_id, limit, offset)
-    ).fetchall()
+    # One extra row tells whether there is another page in that direction
+    if before or (latest and not after):
+        where, params = "", []
+        if before:
+            where, params = "AND (timestamp, id) < (?, ?)", list(_decode_cursor(before))
+        rows = cursor.execute(
+            f"""
+            SELECT * FROM chat_messages
+            WHERE conversation_id = ? {where}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+            """,
+            (conversation_id, *params, limit + 1)
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        more = {"older": has_more, "newer": before is not None}
+    else:
+        where, params = "", []
+        if after:
+            where, params = "AND (timestamp, id) > (?, ?)", list(_decode_cursor(after))
+        rows = cursor.execute(
+            f"""
+            SELECT * FROM chat_messages
+            WHERE conversation_id = ? {where}
+            ORDER BY timestamp ASC, id ASC
+            LIMIT ? OFFSET ?
+            """,
+            (conversation_id, *params, limit + 1, 0 if after else offset)
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        more = {"older": after is not None or offset > 0, "newer": has_more}
 
     conn.close()
 
-    messages = []
-    for row in rows:
-        msg_dict = dict(row)
-        if msg_dict.get('references_json'):
-            msg_dict['references'] = json.loads(msg_dict['references_json'])
-        else:
-            msg_dict['references'] = None
-        del msg_dict['references_json']
-        messages.append(msg_dict)
-
+    messages = [_message_dict(row) for row in rows]
     return {
         "messages": messages,
         "total": len(messages),
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "cursors": {
+            "older": _encode_cursor(messages[0]) if messages and more["older"] else None,
+            "newer": _encode_cursor(messages[-1]) if messages and more["newer"] else None,
+        }
     }
 
 
@@ -147,57 +342,146 @@ async def get_messages(
 async def send_message(conversation_id: str, msg: MessageCreate):
     """Send a message in a conversation (simplified - no AI response yet)"""
     conn = get_db_connection()
-    cursor = conn.cursor()
 
     # Verify conversation exists
-    conv = cursor.execute(
-        "SELECT id FROM conversations WHERE id = ?", (conversation_id,)
-    ).fetchone()
-
-    if not conv:
+    if not await _open_conversation(conn, conversation_id):
         conn.close()
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Create user message
-    msg_id = str(uuid.uuid4())
-    now = datetime.now().isoformat()
+    message = _add_message(conn, conversation_id, msg.role, msg.content, msg.model, msg.references)
+    conn.close()
+    return message
 
-    references_json = None
-    if msg.references:
-        references_json = json.dumps(msg.references)
 
-    cursor.execute(
-        """
-        INSERT INTO chat_messages
-        (id, conversation_id, role, content, model, timestamp, references_json)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (msg_id, conversation_id, msg.role, msg.content, msg.model, now, references_json)
-    )
+@router.get("/stream/metrics")
+async def stream_metrics_stats():
+    """Time to first token and duration of streamed replies, and context assembly stats"""
+    return {**stream_metrics.stats(), "context": get_context_assembler().stats()}
 
-    # Update conversation
-    preview = msg.content[:100] if len(msg.content) > 100 else msg.content
-    cursor.execute(
-        """
-        UPDATE conversations
-        SET updated_at = ?, last_message_preview = ?
-        WHERE id = ?
-        """,
-        (now, preview, conversation_id)
-    )
 
-    conn.commit()
-    conn.close()
+async def _stream_reply(websocket: WebSocket, conversation_id: str, content: str, include_context: bool):
+    """
+    Stores the user message, then streams the assistant reply.
 
-    return {
-        "id": msg_id,
-        "conversation_id": conversation_id,
-        "role": msg.role,
-        "content": msg.content,
-        "model": msg.model,
-        "timestamp": now,
-        "references": msg.references
+    The reply is stored once, when the stream ends; a cancelled reply keeps
+    the text produced so far. Older turns are folded into the rolling
+    summary after the reply, off the time-to-first-token path.
+    """
+    orchestrator = get_orchestrator()
+    assembler = get_context_assembler()
+    model = orchestrator.model("chat")
+    retrieved = await _retrieve(content) if include_context else []
+    conn = get_db_connection()
+    try:
+        user_message = _add_message(conn, conversation_id, "user", content)
+        context = assembler.assemble(conn, conversation_id, retrieved)
+    finally:
+        conn.close()
+    await websocket.send_json({
+        "type": "start", "user_message": user_message, "model": model,
+        "context": {"tokens": context.tokens, "history_messages": context.history_messages,
+                    "excerpts": context.excerpts, "references": context.references},
+    })
+
+    parts: List[str] = []
+    started = time.perf_counter()
+    ttft_ms = None
+    status = "completed"
+    try:
+        async with aclosing(orchestrator.stream_chat(context.messages)) as deltas:
+            async for delta in deltas:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                parts.append(delta)
+                await websocket.send_json({"type": "token", "delta": delta})
+    except (asyncio.CancelledError, WebSocketDisconnect):
+        status = "cancelled"
+    except AIClientError as e:
+        status = "failed"
+        logger.warning("Streaming reply for conversation %s failed: %s", conversation_id, e)
+    duration_ms = (time.perf_counter() - started) * 1000
+    stream_metrics.record(status, ttft_ms, duration_ms)
+
+    message = None
+    if parts:
+        conn = get_db_connection()
+        try:
+            message = _add_message(
+                conn, conversation_id, "assistant", "".join(parts), model, context.references or None
+            )
+        finally:
+            conn.close()
+    metrics = {
+        "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+        "duration_ms": round(duration_ms, 1),
+        "deltas": len(parts),
     }
+    frame = {"type": {"completed": "done"}.get(status, status), "message": message, "metrics": metrics}
+    if status == "failed":
+        frame["detail"] = "The AI service failed to answer"
+    try:
+        await websocket.send_json(frame)
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # Client went away; the reply is stored regardless
+
+    if context.needs_summary:
+        try:
+            await assembler.refresh_summary(conversation_id, orchestrator)
+        except Exception:
+            logger.exception("Updating the summary of conversation %s failed", conversation_id)
+
+
+@router.websocket("/{conversation_id}/stream")
+async def stream_conversation(websocket: WebSocket, conversation_id: str):
+    """
+    Chat over a WebSocket, streaming assistant replies as they are generated.
+
+    Client frames: {"type": "message", "content": "...", "include_context": bool}
+    (include_context retrieves relevant notes and tasks) and {"type": "cancel"}.
+    Server frames: "start" (stored user message), "token" ({"delta"}), then
+    "done", "cancelled" or "failed" with the stored assistant message and
+    ttft_ms / duration_ms metrics; "error" for rejected client frames.
+    """
+    await websocket.accept()
+    conn = get_db_connection()
+    try:
+        exists = await _open_conversation(conn, conversation_id)
+    finally:
+        conn.close()
+    if not exists:
+        await websocket.send_json({"type": "error", "detail": "Conversation not found"})
+        await websocket.close(code=4404)
+        return
+
+    generation: Optional[asyncio.Task] = None
+    try:
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+            except ValueError:
+                frame = None
+            if not isinstance(frame, dict):
+                await websocket.send_json({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+            kind = frame.get("type")
+            if kind == "cancel":
+                if generation is not None and not generation.done():
+                    generation.cancel()
+            elif kind == "message" and str(frame.get("content") or "").strip():
+                if generation is not None and not generation.done():
+                    await websocket.send_json({"type": "error", "detail": "A reply is already streaming"})
+                    continue
+                generation = asyncio.create_task(_stream_reply(
+                    websocket, conversation_id, frame["content"], bool(frame.get("include_context"))
+                ))
+            else:
+                await websocket.send_json({"type": "error", "detail": "Expected a message or cancel frame"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if generation is not None and not generation.done():
+            generation.cancel()
+            await asyncio.gather(generation, return_exceptions=True)
 
 
 @router.delete("/{conversation_id}")
@@ -206,6 +490,9 @@ async def delete_conversation(conversation_id: str):
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    archived = cursor.execute("SELECT archived_at FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+    if archived is not None and archived[0] is not None:
+        _outside_batch("deleted")
     cursor.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
     deleted_count = cursor.rowcount
 
@@ -215,4 +502,5 @@ async def delete_conversation(conversation_id: str):
     if deleted_count == 0:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
+    get_conversation_archive().discard(conversation_id)
     return {"message": "Conversation deleted", "id": conversation_id}
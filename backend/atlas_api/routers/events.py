@@ -1,28 +1,84 @@
 """
 Events API endpoints
 """
-from fastapi import APIRouter, HTTPException
-from typing import Optional
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime, timedelta
+import io
 import uuid
+import json
 from ..models.event import Event, EventCreate, EventUpdate
 from ..database import get_db_connection
+from ..conditional import conditional, if_match, row_etag
+from ..db.repo import attach_event_links
+from ..config import settings
+from ..services.calendar_sync import CalendarSyncEngine, HttpCalendarProvider
+from ..services.event_service import (
+    compute_series_end,
+    format_event,
+    get_occurrence,
+    occurrence_cache,
+    parse_occurrence_id,
+    query_occurrences,
+)
+from ..services.scheduling import (
+    event_intervals,
+    free_slots,
+    merge_busy,
+    parse_clock,
+    suggest_slots,
+    working_windows,
+)
+from ..services.ics import (
+    export_query,
+    import_ics,
+    row_to_vevent,
+    write_calendar_footer,
+    write_calendar_header,
+)
+from ..utils.dates import parse_datetime
+from ..responses import JSONRoute
 
-router = APIRouter(prefix="/events", tags=["events"])
+router = APIRouter(prefix="/events", tags=["events"], route_class=JSONRoute)
 
 
-@router.get("")
+class SyncRequest(BaseModel):
+    """Calendar sync request"""
+    calendar_ids: Optional[List[str]] = None  # Defaults to settings.calendar.selected_calendars
+
+
+@router.get("", dependencies=[conditional("event", depends_on=("note", "task"))])
 async def list_events(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     source: Optional[str] = None,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    expand: bool = True
 ):
-    """List events with filters"""
+    """
+    List events with filters.
+
+    When both start_date and end_date are given (and expand is true), returns
+    every event overlapping the window, with recurring series expanded into
+    their occurrences. Otherwise series are returned as their master rows.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    if start_date and end_date and expand:
+        try:
+            events = query_occurrences(conn, start_date, end_date, source, limit=offset + limit)
+        except ValueError as e:
+            conn.close()
+            raise HTTPException(status_code=422, detail=str(e))
+        events = attach_event_links(conn, events[offset:])
+        conn.close()
+        return {"events": events, "total": len(events), "limit": limit, "offset": offset}
+
     query = "SELECT * FROM events WHERE 1=1"
     params = []
 
@@ -42,60 +98,104 @@ async def list_events(
     params.extend([limit, offset])
 
     rows = cursor.execute(query, params).fetchall()
+    events = attach_event_links(conn, [format_event(row) for row in rows])
     conn.close()
 
-    events = [dict(row) for row in rows]
-    for event in events:
-        event['linked_notes'] = []
-        event['linked_tasks'] = []
-
     return {"events": events, "total": len(events), "limit": limit, "offset": offset}
 
 
 @router.post("")
 async def create_event(event: EventCreate):
-    """Create a new event"""
+    """Create a new event, recurring series or occurrence override"""
+    # Stored and compared as naive local time, like every other timestamp
+    start_time = parse_datetime(event.start_time)
+    end_time = parse_datetime(event.end_time)
+    try:
+        series_end = compute_series_end(event.rrule, start_time, end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if event.recurring_event_id and event.rrule:
+        raise HTTPException(status_code=422, detail="An occurrence override cannot have its own rrule")
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    original_start_time = None
+    if event.recurring_event_id:
+        series = cursor.execute(
+            "SELECT id FROM events WHERE id = ? AND rrule IS NOT NULL",
+            (event.recurring_event_id,)
+        ).fetchone()
+        if not series:
+            conn.close()
+            raise HTTPException(status_code=404, detail="Recurring event not found")
+        original_start_time = parse_datetime(event.original_start_time or start_time).isoformat()
+
+    # NULL never matches in the (calendar_id, external_id) key, so keyed events need a calendar
+    calendar_id = event.calendar_id
+    if event.external_id and not calendar_id:
+        calendar_id = event.source
+    if event.external_id and cursor.execute(
+        "SELECT 1 FROM events WHERE calendar_id = ? AND external_id = ?",
+        (calendar_id, event.external_id)
+    ).fetchone():
+        conn.close()
+        raise HTTPException(status_code=409, detail="An event with this external_id already exists")
+
     event_id = str(uuid.uuid4())
     now = datetime.now().isoformat()
+    exdates = [parse_datetime(d).isoformat() for d in event.exdates]
 
     cursor.execute(
         """
         INSERT INTO events
         (id, title, description, start_time, end_time, location,
-         source, external_id, calendar_id, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+         source, external_id, calendar_id, created_at, updated_at,
+         rrule, exdates, recurring_event_id, original_start_time, series_end)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (
             event_id,
             event.title,
             event.description,
-            event.start_time.isoformat(),
-            event.end_time.isoformat(),
+            start_time.isoformat(),
+            end_time.isoformat(),
             event.location,
             event.source,
             event.external_id,
-            event.calendar_id,
+            calendar_id,
+            now,
             now,
-            now
+            event.rrule,
+            json.dumps(exdates) if exdates else None,
+            event.recurring_event_id,
+            original_start_time,
+            series_end
         )
     )
 
     conn.commit()
     conn.close()
 
+    if event.recurring_event_id:
+        occurrence_cache.invalidate(event.recurring_event_id)
+
     return {
         "id": event_id,
         "title": event.title,
         "description": event.description,
-        "start_time": event.start_time,
-        "end_time": event.end_time,
+        "start_time": start_time,
+        "end_time": end_time,
         "location": event.location,
         "source": event.source,
         "external_id": event.external_id,
-        "calendar_id": event.calendar_id,
+        "calendar_id": calendar_id,
+        "rrule": event.rrule,
+        "exdates": exdates,
+        "recurring_event_id": event.recurring_event_id,
+        "original_start_time": original_start_time,
+        "series_end": series_end,
         "created_at": now,
         "updated_at": now,
         "linked_notes": [],
@@ -103,7 +203,167 @@ async def create_event(event: EventCreate):
     }
 
 
-@router.get("/{event_id}")
+@router.get("/freebusy")
+async def freebusy(
+    start_date: str,
+    end_date: str,
+    source: Optional[str] = None,
+    work_start: str = "09:00",
+    work_end: str = "18:00",
+    weekdays_only: bool = False,
+    min_slot_minutes: int = 15,
+    include_all_day: bool = False,
+    suggest_tasks: bool = True,
+    task_minutes: int = 30,
+    max_tasks: int = 50
+):
+    """
+    Busy blocks, free slots and task slot suggestions for a window.
+
+    Events (with recurring series expanded) are merged into busy blocks;
+    free slots are the gaps inside working hours. Open tasks are suggested
+    into free slots ordered by due date, then priority.
+    """
+    try:
+        window_start = parse_datetime(start_date)
+        window_end = parse_datetime(end_date)
+        day_start = parse_clock(work_start)
+        day_end = parse_clock(work_end)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if window_end <= window_start:
+        raise HTTPException(status_code=422, detail="end_date must be after start_date")
+
+    conn = get_db_connection()
+    events = query_occurrences(conn, window_start, window_end, source)
+    tasks = []
+    if suggest_tasks:
+        tasks = [dict(row) for row in conn.execute(
+            """
+            SELECT id, title, priority, due_date FROM tasks
+            WHERE status != 'done'
+            ORDER BY due_date IS NULL, due_date ASC,
+                     CASE priority WHEN 'high' THEN 0 WHEN 'medium' THEN 1 ELSE 2 END
+            LIMIT ?
+            """,
+            (max_tasks,)
+        ).fetchall()]
+    conn.close()
+
+    busy = merge_busy(event_intervals(events, include_all_day))
+    windows = working_windows(window_start, window_end, day_start, day_end, weekdays_only)
+    free = free_slots(busy, windows, timedelta(minutes=min_slot_minutes))
+
+    suggestions, unscheduled = [], []
+    if tasks:
+        suggestions, unscheduled = suggest_slots(tasks, free, timedelta(minutes=task_minutes))
+
+    return {
+        "start": window_start.isoformat(),
+        "end": window_end.isoformat(),
+        "busy": [block.to_dict() for block in busy],
+        "free": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in free],
+        "suggestions": suggestions,
+        "unscheduled_task_ids": unscheduled,
+    }
+
+
+@router.post("/import")
+async def import_events(
+    file: UploadFile = File(...),
+    calendar_id: Optional[str] = None,
+    source: str = "ics"
+):
+    """
+    Import events from an iCalendar (.ics) file.
+
+    Events are upserted by (calendar_id, external_id), so re-importing the
+    same file updates events in place. The calendar id defaults to the
+    file's X-WR-CALNAME.
+    """
+    def run_import():
+        conn = get_db_connection()
+        try:
+            lines = io.TextIOWrapper(file.file, encoding="utf-8", errors="replace", newline="")
+            return import_ics(conn, lines, calendar_id, source)
+        finally:
+            conn.close()
+
+    return await run_in_threadpool(run_import)
+
+
+@router.get("/export")
+async def export_events(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    calendar_id: Optional[str] = None,
+    source: Optional[str] = None
+):
+    """Stream events intersecting a date range as an iCalendar file"""
+    query, params = export_query(start_date, end_date, calendar_id, source)
+
+    async def stream():
+        conn = get_db_connection()
+        try:
+            cursor = conn.execute(query, params)
+            yield write_calendar_header(calendar_id)
+            while True:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                yield "".join(row_to_vevent(row) for row in rows)
+            yield write_calendar_footer()
+        finally:
+            conn.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/calendar; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="atlas.ics"'}
+    )
+
+
+@router.post("/sync")
+async def sync_calendars(req: SyncRequest):
+    """Incrementally sync calendars from the configured provider"""
+    calendar_ids = req.calendar_ids
+    if calendar_ids is None:
+        conn = get_db_connection()
+        row = conn.execute("SELECT data FROM settings WHERE id = 1").fetchone()
+        conn.close()
+        data = json.loads(row['data']) if row else {}
+        calendar_ids = data.get('calendar', {}).get('selected_calendars', [])
+
+    if not calendar_ids:
+        raise HTTPException(status_code=400, detail="No calendars selected")
+
+    provider = HttpCalendarProvider(settings.calendar_api_url, settings.calendar_access_token)
+    engine = CalendarSyncEngine(provider, max_concurrency=settings.calendar_sync_concurrency)
+    try:
+        results = await engine.sync_all(calendar_ids)
+    finally:
+        await provider.aclose()
+    return {"calendars": results}
+
+
+@router.get("/sync/status")
+async def sync_status():
+    """Sync state of every calendar"""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT id, provider, last_sync, metadata FROM sync_state ORDER BY id"
+    ).fetchall()
+    conn.close()
+
+    states = []
+    for row in rows:
+        state = dict(row)
+        state['metadata'] = json.loads(state['metadata'] or '{}')
+        states.append(state)
+    return {"calendars": states}
+
+
+@router.get("/{event_id}", dependencies=[conditional("event", "event_id", depends_on=("event", "note", "task"))])
 async def get_event(event_id: str):
     """Get a single event"""
     conn = get_db_connection()
@@ -113,26 +373,148 @@ async def get_event(event_id: str):
         "SELECT * FROM events WHERE id = ?", (event_id,)
     ).fetchone()
 
+    if row:
+        event_dict = format_event(row)
+    else:
+        # Occurrences of recurring series have virtual ids
+        event_dict = get_occurrence(conn, event_id)
+
+    if not event_dict:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    attach_event_links(conn, [event_dict])
     conn.close()
+    return event_dict
+
 
-    if not row:
+@router.patch("/{event_id}")
+async def update_event(event_id: str, update: EventUpdate, request: Request, response: Response):
+    """Update an event or recurring series"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    existing = cursor.execute(
+        "SELECT * FROM events WHERE id = ?", (event_id,)
+    ).fetchone()
+
+    if not existing:
+        conn.close()
         raise HTTPException(status_code=404, detail="Event not found")
 
-    event_dict = dict(row)
-    event_dict['linked_notes'] = []
-    event_dict['linked_tasks'] = []
+    if not if_match(conn, request, "event", event_id):
+        conn.close()
+        raise HTTPException(status_code=412, detail="Event was modified")
+
+    # Build update query
+    updates = []
+    params = []
+
+    if update.title is not None:
+        updates.append("title = ?")
+        params.append(update.title)
+
+    if update.description is not None:
+        updates.append("description = ?")
+        params.append(update.description)
+
+    start_time = parse_datetime(update.start_time) if update.start_time is not None else None
+    end_time = parse_datetime(update.end_time) if update.end_time is not None else None
+
+    if start_time is not None:
+        updates.append("start_time = ?")
+        params.append(start_time.isoformat())
+
+    if end_time is not None:
+        updates.append("end_time = ?")
+        params.append(end_time.isoformat())
+
+    if update.location is not None:
+        updates.append("location = ?")
+        params.append(update.location)
+
+    if update.rrule is not None:
+        # An empty string turns a series back into a single event
+        updates.append("rrule = ?")
+        params.append(update.rrule or None)
+
+    if update.exdates is not None:
+        updates.append("exdates = ?")
+        params.append(json.dumps([parse_datetime(d).isoformat() for d in update.exdates]))
+
+    if not updates:
+        conn.close()
+        return format_event(existing)
+
+    rrule = existing['rrule'] if update.rrule is None else (update.rrule or None)
+    try:
+        series_end = compute_series_end(
+            rrule,
+            start_time or existing['start_time'],
+            end_time or existing['end_time']
+        )
+    except ValueError as e:
+        conn.close()
+        raise HTTPException(status_code=422, detail=str(e))
+
+    updates.append("series_end = ?")
+    params.append(series_end)
+    updates.append("updated_at = ?")
+    params.append(datetime.now().isoformat())
+    params.append(event_id)
+
+    query = f"UPDATE events SET {', '.join(updates)} WHERE id = ?"
+    cursor.execute(query, params)
+    conn.commit()
+
+    updated = cursor.execute(
+        "SELECT * FROM events WHERE id = ?", (event_id,)
+    ).fetchone()
+
+    occurrence_cache.invalidate(existing['recurring_event_id'] or event_id)
+
+    event_dict = attach_event_links(conn, [format_event(updated)])[0]
+    response.headers["ETag"] = row_etag(conn, "event", event_id, depends_on=("event", "note", "task"))
+    conn.close()
     return event_dict
 
 
 @router.delete("/{event_id}")
 async def delete_event(event_id: str):
-    """Delete an event"""
+    """
+    Delete an event.
+
+    Deleting a series also removes its overrides. Deleting a single
+    occurrence of a series (by its occurrence id) cancels it via EXDATE.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
 
     cursor.execute("DELETE FROM events WHERE id = ?", (event_id,))
     deleted_count = cursor.rowcount
 
+    if deleted_count:
+        cursor.execute("DELETE FROM events WHERE recurring_event_id = ?", (event_id,))
+        occurrence_cache.invalidate(event_id)
+    else:
+        occurrence = get_occurrence(conn, event_id)
+        if occurrence:
+            series_id, start = parse_occurrence_id(event_id)
+            series = cursor.execute(
+                "SELECT exdates, local_exdates FROM events WHERE id = ?", (series_id,)
+            ).fetchone()
+            exdates = json.loads(series['exdates'] or '[]')
+            exdates.append(start.isoformat())
+            # Kept when a calendar sync replaces the series' EXDATEs
+            local_exdates = json.loads(series['local_exdates'] or '[]')
+            local_exdates.append(start.isoformat())
+            cursor.execute(
+                "UPDATE events SET exdates = ?, local_exdates = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(exdates), json.dumps(local_exdates), datetime.now().isoformat(), series_id)
+            )
+            occurrence_cache.invalidate(series_id)
+            deleted_count = 1
+
     conn.commit()
     conn.close()
 
@@ -140,3 +522,93 @@ async def delete_event(event_id: str):
         raise HTTPException(status_code=404, detail="Event not found")
 
     return {"message": "Event deleted", "id": event_id}
+
+
+def _resolve_link_target(conn, event_id: str) -> str:
+    """Links on an occurrence of a series are stored on the series itself"""
+    if conn.execute("SELECT 1 FROM events WHERE id = ?", (event_id,)).fetchone():
+        return event_id
+    if get_occurrence(conn, event_id):
+        return parse_occurrence_id(event_id)[0]
+    conn.close()
+    raise HTTPException(status_code=404, detail="Event not found")
+
+
+@router.post("/{event_id}/notes/{note_id}")
+async def link_note(event_id: str, note_id: str):
+    """Link a note to an event"""
+    conn = get_db_connection()
+    target_id = _resolve_link_target(conn, event_id)
+
+    if not conn.execute("SELECT 1 FROM notes WHERE id = ?", (note_id,)).fetchone():
+        conn.close()
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    conn.execute(
+        "INSERT OR IGNORE INTO event_notes (event_id, note_id) VALUES (?, ?)",
+        (target_id, note_id)
+    )
+    conn.commit()
+    conn.close()
+
+    return {"message": "Note linked", "event_id": target_id, "note_id": note_id}
+
+
+@router.delete("/{event_id}/notes/{note_id}")
+async def unlink_note(event_id: str, note_id: str):
+    """Unlink a note from an event"""
+    conn = get_db_connection()
+    target_id = _resolve_link_target(conn, event_id)
+
+    cursor = conn.execute(
+        "DELETE FROM event_notes WHERE event_id = ? AND note_id = ?",
+        (target_id, note_id)
+    )
+    deleted_count = cursor.rowcount
+    conn.commit()
+    conn.close()
+
+    if deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Link not found")
+
+    return {"message": "Note unlinked", "event_id": target_id, "note_id": note_id}
+
+
+@router.post("/{event_id}/tasks/{task_id}")
+async def link_task(event_id: str, task_id: str):
+    """Link a task to an event"""
+    conn = get_db_connection()
+    target_id = _resolve_link_target(conn, event_id)
+
+    if not conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone():
+        conn.close()
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    conn.execute(
+        "INSERT OR IGNORE INTO event_tasks (event_id, task_id) VALUES (?, ?)",
+        (target_id, task_id)
+    )
+    conn.commit()
+    conn.close()
+
+    return {"message": "Task linked", "event_id": target_id, "task_id": task_id}
+
+
+@router.delete("/{event_id}/tasks/{task_id}")
+async def unlink_task(event_id: str, task_id: str):
+    """Unlink a task from an event"""
+    conn = get_db_connection()
+    target_id = _resolve_link_target(conn, event_id)
+
+    cursor = conn.execute(
+        "DELETE FROM event_tasks WHERE event_id = ? AND task_id = ?",
+        (target_id, task_id)
+    )
+    deleted_count = cursor.rowcount
+    conn.commit()
+    conn.close()
+
+    if deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Link not found")
+
+    return {"message": "Task unlinked", "event_id": target_id, "task_id": task_id}
@@ -1,7 +1,7 @@
 """
 Notes API endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import Optional, List
 from datetime import datetime
 import uuid
@@ -9,9 +9,18 @@ import json
 import re
 from ..models.note import Note, NoteCreate, NoteUpdate, Backlink, NoteTaskCount
 from ..database import get_db_connection
+from ..conditional import conditional, if_match, row_etag
+from ..db.fields import parse_fields
+from ..db.repo import load_backlinks
+from ..ai.indexing import enqueue_embedding
+from ..responses import JSONRoute
 import sqlite3
 
-router = APIRouter(prefix="/notes", tags=["notes"])
+router = APIRouter(prefix="/notes", tags=["notes"], route_class=JSONRoute)
+
+NOTE_COLUMNS = ("id", "title", "content", "tags", "created_at", "updated_at")
+NOTE_COMPUTED = {"links": ("content",), "task_count": ("content",), "backlinks": ("title",)}
+NOTE_PRESETS = {"summary": ("id", "title", "tags", "updated_at")}
 
 
 from ..utils.wiki_links import parse_wiki_links
@@ -55,24 +64,38 @@ def get_backlinks(note_id: str, conn: sqlite3.Connection) -> List[Backlink]:
     return backlinks
 
 
-@router.get("")
+@router.get("", dependencies=[conditional("note")])
 async def list_notes(
     q: Optional[str] = None,
     tag: Optional[str] = None,
     limit: int = 20,
     offset: int = 0,
-    sort: str = "updated_desc"
+    sort: str = "updated_desc",
+    fields: Optional[str] = None
 ):
-    """List notes with optional filters"""
+    """
+    List notes with optional filters.
+
+    `fields` picks columns and computed fields (`links`, `task_count`,
+    `backlinks`) per note, or a preset: `summary` for sidebars. Without it,
+    notes carry every column plus links and task counts; backlinks are
+    only resolved when requested.
+    """
+    try:
+        fieldset = parse_fields(fields, NOTE_COLUMNS, NOTE_COMPUTED, NOTE_PRESETS,
+                                default=NOTE_COLUMNS + ("links", "task_count"))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    query = "SELECT n.* FROM notes n"
+    query = f"SELECT {fieldset.select('n')} FROM notes n"
     params = []
     where_clauses = ["1=1"]
 
     if q:
-        query = "SELECT n.* FROM notes n JOIN notes_fts nft ON n.rowid = nft.rowid WHERE nft MATCH ?"
+        query = f"SELECT {fieldset.select('n')} FROM notes n JOIN notes_fts ON n.rowid = notes_fts.rowid WHERE notes_fts MATCH ?"
         params.append(q)
     
     if tag:
@@ -87,31 +110,38 @@ async def list_notes(
 
     # Sorting
     if sort == "updated_desc":
-        query += " ORDER BY updated_at DESC"
+        query += " ORDER BY n.updated_at DESC"
     elif sort == "updated_asc":
-        query += " ORDER BY updated_at ASC"
+        query += " ORDER BY n.updated_at ASC"
     elif sort == "created_desc":
-        query += " ORDER BY created_at DESC"
+        query += " ORDER BY n.created_at DESC"
     elif sort == "title_asc":
-        query += " ORDER BY title ASC"
+        query += " ORDER BY n.title ASC"
 
     query += " LIMIT ? OFFSET ?"
     params.extend([limit, offset])
 
     rows = cursor.execute(query, params).fetchall()
+    backlinks = load_backlinks(conn, [row['title'] for row in rows]) if "backlinks" in fieldset else None
     conn.close()
 
     notes = []
     for row in rows:
-        note_dict = dict(row)
-        note_dict['tags'] = json.loads(note_dict.get('tags') or '[]')
-        note_dict['links'] = parse_wiki_links(note_dict['content'])
-        note_dict['backlinks'] = []
-        extracted_tasks = extract_tasks_from_markdown(note_dict['content'])
-        total_tasks = len(extracted_tasks)
-        open_tasks = sum(1 for task in extracted_tasks if task['status'] == 'todo')
-        done_tasks = total_tasks - open_tasks
-        note_dict['task_count'] = NoteTaskCount(total=total_tasks, open=open_tasks, done=done_tasks)
+        note_dict = fieldset.stored(row)
+        if 'tags' in note_dict:
+            note_dict['tags'] = json.loads(note_dict['tags'] or '[]')
+        if "links" in fieldset:
+            note_dict['links'] = parse_wiki_links(row['content'])
+        if backlinks is not None:
+            note_dict['backlinks'] = [b for b in backlinks.get(row['title'], ()) if b['note_id'] != row['id']]
+        elif fields is None:
+            note_dict['backlinks'] = []
+        if "task_count" in fieldset:
+            extracted_tasks = extract_tasks_from_markdown(row['content'])
+            total_tasks = len(extracted_tasks)
+            open_tasks = sum(1 for task in extracted_tasks if task['status'] == 'todo')
+            done_tasks = total_tasks - open_tasks
+            note_dict['task_count'] = NoteTaskCount(total=total_tasks, open=open_tasks, done=done_tasks)
         notes.append(note_dict)
 
     return {"notes": notes, "total": len(notes), "limit": limit, "offset": offset}
@@ -151,6 +181,7 @@ async def create_note(note: NoteCreate):
             """,
             (note_id, link_target)
         )
+    enqueue_embedding(conn, "note", note_id)
     conn.commit()
     conn.close()
 
@@ -173,7 +204,7 @@ async def create_note(note: NoteCreate):
     }
 
 
-@router.get("/{note_id}")
+@router.get("/{note_id}", dependencies=[conditional("note", "note_id", depends_on=("note",))])
 async def get_note(note_id: str):
     """Get a single note with backlinks"""
     conn = get_db_connection()
@@ -203,7 +234,7 @@ async def get_note(note_id: str):
 
 
 @router.patch("/{note_id}")
-async def update_note(note_id: str, update: NoteUpdate):
+async def update_note(note_id: str, update: NoteUpdate, request: Request, response: Response):
     """Partial update of a note"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -217,6 +248,10 @@ async def update_note(note_id: str, update: NoteUpdate):
         conn.close()
         raise HTTPException(status_code=404, detail="Note not found")
 
+    if not if_match(conn, request, "note", note_id):
+        conn.close()
+        raise HTTPException(status_code=412, detail="Note was modified")
+
     # Build update query
     updates = []
     params = []
@@ -247,6 +282,8 @@ async def update_note(note_id: str, update: NoteUpdate):
 
     query = f"UPDATE notes SET {', '.join(updates)} WHERE id = ?"
     cursor.execute(query, params)
+    if update.title is not None or update.content is not None:
+        enqueue_embedding(conn, "note", note_id)
     conn.commit()
 
     # Fetch updated note to get its content (potentially new content)
@@ -281,6 +318,7 @@ async def update_note(note_id: str, update: NoteUpdate):
     open_tasks = sum(1 for task in extracted_tasks if task['status'] == 'todo')
     done_tasks = total_tasks - open_tasks
     note_dict['task_count'] = NoteTaskCount(total=total_tasks, open=open_tasks, done=done_tasks)
+    response.headers["ETag"] = row_etag(conn, "note", note_id, depends_on=("note",))
 
     conn.close()
     return note_dict
@@ -294,6 +332,8 @@ async def delete_note(note_id: str):
 
     cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,))
     deleted_count = cursor.rowcount
+    if deleted_count:
+        enqueue_embedding(conn, "note", note_id)
 
     conn.commit()
     conn.close()
@@ -7,11 +7,14 @@ from datetime import datetime
 import uuid
 from ..models.project import Project, ProjectCreate, ProjectUpdate
 from ..database import get_db_connection
+from ..conditional import conditional
+from ..db.repo import attach_project_notes
+from ..responses import JSONRoute
 
-router = APIRouter(prefix="/projects", tags=["projects"])
+router = APIRouter(prefix="/projects", tags=["projects"], route_class=JSONRoute)
 
 
-@router.get("")
+@router.get("", dependencies=[conditional("project", depends_on=("note",))])
 async def list_projects(limit: int = 50, offset: int = 0):
     """List all projects"""
     conn = get_db_connection()
@@ -22,12 +25,9 @@ async def list_projects(limit: int = 50, offset: int = 0):
         (limit, offset)
     ).fetchall()
 
+    projects = attach_project_notes(conn, [dict(row) for row in rows])
     conn.close()
 
-    projects = [dict(row) for row in rows]
-    for project in projects:
-        project['linked_notes'] = []
-
     return {"projects": projects, "total": len(projects), "limit": limit, "offset": offset}
 
 
@@ -62,7 +62,7 @@ async def create_project(project: ProjectCreate):
     }
 
 
-@router.get("/{project_id}")
+@router.get("/{project_id}", dependencies=[conditional("project", "project_id", depends_on=("note",))])
 async def get_project(project_id: str):
     """Get a single project"""
     conn = get_db_connection()
@@ -72,13 +72,12 @@ async def get_project(project_id: str):
         "SELECT * FROM projects WHERE id = ?", (project_id,)
     ).fetchone()
 
-    conn.close()
-
     if not row:
+        conn.close()
         raise HTTPException(status_code=404, detail="Project not found")
 
-    project_dict = dict(row)
-    project_dict['linked_notes'] = []
+    project_dict = attach_project_notes(conn, [dict(row)])[0]
+    conn.close()
     return project_dict
 
 
@@ -98,3 +97,45 @@ async def delete_project(project_id: str):
         raise HTTPException(status_code=404, detail="Project not found")
 
     return {"message": "Project deleted", "id": project_id}
+
+
+@router.post("/{project_id}/notes/{note_id}")
+async def link_note(project_id: str, note_id: str):
+    """Link a note to a project"""
+    conn = get_db_connection()
+
+    if not conn.execute("SELECT 1 FROM projects WHERE id = ?", (project_id,)).fetchone():
+        conn.close()
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if not conn.execute("SELECT 1 FROM notes WHERE id = ?", (note_id,)).fetchone():
+        conn.close()
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    conn.execute(
+        "INSERT OR IGNORE INTO project_notes (project_id, note_id) VALUES (?, ?)",
+        (project_id, note_id)
+    )
+    conn.commit()
+    conn.close()
+
+    return {"message": "Note linked", "project_id": project_id, "note_id": note_id}
+
+
+@router.delete("/{project_id}/notes/{note_id}")
+async def unlink_note(project_id: str, note_id: str):
+    """Unlink a note from a project"""
+    conn = get_db_connection()
+
+    cursor = conn.execute(
+        "DELETE FROM project_notes WHERE project_id = ? AND note_id = ?",
+        (project_id, note_id)
+    )
+    deleted_count = cursor.rowcount
+    conn.commit()
+    conn.close()
+
+    if deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Link not found")
+
+    return {"message": "Note unlinked", "project_id": project_id, "note_id": note_id}
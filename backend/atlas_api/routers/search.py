@@ -4,9 +4,10 @@ Search API endpoints
 from fastapi import APIRouter
 from typing import Optional, List
 from ..database import get_db_connection
+from ..responses import JSONRoute
 import json
 
-router = APIRouter(prefix="/search", tags=["search"])
+router = APIRouter(prefix="/search", tags=["search"], route_class=JSONRoute)
 
 
 @router.get("")
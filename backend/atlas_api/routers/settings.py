@@ -6,9 +6,11 @@ from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from datetime import datetime
 from ..database import get_db_connection
+from ..conditional import conditional
+from ..responses import JSONRoute
 import json
 
-router = APIRouter(prefix="/settings", tags=["settings"])
+router = APIRouter(prefix="/settings", tags=["settings"], route_class=JSONRoute)
 
 
 class SettingsData(BaseModel):
@@ -19,7 +21,7 @@ class SettingsData(BaseModel):
     ui: Optional[Dict[str, Any]] = None
 
 
-@router.get("")
+@router.get("", dependencies=[conditional("settings")])
 async def get_settings():
     """Get application settings"""
     conn = get_db_connection()
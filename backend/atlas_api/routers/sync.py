@@ -0,0 +1,71 @@
+"""
+Delta sync API endpoints
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional, Set
+import asyncio
+import json
+import sqlite3
+from ..database import get_db_connection
+from ..services.changes import latest_version
+from ..services.sync import TABLES, compacted_version, read_sync
+from ..responses import JSONRoute
+
+router = APIRouter(prefix="/sync", tags=["sync"], route_class=JSONRoute)
+
+MAX_PAGE = 10000
+
+
+async def _page(
+    conn: sqlite3.Connection,
+    since: int,
+    limit: int,
+    entities: Optional[Set[str]],
+    reset: bool,
+) -> AsyncIterator[str]:
+    """Streams one page as a JSON document, a chunk of rows at a time"""
+    try:
+        yield f'{{"reset":{json.dumps(reset)},"changes":['
+        separator = ""
+        for since, items in read_sync(conn, since, limit, entities):
+            if items:
+                yield separator + ",".join(json.dumps(item, separators=(",", ":")) for item in items)
+                separator = ","
+            await asyncio.sleep(0)
+        has_more = conn.execute(
+            "SELECT 1 FROM row_versions WHERE version > ? LIMIT 1", (since,)
+        ).fetchone() is not None
+        yield f'],"version":{since},"has_more":{json.dumps(has_more)}}}'
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@router.get("")
+async def sync(since: int = 0, limit: int = 1000, entities: Optional[str] = None):
+    """
+    Rows created, updated or deleted after version `since`, across entities.
+
+    Pass the returned `version` as the next `since` until `has_more` is
+    false. With `reset`, the page starts a full snapshot instead: the
+    client missed compacted deletes (or the database was replaced) and
+    should drop rows the snapshot does not return.
+    """
+    wanted = None
+    if entities:
+        wanted = {e.strip() for e in entities.split(",") if e.strip()}
+        unknown = wanted - set(TABLES)
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown entities: {', '.join(sorted(unknown))}")
+
+    conn = get_db_connection()
+    # One snapshot for the whole page, even if writes land between chunks. In
+    # WAL mode (see init_db) this read transaction does not hold writers back
+    # while a slow client drains the stream.
+    conn.execute("BEGIN")
+    reset = since > 0 and (since < compacted_version(conn) or since > latest_version(conn))
+    return StreamingResponse(
+        _page(conn, 0 if reset else since, max(1, min(limit, MAX_PAGE)), wanted, reset),
+        media_type="application/json",
+    )
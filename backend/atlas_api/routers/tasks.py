@@ -1,18 +1,37 @@
 """
 Tasks API endpoints
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import Optional
 from datetime import datetime
 import uuid
 import json
 from ..models.task import Task, TaskCreate, TaskUpdate
 from ..database import get_db_connection
+from ..conditional import conditional, if_match, row_etag
+from ..db.fields import parse_fields
+from ..ai.indexing import enqueue_embedding
+from ..responses import JSONRoute
 
-router = APIRouter(prefix="/tasks", tags=["tasks"])
+router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=JSONRoute)
 
+TASK_COLUMNS = (
+    "id", "title", "description", "status", "priority", "due_date", "tags",
+    "source_note_id", "source_line", "project_id", "created_at", "completed_at",
+)
+TASK_PRESETS = {"summary": ("id", "title", "status", "priority", "due_date", "tags", "project_id")}
 
-@router.get("")
+
+def _clock(request: Request) -> Optional[str]:
+    """The overdue and due_today filters also change with the time"""
+    if request.query_params.get("overdue") in ("true", "1"):
+        return datetime.now().strftime("%Y-%m-%dT%H%M")
+    if request.query_params.get("due_today") in ("true", "1"):
+        return datetime.now().date().isoformat()
+    return None
+
+
+@router.get("", dependencies=[conditional("task", vary=_clock)])
 async def list_tasks(
     status: Optional[str] = None,
     overdue: bool = False,
@@ -20,13 +39,19 @@ async def list_tasks(
     project_id: Optional[str] = None,
     tag: Optional[str] = None,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    fields: Optional[str] = None
 ):
-    """List tasks with filters"""
+    """List tasks with filters; `fields` picks columns per task, or `summary`"""
+    try:
+        fieldset = parse_fields(fields, TASK_COLUMNS, presets=TASK_PRESETS)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    query = "SELECT * FROM tasks WHERE 1=1"
+    query = f"SELECT {fieldset.select()} FROM tasks WHERE 1=1"
     params = []
 
     if status:
@@ -58,8 +83,9 @@ async def list_tasks(
 
     tasks = []
     for row in rows:
-        task_dict = dict(row)
-        task_dict['tags'] = json.loads(task_dict.get('tags') or '[]')
+        task_dict = fieldset.stored(row)
+        if 'tags' in task_dict:
+            task_dict['tags'] = json.loads(task_dict['tags'] or '[]')
         tasks.append(task_dict)
 
     return {"tasks": tasks, "total": len(tasks), "limit": limit, "offset": offset}
@@ -97,6 +123,7 @@ async def create_task(task: TaskCreate):
         )
     )
 
+    enqueue_embedding(conn, "task", task_id)
     conn.commit()
     conn.close()
 
@@ -116,7 +143,7 @@ async def create_task(task: TaskCreate):
     }
 
 
-@router.get("/{task_id}")
+@router.get("/{task_id}", dependencies=[conditional("task", "task_id")])
 async def get_task(task_id: str):
     """Get a single task"""
     conn = get_db_connection()
@@ -137,7 +164,7 @@ async def get_task(task_id: str):
 
 
 @router.patch("/{task_id}")
-async def update_task(task_id: str, update: TaskUpdate):
+async def update_task(task_id: str, update: TaskUpdate, request: Request, response: Response):
     """Update a task"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -151,6 +178,10 @@ async def update_task(task_id: str, update: TaskUpdate):
         conn.close()
         raise HTTPException(status_code=404, detail="Task not found")
 
+    if not if_match(conn, request, "task", task_id):
+        conn.close()
+        raise HTTPException(status_code=412, detail="Task was modified")
+
     # Build update query
     updates = []
     params = []
@@ -196,12 +227,15 @@ async def update_task(task_id: str, update: TaskUpdate):
     params.append(task_id)
     query = f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?"
     cursor.execute(query, params)
+    if update.title is not None or update.description is not None or update.tags is not None:
+        enqueue_embedding(conn, "task", task_id)
     conn.commit()
 
     # Fetch updated task
     updated = cursor.execute(
         "SELECT * FROM tasks WHERE id = ?", (task_id,)
     ).fetchone()
+    response.headers["ETag"] = row_etag(conn, "task", task_id)
 
     conn.close()
 
@@ -218,6 +252,8 @@ async def delete_task(task_id: str):
 
     cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
     deleted_count = cursor.rowcount
+    if deleted_count:
+        enqueue_embedding(conn, "task", task_id)
 
     conn.commit()
     conn.close()
@@ -0,0 +1,3 @@
+"""
+Service layer (business logic shared by routers and background workers)
+"""
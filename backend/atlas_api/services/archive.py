@@ -0,0 +1,289 @@
+"""
+Conversation archive (cold storage)
+
+Conversations idle for `idle_days` have their messages moved out of the hot
+database. All of a conversation's messages become one zlib-compressed JSON
+blob in a separate SQLite file, the cold store. The row in `conversations`
+stays, with `archived_at` set, so lists still show the title, preview and
+dates without touching the cold store.
+
+Opening an archived conversation rehydrates it: its messages are put back
+in `chat_messages` (and the FTS index, through its triggers) and the blob
+is dropped. `rehydrated_at` records the opening, so a conversation that is
+read but not replied to stays hot for another `idle_days`.
+
+Each move commits in the destination first and deletes from the source
+second. An interruption can therefore leave a copy in both places, but
+never in neither; the next move of the same conversation overwrites or
+ignores the copy.
+
+Because the moves commit to two files, the archive never joins a batch's
+shared transaction (database.shared_connection): it opens connections of
+its own, and callers inside a scope must not move conversations at all.
+
+Archiving frees pages inside the hot file but does not shrink it. `compact`
+runs VACUUM once free pages reach `compact_ratio` of the file.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..database import connect_db, get_db_path
+from .background import BackgroundLoop
+
+logger = logging.getLogger(__name__)
+
+COLD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived_conversations (
+  conversation_id TEXT PRIMARY KEY,
+  messages        BLOB NOT NULL,      -- zlib-compressed JSON array of chat_messages rows
+  message_count   INTEGER NOT NULL,
+  raw_bytes       INTEGER NOT NULL,   -- Size of the JSON before compression
+  archived_at     TIMESTAMP NOT NULL
+);
+"""
+
+
+def default_archive_path() -> Path:
+    from ..config import settings
+
+    if settings.archive_database_path:
+        return Path(settings.archive_database_path)
+    return get_db_path().with_name("atlas_archive.db")
+
+
+def free_ratio(conn: sqlite3.Connection) -> float:
+    """Share of the database file taken by free pages"""
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return free / pages if pages else 0.0
+
+
+class ConversationArchive(BackgroundLoop):
+    """
+    Args:
+        archive_path: Cold store file, created on first use (default: next to the database).
+        idle_days: Conversations not updated or opened for this long are archived; pinned ones never are.
+        batch_size: Conversations archived per round.
+        interval: Seconds between rounds of the background loop.
+        compact_ratio: Free page share of a file above which compact() vacuums it.
+        connection_factory: Returns a new connection to the hot database.
+    """
+
+    def __init__(
+        self,
+        archive_path: Optional[Path] = None,
+        idle_days: int = 90,
+        batch_size: int = 200,
+        interval: float = 6 * 3600.0,
+        compact_ratio: float = 0.25,
+        connection_factory: Callable[[], sqlite3.Connection] = connect_db,
+    ):
+        super().__init__()
+        self._archive_path = Path(archive_path) if archive_path else None
+        self.idle_days = idle_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.compact_ratio = compact_ratio
+        self.connection_factory = connection_factory
+        self.archived = 0
+        self.rehydrated = 0
+        self.compactions = 0
+
+    @property
+    def archive_path(self) -> Path:
+        return self._archive_path or default_archive_path()
+
+    def cold_connection(self) -> sqlite3.Connection:
+        self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.archive_path))
+        conn.executescript(COLD_SCHEMA)
+        return conn
+
+    # Moving conversations
+
+    def archive(self, conversation_id: str) -> bool:
+        """Moves a conversation's messages to the cold store; False if it changed meanwhile or is archived"""
+        hot = self.connection_factory()
+        try:
+            conv = hot.execute(
+                "SELECT updated_at, archived_at FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if conv is None or conv[1] is not None:
+                return False
+            rows = [
+                dict(row) for row in hot.execute(
+                    "SELECT * FROM chat_messages WHERE conversation_id = ? ORDER BY timestamp, id",
+                    (conversation_id,)
+                )
+            ]
+            raw = json.dumps(rows).encode("utf-8")
+            cold = self.cold_connection()
+            try:
+                with cold:
+                    cold.execute(
+                        "INSERT OR REPLACE INTO archived_conversations VALUES (?, ?, ?, ?, ?)",
+                        (conversation_id, zlib.compress(raw, 6), len(rows), len(raw), datetime.now().isoformat())
+                    )
+
+                with hot:
+                    # Only if no message arrived since the copy was taken
+                    marked = hot.execute(
+                        "UPDATE conversations SET archived_at = ? WHERE id = ? AND updated_at = ? AND archived_at IS NULL",
+                        (datetime.now().isoformat(), conversation_id, conv[0])
+                    ).rowcount
+                    if marked:
+                        hot.execute("DELETE FROM chat_messages WHERE conversation_id = ?", (conversation_id,))
+                if not marked:
+                    with cold:
+                        cold.execute("DELETE FROM archived_conversations WHERE conversation_id = ?", (conversation_id,))
+                    return False
+            finally:
+                cold.close()
+        finally:
+            hot.close()
+        self.archived += 1
+        return True
+
+    def rehydrate(self, conversation_id: str) -> int:
+        """Moves an archived conversation's messages back; returns how many were restored"""
+        hot = self.connection_factory()
+        cold = self.cold_connection()
+        try:
+            archived = hot.execute(
+                "SELECT archived_at FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if archived is None or archived[0] is None:
+                return 0
+            blob = cold.execute(
+                "SELECT messages FROM archived_conversations WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+            rows = json.loads(zlib.decompress(blob[0])) if blob else []
+            if blob is None:
+                logger.warning("Archived conversation %s is missing from the cold store", conversation_id)
+
+            columns = {row[1] for row in hot.execute("PRAGMA table_info(chat_messages)")}
+            with hot:
+                for row in rows:
+                    row = {key: value for key, value in row.items() if key in columns}
+                    hot.execute(
+                        f"INSERT OR IGNORE INTO chat_messages ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+                        list(row.values())
+                    )
+                hot.execute(
+                    "UPDATE conversations SET archived_at = NULL, rehydrated_at = ? WHERE id = ?",
+                    (datetime.now().isoformat(), conversation_id)
+                )
+            with cold:
+                cold.execute("DELETE FROM archived_conversations WHERE conversation_id = ?", (conversation_id,))
+        finally:
+            cold.close()
+            hot.close()
+        self.rehydrated += 1
+        return len(rows)
+
+    def discard(self, conversation_id: str):
+        """Drops the cold copy of a deleted conversation"""
+        if not self.archive_path.exists():
+            return
+        cold = self.cold_connection()
+        try:
+            with cold:
+                cold.execute("DELETE FROM archived_conversations WHERE conversation_id = ?", (conversation_id,))
+        finally:
+            cold.close()
+
+    def archive_idle(self, now: Optional[datetime] = None) -> List[str]:
+        """Archives up to batch_size idle, unpinned conversations, least recently updated first"""
+        cutoff = ((now or datetime.now()) - timedelta(days=self.idle_days)).isoformat()
+        conn = self.connection_factory()
+        try:
+            candidates = [
+                row[0] for row in conn.execute(
+                    """
+                    SELECT id FROM conversations
+                    WHERE archived_at IS NULL AND pinned = 0 AND updated_at < ?
+                      AND (rehydrated_at IS NULL OR rehydrated_at < ?)
+                    ORDER BY updated_at
+                    LIMIT ?
+                    """,
+                    (cutoff, cutoff, self.batch_size)
+                )
+            ]
+        finally:
+            conn.close()
+        return [conversation_id for conversation_id in candidates if self.archive(conversation_id)]
+
+    def compact(self, force: bool = False) -> Dict[str, bool]:
+        """VACUUMs the hot database and the cold store where free pages exceed compact_ratio"""
+        vacuumed = {}
+        for name, connect in (("hot", self.connection_factory), ("cold", self.cold_connection)):
+            conn = connect()
+            try:
+                vacuumed[name] = force or free_ratio(conn) >= self.compact_ratio
+                if vacuumed[name]:
+                    conn.execute("VACUUM")
+                    self.compactions += 1
+            finally:
+                conn.close()
+        return vacuumed
+
+    # Background loop
+
+    round_failed_message = "Conversation archiving round failed"
+
+    async def run_once(self) -> List[str]:
+        archived = await asyncio.to_thread(self.archive_idle)
+        if archived:
+            await asyncio.to_thread(self.compact)
+        return archived
+
+    def stats(self) -> Dict:
+        conn = self.connection_factory()
+        try:
+            archived_conversations = conn.execute(
+                "SELECT COUNT(*) FROM conversations WHERE archived_at IS NOT NULL"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        cold = {"messages": 0, "raw_bytes": 0, "stored_bytes": 0}
+        if self.archive_path.exists():
+            conn = self.cold_connection()
+            try:
+                row = conn.execute(
+                    "SELECT COALESCE(SUM(message_count), 0), COALESCE(SUM(raw_bytes), 0), "
+                    "COALESCE(SUM(LENGTH(messages)), 0) FROM archived_conversations"
+                ).fetchone()
+                cold = {"messages": row[0], "raw_bytes": row[1], "stored_bytes": row[2]}
+            finally:
+                conn.close()
+        return {
+            "archived_conversations": archived_conversations,
+            **cold,
+            "archived": self.archived,
+            "rehydrated": self.rehydrated,
+            "compactions": self.compactions,
+            "running": self._task is not None,
+        }
+
+
+_archive: Optional[ConversationArchive] = None
+
+
+def get_conversation_archive() -> ConversationArchive:
+    global _archive
+    if _archive is None:
+        from ..config import settings
+
+        _archive = ConversationArchive(
+            idle_days=settings.archive_idle_days,
+            batch_size=settings.archive_batch_size,
+            interval=settings.archive_interval_hours * 3600,
+            compact_ratio=settings.archive_compact_ratio,
+        )
+    return _archive
@@ -0,0 +1,70 @@
+"""
+Background loops on the running event loop
+
+`BackgroundLoop` runs a round of work every `interval` seconds, or right
+away after `wake()`. The wakeup is cleared before each round, not after, so
+a wake() or stop() that arrives mid-round starts the next round (or ends
+the loop) instead of being lost until the interval runs out.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+
+class BackgroundLoop:
+    """
+    Base of the app's background services.
+
+    Subclasses implement `_round`, or `run_once` for the default `_round`,
+    and provide `interval` (seconds between rounds when not woken).
+    """
+
+    interval: float
+    round_failed_message = "Background round failed"
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self):
+        """Starts the loop on the running event loop"""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        self.wake()
+        if self._task:
+            await self._task
+            self._task = None
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _round(self) -> bool:
+        """One round of work; returns True to start the next one without waiting"""
+        await self.run_once()
+        return False
+
+    async def run_once(self):
+        raise NotImplementedError
+
+    async def _run(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                busy = await self._round()
+            except Exception:
+                logging.getLogger(type(self).__module__).exception(self.round_failed_message)
+                busy = False
+            if self._stopping:
+                break
+            if busy:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,255 @@
+"""
+Change feed over the `changes` log
+
+Triggers append one row per note, task, event, project, conversation or
+settings write to `changes`, in the writing transaction. `version` is a
+gap-free, ever-increasing offset. The log therefore also catches writes
+that bypass the API routers, such as calendar sync, migrations or another
+process.
+
+`ChangeHub` is the only reader while clients are connected. It polls the
+log's sequence number, a one-row lookup, every `poll_interval`. When that moves, it
+reads the new rows once and fans them out to every subscriber. However
+many renderer windows listen, SQLite sees one tiny query per interval
+instead of each window re-fetching lists.
+
+A subscriber resumes from the last version it saw. When that version has
+been pruned from the log, the subscriber gets a reset instead and must
+reload its views.
+"""
+import asyncio
+import logging
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+from ..database import get_db_connection
+from .background import BackgroundLoop
+from .sync import compact_tombstones
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = ("note", "task", "event", "project", "conversation", "settings")
+
+
+@dataclass
+class Change:
+    version: int
+    entity: str
+    id: str
+    op: str     # insert | update | delete
+
+    def to_dict(self) -> Dict:
+        return {"entity": self.entity, "id": self.id, "op": self.op, "version": self.version}
+
+
+class ResetRequired(Exception):
+    """The requested offset was pruned; the client must reload and resume from `version`"""
+
+    def __init__(self, version: int):
+        super().__init__(f"Changes before version {version} are no longer available")
+        self.version = version
+
+
+def latest_version(conn: sqlite3.Connection) -> int:
+    """Newest version ever written (kept by AUTOINCREMENT even when the log is empty)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+    return row[0] if row else 0
+
+
+def read_changes(conn: sqlite3.Connection, since: int, limit: int = 500) -> List[Change]:
+    """
+    Changes after `since`, oldest first.
+
+    Raises ResetRequired if changes after `since` were pruned.
+    """
+    oldest = conn.execute("SELECT MIN(version) FROM changes").fetchone()[0]
+    latest = latest_version(conn)
+    if since < latest and (oldest is None or since < oldest - 1):
+        raise ResetRequired(latest)
+    rows = conn.execute(
+        "SELECT version, entity, entity_id, op FROM changes WHERE version > ? ORDER BY version LIMIT ?",
+        (since, limit)
+    ).fetchall()
+    return [Change(*row) for row in rows]
+
+
+def prune_changes(conn: sqlite3.Connection, retention_days: float) -> int:
+    """Deletes changes older than the retention window; returns how many"""
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    with conn:
+        return conn.execute("DELETE FROM changes WHERE changed_at < ?", (cutoff,)).rowcount
+
+
+class _Subscriber:
+    def __init__(self, max_pending: int):
+        self.queue: "asyncio.Queue[List[Change]]" = asyncio.Queue(max_pending)
+        self.overflowed = False
+
+    def offer(self, changes: List[Change]):
+        try:
+            self.queue.put_nowait(changes)
+        except asyncio.QueueFull:
+            self.overflowed = True    # Catches up from the log instead
+
+
+class ChangeHub(BackgroundLoop):
+    """
+    Args:
+        poll_interval: Seconds between checks of the log while subscribers are connected.
+        retention_days: Age after which changes are pruned.
+        tombstone_retention_days: Age after which sync tombstones are compacted.
+        max_pending: Batches buffered per subscriber before it falls back to reading the log.
+        connection_factory: Returns a new sqlite3 connection.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 0.25,
+        retention_days: float = 7.0,
+        tombstone_retention_days: float = 30.0,
+        max_pending: int = 256,
+        connection_factory: Callable[[], sqlite3.Connection] = get_db_connection,
+    ):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self.tombstone_retention_days = tombstone_retention_days
+        self.max_pending = max_pending
+        self.connection_factory = connection_factory
+        self.version: Optional[int] = None
+        self.polls = 0
+        self.broadcasts = 0
+        self._subscribers: Set[_Subscriber] = set()
+        self._last_prune: Optional[datetime] = None
+
+    # Lifecycle (wake() checks the log now, e.g. right after a write)
+
+    round_failed_message = "Change feed poll failed"
+
+    @property
+    def interval(self) -> float:
+        return self.poll_interval
+
+    async def _round(self) -> bool:
+        if self._subscribers:
+            self.poll()
+        self._maybe_prune()
+        return False
+
+    # Polling
+
+    def poll(self) -> List[Change]:
+        """Reads changes since the last poll and hands them to subscribers"""
+        conn = self.connection_factory()
+        try:
+            latest = latest_version(conn)
+            self.polls += 1
+            if self.version is None or latest < self.version:
+                self.version = latest
+                return []
+            if latest == self.version:
+                return []
+            try:
+                changes = read_changes(conn, self.version, limit=latest - self.version)
+            except ResetRequired:
+                # Stalled past the retention window; subscribers find out from the log
+                for subscriber in self._subscribers:
+                    subscriber.overflowed = True
+                    subscriber.offer([])
+                changes = []
+            self.version = latest
+        finally:
+            conn.close()
+        if changes:
+            self.broadcasts += 1
+            for subscriber in self._subscribers:
+                subscriber.offer(changes)
+        return changes
+
+    def _maybe_prune(self):
+        now = datetime.now()
+        if self._last_prune and now - self._last_prune < timedelta(hours=1):
+            return
+        self._last_prune = now
+        conn = self.connection_factory()
+        try:
+            prune_changes(conn, self.retention_days)
+            compact_tombstones(conn, self.tombstone_retention_days)
+        finally:
+            conn.close()
+
+    # Subscribing
+
+    async def subscribe(self, since: Optional[int] = None, entities: Optional[Set[str]] = None) -> AsyncIterator[List[Change]]:
+        """
+        Yields batches of changes after `since` (default: from now on), first
+        from the log, then live.
+
+        Raises ResetRequired if `since` is no longer in the log.
+        """
+        subscriber = _Subscriber(self.max_pending)
+        self._subscribers.add(subscriber)
+        try:
+            conn = self.connection_factory()
+            try:
+                latest = latest_version(conn)
+                if since is None:
+                    since = latest
+                if self.version is None or len(self._subscribers) == 1:
+                    self.version = latest   # The backlog covers everything up to here
+                backlog = read_changes(conn, since, limit=1_000_000)
+            finally:
+                conn.close()
+            # Live batches may repeat part of the backlog; versions filter them
+            last = since
+            while True:
+                if backlog:
+                    batch, backlog = backlog, None
+                else:
+                    batch = await subscriber.queue.get()
+                    if subscriber.overflowed:
+                        subscriber.overflowed = False
+                        while not subscriber.queue.empty():
+                            subscriber.queue.get_nowait()
+                        conn = self.connection_factory()
+                        try:
+                            batch = read_changes(conn, last, limit=1_000_000)
+                        finally:
+                            conn.close()
+                batch = [c for c in batch if c.version > last]
+                if not batch:
+                    continue
+                last = batch[-1].version
+                if entities:
+                    batch = [c for c in batch if c.entity in entities]
+                if batch:
+                    yield batch
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "subscribers": len(self._subscribers),
+            "polls": self.polls,
+            "broadcasts": self.broadcasts,
+            "running": self._task is not None,
+        }
+
+
+_hub: Optional[ChangeHub] = None
+
+
+def get_change_hub() -> ChangeHub:
+    global _hub
+    if _hub is None:
+        from ..config import settings
+
+        _hub = ChangeHub(
+            poll_interval=settings.changes_poll_interval_ms / 1000,
+            retention_days=settings.changes_retention_days,
+            tombstone_retention_days=settings.sync_tombstone_retention_days,
+        )
+    return _hub
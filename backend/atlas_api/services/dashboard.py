@@ -0,0 +1,180 @@
+"""
+Day overview shared by the dashboard and the daily briefing
+
+The tasks and notes of an overview come from one statement: three
+index range scans (`idx_tasks_open_due` twice, `idx_notes_updated_at`),
+each with its own order and limit, joined with UNION ALL. Without
+ANALYZE statistics SQLite would rather use `idx_tasks_status` and sort every
+open task, hence the INDEXED BY. Events come from
+`query_occurrences`, which expands recurring series.
+
+The dashboard endpoint polls overviews through `OverviewCache`. Each write
+to tasks, events or notes that could change an overview logs the affected
+date range in `dashboard_invalidations` (via triggers). Before answering,
+the cache reads any new log rows and evicts only the days they cover. A
+poll with no relevant write in between therefore costs one primary-key
+lookup.
+"""
+import json
+import sqlite3
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from ..database import in_shared_scope
+from .event_service import query_occurrences
+
+EVENT_FIELDS = ("id", "title", "start_time", "end_time", "location", "source", "recurring_event_id")
+TASK_FIELDS = ("id", "title", "status", "priority", "due_date", "tags")
+NOTE_FIELDS = ("id", "title", "tags", "created_at", "updated_at")
+RECENT_NOTE_DAYS = 3
+
+_OVERVIEW_SQL = """
+SELECT * FROM (
+    SELECT 'overdue' AS section, id, title, status, priority, due_date, tags, NULL AS created_at, NULL AS updated_at
+    FROM tasks INDEXED BY idx_tasks_open_due
+    WHERE status IN ('todo', 'in_progress') AND due_date < :day_start
+    ORDER BY due_date ASC
+    LIMIT 10
+)
+UNION ALL
+SELECT * FROM (
+    SELECT 'due_today', id, title, status, priority, due_date, tags, NULL, NULL
+    FROM tasks INDEXED BY idx_tasks_open_due
+    WHERE status IN ('todo', 'in_progress') AND due_date >= :day_start AND due_date <= :day_end
+    ORDER BY priority DESC, due_date ASC
+    LIMIT 10
+)
+UNION ALL
+SELECT * FROM (
+    SELECT 'recent_notes', id, title, NULL, NULL, NULL, tags, created_at, updated_at
+    FROM notes
+    WHERE updated_at >= :recent_since
+    ORDER BY updated_at DESC, id ASC
+    LIMIT 10
+)
+"""
+
+
+def _format_tagged(row, fields) -> Dict:
+    item = {key: row[key] for key in fields}
+    item['tags'] = json.loads(item.get('tags') or '[]')
+    return item
+
+
+def today_overview(conn: sqlite3.Connection, today: date) -> Dict:
+    """Overdue and due tasks, the day's events and recently edited notes"""
+    day_start = datetime.combine(today, datetime.min.time())
+    sections = {"overdue": [], "due_today": [], "recent_notes": []}
+    # ISO timestamps sort as text, so the day bounds compare without date() wrappers
+    rows = conn.execute(_OVERVIEW_SQL, {
+        "day_start": day_start.isoformat(),
+        "day_end": datetime.combine(today, datetime.max.time()).isoformat(),
+        "recent_since": (today - timedelta(days=RECENT_NOTE_DAYS)).isoformat(),
+    })
+    columns = [c[0] for c in rows.description]
+    for row in rows:
+        item = dict(zip(columns, row))
+        fields = NOTE_FIELDS if item["section"] == "recent_notes" else TASK_FIELDS
+        sections[item["section"]].append(_format_tagged(item, fields))
+
+    # Get today's events, including occurrences of recurring series
+    events_today = query_occurrences(conn, day_start, day_start + timedelta(days=1))
+
+    return {
+        "date": today.isoformat(),
+        "tasks": {
+            "overdue": sections["overdue"],
+            "due_today": sections["due_today"]
+        },
+        "events": [
+            {key: e[key] for key in EVENT_FIELDS}
+            for e in events_today
+        ],
+        "recent_notes": sections["recent_notes"]
+    }
+
+
+class OverviewCache:
+    """
+    Day overviews kept until a write could change them.
+
+    Cached overviews are shared between callers and must not be mutated.
+
+    Args:
+        max_days: Days kept, least recently used evicted first.
+        prune_after: Processed log rows tolerated before they are deleted.
+    """
+
+    def __init__(self, max_days: int = 32, prune_after: int = 1000):
+        self.max_days = max_days
+        self.prune_after = prune_after
+        self._overviews: "OrderedDict[str, Dict]" = OrderedDict()
+        self._seen: Optional[int] = None
+        self._unpruned = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _apply_invalidations(self, conn: sqlite3.Connection):
+        latest = conn.execute("SELECT MAX(id) FROM dashboard_invalidations").fetchone()[0] or 0
+        if self._seen is None or latest < self._seen:
+            # First use, or the log was reset underneath us (e.g. a restored backup)
+            self.evictions += len(self._overviews)
+            self._overviews.clear()
+        elif latest > self._seen:
+            ranges = conn.execute(
+                "SELECT first_date, last_date FROM dashboard_invalidations WHERE id > ?", (self._seen,)
+            ).fetchall()
+            for day in list(self._overviews):
+                if any((first is None or first <= day) and (last is None or day <= last) for first, last in ranges):
+                    del self._overviews[day]
+                    self.evictions += 1
+            self._unpruned += len(ranges)
+        self._seen = latest
+
+        if self._unpruned >= self.prune_after:
+            with conn:
+                conn.execute("DELETE FROM dashboard_invalidations WHERE id <= ?", (latest,))
+            self._unpruned = 0
+
+    def get(self, conn: sqlite3.Connection, day: date) -> Dict:
+        if in_shared_scope():
+            # A batch transaction may still roll back, and with it the invalidation ids it used
+            return today_overview(conn, day)
+        self._apply_invalidations(conn)
+        key = day.isoformat()
+        overview = self._overviews.get(key)
+        if overview is not None:
+            self._overviews.move_to_end(key)
+            self.hits += 1
+            return overview
+
+        self.misses += 1
+        overview = today_overview(conn, day)
+        self._overviews[key] = overview
+        if len(self._overviews) > self.max_days:
+            self._overviews.popitem(last=False)
+        return overview
+
+    def clear(self):
+        self._overviews.clear()
+        self._seen = None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "cached_days": len(self._overviews),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_overview_cache: Optional[OverviewCache] = None
+
+
+def get_overview_cache() -> OverviewCache:
+    global _overview_cache
+    if _overview_cache is None:
+        _overview_cache = OverviewCache()
+    return _overview_cache
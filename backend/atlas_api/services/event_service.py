@@ -0,0 +1,391 @@
+"""
+Event queries over single events and recurring series
+
+A recurring series is stored as one `events` row with an `rrule`. Its
+occurrences are never materialized in the database; they are expanded on
+demand for the requested window. Overridden occurrences are ordinary rows
+pointing back at the series via `recurring_event_id`/`original_start_time`,
+and cancelled occurrences are listed in the series' `exdates`. Those
+cancelled here (a deleted occurrence, a cancelled instance from a sync)
+rather than in the source's EXDATE list are also kept in `local_exdates`.
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .recurrence import RecurrenceRule, iter_occurrences, last_occurrence
+from ..utils.dates import parse_datetime
+
+OCCURRENCE_ID_FORMAT = "%Y%m%dT%H%M%S"
+
+# Width of the aligned expansion buckets held by the occurrence cache.
+# Windows that overlap the same buckets (day, week and month views, or the
+# same window recomputed repeatedly) share the cached expansion.
+BUCKET_DAYS = 32
+_EPOCH = datetime(1970, 1, 1)
+
+
+def occurrence_id(series_id: str, start: datetime) -> str:
+    """Stable id of a virtual occurrence, e.g. `<series id>_20250106T090000`"""
+    return f"{series_id}_{start.strftime(OCCURRENCE_ID_FORMAT)}"
+
+
+def parse_occurrence_id(event_id: str) -> Optional[Tuple[str, datetime]]:
+    """Splits an occurrence id into (series id, occurrence start)"""
+    series_id, sep, stamp = event_id.rpartition("_")
+    if not sep or not series_id:
+        return None
+    try:
+        return series_id, datetime.strptime(stamp, OCCURRENCE_ID_FORMAT)
+    except ValueError:
+        return None
+
+
+def parse_exdates(value: Optional[str]) -> Set[datetime]:
+    """Decodes the JSON `exdates` column into a set of naive datetimes"""
+    if not value:
+        return set()
+    return {parse_datetime(v) for v in json.loads(value)}
+
+
+def compute_series_end(rrule: Optional[str], start_time: datetime, end_time: datetime) -> Optional[str]:
+    """
+    Computes the end of the last occurrence of a series.
+
+    Stored in `events.series_end` so window queries can skip finished series
+    without expanding them. Returns None for unbounded series.
+    """
+    if not rrule:
+        return None
+    rule = RecurrenceRule.parse(rrule)
+    start = parse_datetime(start_time)
+    last = last_occurrence(rule, start)
+    if last is None:
+        return None
+    duration = parse_datetime(end_time) - start
+    return (last + duration).isoformat()
+
+
+def format_event(row) -> Dict:
+    """Converts an events row to an API dict"""
+    event = dict(row)
+    event['exdates'] = json.loads(event.get('exdates') or '[]')
+    event.pop('local_exdates', None)
+    return event
+
+
+class OccurrenceCache:
+    """
+    Per-series LRU cache of expanded occurrence starts.
+
+    Each series keeps an LRU of aligned buckets (see BUCKET_DAYS). Entries
+    are validated against the series' recurrence inputs, so an edited rule
+    is never served stale even without an explicit invalidate().
+    """
+
+    def __init__(self, max_series: int = 512, max_buckets: int = 24):
+        self.max_series = max_series
+        self.max_buckets = max_buckets
+        self._series: "OrderedDict[str, Tuple[tuple, OrderedDict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_bucket(
+        self,
+        series_id: str,
+        version: tuple,
+        bucket: int,
+        rule: RecurrenceRule,
+        dtstart: datetime,
+    ) -> Tuple[datetime, ...]:
+        """Returns occurrence starts of the series that fall in `bucket`"""
+        with self._lock:
+            entry = self._series.get(series_id)
+            if entry is not None and entry[0] == version:
+                self._series.move_to_end(series_id)
+                starts = entry[1].get(bucket)
+                if starts is not None:
+                    entry[1].move_to_end(bucket)
+                    self.hits += 1
+                    return starts
+
+        bucket_start = _EPOCH + timedelta(days=bucket * BUCKET_DAYS)
+        bucket_end = bucket_start + timedelta(days=BUCKET_DAYS)
+        starts = tuple(iter_occurrences(rule, dtstart, after=bucket_start, before=bucket_end))
+
+        with self._lock:
+            self.misses += 1
+            entry = self._series.get(series_id)
+            if entry is None or entry[0] != version:
+                entry = (version, OrderedDict())
+                self._series[series_id] = entry
+            self._series.move_to_end(series_id)
+            buckets = entry[1]
+            buckets[bucket] = starts
+            buckets.move_to_end(bucket)
+            while len(buckets) > self.max_buckets:
+                buckets.popitem(last=False)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        return starts
+
+    def invalidate(self, series_id: Optional[str] = None):
+        """Drops one series (or everything when series_id is None)"""
+        with self._lock:
+            if series_id is None:
+                self._series.clear()
+            else:
+                self._series.pop(series_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+occurrence_cache = OccurrenceCache()
+
+
+def _bucket_of(value: datetime) -> int:
+    return (value - _EPOCH).days // BUCKET_DAYS
+
+
+def expand_series(
+    series: Dict,
+    window_start: datetime,
+    window_end: datetime,
+    overridden: Iterable[datetime] = (),
+    cache: Optional[OccurrenceCache] = None,
+) -> List[Dict]:
+    """
+    Expands a recurring series into occurrences overlapping a window.
+
+    Args:
+        series: The series row as a dict (must include `rrule`).
+        window_start: Inclusive window start.
+        window_end: Exclusive window end.
+        overridden: Original starts replaced by override rows.
+        cache: Occurrence cache to use (defaults to the shared cache).
+
+    Returns:
+        Occurrence dicts shaped like event rows, sorted by start time.
+    """
+    cache = cache or occurrence_cache
+    rule = RecurrenceRule.parse(series['rrule'])
+    dtstart = parse_datetime(series['start_time'])
+    duration = parse_datetime(series['end_time']) - dtstart
+    excluded = parse_exdates(series.get('exdates')) | set(overridden)
+    version = (series['rrule'], series['start_time'], series['end_time'], series.get('exdates'))
+
+    # An occurrence overlaps the window if it starts before the window ends
+    # and ends after the window starts.
+    first = window_start - duration
+    occurrences = []
+    for bucket in range(_bucket_of(first), _bucket_of(window_end) + 1):
+        for start in cache.get_bucket(series['id'], version, bucket, rule, dtstart):
+            if start < first or start >= window_end or start in excluded:
+                continue
+            end = start + duration
+            if end <= window_start and duration:
+                continue
+            occurrence = dict(series)
+            occurrence.pop("local_exdates", None)
+            occurrence.update({
+                "id": occurrence_id(series['id'], start),
+                "start_time": start.isoformat(),
+                "end_time": end.isoformat(),
+                "rrule": None,
+                "exdates": [],
+                "series_end": None,
+                "recurring_event_id": series['id'],
+                "original_start_time": start.isoformat(),
+            })
+            occurrences.append(occurrence)
+    return occurrences
+
+
+def _overridden_starts(conn: sqlite3.Connection, series_ids: Sequence[str]) -> Dict[str, Set[datetime]]:
+    overridden: Dict[str, Set[datetime]] = {}
+    for i in range(0, len(series_ids), 500):
+        chunk = series_ids[i:i + 500]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            SELECT recurring_event_id, original_start_time FROM events
+            WHERE recurring_event_id IN ({placeholders})
+              AND original_start_time IS NOT NULL
+            """,
+            list(chunk)
+        ).fetchall()
+        for row in rows:
+            overridden.setdefault(row[0], set()).add(parse_datetime(row[1]))
+    return overridden
+
+
+def query_occurrences(
+    conn: sqlite3.Connection,
+    window_start: datetime,
+    window_end: datetime,
+    source: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Returns events and series occurrences overlapping [window_start, window_end).
+
+    Single events (including overrides) come straight from an index range
+    query; series are pre-filtered by `start_time`/`series_end` and expanded
+    in memory, so no instances are materialized in the database.
+    """
+    window_start = parse_datetime(window_start)
+    window_end = parse_datetime(window_end)
+    start_iso = window_start.isoformat()
+    end_iso = window_end.isoformat()
+
+    source_clause = ""
+    params: List = [end_iso, start_iso]
+    if source:
+        source_clause = " AND source = ?"
+        params.append(source)
+
+    single_query = (
+        "SELECT * FROM events WHERE rrule IS NULL AND start_time < ? AND end_time > ?"
+        + source_clause + " ORDER BY start_time ASC"
+    )
+    single_params = list(params)
+    if limit is not None:
+        single_query += " LIMIT ?"
+        single_params.append(limit)
+    singles = [format_event(row) for row in conn.execute(single_query, single_params).fetchall()]
+
+    series_rows = conn.execute(
+        "SELECT * FROM events WHERE rrule IS NOT NULL AND start_time < ?"
+        " AND (series_end IS NULL OR series_end > ?)" + source_clause,
+        params
+    ).fetchall()
+
+    occurrences: List[Dict] = []
+    if series_rows:
+        overridden = _overridden_starts(conn, [row['id'] for row in series_rows])
+        for row in series_rows:
+            series = dict(row)
+            occurrences.extend(expand_series(
+                series, window_start, window_end, overridden.get(series['id'], ())
+            ))
+
+    events = singles + occurrences
+    events.sort(key=lambda e: parse_datetime(e['start_time']))
+    if limit is not None:
+        events = events[:limit]
+    return events
+
+
+def get_occurrence(conn: sqlite3.Connection, event_id: str) -> Optional[Dict]:
+    """Resolves a virtual occurrence id to its occurrence, if it exists"""
+    parsed = parse_occurrence_id(event_id)
+    if parsed is None:
+        return None
+    series_id, start = parsed
+    row = conn.execute(
+        "SELECT * FROM events WHERE id = ? AND rrule IS NOT NULL", (series_id,)
+    ).fetchone()
+    if not row:
+        return None
+    overridden = _overridden_starts(conn, [series_id]).get(series_id, ())
+    matches = expand_series(dict(row), start, start + timedelta(seconds=1), overridden)
+    for occurrence in matches:
+        if occurrence['id'] == event_id:
+            return occurrence
+    return None
+
+
+UPSERT_COLUMNS = (
+    "id", "title", "description", "start_time", "end_time", "location",
+    "source", "external_id", "calendar_id", "created_at", "updated_at",
+    "rrule", "exdates", "recurring_event_id", "original_start_time", "series_end",
+)
+
+_UPSERT_SQL = f"""
+    INSERT INTO events ({", ".join(UPSERT_COLUMNS)})
+    VALUES ({", ".join("?" for _ in UPSERT_COLUMNS)})
+    ON CONFLICT(calendar_id, external_id) DO UPDATE SET
+        {", ".join(f"{c} = excluded.{c}" for c in UPSERT_COLUMNS if c not in ("id", "created_at", "recurring_event_id", "exdates"))},
+        recurring_event_id = COALESCE(excluded.recurring_event_id, events.recurring_event_id),
+        exdates = CASE
+            WHEN events.local_exdates IS NULL THEN excluded.exdates
+            ELSE (SELECT json_group_array(value) FROM (
+                SELECT value FROM json_each(events.local_exdates)
+                UNION SELECT value FROM json_each(COALESCE(excluded.exdates, '[]'))
+                ORDER BY value
+            ))
+        END
+"""
+
+
+def upsert_events(conn: sqlite3.Connection, rows: Sequence[Dict]) -> int:
+    """
+    Inserts or updates externally sourced events keyed by (calendar_id, external_id).
+
+    Rows must provide every column in UPSERT_COLUMNS. The caller owns the
+    transaction, so a batch is applied atomically with a single executemany.
+    The source's EXDATEs replace the stored ones, so an occurrence restored
+    upstream comes back; only `local_exdates` are merged in, since a series
+    update doesn't carry the cancellations folded in here.
+    """
+    conn.executemany(_UPSERT_SQL, [tuple(row[c] for c in UPSERT_COLUMNS) for row in rows])
+    return len(rows)
+
+
+def link_overrides(conn: sqlite3.Connection, calendar_id: str, overrides: Sequence[Tuple[str, str]]):
+    """
+    Points override rows at their series once both are stored.
+
+    Args:
+        overrides: (override external_id, series external_id) pairs.
+    """
+    conn.executemany(
+        """
+        UPDATE events SET recurring_event_id = (
+            SELECT m.id FROM events m WHERE m.calendar_id = ? AND m.external_id = ?
+        )
+        WHERE calendar_id = ? AND external_id = ?
+        """,
+        [(calendar_id, series_uid, calendar_id, external_id) for external_id, series_uid in overrides]
+    )
+
+
+def cancel_occurrences(conn: sqlite3.Connection, calendar_id: str, cancelled: Sequence[Tuple[str, datetime]]):
+    """
+    Adds EXDATEs (and local_exdates) to series for cancelled occurrences and drops any override rows.
+
+    Args:
+        cancelled: (series external_id, original occurrence start) pairs.
+    """
+    by_series: Dict[str, List[datetime]] = {}
+    for series_uid, start in cancelled:
+        by_series.setdefault(series_uid, []).append(start)
+
+    for series_uid, starts in by_series.items():
+        row = conn.execute(
+            "SELECT id, exdates, local_exdates FROM events WHERE calendar_id = ? AND external_id = ?",
+            (calendar_id, series_uid)
+        ).fetchone()
+        if not row:
+            continue
+        cancelled_starts = {start.isoformat() for start in starts}
+        exdates = set(json.loads(row['exdates'] or '[]')) | cancelled_starts
+        local_exdates = set(json.loads(row['local_exdates'] or '[]')) | cancelled_starts
+        conn.execute(
+            "UPDATE events SET exdates = ?, local_exdates = ? WHERE id = ?",
+            (json.dumps(sorted(exdates)), json.dumps(sorted(local_exdates)), row['id'])
+        )
+        conn.executemany(
+            "DELETE FROM events WHERE recurring_event_id = ? AND original_start_time = ?",
+            [(row['id'], start.isoformat()) for start in starts]
+        )
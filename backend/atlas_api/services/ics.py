@@ -0,0 +1,534 @@
+"""
+Streaming iCalendar (RFC 5545) reader and writer for events
+
+Both directions work on iterators: the reader consumes lines and yields one
+VEVENT at a time, and the writer yields ICS text chunks, so neither ever
+holds a whole calendar in memory.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .event_service import (
+    cancel_occurrences,
+    compute_series_end,
+    link_overrides,
+    occurrence_cache,
+    upsert_events,
+)
+from ..utils.dates import is_all_day, parse_datetime, to_local_naive
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None
+    ZoneInfoNotFoundError = Exception
+
+PRODID = "-//Atlas//Atlas Calendar//EN"
+
+# Properties that may appear multiple times and are collected into lists
+MULTI_VALUED = {"EXDATE", "RDATE"}
+
+_DURATION_PATTERN = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+class ICSProperty:
+    """A content line: name, parameters and raw value"""
+    __slots__ = ("name", "params", "value")
+
+    def __init__(self, name: str, params: Dict[str, str], value: str):
+        self.name = name
+        self.params = params
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"ICSProperty({self.name!r}, {self.params!r}, {self.value!r})"
+
+
+# ----------------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------------
+
+def unfold_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Joins folded continuation lines (those starting with a space or tab)"""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_content_line(line: str) -> ICSProperty:
+    """Splits `NAME;PARAM=VALUE:value` into an ICSProperty"""
+    colon = line.find(":")
+    quote = line.find('"')
+    if 0 <= quote < colon:
+        # A quoted parameter value may itself contain ':'
+        in_quotes = False
+        colon = -1
+        for i, char in enumerate(line):
+            if char == '"':
+                in_quotes = not in_quotes
+            elif char == ":" and not in_quotes:
+                colon = i
+                break
+    if colon < 0:
+        raise ValueError(f"Malformed content line: {line[:60]!r}")
+
+    head, value = line[:colon], line[colon + 1:]
+    if ";" not in head:
+        return ICSProperty(head.upper(), {}, value)
+    name, *raw_params = head.split(";")
+    params = {}
+    for raw in raw_params:
+        key, _, param_value = raw.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return ICSProperty(name.upper(), params, value)
+
+
+def unescape_text(value: str) -> str:
+    """Decodes TEXT escapes (\\n, \\, \\; \\\\)"""
+    if "\\" not in value:
+        return value
+    out = []
+    chars = iter(value)
+    for char in chars:
+        if char == "\\":
+            nxt = next(chars, "")
+            out.append("\n" if nxt in ("n", "N") else nxt)
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+class ICSReader:
+    """
+    Iterates the VEVENTs of an iCalendar stream.
+
+    Each item maps property names to ICSProperty (or a list of them for
+    MULTI_VALUED properties). Nested components such as VALARM are skipped.
+    Calendar-level properties seen so far (e.g. X-WR-CALNAME) are available
+    on `calendar_props` while iterating.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self.lines = lines
+        self.calendar_props: Dict[str, ICSProperty] = {}
+
+    def __iter__(self) -> Iterator[Dict[str, object]]:
+        depth = 0
+        event: Optional[Dict[str, object]] = None
+
+        for line in unfold_lines(self.lines):
+            if not line.strip():
+                continue
+            upper = line.upper()
+            if upper.startswith("BEGIN:"):
+                if event is not None:
+                    depth += 1
+                elif upper[6:].strip() == "VEVENT":
+                    event = {}
+                continue
+            if upper.startswith("END:"):
+                if event is not None:
+                    if depth:
+                        depth -= 1
+                    elif upper[4:].strip() == "VEVENT":
+                        yield event
+                        event = None
+                continue
+
+            try:
+                prop = parse_content_line(line)
+            except ValueError:
+                continue
+            if event is None:
+                self.calendar_props.setdefault(prop.name, prop)
+            elif depth == 0:
+                if prop.name in MULTI_VALUED:
+                    event.setdefault(prop.name, []).append(prop)
+                else:
+                    event.setdefault(prop.name, prop)
+
+
+def parse_ics_datetime(prop: ICSProperty) -> Tuple[datetime, bool]:
+    """
+    Parses a DTSTART/DTEND/RECURRENCE-ID style property.
+
+    Returns:
+        (naive local datetime, is_all_day)
+    """
+    return _parse_ics_value(prop.value, prop.params)
+
+
+def _basic_datetime(value: str) -> datetime:
+    """Parses YYYYMMDDTHHMMSS without strptime, which dominates import time"""
+    if len(value) != 15 or value[8] != "T":
+        raise ValueError(f"Invalid DATE-TIME: {value!r}")
+    return datetime(
+        int(value[0:4]), int(value[4:6]), int(value[6:8]),
+        int(value[9:11]), int(value[11:13]), int(value[13:15])
+    )
+
+
+def _parse_ics_value(value: str, params: Dict[str, str]) -> Tuple[datetime, bool]:
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or (len(value) == 8 and value.isdigit()):
+        return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8])), True
+
+    if value.endswith("Z"):
+        parsed = _basic_datetime(value[:-1])
+        return to_local_naive(parsed.replace(tzinfo=timezone.utc)), False
+
+    parsed = _basic_datetime(value)
+    tzid = params.get("TZID")
+    if tzid and ZoneInfo is not None:
+        try:
+            return to_local_naive(parsed.replace(tzinfo=ZoneInfo(tzid))), False
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    # Floating time or an unknown TZID: keep the wall-clock value
+    return parsed, False
+
+
+def parse_ics_datetime_list(props: List[ICSProperty]) -> List[datetime]:
+    """Parses EXDATE-style properties, which may hold comma-separated values"""
+    values = []
+    for prop in props:
+        for raw in prop.value.split(","):
+            if raw.strip():
+                values.append(_parse_ics_value(raw, prop.params)[0])
+    return values
+
+
+def parse_duration(value: str) -> timedelta:
+    """Parses an RFC 5545 DURATION such as PT1H30M or P1D"""
+    match = _DURATION_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid DURATION: {value!r}")
+    parts = {k: int(v) for k, v in match.groupdict().items() if v and k != "sign"}
+    delta = timedelta(
+        weeks=parts.get("weeks", 0),
+        days=parts.get("days", 0),
+        hours=parts.get("hours", 0),
+        minutes=parts.get("minutes", 0),
+        seconds=parts.get("seconds", 0),
+    )
+    return -delta if match.group("sign") == "-" else delta
+
+
+# ----------------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------------
+
+def escape_text(value: str) -> str:
+    """Encodes a TEXT value"""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """Folds a content line at 75 octets and terminates it with CRLF"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_ics_datetime(value: datetime) -> str:
+    """Formats a naive local datetime as a floating DATE-TIME"""
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def _time_property(name: str, value: datetime, all_day: bool) -> str:
+    if all_day:
+        return f"{name};VALUE=DATE:{value.strftime('%Y%m%d')}"
+    return f"{name}:{format_ics_datetime(value)}"
+
+
+def write_calendar_header(name: Optional[str] = None) -> str:
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN"]
+    if name:
+        lines.append(f"X-WR-CALNAME:{escape_text(name)}")
+    return "".join(fold_line(line) for line in lines)
+
+
+def write_calendar_footer() -> str:
+    return fold_line("END:VCALENDAR")
+
+
+def write_vevent(event: Dict, uid: str, recurrence_id: Optional[datetime] = None) -> str:
+    """
+    Serializes one event dict (an events row) as a VEVENT block.
+
+    Args:
+        event: Row values with start_time/end_time as ISO strings or datetimes.
+        uid: The UID to emit (series and overrides share one UID).
+        recurrence_id: Original occurrence start, for override rows.
+    """
+    start = parse_datetime(event['start_time'])
+    end = parse_datetime(event['end_time'])
+    stamp = parse_datetime(event.get('updated_at') or event['start_time'])
+    all_day = is_all_day(start, end)
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{format_ics_datetime(stamp)}",
+        _time_property("DTSTART", start, all_day),
+        _time_property("DTEND", end, all_day),
+        f"SUMMARY:{escape_text(event.get('title') or '')}",
+    ]
+    if event.get('description'):
+        lines.append(f"DESCRIPTION:{escape_text(event['description'])}")
+    if event.get('location'):
+        lines.append(f"LOCATION:{escape_text(event['location'])}")
+    if event.get('rrule'):
+        lines.append(f"RRULE:{event['rrule']}")
+    exdates = event.get('exdates') or []
+    if exdates:
+        if all_day:
+            lines.append("EXDATE;VALUE=DATE:" + ",".join(parse_datetime(d).strftime("%Y%m%d") for d in exdates))
+        else:
+            lines.append("EXDATE:" + ",".join(format_ics_datetime(parse_datetime(d)) for d in exdates))
+    if recurrence_id is not None:
+        lines.append(_time_property("RECURRENCE-ID", recurrence_id, all_day))
+    lines.append("END:VEVENT")
+    return "".join(fold_line(line) for line in lines)
+
+
+# ----------------------------------------------------------------------------
+# Import / export
+# ----------------------------------------------------------------------------
+
+def _text(event: Dict[str, object], name: str) -> Optional[str]:
+    prop = event.get(name)
+    return unescape_text(prop.value) if prop is not None else None
+
+
+def vevent_to_row(event: Dict[str, object], calendar_id: str, source: str, now: str) -> Dict:
+    """
+    Maps a parsed VEVENT onto an events row for `upsert_events`.
+
+    Overrides (VEVENTs with RECURRENCE-ID) get an external_id derived from
+    the series UID and the original start, mirroring how calendar providers
+    identify instances. Unsupported RRULEs degrade to a single event and
+    are reported via the `_unsupported_rule` key.
+
+    Raises:
+        ValueError: If the VEVENT has no usable DTSTART.
+    """
+    dtstart = event.get("DTSTART")
+    if dtstart is None:
+        raise ValueError("VEVENT without DTSTART")
+    start, all_day = parse_ics_datetime(dtstart)
+
+    if event.get("DTEND") is not None:
+        end = parse_ics_datetime(event["DTEND"])[0]
+    elif event.get("DURATION") is not None:
+        end = start + parse_duration(event["DURATION"].value)
+    else:
+        end = start + timedelta(days=1) if all_day else start
+
+    uid = _text(event, "UID")
+    if not uid:
+        # Keep re-imports of UID-less feeds idempotent
+        digest = hashlib.sha1(f"{_text(event, 'SUMMARY')}|{dtstart.value}".encode("utf-8"))
+        uid = f"atlas-{digest.hexdigest()}"
+
+    recurrence_id = None
+    external_id = uid
+    if event.get("RECURRENCE-ID") is not None:
+        recurrence_id = parse_ics_datetime(event["RECURRENCE-ID"])[0]
+        external_id = f"{uid}_{recurrence_id.strftime('%Y%m%dT%H%M%S')}"
+
+    rrule = None
+    series_end = None
+    unsupported_rule = False
+    if recurrence_id is None and event.get("RRULE") is not None:
+        try:
+            series_end = compute_series_end(event["RRULE"].value, start, end)
+            rrule = event["RRULE"].value
+        except ValueError:
+            unsupported_rule = True
+
+    exdates = parse_ics_datetime_list(event.get("EXDATE", [])) if rrule else []
+
+    status = _text(event, "STATUS")
+    return {
+        "id": str(uuid.uuid4()),
+        "title": _text(event, "SUMMARY") or "(No title)",
+        "description": _text(event, "DESCRIPTION"),
+        "start_time": start.isoformat(),
+        "end_time": end.isoformat(),
+        "location": _text(event, "LOCATION"),
+        "source": source,
+        "external_id": external_id,
+        "calendar_id": calendar_id,
+        "created_at": now,
+        "updated_at": now,
+        "rrule": rrule,
+        "exdates": json.dumps([d.isoformat() for d in exdates]) if exdates else None,
+        "recurring_event_id": None,
+        "original_start_time": recurrence_id.isoformat() if recurrence_id else None,
+        "series_end": series_end,
+        "_series_uid": uid if recurrence_id else None,
+        "_cancelled": (status or "").upper() == "CANCELLED",
+        "_unsupported_rule": unsupported_rule,
+    }
+
+
+def import_ics(
+    conn: sqlite3.Connection,
+    lines: Iterable[str],
+    calendar_id: Optional[str] = None,
+    source: str = "ics",
+    batch_size: int = 1000,
+) -> Dict[str, object]:
+    """
+    Streams an iCalendar file into `events`, upserting by (calendar_id, external_id).
+
+    Events are written in batches of `batch_size`, one transaction per batch,
+    so memory stays bounded regardless of file size. Overrides are linked to
+    their series and cancelled occurrences folded into EXDATEs at the end,
+    since a series may appear after its exceptions in the file.
+
+    Returns:
+        Import statistics.
+    """
+    reader = ICSReader(lines)
+    now = datetime.now().isoformat()
+    stats = {"imported": 0, "overrides": 0, "cancelled": 0, "skipped": 0, "unsupported_rules": 0}
+    batch: List[Dict] = []
+    overrides: List[Tuple[str, str]] = []
+    cancelled: List[Tuple[str, datetime]] = []
+    deleted: List[str] = []
+
+    def flush():
+        if batch:
+            stats["imported"] += upsert_events(conn, batch)
+            conn.commit()
+            batch.clear()
+
+    for event in reader:
+        if calendar_id is None:
+            name = reader.calendar_props.get("X-WR-CALNAME")
+            calendar_id = unescape_text(name.value) if name is not None else "ics"
+        try:
+            row = vevent_to_row(event, calendar_id, source, now)
+        except ValueError:
+            stats["skipped"] += 1
+            continue
+
+        stats["unsupported_rules"] += row.pop("_unsupported_rule")
+        series_uid = row.pop("_series_uid")
+        if row.pop("_cancelled"):
+            if series_uid:
+                cancelled.append((series_uid, datetime.fromisoformat(row["original_start_time"])))
+            else:
+                deleted.append(row["external_id"])
+            stats["cancelled"] += 1
+            continue
+
+        if series_uid:
+            overrides.append((row["external_id"], series_uid))
+            stats["overrides"] += 1
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    calendar_id = calendar_id or "ics"
+    if overrides:
+        link_overrides(conn, calendar_id, overrides)
+    if cancelled:
+        cancel_occurrences(conn, calendar_id, cancelled)
+    if deleted:
+        conn.executemany(
+            "DELETE FROM events WHERE calendar_id = ? AND external_id = ?",
+            [(calendar_id, external_id) for external_id in deleted]
+        )
+    conn.commit()
+    occurrence_cache.invalidate()
+
+    stats["calendar_id"] = calendar_id
+    return stats
+
+
+def export_query(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    calendar_id: Optional[str] = None,
+    source: Optional[str] = None,
+) -> Tuple[str, List]:
+    """
+    Builds the export query for events (and series) intersecting a range.
+
+    Series are exported once with their RRULE rather than as occurrences;
+    overrides are joined to their series so they can share its UID.
+    """
+    query = """
+        SELECT e.*, COALESCE(m.external_id, m.id) AS series_uid
+        FROM events e
+        LEFT JOIN events m ON m.id = e.recurring_event_id
+        WHERE 1=1
+    """
+    params: List = []
+    if end_date:
+        query += " AND e.start_time < ?"
+        params.append(parse_datetime(end_date).isoformat())
+    if start_date:
+        query += """ AND (
+            (e.rrule IS NULL AND e.end_time > ?)
+            OR (e.rrule IS NOT NULL AND (e.series_end IS NULL OR e.series_end > ?))
+        )"""
+        start_iso = parse_datetime(start_date).isoformat()
+        params.extend([start_iso, start_iso])
+    if calendar_id:
+        query += " AND e.calendar_id = ?"
+        params.append(calendar_id)
+    if source:
+        query += " AND e.source = ?"
+        params.append(source)
+    query += " ORDER BY e.start_time ASC"
+    return query, params
+
+
+def row_to_vevent(row) -> str:
+    """Serializes an export query row"""
+    event = dict(row)
+    event["exdates"] = json.loads(event.get("exdates") or "[]")
+    if event.get("recurring_event_id") and event.get("original_start_time"):
+        uid = event.get("series_uid") or event["recurring_event_id"]
+        event["rrule"] = None
+        return write_vevent(event, uid, parse_datetime(event["original_start_time"]))
+    return write_vevent(event, event.get("external_id") or event["id"])
@@ -0,0 +1,335 @@
+"""
+Persistent background job queue
+
+Jobs live in the `jobs` table, so pending work survives restarts. Each
+(kind, key) pair has at most one row: re-enqueueing a queued job bumps its
+`generation` instead of adding a duplicate, which keeps the queue bounded
+by the number of distinct sources no matter how often they change.
+
+A worker claims ready jobs in batches, hands each batch to the handler
+registered for its kind, and deletes the rows it finished -- unless they
+were re-enqueued meanwhile (generation changed), in which case they stay
+pending and run again. Failures are retried with jittered exponential
+backoff until `max_attempts`, after which the job is parked as `failed`.
+"""
+import itertools
+import json
+import logging
+import random
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from ..database import get_db_connection
+from .background import BackgroundLoop
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK = 500
+
+
+class QueueFull(Exception):
+    """The backlog is above the high watermark; retry later"""
+
+
+@dataclass
+class Job:
+    """A claimed job"""
+    id: int
+    kind: str
+    key: str
+    payload: Optional[Dict]
+    attempts: int
+    generation: int
+
+
+# Handlers receive a batch of jobs of one kind and return {job_id: error} for
+# the jobs that failed (an exception fails the whole batch).
+JobHandler = Callable[[sqlite3.Connection, List[Job]], Awaitable[Optional[Dict[int, str]]]]
+
+
+def enqueue_job(
+    conn: sqlite3.Connection,
+    kind: str,
+    key: str,
+    payload: Optional[Dict] = None,
+    delay: float = 0.0,
+):
+    """
+    Queues (or re-queues) a job using the caller's connection.
+
+    Does not commit, so the job lands atomically with the change that
+    caused it.
+    """
+    now = datetime.now()
+    conn.execute(
+        """
+        INSERT INTO jobs (kind, key, payload, status, attempts, generation, run_after, created_at, updated_at)
+        VALUES (?, ?, ?, 'pending', 0, 0, ?, ?, ?)
+        ON CONFLICT(kind, key) DO UPDATE SET
+            payload = excluded.payload,
+            status = 'pending',
+            attempts = 0,
+            generation = jobs.generation + 1,
+            run_after = excluded.run_after,
+            last_error = NULL,
+            updated_at = excluded.updated_at
+        """,
+        (
+            kind, key, json.dumps(payload) if payload is not None else None,
+            (now + timedelta(seconds=delay)).isoformat(), now.isoformat(), now.isoformat()
+        )
+    )
+    wake_workers()
+
+
+def pending_count(conn: sqlite3.Connection, kinds: Optional[Sequence[str]] = None) -> int:
+    query = "SELECT COUNT(*) FROM jobs WHERE status != 'failed'"
+    params: List = []
+    if kinds:
+        query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+        params.extend(kinds)
+    return conn.execute(query, params).fetchone()[0]
+
+
+def enqueue_jobs(
+    conn: sqlite3.Connection,
+    kind: str,
+    keys: Iterable[str],
+    max_pending: Optional[int] = None,
+) -> int:
+    """
+    Queues many jobs of one kind (bulk backfills); returns how many were queued.
+
+    With `max_pending`, keys that already have a pending job are re-queued
+    for free (they do not grow the queue), and new keys are queued only up
+    to the free capacity; the rest are left for a later call. Raises
+    QueueFull when new keys arrive and there is no capacity at all, so
+    producers back off instead of growing the queue without bound.
+    """
+    if max_pending is None:
+        count = 0
+        for key in keys:
+            enqueue_job(conn, kind, key)
+            count += 1
+        return count
+
+    backlog = pending_count(conn)
+    capacity = max_pending - backlog
+    queued = 0
+    keys = iter(keys)
+    while True:
+        chunk = list(dict.fromkeys(itertools.islice(keys, LOOKUP_CHUNK)))
+        if not chunk:
+            return queued
+        pending = {
+            row[0] for row in conn.execute(
+                f"SELECT key FROM jobs WHERE kind = ? AND status != 'failed' AND key IN ({', '.join('?' for _ in chunk)})",
+                [kind, *chunk]
+            )
+        }
+        for key in chunk:
+            if key not in pending:
+                if capacity <= 0:
+                    if not queued:
+                        raise QueueFull(f"{backlog} jobs pending (limit {max_pending})")
+                    continue
+                capacity -= 1
+            enqueue_job(conn, kind, key)
+            queued += 1
+
+
+def queue_stats(conn: sqlite3.Connection) -> Dict[str, Dict[str, int]]:
+    """Job counts per kind and status"""
+    stats: Dict[str, Dict[str, int]] = {}
+    for row in conn.execute("SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status"):
+        stats.setdefault(row[0], {})[row[1]] = row[2]
+    return stats
+
+
+def retry_failed(conn: sqlite3.Connection, kind: Optional[str] = None) -> int:
+    """Moves parked jobs back to pending"""
+    query = "UPDATE jobs SET status = 'pending', attempts = 0, run_after = ? WHERE status = 'failed'"
+    params: List = [datetime.now().isoformat()]
+    if kind:
+        query += " AND kind = ?"
+        params.append(kind)
+    count = conn.execute(query, params).rowcount
+    wake_workers()
+    return count
+
+
+# ----------------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------------
+
+_workers: List["JobWorker"] = []
+
+
+def wake_workers():
+    """Lets running workers pick up new jobs without waiting for the next poll"""
+    for worker in _workers:
+        worker.wake()
+
+
+class JobWorker(BackgroundLoop):
+    """
+    Runs queued jobs in the background.
+
+    Args:
+        handlers: Handler per job kind.
+        batch_size: Jobs claimed per round; bounds the work in flight.
+        poll_interval: Seconds between polls when idle.
+        max_attempts: Attempts before a job is parked as failed.
+        base_delay: Backoff before the first retry, doubled per attempt.
+        connection_factory: Returns a new sqlite3 connection.
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, JobHandler],
+        batch_size: int = 32,
+        poll_interval: float = 2.0,
+        max_attempts: int = 5,
+        base_delay: float = 2.0,
+        connection_factory: Callable[[], sqlite3.Connection] = get_db_connection,
+    ):
+        super().__init__()
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.connection_factory = connection_factory
+        self.processed = 0
+        self.failed = 0
+
+    # Lifecycle
+
+    round_failed_message = "Job worker round failed"
+
+    @property
+    def interval(self) -> float:
+        return self.poll_interval
+
+    def start(self):
+        _workers.append(self)
+        super().start()
+
+    async def stop(self):
+        await super().stop()
+        if self in _workers:
+            _workers.remove(self)
+
+    async def _run(self):
+        try:
+            conn = self.connection_factory()
+            try:
+                self.recover(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            logger.exception("Could not recover interrupted jobs")
+        await super()._run()
+
+    async def _round(self) -> bool:
+        return await self.run_once()
+
+    # Queue operations
+
+    def recover(self, conn: sqlite3.Connection):
+        """Returns jobs left running by a crashed process to the queue"""
+        conn.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+        conn.commit()
+
+    def claim(self, conn: sqlite3.Connection) -> List[Job]:
+        """Claims up to batch_size ready jobs of a single kind"""
+        now = datetime.now().isoformat()
+        kinds = list(self.handlers)
+        placeholders = ", ".join("?" for _ in kinds)
+        first = conn.execute(
+            f"""
+            SELECT kind FROM jobs
+            WHERE status = 'pending' AND run_after <= ? AND kind IN ({placeholders})
+            ORDER BY run_after LIMIT 1
+            """,
+            [now, *kinds]
+        ).fetchone()
+        if not first:
+            return []
+        rows = conn.execute(
+            """
+            SELECT id, kind, key, payload, attempts, generation FROM jobs
+            WHERE status = 'pending' AND run_after <= ? AND kind = ?
+            ORDER BY run_after LIMIT ?
+            """,
+            (now, first[0], self.batch_size)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+            [(now, row[0]) for row in rows]
+        )
+        conn.commit()
+        return [
+            Job(row[0], row[1], row[2], json.loads(row[3]) if row[3] else None, row[4], row[5])
+            for row in rows
+        ]
+
+    def complete(self, conn: sqlite3.Connection, job: Job):
+        """Removes a finished job unless it was re-enqueued while running"""
+        conn.execute("DELETE FROM jobs WHERE id = ? AND generation = ?", (job.id, job.generation))
+        self.processed += 1
+
+    def fail(self, conn: sqlite3.Connection, job: Job, error: str):
+        """Schedules a retry with jittered backoff, or parks the job"""
+        attempts = job.attempts + 1
+        now = datetime.now()
+        if attempts >= self.max_attempts:
+            status, run_after = "failed", now
+            self.failed += 1
+        else:
+            delay = self.base_delay * 2 ** job.attempts * random.uniform(0.5, 1.5)
+            status, run_after = "pending", now + timedelta(seconds=delay)
+        # A job re-enqueued while running starts over with a fresh attempt count
+        conn.execute(
+            """
+            UPDATE jobs SET status = ?, attempts = ?, run_after = ?, last_error = ?, updated_at = ?
+            WHERE id = ? AND generation = ?
+            """,
+            (status, attempts, run_after.isoformat(), error[:1000], now.isoformat(), job.id, job.generation)
+        )
+
+    async def run_once(self) -> bool:
+        """Processes one batch; returns False when nothing was ready"""
+        conn = self.connection_factory()
+        try:
+            jobs = self.claim(conn)
+            if not jobs:
+                return False
+            handler = self.handlers[jobs[0].kind]
+            try:
+                failures = await handler(conn, jobs) or {}
+            except Exception as e:
+                logger.warning("Job batch %s failed: %s", jobs[0].kind, e)
+                conn.rollback()
+                failures = {job.id: f"{type(e).__name__}: {e}" for job in jobs}
+            for job in jobs:
+                if job.id in failures:
+                    self.fail(conn, job, failures[job.id])
+                else:
+                    self.complete(conn, job)
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    async def drain(self, max_rounds: int = 1000) -> int:
+        """Runs batches until nothing is ready (tests, CLI backfills)"""
+        rounds = 0
+        while rounds < max_rounds and await self.run_once():
+            rounds += 1
+        return rounds
+
+    def stats(self) -> Dict[str, Any]:
+        return {"processed": self.processed, "failed": self.failed, "running": self._task is not None}
@@ -0,0 +1,330 @@
+"""
+Recurrence rule parsing and occurrence expansion (RFC 5545 subset)
+
+Supports FREQ=DAILY|WEEKLY|MONTHLY|YEARLY with INTERVAL, COUNT, UNTIL,
+BYDAY (including ordinals such as 2TU / -1FR), BYMONTHDAY, BYMONTH,
+BYSETPOS and WKST. Occurrences are generated period by period, and for
+rules without COUNT the iteration jumps straight to the period containing
+the requested window, so a window years after DTSTART costs the same as
+the first week of the series.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, date, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.dates import parse_datetime
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+
+# Upper bound on consecutive periods that produce no candidates (e.g. a
+# yearly rule on Feb 29 or an impossible BYMONTH/BYMONTHDAY combination).
+MAX_EMPTY_PERIODS = 5000
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """Parsed RRULE"""
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    by_day: Tuple[Tuple[int, int], ...] = ()  # (ordinal or 0, weekday 0=MO)
+    by_month_day: Tuple[int, ...] = ()
+    by_month: Tuple[int, ...] = ()
+    by_set_pos: Tuple[int, ...] = ()
+    wkst: int = 0
+
+    @classmethod
+    def parse(cls, text: str) -> "RecurrenceRule":
+        """
+        Parses an RRULE string such as "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10".
+
+        Raises:
+            ValueError: If the rule is malformed or uses unsupported parts.
+        """
+        text = text.strip()
+        if text.upper().startswith("RRULE:"):
+            text = text[6:]
+
+        parts = {}
+        for part in text.split(";"):
+            if not part:
+                continue
+            if "=" not in part:
+                raise ValueError(f"Malformed RRULE part: {part!r}")
+            key, value = part.split("=", 1)
+            parts[key.strip().upper()] = value.strip()
+
+        freq = parts.pop("FREQ", "").upper()
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unsupported RRULE frequency: {freq or 'missing'}")
+
+        interval = int(parts.pop("INTERVAL", "1"))
+        if interval < 1:
+            raise ValueError("RRULE INTERVAL must be positive")
+
+        count = parts.pop("COUNT", None)
+        until = parts.pop("UNTIL", None)
+        if count is not None and until is not None:
+            raise ValueError("RRULE cannot specify both COUNT and UNTIL")
+
+        by_day = tuple(_parse_by_day(v) for v in _split(parts.pop("BYDAY", "")))
+        by_month_day = tuple(int(v) for v in _split(parts.pop("BYMONTHDAY", "")))
+        by_month = tuple(int(v) for v in _split(parts.pop("BYMONTH", "")))
+        by_set_pos = tuple(int(v) for v in _split(parts.pop("BYSETPOS", "")))
+        wkst = WEEKDAYS.index(parts.pop("WKST", "MO").upper())
+
+        if parts:
+            raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(parts))}")
+        if any(d == 0 or abs(d) > 31 for d in by_month_day):
+            raise ValueError("RRULE BYMONTHDAY out of range")
+        if any(m < 1 or m > 12 for m in by_month):
+            raise ValueError("RRULE BYMONTH out of range")
+
+        until_dt = None
+        if until is not None:
+            until_dt = parse_ical_datetime(until)
+            if len(until.strip()) == 8:
+                # A DATE-valued UNTIL includes the whole final day.
+                until_dt = until_dt.replace(hour=23, minute=59, second=59)
+
+        return cls(
+            freq=freq,
+            interval=interval,
+            count=int(count) if count is not None else None,
+            until=until_dt,
+            by_day=by_day,
+            by_month_day=by_month_day,
+            by_month=by_month,
+            by_set_pos=by_set_pos,
+            wkst=wkst,
+        )
+
+    def is_bounded(self) -> bool:
+        """Whether the series has a last occurrence"""
+        return self.count is not None or self.until is not None
+
+
+def _split(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _parse_by_day(value: str) -> Tuple[int, int]:
+    value = value.upper()
+    weekday = value[-2:]
+    if weekday not in WEEKDAYS:
+        raise ValueError(f"Invalid RRULE BYDAY value: {value!r}")
+    ordinal = int(value[:-2]) if value[:-2] else 0
+    return ordinal, WEEKDAYS.index(weekday)
+
+
+def parse_ical_datetime(value: str) -> datetime:
+    """Parses iCalendar DATE / DATE-TIME values (e.g. 20250101T090000Z)"""
+    value = value.strip()
+    if "T" not in value and "-" not in value:
+        return datetime.strptime(value, "%Y%m%d")
+    if "-" in value:
+        return parse_datetime(value)
+    if value.endswith("Z"):
+        return parse_datetime(datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").isoformat() + "Z")
+    return datetime.strptime(value, "%Y%m%dT%H%M%S")
+
+
+# ----------------------------------------------------------------------------
+# Candidate generation
+# ----------------------------------------------------------------------------
+
+def _nth_weekdays(days: List[date], by_day: Iterable[Tuple[int, int]]) -> set:
+    """Select days matching BYDAY entries, honouring ordinals within `days`"""
+    selected = set()
+    for ordinal, weekday in by_day:
+        matching = [d for d in days if d.weekday() == weekday]
+        if ordinal == 0:
+            selected.update(matching)
+        elif 0 < ordinal <= len(matching):
+            selected.add(matching[ordinal - 1])
+        elif ordinal < 0 and -ordinal <= len(matching):
+            selected.add(matching[ordinal])
+    return selected
+
+
+def _month_days(year: int, month: int, rule: RecurrenceRule, dtstart: datetime) -> List[date]:
+    last = calendar.monthrange(year, month)[1]
+
+    if not rule.by_month_day and not rule.by_day:
+        return [date(year, month, dtstart.day)] if dtstart.day <= last else []
+
+    candidates = None
+    if rule.by_month_day:
+        candidates = set()
+        for d in rule.by_month_day:
+            day = d if d > 0 else last + 1 + d
+            if 1 <= day <= last:
+                candidates.add(date(year, month, day))
+
+    if rule.by_day:
+        days = [date(year, month, d) for d in range(1, last + 1)]
+        by_day = _nth_weekdays(days, rule.by_day)
+        candidates = by_day if candidates is None else candidates & by_day
+
+    return sorted(candidates)
+
+
+def _period_days(rule: RecurrenceRule, dtstart: datetime, k: int) -> Tuple[date, List[date]]:
+    """Returns (period start, candidate days) for the k-th period of the rule"""
+    start = dtstart.date()
+
+    if rule.freq == "DAILY":
+        day = start + timedelta(days=k * rule.interval)
+        if rule.by_month and day.month not in rule.by_month:
+            return day, []
+        if rule.by_month_day:
+            last = calendar.monthrange(day.year, day.month)[1]
+            if not any(day.day == (d if d > 0 else last + 1 + d) for d in rule.by_month_day):
+                return day, []
+        if rule.by_day and day.weekday() not in {wd for _, wd in rule.by_day}:
+            return day, []
+        return day, [day]
+
+    if rule.freq == "WEEKLY":
+        week_start = start - timedelta(days=(start.weekday() - rule.wkst) % 7)
+        period = week_start + timedelta(weeks=k * rule.interval)
+        weekdays = {wd for _, wd in rule.by_day} or {start.weekday()}
+        days = [period + timedelta(days=i) for i in range(7)]
+        days = [d for d in days if d.weekday() in weekdays]
+        if rule.by_month:
+            days = [d for d in days if d.month in rule.by_month]
+        return period, days
+
+    if rule.freq == "MONTHLY":
+        index = start.year * 12 + start.month - 1 + k * rule.interval
+        year, month = divmod(index, 12)
+        month += 1
+        period = date(year, month, 1)
+        if rule.by_month and month not in rule.by_month:
+            return period, []
+        return period, _month_days(year, month, rule, dtstart)
+
+    # YEARLY
+    year = start.year + k * rule.interval
+    period = date(year, 1, 1)
+    if rule.by_month:
+        days = []
+        for month in sorted(rule.by_month):
+            days.extend(_month_days(year, month, rule, dtstart))
+        return period, days
+    if rule.by_month_day:
+        days = []
+        for month in range(1, 13):
+            days.extend(_month_days(year, month, rule, dtstart))
+        return period, days
+    if rule.by_day:
+        length = 366 if calendar.isleap(year) else 365
+        year_days = [period + timedelta(days=i) for i in range(length)]
+        return period, sorted(_nth_weekdays(year_days, rule.by_day))
+    month_last = calendar.monthrange(year, start.month)[1]
+    if start.day > month_last:
+        return period, []
+    return period, [date(year, start.month, start.day)]
+
+
+def _apply_set_pos(rule: RecurrenceRule, days: List[date]) -> List[date]:
+    if not rule.by_set_pos or not days:
+        return days
+    selected = set()
+    for pos in rule.by_set_pos:
+        if 0 < pos <= len(days):
+            selected.add(days[pos - 1])
+        elif pos < 0 and -pos <= len(days):
+            selected.add(days[pos])
+    return sorted(selected)
+
+
+def _first_period(rule: RecurrenceRule, dtstart: datetime, target: datetime) -> int:
+    """Index of the period containing `target` (never before the first period)"""
+    if target <= dtstart:
+        return 0
+    start = dtstart.date()
+    day = target.date()
+    if rule.freq == "DAILY":
+        k = (day - start).days // rule.interval
+    elif rule.freq == "WEEKLY":
+        week_start = start - timedelta(days=(start.weekday() - rule.wkst) % 7)
+        k = ((day - week_start).days // 7) // rule.interval
+    elif rule.freq == "MONTHLY":
+        months = (day.year * 12 + day.month) - (start.year * 12 + start.month)
+        k = months // rule.interval
+    else:
+        k = (day.year - start.year) // rule.interval
+    return max(0, k)
+
+
+def iter_occurrences(
+    rule: RecurrenceRule,
+    dtstart: datetime,
+    after: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+) -> Iterator[datetime]:
+    """
+    Yields occurrence start times of `rule` anchored at `dtstart`.
+
+    Args:
+        rule: The parsed recurrence rule.
+        dtstart: Start of the first occurrence (naive local time).
+        after: Only yield occurrences starting at or after this time.
+        before: Stop before the first occurrence starting at or after this time.
+
+    Yields:
+        Occurrence starts in ascending order. EXDATEs are not applied here.
+    """
+    if rule.count is None and rule.until is None and before is None:
+        raise ValueError("Unbounded recurrence requires a `before` limit")
+
+    start_time = dtstart.time()
+    # COUNT rules must be enumerated from the beginning to count correctly.
+    k = 0 if rule.count is not None or after is None else _first_period(rule, dtstart, after)
+    emitted = 0
+    empty = 0
+
+    while True:
+        period, days = _period_days(rule, dtstart, k)
+        if before is not None and datetime.combine(period, datetime.min.time()) >= before:
+            return
+        if rule.until is not None and datetime.combine(period, datetime.min.time()) > rule.until:
+            return
+
+        days = _apply_set_pos(rule, days)
+        empty = 0 if days else empty + 1
+        if empty > MAX_EMPTY_PERIODS:
+            return
+
+        for day in days:
+            occurrence = datetime.combine(day, start_time)
+            if occurrence < dtstart:
+                continue
+            if rule.until is not None and occurrence > rule.until:
+                return
+            if before is not None and occurrence >= before:
+                return
+            emitted += 1
+            if after is None or occurrence >= after:
+                yield occurrence
+            if rule.count is not None and emitted >= rule.count:
+                return
+        k += 1
+
+
+def last_occurrence(rule: RecurrenceRule, dtstart: datetime) -> Optional[datetime]:
+    """Start of the final occurrence of a bounded rule (None if unbounded or empty)"""
+    if rule.count is not None:
+        last = None
+        for last in iter_occurrences(rule, dtstart):
+            pass
+        return last
+    if rule.until is not None:
+        # UNTIL is an inclusive upper bound on occurrence starts; using it
+        # directly avoids walking a potentially long series.
+        return rule.until
+    return None
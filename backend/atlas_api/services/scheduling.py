@@ -0,0 +1,175 @@
+"""
+Free/busy computation and task slot suggestions
+
+Busy blocks are built with a sweep line over interval endpoints, so
+overlapping and back-to-back events collapse into a single block in
+O(n log n). Free time is the complement of the busy blocks inside working
+hours, and open tasks are placed first-fit into it, most urgent first.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from ..utils.dates import is_all_day, parse_datetime
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+@dataclass
+class BusyBlock:
+    """A maximal run of overlapping or adjacent events"""
+    start: datetime
+    end: datetime
+    event_ids: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "event_ids": self.event_ids,
+        }
+
+
+def merge_busy(intervals: Iterable[Tuple[datetime, datetime, str]]) -> List[BusyBlock]:
+    """
+    Merges (start, end, event_id) intervals into busy blocks.
+
+    Endpoints are swept in time order with starts before ends at the same
+    instant, so touching intervals join the same block.
+    """
+    points: List[Tuple[datetime, int, str]] = []
+    for start, end, event_id in intervals:
+        if end <= start:
+            continue
+        points.append((start, 0, event_id))
+        points.append((end, 1, event_id))
+    points.sort()
+
+    blocks: List[BusyBlock] = []
+    depth = 0
+    for at, kind, event_id in points:
+        if kind == 0:
+            if depth == 0:
+                blocks.append(BusyBlock(at, at))
+            blocks[-1].event_ids.append(event_id)
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                blocks[-1].end = at
+    return blocks
+
+
+def working_windows(
+    window_start: datetime,
+    window_end: datetime,
+    work_start: time,
+    work_end: time,
+    weekdays_only: bool = False,
+) -> List[Tuple[datetime, datetime]]:
+    """Working-hour windows per day, clipped to [window_start, window_end)"""
+    windows = []
+    day = window_start.date()
+    while day <= window_end.date():
+        if not (weekdays_only and day.weekday() >= 5):
+            start = max(datetime.combine(day, work_start), window_start)
+            end = min(datetime.combine(day, work_end), window_end)
+            if end > start:
+                windows.append((start, end))
+        day += timedelta(days=1)
+    return windows
+
+
+def free_slots(
+    busy: Sequence[BusyBlock],
+    windows: Sequence[Tuple[datetime, datetime]],
+    min_duration: timedelta = timedelta(0),
+) -> List[Tuple[datetime, datetime]]:
+    """Gaps between busy blocks inside the given windows (both sorted)"""
+    slots = []
+    i = 0
+    for window_start, window_end in windows:
+        # Blocks ending before this window can never matter again
+        while i < len(busy) and busy[i].end <= window_start:
+            i += 1
+        cursor = window_start
+        j = i
+        while j < len(busy) and busy[j].start < window_end:
+            if busy[j].start - cursor >= max(min_duration, timedelta(microseconds=1)):
+                slots.append((cursor, busy[j].start))
+            cursor = max(cursor, busy[j].end)
+            j += 1
+        if window_end - cursor >= max(min_duration, timedelta(microseconds=1)):
+            slots.append((cursor, window_end))
+    return slots
+
+
+def task_sort_key(task: Dict) -> Tuple:
+    """Due date first (undated last), then priority"""
+    due = task.get("due_date")
+    return (
+        due is None,
+        parse_datetime(due) if due else datetime.max,
+        PRIORITY_RANK.get(task.get("priority"), 1),
+    )
+
+
+def suggest_slots(
+    tasks: Iterable[Dict],
+    free: Sequence[Tuple[datetime, datetime]],
+    duration: timedelta,
+) -> Tuple[List[Dict], List[str]]:
+    """
+    Places tasks first-fit into free slots in urgency order.
+
+    Each placement consumes the front of the slot it lands in. Returns the
+    suggestions and the ids of tasks that did not fit.
+    """
+    remaining = [list(slot) for slot in free]
+    suggestions = []
+    unscheduled = []
+    first_open = 0
+    for task in sorted(tasks, key=task_sort_key):
+        placed = False
+        for index in range(first_open, len(remaining)):
+            slot = remaining[index]
+            if slot[1] - slot[0] >= duration:
+                start = slot[0]
+                slot[0] = start + duration
+                due = parse_datetime(task["due_date"]) if task.get("due_date") else None
+                suggestions.append({
+                    "task_id": task["id"],
+                    "title": task["title"],
+                    "priority": task.get("priority"),
+                    "due_date": task.get("due_date"),
+                    "start": start.isoformat(),
+                    "end": slot[0].isoformat(),
+                    "late": due is not None and slot[0] > due,
+                })
+                placed = True
+                break
+        if not placed:
+            unscheduled.append(task["id"])
+        while first_open < len(remaining) and remaining[first_open][1] - remaining[first_open][0] < duration:
+            first_open += 1
+    return suggestions, unscheduled
+
+
+def parse_clock(value: str) -> time:
+    """Parses HH:MM"""
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid time of day: {value!r} (expected HH:MM)")
+
+
+def event_intervals(events: Iterable[Dict], include_all_day: bool = False) -> List[Tuple[datetime, datetime, str]]:
+    """(start, end, id) tuples for events that block time"""
+    intervals = []
+    for event in events:
+        start = parse_datetime(event["start_time"])
+        end = parse_datetime(event["end_time"])
+        if not include_all_day and is_all_day(start, end):
+            continue
+        intervals.append((start, end, event["id"]))
+    return intervals
@@ -0,0 +1,149 @@
+"""
+Delta sync over `row_versions`
+
+The change-log triggers also keep `row_versions` current: one row per
+note, task, event, project, conversation or settings row. Each holds the
+`changes.version` of its last write, so versions are global and only
+increase. A delete leaves a tombstone (`deleted_at` set) in place of the
+row.
+
+A client keeps the highest version it has seen and asks for everything
+above it. Live rows come back with their current data and deleted rows as
+tombstones, oldest version first, via `idx_row_versions_version`.
+
+The change log is pruned after days. `row_versions` only ever drops
+tombstones, via `compact_tombstones`, and records the highest version it
+dropped. A client whose offset is below that version may have missed a
+delete. It gets a full snapshot instead, flagged `reset`.
+"""
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..db.repo import CHUNK_SIZE, attach_event_links, attach_project_notes
+from .event_service import format_event
+
+TABLES = {
+    "note": "notes",
+    "task": "tasks",
+    "event": "events",
+    "project": "projects",
+    "conversation": "conversations",
+    "settings": "settings",
+}
+
+
+def _tagged(conn: sqlite3.Connection, rows: List[Dict]) -> List[Dict]:
+    for row in rows:
+        row["tags"] = json.loads(row.get("tags") or "[]")
+    return rows
+
+
+def _events(conn: sqlite3.Connection, rows: List[Dict]) -> List[Dict]:
+    return attach_event_links(conn, [format_event(row) for row in rows])
+
+
+def _settings(conn: sqlite3.Connection, rows: List[Dict]) -> List[Dict]:
+    for row in rows:
+        row["data"] = json.loads(row["data"])
+    return rows
+
+
+# Shapes rows like the entity's own GET endpoint (without derived fields such as backlinks)
+FORMATTERS: Dict[str, Callable[[sqlite3.Connection, List[Dict]], List[Dict]]] = {
+    "note": _tagged,
+    "task": _tagged,
+    "event": _events,
+    "project": attach_project_notes,
+    "conversation": lambda conn, rows: rows,
+    "settings": _settings,
+}
+
+
+def compacted_version(conn: sqlite3.Connection) -> int:
+    """Offsets below this may have missed a delete"""
+    row = conn.execute("SELECT compacted_version FROM tombstone_compaction WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def row_version(conn: sqlite3.Connection, entity: str, entity_id: str) -> Optional[int]:
+    """Current version of one row (None if it was never versioned)"""
+    row = conn.execute(
+        "SELECT version FROM row_versions WHERE entity = ? AND entity_id = ?", (entity, str(entity_id))
+    ).fetchone()
+    return row[0] if row else None
+
+
+def compact_tombstones(conn: sqlite3.Connection, retention_days: float) -> int:
+    """Drops tombstones older than the retention window; returns how many"""
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    with conn:
+        horizon = conn.execute(
+            "SELECT MAX(version) FROM row_versions WHERE deleted_at IS NOT NULL AND deleted_at < ?", (cutoff,)
+        ).fetchone()[0]
+        if horizon is None:
+            return 0
+        conn.execute(
+            "UPDATE tombstone_compaction SET compacted_version = max(compacted_version, ?) WHERE id = 1", (horizon,)
+        )
+        return conn.execute(
+            "DELETE FROM row_versions WHERE deleted_at IS NOT NULL AND deleted_at < ?", (cutoff,)
+        ).rowcount
+
+
+def _load(conn: sqlite3.Connection, entity: str, ids: Iterable[str]) -> Dict[str, Dict]:
+    ids = list(ids)
+    placeholders = ", ".join("?" for _ in ids)
+    rows = [dict(row) for row in conn.execute(
+        f"SELECT * FROM {TABLES[entity]} WHERE id IN ({placeholders})", ids
+    )]
+    return {str(row["id"]): row for row in FORMATTERS[entity](conn, rows)}
+
+
+def read_sync(
+    conn: sqlite3.Connection,
+    since: int,
+    limit: int,
+    entities: Optional[Set[str]] = None,
+) -> Iterator[Tuple[int, List[Dict]]]:
+    """
+    Rows changed after `since`, oldest version first, in chunks.
+
+    Yields (last version read, items) per chunk; the version also advances
+    past rows filtered out by `entities`. Items are `{entity, id, version,
+    deleted, data}` with data None for tombstones. Run inside one read
+    transaction so the chunks share a snapshot.
+    """
+    remaining = limit
+    while remaining > 0:
+        versions = conn.execute(
+            "SELECT entity, entity_id, version, deleted_at FROM row_versions "
+            "WHERE version > ? ORDER BY version LIMIT ?",
+            (since, min(remaining, CHUNK_SIZE))
+        ).fetchall()
+        if not versions:
+            return
+        remaining -= len(versions)
+        since = versions[-1][2]
+
+        wanted = [v for v in versions if not entities or v[0] in entities]
+        live: Dict[str, List[str]] = {}
+        for entity, entity_id, _, deleted_at in wanted:
+            if deleted_at is None:
+                live.setdefault(entity, []).append(entity_id)
+        rows = {entity: _load(conn, entity, ids) for entity, ids in live.items()}
+
+        items = []
+        for entity, entity_id, version, deleted_at in wanted:
+            data = None if deleted_at is not None else rows[entity].get(entity_id)
+            if deleted_at is None and data is None:
+                continue    # Versioned but gone without a tombstone (e.g. a manual restore)
+            items.append({
+                "entity": entity,
+                "id": entity_id,
+                "version": version,
+                "deleted": deleted_at is not None,
+                "data": data,
+            })
+        yield since, items
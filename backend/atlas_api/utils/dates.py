@@ -0,0 +1,42 @@
+from datetime import datetime, date, time
+from typing import Union
+
+
+def to_local_naive(value: datetime) -> datetime:
+    """
+    Converts a datetime to a naive local wall-clock datetime.
+
+    Timestamps in the database are stored as naive ISO strings in local time
+    (see `datetime.now().isoformat()` throughout the routers). Aware values
+    coming from the API or from calendar feeds are converted to the same
+    representation so they compare and sort correctly against stored rows.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def is_all_day(start: datetime, end: datetime) -> bool:
+    """True for date-only events, stored as whole days from midnight to midnight"""
+    return end > start and start.time() == end.time() == time.min
+
+
+def parse_datetime(value: Union[str, datetime, date]) -> datetime:
+    """
+    Parses an ISO timestamp (or date) into a naive local datetime.
+
+    Args:
+        value: An ISO 8601 string, a datetime or a date.
+
+    Returns:
+        A naive datetime in local time. Plain dates map to midnight.
+    """
+    if isinstance(value, datetime):
+        return to_local_naive(value)
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+
+    text = value.strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    return to_local_naive(datetime.fromisoformat(text))
@@ -0,0 +1,3 @@
+"""
+Benchmarks and local fake servers for offline load testing
+"""
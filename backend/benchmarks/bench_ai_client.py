@@ -0,0 +1,110 @@
+"""
+AI client throughput and backpressure against the mock AI API
+
+Fires a burst of chat completions at a mock API that rejects more than
+--upstream-limit concurrent requests, once with the client's per-model
+limit off and once with it matching the upstream; then times many small
+embedding calls with and without request batching, and the time to first
+token of a streamed reply.
+
+    python -m benchmarks.bench_ai_client --requests 200 --upstream-limit 8
+    python -m benchmarks.bench_ai_client --url http://127.0.0.1:4300/v1   # against a running mock_ai_server
+
+The in-process transport buffers streamed responses, so time to first
+token is only meaningful with --url.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from atlas_api.ai.client import AIClient
+from benchmarks import mock_ai_server as mock
+
+MESSAGES = [{"role": "user", "content": "Summarize my notes from this week"}]
+
+
+def _client(url, **kwargs) -> AIClient:
+    if url:
+        return AIClient(base_url=url, **kwargs)
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=mock.app), base_url="http://mock/v1")
+    return AIClient(client=http, **kwargs)
+
+
+async def _configure(url, **changes):
+    if url:
+        async with httpx.AsyncClient(base_url=url.rsplit("/v1", 1)[0]) as admin:
+            await admin.post("/admin/reset")
+            await admin.post("/admin/config", json=changes)
+            return
+    await mock.reset()
+    await mock.update_config(changes)
+
+
+async def _server_stats(url):
+    if url:
+        async with httpx.AsyncClient(base_url=url.rsplit("/v1", 1)[0]) as admin:
+            return (await admin.get("/admin/stats")).json()
+    return await mock.get_stats()
+
+
+async def chat_burst(url, requests: int, upstream_limit: int, client_limit: int, label: str):
+    await _configure(url, latency=0.05, max_concurrency=upstream_limit)
+    client = _client(url, max_concurrency=client_limit, max_retries=50)
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*[client.chat(MESSAGES, "mock-chat") for _ in range(requests)])
+        elapsed = time.perf_counter() - started
+        stats = client.stats()["mock-chat"]
+    finally:
+        await client.aclose()
+    server = await _server_stats(url)
+    print(f"{label:<28} {elapsed:7.2f}s {requests / elapsed:8.1f} req/s  "
+          f"upstream 429s={server['rate_limited']:<5} retries={stats['retries']:<5} "
+          f"peak in flight={stats['peak_in_flight']}")
+
+
+async def embedding_calls(url, calls: int, batch_size: int, label: str):
+    await _configure(url, latency=0.02, max_concurrency=16)
+    client = _client(url, max_concurrency=16, max_retries=50, embedding_batch_size=batch_size)
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*[client.embed([f"chunk {i}"], "mock-embed") for i in range(calls)])
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.aclose()
+    server = await _server_stats(url)
+    print(f"{label:<28} {elapsed:7.2f}s {calls / elapsed:8.1f} calls/s  "
+          f"upstream requests={server['embedding_requests']:<5} 429s={server['rate_limited']}")
+
+
+async def streaming(url, tokens: int):
+    await _configure(url, latency=0.1, token_delay=0.02, reply_tokens=tokens)
+    client = _client(url)
+    try:
+        started = time.perf_counter()
+        first = None
+        async for _ in client.stream_chat(MESSAGES, "mock-chat"):
+            first = first or time.perf_counter() - started
+        total = time.perf_counter() - started
+    finally:
+        await client.aclose()
+    print(f"{'stream ' + str(tokens) + ' tokens':<28} first token {first * 1000:6.0f} ms, complete {total * 1000:6.0f} ms")
+
+
+async def main(url, requests: int, upstream_limit: int):
+    await chat_burst(url, requests, upstream_limit, requests, "chat, no client limit")
+    await chat_burst(url, requests, upstream_limit, upstream_limit, f"chat, client limit {upstream_limit}")
+    await embedding_calls(url, requests * 5, 1, "embed, unbatched")
+    await embedding_calls(url, requests * 5, 512, "embed, batched")
+    await streaming(url, 50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--upstream-limit", type=int, default=8)
+    parser.add_argument("--url", help="OpenAI-compatible base URL (default: in-process mock)")
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.requests, args.upstream_limit))
@@ -0,0 +1,98 @@
+"""
+Approximate index (IVF) recall benchmark
+
+Builds an IVF vector store over clustered synthetic embeddings (uniform
+random vectors have no neighbourhood structure and are a worst case no
+real corpus resembles) and reports recall@k against exact search and query
+latency for a sweep of nprobe values, next to the exhaustive flat store.
+
+    python -m benchmarks.bench_ann --rows 300000 --dim 256 --nprobe 4 8 16 32 64
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from atlas_api.ai.ann import IVFVectorStore
+from atlas_api.ai.embeddings import to_blob
+from atlas_api.ai.vector_store import MmapVectorStore
+
+SCHEMA_PATH = Path(__file__).parent.parent / "atlas_api" / "db" / "schema.sql"
+
+
+def clustered(n: int, dim: int, topics: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    labels = rng.integers(0, topics, n)
+    noise = rng.standard_normal((n, dim), dtype=np.float32)
+    return centers[labels] + noise * np.float32(0.6)
+
+
+def _report(name, store, conn, queries, exact, k):
+    samples, recall = [], []
+    for q, expected in zip(queries, exact):
+        started = time.perf_counter()
+        hits = store.search(q, k, conn=conn)
+        samples.append(time.perf_counter() - started)
+        recall.append(len({h[0] for h in hits} & expected) / k)
+    samples = np.asarray(samples) * 1000
+    print(f"{name:<16} recall@{k}={np.mean(recall):.3f}  "
+          f"p50={np.percentile(samples, 50):7.2f}ms p95={np.percentile(samples, 95):7.2f}ms")
+
+
+def main(rows: int, dim: int, k: int, queries: int, topics: int, nlist: int, nprobes):
+    rng = np.random.default_rng(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        conn = sqlite3.connect(db_path)
+        conn.executescript(SCHEMA_PATH.read_text())
+        points = clustered(rows + queries, dim, topics, rng)
+        vectors, query_vectors = points[:rows], points[rows:]
+        for start in range(0, rows, 50000):
+            conn.executemany(
+                "INSERT INTO embeddings (id, source_type, source_id, chunk_index, content, embedding, model, created_at)"
+                " VALUES (?, 'note', ?, 0, '', ?, 'bench', '2025-01-01')",
+                [(f"e{start + i}", f"n{start + i}", to_blob(v))
+                 for i, v in enumerate(vectors[start:start + 50000])]
+            )
+        conn.commit()
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = [
+            {f"e{i}" for i in np.argpartition(-(normalized @ q), k)[:k]}
+            for q in query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        ]
+        del normalized
+
+        def connect():
+            return sqlite3.connect(db_path)
+
+        flat = MmapVectorStore(Path(tmp) / "flat", dim, "bench", connection_factory=connect)
+        flat.load(conn)
+        _report("flat (exact)", flat, conn, query_vectors, exact, k)
+
+        store = IVFVectorStore(Path(tmp) / "ivf", dim, "bench", nlist=nlist, min_train_size=0,
+                               connection_factory=connect)
+        started = time.perf_counter()
+        store.load(conn)
+        stats = store.stats()
+        print(f"ivf build={time.perf_counter() - started:.2f}s nlist={stats['nlist']} lists={stats['list_sizes']}")
+        for nprobe in nprobes:
+            store.nprobe = nprobe
+            _report(f"ivf nprobe={nprobe}", store, conn, query_vectors, exact, k)
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--topics", type=int, default=2000, help="Clusters in the synthetic data")
+    parser.add_argument("--nlist", type=int, default=0, help="0 = ~sqrt(rows)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+    main(args.rows, args.dim, args.k, args.queries, args.topics, args.nlist, args.nprobe)
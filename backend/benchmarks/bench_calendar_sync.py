@@ -0,0 +1,90 @@
+"""
+Calendar sync load test against the in-process fake provider
+
+Seeds the fake provider with N events spread over several calendars and
+times a full sync, an incremental sync after a small batch of changes, and a
+full resync after the provider expires every token.
+
+    python -m benchmarks.bench_calendar_sync --events 100000 --calendars 4
+"""
+import argparse
+import asyncio
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from atlas_api.services.calendar_sync import CalendarSyncEngine, HttpCalendarProvider
+from benchmarks import fake_calendar_server as fake
+
+SCHEMA_PATH = Path(__file__).parent.parent / "atlas_api" / "db" / "schema.sql"
+
+
+def _connection_factory(db_path: Path):
+    def connect():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    return connect
+
+
+async def _run(engine: CalendarSyncEngine, calendar_ids, label: str):
+    started = time.perf_counter()
+    report = await engine.sync_all(calendar_ids)
+    elapsed = time.perf_counter() - started
+    upserted = sum(r.get("upserted", 0) for r in report.values())
+    deleted = sum(r.get("deleted", 0) for r in report.values())
+    errors = [r["error"] for r in report.values() if r.get("status") == "error"]
+    print(f"{label:<22} {elapsed:8.2f}s  upserted={upserted:<7} deleted={deleted:<6} "
+          f"{upserted / elapsed if elapsed else 0:10.0f} rows/s")
+    for error in errors:
+        print(f"  error: {error}")
+
+
+async def main(events: int, calendars: int, page_size: int, concurrency: int):
+    calendar_ids = [f"cal{i}" for i in range(calendars)]
+    per_calendar = events // calendars
+    base = datetime(2025, 1, 1)
+    for calendar_id in calendar_ids:
+        cal = fake._calendar(calendar_id)
+        for i in range(per_calendar):
+            cal.put(fake.make_event(i, base, recurring=i % 20 == 0))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        conn = sqlite3.connect(db_path)
+        conn.executescript(SCHEMA_PATH.read_text())
+        conn.close()
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app), base_url="http://fake")
+        provider = HttpCalendarProvider("http://fake", page_size=page_size, client=client)
+        engine = CalendarSyncEngine(
+            provider, max_concurrency=concurrency, connection_factory=_connection_factory(db_path)
+        )
+        try:
+            print(f"{events} events across {calendars} calendars (page size {page_size})")
+            await _run(engine, calendar_ids, "full sync")
+            for calendar_id in calendar_ids:
+                await fake.mutate(calendar_id, updates=200, deletes=20, inserts=20)
+            await _run(engine, calendar_ids, "incremental sync")
+            await _run(engine, calendar_ids, "no-op sync")
+            for calendar_id in calendar_ids:
+                await fake.expire_tokens(calendar_id)
+            await _run(engine, calendar_ids, "expired-token resync")
+        finally:
+            await provider.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--calendars", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=2500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.events, args.calendars, args.page_size, args.concurrency))
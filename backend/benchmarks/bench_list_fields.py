@@ -0,0 +1,83 @@
+"""
+List projection benchmark
+
+Builds a vault of notes and tasks, then compares GET /api/notes and
+GET /api/tasks with the default (full) items against the `summary`
+preset and a bare `id,title` projection: payload size and p50/p95
+latency through the ASGI app.
+
+    python -m benchmarks.bench_list_fields --notes 10000 --limit 500
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from atlas_api.config import settings
+from atlas_api.database import get_db_connection, init_db
+from atlas_api.main import app
+
+WORDS = "plan draft review ship meeting design notes atlas sprint idea budget client".split()
+
+
+def _fill(notes: int, tasks: int, rng: random.Random):
+    conn = get_db_connection()
+    titles = [f"Note {i}" for i in range(notes)]
+    rows = []
+    for i, title in enumerate(titles):
+        body = "\n".join(
+            " ".join(rng.choices(WORDS, k=12)) + f" [[{rng.choice(titles)}]]" for _ in range(20)
+        ) + "\n- [ ] follow up\n- [x] sent"
+        rows.append((str(uuid.uuid4()), title, body, json.dumps(rng.sample(WORDS, 2)),
+                     "2025-01-01T09:00:00", f"2025-01-{1 + i % 28:02d}T09:00:00"))
+    conn.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany(
+        "INSERT INTO tasks (id, title, description, status, priority, tags, created_at) VALUES (?, ?, ?, 'todo', 'medium', '[]', ?)",
+        [(str(uuid.uuid4()), f"Task {i}", " ".join(rng.choices(WORDS, k=80)), "2025-01-01T09:00:00") for i in range(tasks)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _measure(client: TestClient, path: str, params: dict, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, params=params)
+        samples.append(time.perf_counter() - started)
+    samples = np.asarray(samples) * 1000
+    label = params.get("fields", "(default)")
+    print(
+        f"{path:<11} {label:<12} size={len(response.content) / 1024:9.1f}KiB  "
+        f"p50={np.percentile(samples, 50):7.2f}ms p95={np.percentile(samples, 95):7.2f}ms"
+    )
+
+
+def main(notes: int, tasks: int, limit: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.database_path = str(Path(tmp) / "bench.db")
+        init_db()
+        _fill(notes, tasks, random.Random(42))
+        client = TestClient(app)
+        for path in ("/api/notes", "/api/tasks"):
+            for fields in (None, "summary", "id,title"):
+                params = {"limit": limit}
+                if fields:
+                    params["fields"] = fields
+                _measure(client, path, params, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    main(args.notes, args.tasks, args.limit, args.repeat)
@@ -0,0 +1,112 @@
+"""
+Response pipeline benchmark
+
+Builds a vault of notes and tasks, then requests GET /api/notes and
+GET /api/search three ways:
+- baseline: the same endpoints on plain FastAPI routes (jsonable_encoder
+  + stdlib json), uncompressed
+- fast-json: the app's JSONRoute encoding, without Accept-Encoding
+- fast-json+gzip: the same, with the response gzipped
+
+For each, it reports the bytes on the wire, p50/p95 latency and
+sequential throughput through the ASGI app.
+
+    python -m benchmarks.bench_responses --notes 10000 --limit 500
+"""
+import argparse
+import inspect
+import json
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from atlas_api.config import settings
+from atlas_api.database import get_db_connection, init_db
+from atlas_api.main import app
+from atlas_api.routers import notes, search
+
+WORDS = "plan draft review ship meeting design notes atlas sprint idea budget client".split()
+
+
+def _fill(count: int, rng: random.Random):
+    conn = get_db_connection()
+    titles = [f"Note {i}" for i in range(count)]
+    conn.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?)", [
+        (str(uuid.uuid4()), title,
+         "\n".join(" ".join(rng.choices(WORDS, k=12)) + f" [[{rng.choice(titles)}]]" for _ in range(20)),
+         json.dumps(rng.sample(WORDS, 2)), "2025-01-01T09:00:00", f"2025-01-{1 + i % 28:02d}T09:00:00")
+        for i, title in enumerate(titles)
+    ])
+    conn.executemany(
+        "INSERT INTO tasks (id, title, description, status, priority, tags, created_at) VALUES (?, ?, ?, 'todo', 'medium', '[]', ?)",
+        [(str(uuid.uuid4()), f"Task {i}", " ".join(rng.choices(WORDS, k=80)), "2025-01-01T09:00:00") for i in range(count)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _baseline_app() -> FastAPI:
+    """The same endpoints, served the stock FastAPI way"""
+    baseline = FastAPI()
+    for router in (notes.router, search.router):
+        plain = APIRouter()
+        for route in router.routes:
+            plain.add_api_route(
+                route.path, inspect.unwrap(route.endpoint), methods=route.methods,
+                dependencies=route.dependencies, response_class=JSONResponse,
+            )
+        baseline.include_router(plain, prefix="/api")
+    return baseline
+
+
+def _measure(label: str, client: TestClient, path: str, params: dict, headers: dict, repeat: int):
+    samples = []
+    started_all = time.perf_counter()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, params=params, headers=headers)
+        samples.append(time.perf_counter() - started)
+    elapsed = time.perf_counter() - started_all
+    assert response.status_code == 200, response.text
+    wire = int(response.headers.get("content-length", len(response.content)))
+    samples = np.asarray(samples) * 1000
+    print(
+        f"{path:<12} {label:<15} wire={wire / 1024:8.1f}KiB  "
+        f"p50={np.percentile(samples, 50):7.2f}ms p95={np.percentile(samples, 95):7.2f}ms  "
+        f"{repeat / elapsed:6.1f} req/s"
+    )
+
+
+def main(count: int, limit: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.database_path = str(Path(tmp) / "bench.db")
+        init_db()
+        _fill(count, random.Random(42))
+        clients = (
+            ("baseline", TestClient(_baseline_app()), {"Accept-Encoding": "identity"}),
+            ("fast-json", TestClient(app), {"Accept-Encoding": "identity"}),
+            ("fast-json+gzip", TestClient(app), {"Accept-Encoding": "gzip"}),
+        )
+        for path, params in (
+            ("/api/notes", {"limit": limit}),
+            ("/api/search", {"q": "budget", "limit": limit}),
+        ):
+            for label, client, headers in clients:
+                settings.compression_enabled = "gzip" in label
+                _measure(label, client, path, params, headers, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=10000, help="notes, and as many tasks")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    main(args.notes, args.limit, args.repeat)
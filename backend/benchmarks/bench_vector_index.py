@@ -0,0 +1,98 @@
+"""
+Vector index benchmark
+
+Builds the in-memory index from random vectors at several sizes and reports
+build time, memory, top-k latency (unfiltered and source-type filtered) and
+the cost of incremental inserts and deletes. `--sqlite` also times a cold
+load from an embeddings table.
+
+    python -m benchmarks.bench_vector_index --sizes 10000 100000 1000000 --dim 256
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from atlas_api.ai.embeddings import to_blob
+from atlas_api.ai.retrieval import VectorIndex
+
+SCHEMA_PATH = Path(__file__).parent.parent / "atlas_api" / "db" / "schema.sql"
+
+
+def _percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    return f"p50={np.percentile(samples, 50):7.2f}ms p95={np.percentile(samples, 95):7.2f}ms"
+
+
+def _time_queries(index, queries, k, source_types=None):
+    samples = []
+    for q in queries:
+        started = time.perf_counter()
+        index.search(q, k, source_types)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_size(n: int, dim: int, k: int, queries: int, rng: np.random.Generator):
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    ids = [f"e{i}" for i in range(n)]
+    types = np.where(np.arange(n) % 4 == 0, "task", "note").tolist()
+
+    started = time.perf_counter()
+    index = VectorIndex(dim, "bench", initial_capacity=n)
+    for i in range(0, n, 50000):
+        index.add(ids[i:i + 50000], types[i:i + 50000], ids[i:i + 50000], vectors[i:i + 50000])
+    build = time.perf_counter() - started
+
+    query_vectors = rng.standard_normal((queries, dim), dtype=np.float32)
+    all_types = _time_queries(index, query_vectors, k)
+    tasks_only = _time_queries(index, query_vectors, k, ["task"])
+
+    batch = rng.standard_normal((100, dim), dtype=np.float32)
+    started = time.perf_counter()
+    index.remove(ids[:100])
+    index.add([f"new{i}" for i in range(100)], ["note"] * 100, [f"n{i}" for i in range(100)], batch)
+    incremental = (time.perf_counter() - started) * 1000
+
+    print(f"n={n:>9,}  build={build:6.2f}s  matrix={index.stats()['memory_bytes'] / 2**20:8.1f}MiB")
+    print(f"    top-{k} all      {_percentiles(all_types)}")
+    print(f"    top-{k} tasks    {_percentiles(tasks_only)}")
+    print(f"    100 deletes + 100 inserts: {incremental:.2f}ms")
+
+
+def bench_sqlite_load(n: int, dim: int, rng: np.random.Generator):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / "bench.db")
+        conn.executescript(SCHEMA_PATH.read_text())
+        for start in range(0, n, 50000):
+            vectors = rng.standard_normal((min(50000, n - start), dim), dtype=np.float32)
+            conn.executemany(
+                "INSERT INTO embeddings (id, source_type, source_id, chunk_index, content, embedding, model, created_at)"
+                " VALUES (?, 'note', ?, 0, '', ?, 'bench', '2025-01-01')",
+                [(f"e{start + i}", f"n{start + i}", to_blob(v)) for i, v in enumerate(vectors)]
+            )
+        conn.commit()
+        index = VectorIndex(dim, "bench")
+        started = time.perf_counter()
+        index.load(conn)
+        print(f"sqlite load n={n:,}: {time.perf_counter() - started:.2f}s")
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--sqlite", type=int, default=0, help="Also time a cold load of this many rows")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for size in args.sizes:
+        bench_size(size, args.dim, args.k, args.queries, rng)
+    if args.sqlite:
+        bench_sqlite_load(args.sqlite, args.dim, rng)
@@ -0,0 +1,103 @@
+"""
+Vector store benchmark
+
+Fills an embeddings table with random vectors, then compares the in-memory
+float32 index with the memory-mapped float16 and int8 sidecars: startup
+time (cold SQLite load vs. reopening the sidecar), resident size, top-k
+latency and recall@k against exact search.
+
+    python -m benchmarks.bench_vector_store --rows 200000 --dim 1536
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from atlas_api.ai.embeddings import to_blob
+from atlas_api.ai.retrieval import VectorIndex
+from atlas_api.ai.vector_store import MmapVectorStore
+
+SCHEMA_PATH = Path(__file__).parent.parent / "atlas_api" / "db" / "schema.sql"
+
+
+def _fill(conn: sqlite3.Connection, n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    chunks = []
+    for start in range(0, n, 20000):
+        vectors = rng.standard_normal((min(20000, n - start), dim), dtype=np.float32)
+        conn.executemany(
+            "INSERT INTO embeddings (id, source_type, source_id, chunk_index, content, embedding, model, created_at)"
+            " VALUES (?, 'note', ?, 0, '', ?, 'bench', '2025-01-01')",
+            [(f"e{start + i}", f"n{start + i}", to_blob(v)) for i, v in enumerate(vectors)]
+        )
+        chunks.append(vectors)
+    conn.commit()
+    vectors = np.concatenate(chunks)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _measure(name, index, conn, queries, exact, k, startup, size_bytes):
+    samples, recall = [], []
+    for q, expected in zip(queries, exact):
+        started = time.perf_counter()
+        hits = index.search(q, k) if isinstance(index, VectorIndex) else index.search(q, k, conn=conn)
+        samples.append(time.perf_counter() - started)
+        recall.append(len({h[0] for h in hits} & expected) / k)
+    samples = np.asarray(samples) * 1000
+    print(
+        f"{name:<14} startup={startup:6.2f}s  size={size_bytes / 2**20:8.1f}MiB  "
+        f"p50={np.percentile(samples, 50):7.2f}ms p95={np.percentile(samples, 95):7.2f}ms  "
+        f"recall@{k}={np.mean(recall):.3f}"
+    )
+
+
+def main(rows: int, dim: int, k: int, queries: int):
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        conn = sqlite3.connect(db_path)
+        conn.executescript(SCHEMA_PATH.read_text())
+        normalized = _fill(conn, rows, dim, rng)
+
+        query_vectors = rng.standard_normal((queries, dim), dtype=np.float32)
+        exact = [
+            {f"e{i}" for i in np.argpartition(-(normalized @ q), k)[:k]}
+            for q in query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        ]
+        del normalized
+
+        index = VectorIndex(dim, "bench")
+        started = time.perf_counter()
+        index.load(conn)
+        _measure("memory/float32", index, conn, query_vectors, exact, k,
+                 time.perf_counter() - started, index.stats()["memory_bytes"])
+        del index
+
+        def connect():
+            return sqlite3.connect(db_path)
+
+        for dtype in ("float16", "int8"):
+            path = Path(tmp) / f"bench-{dtype}.vectors"
+            started = time.perf_counter()
+            MmapVectorStore(path, dim, "bench", dtype=dtype, connection_factory=connect).load(conn)
+            rebuild = time.perf_counter() - started
+
+            store = MmapVectorStore(path, dim, "bench", dtype=dtype, connection_factory=connect)
+            started = time.perf_counter()
+            store.load(conn)
+            reopen = time.perf_counter() - started
+            print(f"{'mmap/' + dtype:<14} rebuild={rebuild:.2f}s")
+            _measure("mmap/" + dtype, store, conn, query_vectors, exact, k, reopen, store.stats()["file_bytes"])
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    main(args.rows, args.dim, args.k, args.queries)
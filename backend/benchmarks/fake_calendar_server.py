@@ -0,0 +1,178 @@
+"""
+Fake calendar provider for offline sync load tests
+
+Implements the subset of the Google Calendar v3 `events.list` protocol the
+sync engine uses: full listings, incremental listings via syncToken,
+pagination via pageToken and HTTP 410 for expired tokens. Calendars live in
+memory and can be seeded and mutated through admin endpoints.
+
+Run standalone:
+    python -m benchmarks.fake_calendar_server --port 4200
+    curl -X POST "http://127.0.0.1:4200/admin/calendars/work/seed?count=100000"
+"""
+import argparse
+import base64
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+
+
+class FakeCalendar:
+    """In-memory calendar with a per-change version counter"""
+
+    def __init__(self):
+        self.version = 0
+        self.items: Dict[str, Dict] = {}      # id -> item (cancelled items kept as tombstones)
+        self.versions: Dict[str, int] = {}    # id -> version of last change
+        self.min_sync_version = 0             # tokens older than this get 410
+
+    def put(self, item: Dict):
+        self.version += 1
+        item["updated"] = datetime.utcnow().isoformat() + "Z"
+        self.items[item["id"]] = item
+        self.versions[item["id"]] = self.version
+
+    def cancel(self, item_id: str):
+        item = self.items.get(item_id)
+        if item is None or item.get("status") == "cancelled":
+            return
+        tombstone = {"id": item_id, "status": "cancelled"}
+        if item.get("recurringEventId"):
+            tombstone["recurringEventId"] = item["recurringEventId"]
+            tombstone["originalStartTime"] = item["originalStartTime"]
+        self.put(tombstone)
+
+    def changes(self, since: int, upto: int, after: int, limit: int, include_deleted: bool) -> List[Dict]:
+        selected = [
+            (version, item_id) for item_id, version in self.versions.items()
+            if since < version <= upto and version > after
+        ]
+        selected.sort()
+        page = []
+        for version, item_id in selected:
+            item = self.items[item_id]
+            if not include_deleted and item.get("status") == "cancelled":
+                continue
+            page.append((version, item))
+            if len(page) >= limit:
+                break
+        return page
+
+
+calendars: Dict[str, FakeCalendar] = {}
+
+app = FastAPI(title="Fake Calendar Provider")
+
+
+def _calendar(calendar_id: str) -> FakeCalendar:
+    return calendars.setdefault(calendar_id, FakeCalendar())
+
+
+def _encode(payload: Dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _decode(token: str) -> Dict:
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, json.JSONDecodeError):
+        raise HTTPException(status_code=410, detail="Invalid token")
+
+
+def make_event(index: int, base: datetime, recurring: bool = False) -> Dict:
+    start = base + timedelta(days=index % 365, hours=8 + index % 9)
+    item = {
+        "id": f"evt{index:08d}",
+        "status": "confirmed",
+        "summary": f"Event {index}",
+        "description": "Synced from the fake provider",
+        "location": random.choice(["Room 1", "Room 2", "Zoom", None]),
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + timedelta(minutes=30 + 15 * (index % 4))).isoformat()},
+    }
+    if recurring:
+        item["recurrence"] = ["RRULE:FREQ=WEEKLY;COUNT=52"]
+    return item
+
+
+@app.get("/calendars/{calendar_id}/events")
+async def list_events(
+    calendar_id: str,
+    syncToken: Optional[str] = None,
+    pageToken: Optional[str] = None,
+    maxResults: int = 250,
+    showDeleted: bool = False,
+):
+    cal = _calendar(calendar_id)
+
+    if pageToken:
+        state = _decode(pageToken)
+    elif syncToken:
+        since = _decode(syncToken).get("v", -1)
+        if since < cal.min_sync_version:
+            raise HTTPException(status_code=410, detail="Sync token is no longer valid")
+        state = {"since": since, "upto": cal.version, "after": since, "deleted": True}
+    else:
+        state = {"since": 0, "upto": cal.version, "after": 0, "deleted": showDeleted}
+
+    page = cal.changes(state["since"], state["upto"], state["after"], maxResults, state["deleted"])
+    response = {"kind": "calendar#events", "items": [item for _, item in page]}
+    if len(page) == maxResults and page[-1][0] < state["upto"]:
+        response["nextPageToken"] = _encode({**state, "after": page[-1][0]})
+    else:
+        response["nextSyncToken"] = _encode({"v": state["upto"]})
+    return response
+
+
+@app.post("/admin/calendars/{calendar_id}/seed")
+async def seed(calendar_id: str, count: int = 1000, recurring_ratio: float = 0.05):
+    cal = _calendar(calendar_id)
+    base = datetime(2025, 1, 1)
+    offset = len(cal.items)
+    for i in range(offset, offset + count):
+        cal.put(make_event(i, base, recurring=random.random() < recurring_ratio))
+    return {"calendar_id": calendar_id, "events": len(cal.items), "version": cal.version}
+
+
+@app.post("/admin/calendars/{calendar_id}/mutate")
+async def mutate(calendar_id: str, updates: int = 100, deletes: int = 10, inserts: int = 10):
+    cal = _calendar(calendar_id)
+    live = [i for i, item in cal.items.items() if item.get("status") != "cancelled"]
+    for item_id in random.sample(live, min(updates, len(live))):
+        item = dict(cal.items[item_id])
+        item["summary"] = item["summary"] + " (edited)"
+        cal.put(item)
+    live = [i for i, item in cal.items.items() if item.get("status") != "cancelled"]
+    for item_id in random.sample(live, min(deletes, len(live))):
+        cal.cancel(item_id)
+    base = datetime(2025, 1, 1)
+    offset = len(cal.items)
+    for i in range(offset, offset + inserts):
+        cal.put(make_event(i, base))
+    return {"calendar_id": calendar_id, "version": cal.version}
+
+
+@app.post("/admin/calendars/{calendar_id}/expire-tokens")
+async def expire_tokens(calendar_id: str):
+    cal = _calendar(calendar_id)
+    cal.min_sync_version = cal.version + 1
+    return {"calendar_id": calendar_id, "min_sync_version": cal.min_sync_version}
+
+
+@app.post("/admin/reset")
+async def reset():
+    calendars.clear()
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4200)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
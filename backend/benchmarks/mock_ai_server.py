@@ -0,0 +1,199 @@
+"""
+Mock OpenAI-compatible API for offline AI client tests
+
+Implements `/v1/chat/completions` (plain and streamed as server-sent
+events) and `/v1/embeddings` with configurable latency, per-token delay
+and upstream limits: requests beyond `max_concurrency` in flight or beyond
+`tokens_per_minute` are rejected with 429 and Retry-After, and a fraction
+of requests can fail with 500. Counters expose what the server saw, e.g.
+the peak concurrency and how many inputs each embeddings request carried.
+
+Run standalone:
+    python -m benchmarks.mock_ai_server --port 4300
+    curl -X POST http://127.0.0.1:4300/admin/config -H 'content-type: application/json' \\
+        -d '{"max_concurrency": 4, "token_delay": 0.02}'
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from atlas_api.ai.embeddings import LocalHashEmbeddingProvider
+from atlas_api.ai.tokens import estimate_tokens
+
+
+@dataclass
+class MockConfig:
+    latency: float = 0.05          # seconds before the first token / the response
+    token_delay: float = 0.0       # seconds between streamed tokens
+    reply_tokens: int = 20         # words in each chat reply
+    max_concurrency: int = 0       # requests in flight per model before 429; 0 = unlimited
+    tokens_per_minute: int = 0     # per model before 429; 0 = unlimited
+    failure_rate: float = 0.0      # fraction of requests answered with 500
+    dimensions: int = 64
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    rate_limited: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    chat_requests: int = 0
+    embedding_requests: int = 0
+    embedding_inputs: int = 0
+    batch_sizes: List[int] = field(default_factory=list)
+
+
+config = MockConfig()
+stats = MockStats()
+_in_flight: Dict[str, int] = {}
+_usage: Dict[str, Deque[Tuple[float, int]]] = {}
+
+app = FastAPI(title="Mock AI API")
+
+
+def _admit(model: str, tokens: int) -> Optional[JSONResponse]:
+    """429/500 response if the request is refused, else None (and counts it in flight)"""
+    stats.requests += 1
+    if config.max_concurrency and _in_flight.get(model, 0) >= config.max_concurrency:
+        stats.rate_limited += 1
+        return JSONResponse({"error": {"message": "Too many concurrent requests"}}, 429, {"Retry-After": "0.05"})
+    if config.tokens_per_minute:
+        window = _usage.setdefault(model, deque())
+        now = time.monotonic()
+        while window and window[0][0] < now - 60:
+            window.popleft()
+        if sum(t for _, t in window) + tokens > config.tokens_per_minute:
+            stats.rate_limited += 1
+            retry = max(0.05, 60 - (now - window[0][0])) if window else 1.0
+            return JSONResponse({"error": {"message": "Rate limit reached for tokens"}}, 429, {"Retry-After": f"{retry:.2f}"})
+        window.append((now, tokens))
+    if random.random() < config.failure_rate:
+        stats.failed += 1
+        return JSONResponse({"error": {"message": "Internal error"}}, 500)
+    _in_flight[model] = _in_flight.get(model, 0) + 1
+    stats.in_flight += 1
+    stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+    return None
+
+
+def _release(model: str):
+    _in_flight[model] -= 1
+    stats.in_flight -= 1
+
+
+def _reply_words(messages: List[Dict]) -> List[str]:
+    last = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    seed = last.split()[:3] or ["hello"]
+    return [f"{seed[i % len(seed)]}{i}" for i in range(config.reply_tokens)]
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "mock")
+    if not body.get("messages"):
+        return JSONResponse({"error": {"message": "'messages' is required"}}, 400)
+    prompt_tokens = sum(estimate_tokens(m.get("content") or "") + 4 for m in body.get("messages", []))
+    refused = _admit(model, prompt_tokens + config.reply_tokens)
+    if refused is not None:
+        return refused
+    stats.chat_requests += 1
+    words = _reply_words(body.get("messages", []))
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+             "total_tokens": prompt_tokens + len(words)}
+
+    if not body.get("stream"):
+        try:
+            await asyncio.sleep(config.latency + config.token_delay * len(words))
+        finally:
+            _release(model)
+        return {
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)},
+                         "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    async def events():
+        try:
+            await asyncio.sleep(config.latency)
+            for i, word in enumerate(words):
+                chunk = {"object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if config.token_delay:
+                    await asyncio.sleep(config.token_delay)
+            yield "data: [DONE]\n\n"
+        finally:
+            _release(model)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    model = body.get("model", "mock")
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    tokens = sum(estimate_tokens(text) for text in inputs)
+    refused = _admit(model, tokens)
+    if refused is not None:
+        return refused
+    stats.embedding_requests += 1
+    stats.embedding_inputs += len(inputs)
+    stats.batch_sizes.append(len(inputs))
+    try:
+        await asyncio.sleep(config.latency)
+    finally:
+        _release(model)
+    provider = LocalHashEmbeddingProvider(config.dimensions)
+    return {
+        "object": "list",
+        "model": model,
+        "data": [{"index": i, "embedding": provider.embed_one(text).tolist()} for i, text in enumerate(inputs)],
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@app.post("/admin/config")
+async def update_config(changes: Dict):
+    for key, value in changes.items():
+        if hasattr(config, key):
+            setattr(config, key, type(getattr(config, key))(value))
+    return asdict(config)
+
+
+@app.get("/admin/stats")
+async def get_stats():
+    return {**asdict(stats), "batch_sizes": stats.batch_sizes[-100:]}
+
+
+@app.post("/admin/reset")
+async def reset():
+    global config, stats
+    config = MockConfig()
+    stats = MockStats()
+    _in_flight.clear()
+    _usage.clear()
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4300)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
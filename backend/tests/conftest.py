@@ -6,11 +6,17 @@ from datetime import datetime, timedelta
 import json
 import uuid
 
+from fastapi.testclient import TestClient
+
 # Import necessary modules from the application
-from atlas_api.database import get_db_connection
+from atlas_api.database import get_db_connection, init_db
 from atlas_api.config import settings
+from atlas_api.main import app
+from atlas_api.services import archive, changes, dashboard
 from atlas_api.utils.wiki_links import parse_wiki_links
 
+SCHEMA_PATH = Path(__file__).parent.parent / "atlas_api" / "db" / "schema.sql"
+
 @pytest.fixture(scope="function")
 def in_memory_db() -> Generator[sqlite3.Connection, None, None]:
     """
@@ -42,6 +48,38 @@ def in_memory_db() -> Generator[sqlite3.Connection, None, None]:
         settings.database_path = original_db_path
 
 
+@pytest.fixture(scope="function")
+def client(tmp_path, monkeypatch) -> TestClient:
+    """
+    A client for the app on a fresh database file.
+    Module singletons that cache state are reset, so no test sees another's database.
+    """
+    monkeypatch.setattr(settings, "database_path", str(tmp_path / "atlas.db"))
+    monkeypatch.setattr(dashboard, "_overview_cache", None)
+    monkeypatch.setattr(changes, "_hub", None)
+    monkeypatch.setattr(archive, "_archive", None)
+    init_db()
+    return TestClient(app)
+
+
+@pytest.fixture(scope="function")
+def db_factory(tmp_path):
+    """
+    Opens fresh connections to a schema-initialised database file, for code
+    that takes a connection factory instead of using the app's database.
+    """
+    db_path = tmp_path / "atlas.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.close()
+
+    def connect():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+    return connect
+
+
 @pytest.fixture(scope="function")
 def seeded_db(in_memory_db: sqlite3.Connection) -> Generator[sqlite3.Connection, None, None]:
     """
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from atlas_api.ai.client import AIClient, AIClientError, TokenBucket
+from benchmarks import mock_ai_server as mock
+
+MESSAGES = [{"role": "user", "content": "plan my week please"}]
+
+
+@pytest.fixture(autouse=True)
+def mock_server():
+    mock.config = mock.MockConfig(latency=0.01)
+    mock.stats = mock.MockStats()
+    mock._in_flight.clear()
+    mock._usage.clear()
+    yield mock
+
+
+def _client(**kwargs) -> AIClient:
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=mock.app), base_url="http://mock/v1")
+    client = AIClient(client=http, **kwargs)
+    client._backoff = lambda attempt, response: 0.01
+    return client
+
+
+def _run(coro_fn, **kwargs):
+    async def run():
+        client = _client(**kwargs)
+        try:
+            return await coro_fn(client)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+def test_chat_and_stream_return_the_same_reply():
+    async def run(client):
+        reply = await client.chat(MESSAGES, "m")
+        deltas = [delta async for delta in client.stream_chat(MESSAGES, "m")]
+        return reply, deltas, client.stats()
+
+    reply, deltas, stats = _run(run)
+    assert reply.startswith("plan0 my1 week2")
+    assert len(deltas) == mock.config.reply_tokens
+    assert "".join(deltas) == reply
+    assert stats["m"]["requests"] == 2
+    assert stats["m"]["in_flight"] == 0
+
+
+def test_concurrency_limit_keeps_within_upstream_limits():
+    mock.config.max_concurrency = 2
+
+    async def burst(client):
+        replies = await asyncio.gather(*[client.chat(MESSAGES, "m") for _ in range(10)])
+        return replies, client.stats()["m"]
+
+    replies, stats = _run(burst, max_concurrency=2)
+    assert len(replies) == 10
+    assert mock.stats.rate_limited == 0
+    assert stats["peak_in_flight"] == 2 and stats["retries"] == 0
+
+    # Without a local limit the burst is rejected upstream and retried
+    mock.stats = mock.MockStats()
+    replies, stats = _run(burst, max_concurrency=10, max_retries=20)
+    assert len(replies) == 10
+    assert mock.stats.rate_limited > 0
+    assert stats["retries"] == mock.stats.rate_limited
+
+
+def test_errors_are_retried_or_raised():
+    mock.config.failure_rate = 1.0
+
+    async def chat(client):
+        return await client.chat(MESSAGES, "m")
+
+    with pytest.raises(AIClientError) as excinfo:
+        _run(chat, max_retries=2)
+    assert excinfo.value.status_code == 500
+    assert mock.stats.failed == 3
+
+    async def bad_request(client):
+        return await client._send("/chat/completions", {"model": "m"}, client.limiter("m"))
+
+    mock.config.failure_rate = 0.0
+    mock.stats = mock.MockStats()
+    with pytest.raises(AIClientError) as excinfo:
+        _run(bad_request)
+    assert excinfo.value.status_code == 400  # not retried
+
+
+def test_concurrent_embedding_calls_share_requests():
+    async def run(client):
+        calls = [client.embed([f"text {i} a", f"text {i} b", f"text {i} c"], "e") for i in range(20)]
+        return await asyncio.gather(*calls)
+
+    results = _run(run, embedding_batch_size=32)
+    assert [len(r) for r in results] == [3] * 20
+    assert mock.stats.embedding_inputs == 60
+    assert mock.stats.embedding_requests == 2  # 30 + 30 inputs, capped by the batch size
+    expected = mock.LocalHashEmbeddingProvider(mock.config.dimensions).embed_one("text 7 b").tolist()
+    assert results[7][1] == pytest.approx(expected)
+
+    mock.config.failure_rate = 1.0
+
+    async def failing(client):
+        return await asyncio.gather(client.embed(["x"], "e"), client.embed(["y"], "e"), return_exceptions=True)
+
+    results = _run(failing, max_retries=0)
+    assert all(isinstance(r, AIClientError) for r in results)
+
+
+def test_token_bucket_paces_requests():
+    async def run():
+        bucket = TokenBucket(6000)  # 100 tokens per second
+        assert await bucket.acquire(6000) == 0
+        started = time.monotonic()
+        await bucket.acquire(30)
+        await bucket.acquire(20)
+        elapsed = time.monotonic() - started
+        bucket.adjust(-1000)  # usage came in under the estimate
+        return elapsed, bucket.tokens
+
+    elapsed, tokens = asyncio.run(run())
+    assert 0.45 < elapsed < 0.8
+    assert tokens == pytest.approx(1000, abs=5)
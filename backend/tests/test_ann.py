@@ -0,0 +1,133 @@
+import numpy as np
+
+from atlas_api.ai.ann import IVFVectorStore, spherical_kmeans
+from atlas_api.ai.embeddings import to_blob
+
+
+def _clustered(n, dim=32, clusters=20, seed=0):
+    """Points around random topic directions, like real embeddings"""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, n)
+    return (topics[labels] + 0.4 * rng.standard_normal((n, dim))).astype(np.float32), labels
+
+
+def _insert(conn, vectors, prefix="e"):
+    conn.executemany(
+        "INSERT INTO embeddings (id, source_type, source_id, chunk_index, content, embedding, model, created_at)"
+        " VALUES (?, 'note', ?, 0, '', ?, 'm', '2025-01-01')",
+        [(f"{prefix}{i}", f"s{i}", to_blob(v)) for i, v in enumerate(vectors)]
+    )
+    conn.commit()
+
+
+def _exact_top(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"e{i}" for i in np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:k]]
+
+
+def test_spherical_kmeans_recovers_clusters():
+    vectors, labels = _clustered(2000, clusters=8)
+    centroids = spherical_kmeans(vectors, 8, iterations=15)
+    assert centroids.shape == (8, 32)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1, atol=1e-5)
+
+    assignments = (vectors @ centroids.T).argmax(axis=1)
+    # True clusters land mostly in one k-means cluster, and no cluster is empty
+    purity = sum(np.bincount(assignments[labels == c]).max() for c in range(8)) / len(vectors)
+    assert purity > 0.9
+    assert len(np.unique(assignments)) == 8
+
+
+def test_ivf_recall_and_probe_tradeoff(tmp_path, db_factory):
+    points, _ = _clustered(5020)
+    vectors, queries = points[:5000], points[5000:]
+    conn = db_factory()
+    _insert(conn, vectors)
+    store = IVFVectorStore(tmp_path / "vectors", 32, "m", nprobe=4, min_train_size=1000,
+                           connection_factory=db_factory)
+    store.load(conn)
+    assert store.stats()["nlist"] == 70
+
+    recall = []
+    for q in queries:
+        expected = set(_exact_top(vectors, q, 10))
+        recall.append(len({h[0] for h in store.search(q, 10, conn=conn)} & expected) / 10)
+    assert np.mean(recall) >= 0.9
+
+    # Probing every list is exhaustive
+    store.nprobe = 70
+    for q in queries[:5]:
+        assert [h[0] for h in store.search(q, 10, conn=conn)] == _exact_top(vectors, q, 10)
+    conn.close()
+
+
+def test_ivf_persists_and_assigns_new_rows(tmp_path, db_factory, monkeypatch):
+    vectors = _clustered(3010)[0][:3000]
+    conn = db_factory()
+    _insert(conn, vectors)
+    path = tmp_path / "vectors"
+    store = IVFVectorStore(path, 32, "m", nlist=16, min_train_size=1000, connection_factory=db_factory)
+    store.load(conn)
+    centroids = store._centroids.copy()
+
+    # Incremental writes are clustered without retraining
+    extra = _clustered(3010)[0][3000:]
+    _insert(conn, extra, prefix="x")
+    store.add([f"x{i}" for i in range(10)], ["task"] * 10, [f"t{i}" for i in range(10)], extra)
+    store.flush()
+    assert store.search(extra[3], 1, conn=conn)[0][0] == "x3"
+
+    trained = []
+    monkeypatch.setattr(IVFVectorStore, "train", lambda self, *a: trained.append(1))
+    reopened = IVFVectorStore(path, 32, "m", nlist=16, min_train_size=1000, connection_factory=db_factory)
+    assert reopened.load(conn) == 3010
+    assert trained == []
+    assert np.array_equal(reopened._centroids, centroids)
+    assert reopened.stats()["trained_size"] == 3000
+    assert reopened.search(extra[3], 1, conn=conn)[0][0] == "x3"
+
+    # Below the training threshold search stays exhaustive
+    small = IVFVectorStore(tmp_path / "small", 32, "m2", min_train_size=1000, connection_factory=db_factory)
+    small.load(conn)
+    small.add(["e1"], ["note"], ["s1"], vectors[1])
+    assert small.stats()["nlist"] == 0
+    assert small.search(vectors[1], 1, conn=conn)[0][0] == "e1"
+    conn.close()
+
+
+def test_ivf_posting_lists_follow_writes(tmp_path, db_factory):
+    vectors = _clustered(3000)[0]
+    conn = db_factory()
+    _insert(conn, vectors)
+    store = IVFVectorStore(tmp_path / "vectors", 32, "m", nlist=16, nprobe=3, min_train_size=1000,
+                           connection_factory=db_factory)
+    store.load(conn)
+
+    def scanned(q):
+        """Probed slots by a full pass over the list assignments"""
+        probe = np.argsort(-(store._centroids @ (q / np.linalg.norm(q))))[:store.nprobe]
+        lists = np.asarray(store._lists[:store._size])
+        live = np.asarray(store._types[:store._size]) >= 0
+        return set(np.flatnonzero(np.isin(lists, probe) & live).tolist())
+
+    def gathered(q):
+        probe = np.argsort(-(store._centroids @ (q / np.linalg.norm(q))))[:store.nprobe]
+        slots = store._probed_slots(probe)
+        return set(slots[np.asarray(store._types[slots]) >= 0].tolist())
+
+    assert store.search(vectors[0], 1, conn=conn)[0][0] == "e0"
+    assert gathered(vectors[0]) == scanned(vectors[0])
+
+    # A freed slot is reused by a row from another cluster
+    moved = -vectors[5]
+    conn.execute("DELETE FROM embeddings WHERE id = 'e5'")
+    _insert(conn, [moved], prefix="y")
+    store.remove(["e5"])
+    store.add(["y0"], ["note"], ["s"], moved)
+    assert store._pending
+    for q in (vectors[5], moved, vectors[9]):
+        assert gathered(q) == scanned(q)
+    assert store.search(moved, 1, conn=conn)[0][0] == "y0"
+    assert "e5" not in {h[0] for h in store.search(vectors[5], 10, conn=conn)}
+    conn.close()
@@ -0,0 +1,39 @@
+import asyncio
+
+from atlas_api.services.background import BackgroundLoop
+
+
+class Recorder(BackgroundLoop):
+    interval = 60.0
+
+    def __init__(self):
+        super().__init__()
+        self.rounds = 0
+        self.in_round = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def run_once(self):
+        self.rounds += 1
+        self.in_round.set()
+        await self.release.wait()
+
+
+def test_wake_and_stop_during_a_round_are_not_lost():
+    async def run():
+        loop = Recorder()
+        loop.start()
+        await loop.in_round.wait()
+        # Woken mid-round: the next round starts without waiting out the interval
+        loop.in_round.clear()
+        loop.wake()
+        loop.release.set()
+        await asyncio.wait_for(loop.in_round.wait(), timeout=1)
+        assert loop.rounds == 2
+
+        loop.release.clear()
+        stopping = asyncio.create_task(loop.stop())
+        await asyncio.sleep(0)
+        loop.release.set()
+        await asyncio.wait_for(stopping, timeout=1)
+        assert loop.rounds == 2
+    asyncio.run(run())
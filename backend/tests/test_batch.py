@@ -0,0 +1,116 @@
+import sqlite3
+from datetime import date
+
+from atlas_api import database
+from atlas_api.config import settings
+
+
+def _batch(client, requests, **options):
+    response = client.post("/api/batch", json={"requests": requests, **options})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_reads_share_one_snapshot(client, monkeypatch):
+    note_id = client.post("/api/notes", json={"title": "Plan", "content": "- [ ] draft", "tags": []}).json()["id"]
+    client.post("/api/notes", json={"title": "Log", "content": "see [[Plan]]", "tags": []})
+    etag = client.get("/api/settings").headers["etag"]
+
+    connections = []
+    connect = sqlite3.connect
+
+    def counting(*args, **kwargs):
+        connections.append(args)
+        return connect(*args, **kwargs)
+
+    monkeypatch.setattr(database.sqlite3, "connect", counting)
+    result = _batch(client, [
+        {"id": "note", "path": f"/api/notes/{note_id}"},
+        {"path": "/api/tasks?status=todo"},
+        {"path": "/api/notes/missing"},
+        {"id": "settings", "path": "/api/settings", "headers": {"If-None-Match": etag}},
+    ])
+    assert len(connections) == 1
+
+    note, tasks, missing, cached = result["responses"]
+    assert (note["id"], note["status"]) == ("note", 200)
+    assert [b["title"] for b in note["body"]["backlinks"]] == ["Log"]
+    assert note["headers"]["etag"]
+    assert tasks["id"] == "1" and tasks["status"] == 200 and "tasks" in tasks["body"]
+    assert missing["status"] == 404 and missing["body"]["detail"] == "Note not found"
+    assert cached["status"] == 304 and cached["body"] is None
+
+
+def test_mutations_commit_separately_or_atomically(client):
+    writes = [
+        {"method": "POST", "path": "/api/notes", "body": {"title": "Plan", "content": "", "tags": []}},
+        {"method": "PATCH", "path": "/api/tasks/missing", "body": {"status": "done"}},
+        {"method": "GET", "path": "/api/notes"},
+    ]
+
+    atomic = _batch(client, writes, atomic=True)
+    assert atomic["committed"] is False
+    assert [r["status"] for r in atomic["responses"]] == [200, 404, 424]
+    assert client.get("/api/notes").json()["notes"] == []
+
+    independent = _batch(client, writes)
+    assert [r["status"] for r in independent["responses"]] == [200, 404, 200]
+    # The read after the write sees it
+    assert [n["title"] for n in independent["responses"][2]["body"]["notes"]] == ["Plan"]
+
+    note_id = independent["responses"][0]["body"]["id"]
+    committed = _batch(client, [
+        {"method": "PATCH", "path": f"/api/notes/{note_id}", "body": {"title": "Plan 2"}},
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "Ship"}},
+        {"path": f"/api/notes/{note_id}"},
+    ], atomic=True)
+    assert committed["committed"] is True
+    assert committed["responses"][2]["body"]["title"] == "Plan 2"
+    assert [t["title"] for t in client.get("/api/tasks").json()["tasks"]] == ["Ship"]
+
+
+def test_rolled_back_batches_leave_no_validators_or_cached_state(client):
+    note_id = client.post("/api/notes", json={"title": "Plan", "content": "", "tags": []}).json()["id"]
+    rolled_back = _batch(client, [
+        {"method": "PATCH", "path": f"/api/notes/{note_id}", "body": {"title": "ROLLED-BACK"}},
+        {"path": f"/api/notes/{note_id}"},
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "PHANTOM", "due_date": date.today().isoformat()}},
+        {"path": "/api/dashboard/today"},
+        {"path": "/api/notes/missing"},
+    ], atomic=True)
+    assert rolled_back["committed"] is False
+    assert [r["status"] for r in rolled_back["responses"]] == [200, 200, 200, 200, 404]
+    assert rolled_back["responses"][3]["body"]["tasks"]["due_today"][0]["title"] == "PHANTOM"
+    assert all("etag" not in r["headers"] for r in rolled_back["responses"])
+
+    # The next real writes reuse the rolled-back versions and invalidation ids
+    client.patch(f"/api/notes/{note_id}", json={"title": "Real"})
+    client.post("/api/notes", json={"title": "Unrelated", "content": "", "tags": []})
+    assert client.get(f"/api/notes/{note_id}").json()["title"] == "Real"
+    assert client.get("/api/dashboard/today").json()["tasks"]["due_today"] == []
+
+
+def test_rejects_unbatchable_requests(client):
+    for item in ({"path": "/api/batch", "method": "POST"}, {"path": "/api/changes"}, {"path": "/health"},
+                 {"path": "/api/notes", "method": "TRACE"}):
+        assert client.post("/api/batch", json={"requests": [item]}).status_code == 422
+
+
+def test_archived_conversations_stay_out_of_batch_transactions(client):
+    conversation_id = client.post("/api/conversations", json={"title": "Old thread"}).json()["id"]
+    for i in range(3):
+        client.post(f"/api/conversations/{conversation_id}/messages", json={"role": "user", "content": f"message {i}"})
+    assert client.post(f"/api/conversations/{conversation_id}/archive").json()["archived"] is True
+
+    result = _batch(client, [
+        {"method": "GET", "path": f"/api/conversations/{conversation_id}/messages"},
+        {"method": "PATCH", "path": "/api/tasks/missing", "body": {"status": "done"}},
+    ], atomic=True)
+    assert result["committed"] is False
+    assert [r["status"] for r in result["responses"]] == [409, 424]
+    assert _batch(client, [{"method": "DELETE", "path": f"/api/conversations/{conversation_id}"}],
+                  atomic=True)["responses"][0]["status"] == 409
+
+    # The cold copy was left alone, so opening the thread directly still finds every message
+    messages = client.get(f"/api/conversations/{conversation_id}/messages").json()["messages"]
+    assert [m["content"] for m in messages] == ["message 0", "message 1", "message 2"]
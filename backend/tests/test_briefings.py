@@ -0,0 +1,118 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from atlas_api.ai.briefings import BriefingScheduler, get_stored_briefing
+from atlas_api.ai.orchestrator import AIOrchestrator
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+class CountingOrchestrator(AIOrchestrator):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def generate_daily_briefing(self, overview):
+        self.calls.append(overview["date"])
+        return await super().generate_daily_briefing(overview)
+
+
+def _scheduler(db_factory, orchestrator):
+    return BriefingScheduler(
+        days_ahead=1, debounce=0, orchestrator_factory=lambda: orchestrator, connection_factory=db_factory
+    )
+
+
+def _execute(db_factory, sql, params=()):
+    conn = db_factory()
+    with conn:
+        conn.execute(sql, params)
+    conn.close()
+
+
+def _stale(db_factory):
+    conn = db_factory()
+    stale = {row[0] for row in conn.execute("SELECT date FROM daily_briefings WHERE stale_since IS NOT NULL")}
+    conn.close()
+    return stale
+
+
+def _add_task(db_factory, task_id, due):
+    _execute(
+        db_factory,
+        "INSERT INTO tasks (id, title, status, priority, due_date, tags, created_at) "
+        "VALUES (?, ?, 'todo', 'high', ?, '[]', ?)",
+        (task_id, f"Task {task_id}", f"{due.isoformat()}T17:00:00", datetime.now().isoformat())
+    )
+
+
+def test_briefings_are_generated_ahead_and_kept(db_factory):
+    orchestrator = CountingOrchestrator()
+    scheduler = _scheduler(db_factory, orchestrator)
+
+    refreshed = asyncio.run(scheduler.run_once())
+    assert refreshed == [TODAY.isoformat(), TOMORROW.isoformat()]
+    assert asyncio.run(scheduler.run_once()) == []
+    assert len(orchestrator.calls) == 2
+
+    conn = db_factory()
+    briefing = get_stored_briefing(conn, TODAY)
+    conn.close()
+    assert briefing["markdown"].startswith("#")
+    assert briefing["stale"] is False
+
+
+def test_changes_stale_only_the_days_they_affect(db_factory):
+    orchestrator = CountingOrchestrator()
+    scheduler = _scheduler(db_factory, orchestrator)
+    asyncio.run(scheduler.run_once())
+
+    _add_task(db_factory, "t1", TOMORROW)
+    assert _stale(db_factory) == {TOMORROW.isoformat()}
+    _add_task(db_factory, "t2", TODAY + timedelta(days=30))
+    assert _stale(db_factory) == {TOMORROW.isoformat()}
+
+    now = datetime.now().isoformat()
+    _execute(
+        db_factory,
+        "INSERT INTO events (id, title, start_time, end_time, source, created_at, updated_at) "
+        "VALUES ('e1', 'Standup', ?, ?, 'local', ?, ?)",
+        (f"{TODAY.isoformat()}T09:00:00", f"{TODAY.isoformat()}T09:15:00", now, now)
+    )
+    assert _stale(db_factory) == {TODAY.isoformat(), TOMORROW.isoformat()}
+
+    # Not yet settled: left alone until the debounce has passed
+    scheduler.debounce = 3600
+    assert asyncio.run(scheduler.run_once()) == []
+    scheduler.debounce = 0
+    assert asyncio.run(scheduler.run_once()) == [TODAY.isoformat(), TOMORROW.isoformat()]
+    assert _stale(db_factory) == set()
+
+    conn = db_factory()
+    assert "Task t1" in get_stored_briefing(conn, TOMORROW)["markdown"]
+    conn.close()
+
+
+def test_unchanged_overview_is_not_regenerated(db_factory):
+    orchestrator = CountingOrchestrator()
+    scheduler = _scheduler(db_factory, orchestrator)
+    _add_task(db_factory, "t1", TODAY)
+    asyncio.run(scheduler.run_once())
+    assert len(orchestrator.calls) == 2
+
+    # The description is not part of the overview
+    _execute(db_factory, "UPDATE tasks SET description = 'more detail' WHERE id = 't1'")
+    assert TODAY.isoformat() in _stale(db_factory)
+    asyncio.run(scheduler.run_once())
+    assert len(orchestrator.calls) == 2
+    assert scheduler.stats()["unchanged"] == 2
+    assert _stale(db_factory) == set()
+
+    async def concurrent():
+        _execute(db_factory, "UPDATE tasks SET priority = 'low' WHERE id = 't1'")
+        return await asyncio.gather(*[scheduler.generate(TODAY) for _ in range(3)])
+
+    results = asyncio.run(concurrent())
+    assert len(orchestrator.calls) == 3
+    assert results[0] == results[2]
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+from atlas_api.services.calendar_sync import CalendarSyncEngine, HttpCalendarProvider, map_items
+from atlas_api.services.event_service import cancel_occurrences, upsert_events
+from benchmarks import fake_calendar_server as fake
+
+
+@pytest.fixture
+def db_factory(db_factory):
+    fake.calendars.clear()
+    yield db_factory
+    fake.calendars.clear()
+
+
+def _sync(connect, *calendar_ids, page_size=50):
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app), base_url="http://fake")
+        provider = HttpCalendarProvider("http://fake", page_size=page_size, client=client)
+        try:
+            engine = CalendarSyncEngine(provider, batch_size=20, connection_factory=connect)
+            return await engine.sync_all(calendar_ids)
+        finally:
+            await provider.aclose()
+    return asyncio.run(run())
+
+
+def _titles(connect, calendar_id):
+    conn = connect()
+    rows = conn.execute(
+        "SELECT external_id, title FROM events WHERE calendar_id = ?", (calendar_id,)
+    ).fetchall()
+    conn.close()
+    return {row["external_id"]: row["title"] for row in rows}
+
+
+def test_map_items_handles_cancellations_and_overrides():
+    items = [
+        {"id": "a", "summary": "Series", "start": {"dateTime": "2025-01-06T09:00:00"},
+         "end": {"dateTime": "2025-01-06T09:30:00"}, "recurrence": ["RRULE:FREQ=WEEKLY;COUNT=3"]},
+        {"id": "a_1", "recurringEventId": "a", "originalStartTime": {"dateTime": "2025-01-13T09:00:00"},
+         "start": {"dateTime": "2025-01-13T10:00:00"}, "end": {"dateTime": "2025-01-13T10:30:00"}},
+        {"id": "a_2", "status": "cancelled", "recurringEventId": "a",
+         "originalStartTime": {"dateTime": "2025-01-20T09:00:00"}},
+        {"id": "b", "start": {"date": "2025-01-07"}, "end": {"date": "2025-01-08"}},
+    ]
+    changes = map_items(items, "work", "google", "2025-01-01T00:00:00")
+    assert [row["external_id"] for row in changes.upserts] == ["a", "a_1", "b"]
+    assert changes.upserts[0]["series_end"] == "2025-01-20T09:30:00"
+    assert changes.upserts[2]["title"] == "(No title)"
+    assert changes.overrides == [("a_1", "a")]
+    assert changes.deletes == ["a_2"]
+    assert changes.cancelled[0][0] == "a"
+
+
+def test_series_update_keeps_cancelled_occurrences(db_factory):
+    series = {"id": "a", "summary": "Series", "start": {"dateTime": "2025-01-06T09:00:00"},
+              "end": {"dateTime": "2025-01-06T09:30:00"}, "recurrence": ["RRULE:FREQ=WEEKLY;COUNT=3"]}
+    cancelled = {"id": "a_2", "status": "cancelled", "recurringEventId": "a",
+                 "originalStartTime": {"dateTime": "2025-01-13T09:00:00"}}
+    conn = db_factory()
+    upsert_events(conn, map_items([series], "work", "google", "2025-01-01T00:00:00").upserts)
+    cancel_occurrences(conn, "work", map_items([cancelled], "work", "google", "2025-01-02T00:00:00").cancelled)
+
+    renamed = dict(series, summary="Renamed", recurrence=["RRULE:FREQ=WEEKLY;COUNT=3", "EXDATE:20250120T090000"])
+    upsert_events(conn, map_items([renamed], "work", "google", "2025-01-03T00:00:00").upserts)
+    row = conn.execute("SELECT title, exdates FROM events WHERE external_id = 'a'").fetchone()
+    assert row["title"] == "Renamed"
+    assert json.loads(row["exdates"]) == ["2025-01-13T09:00:00", "2025-01-20T09:00:00"]
+
+    # The source's EXDATEs replace the stored ones: a restored occurrence comes back
+    upsert_events(conn, map_items([series], "work", "google", "2025-01-04T00:00:00").upserts)
+    row = conn.execute("SELECT exdates FROM events WHERE external_id = 'a'").fetchone()
+    conn.close()
+    assert json.loads(row["exdates"]) == ["2025-01-13T09:00:00"]
+
+
+def test_sync_writes_run_off_the_event_loop(db_factory):
+    threads = set()
+
+    def connect():
+        threads.add(threading.current_thread())
+        return db_factory()
+
+    fake._calendar("work").put(fake.make_event(0, fake.datetime(2025, 1, 1)))
+    assert _sync(connect, "work")["work"]["upserted"] == 1
+    assert threads and threading.main_thread() not in threads
+
+
+def test_incremental_sync_applies_only_changes(db_factory):
+    cal = fake._calendar("work")
+    for i in range(120):
+        cal.put(fake.make_event(i, fake.datetime(2025, 1, 1)))
+
+    report = _sync(db_factory, "work")
+    assert report["work"]["mode"] == "full"
+    assert report["work"]["upserted"] == 120
+    assert report["work"]["pages"] == 3
+
+    edited = dict(cal.items["evt00000005"], summary="Renamed")
+    cal.put(edited)
+    cal.cancel("evt00000006")
+    cal.put(fake.make_event(500, fake.datetime(2025, 1, 1)))
+
+    report = _sync(db_factory, "work")
+    assert report["work"]["mode"] == "incremental"
+    assert report["work"]["upserted"] == 2
+    assert report["work"]["deleted"] == 1
+
+    titles = _titles(db_factory, "work")
+    assert len(titles) == 120
+    assert titles["evt00000005"] == "Renamed"
+    assert "evt00000006" not in titles
+    assert "evt00000500" in titles
+
+
+def test_expired_token_triggers_full_resync(db_factory):
+    cal = fake._calendar("work")
+    for i in range(30):
+        cal.put(fake.make_event(i, fake.datetime(2025, 1, 1)))
+    _sync(db_factory, "work")
+
+    # Deleted while the token expires: a full listing omits it entirely
+    cal.cancel("evt00000001")
+    cal.min_sync_version = cal.version + 1
+
+    report = _sync(db_factory, "work")
+    assert report["work"]["token_expired"] is True
+    assert report["work"]["mode"] == "full"
+    assert "evt00000001" not in _titles(db_factory, "work")
+    assert len(_titles(db_factory, "work")) == 29
+
+
+def test_calendars_sync_concurrently(db_factory):
+    for name, count in (("work", 40), ("home", 25)):
+        cal = fake._calendar(name)
+        for i in range(count):
+            cal.put(fake.make_event(i, fake.datetime(2025, 1, 1)))
+
+    report = _sync(db_factory, "work", "home", page_size=10)
+    assert report["work"]["upserted"] == 40
+    assert report["home"]["upserted"] == 25
+    assert len(_titles(db_factory, "home")) == 25
+
+    conn = db_factory()
+    tokens = conn.execute("SELECT id, sync_token FROM sync_state ORDER BY id").fetchall()
+    conn.close()
+    assert [row["id"] for row in tokens] == ["google_calendar:home", "google_calendar:work"]
+    assert all(row["sync_token"] for row in tokens)
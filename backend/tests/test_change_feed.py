@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from atlas_api.services.changes import ChangeHub, ResetRequired, latest_version, read_changes
+
+NOW = "2025-01-06T08:00:00"
+
+
+def _write(connect, sql, *params):
+    conn = connect()
+    with conn:
+        conn.execute(sql, params)
+    conn.close()
+
+
+def _note(connect, note_id):
+    _write(connect, "INSERT INTO notes (id, title, content, tags, created_at, updated_at) "
+                    "VALUES (?, ?, '', '[]', ?, ?)", note_id, note_id, NOW, NOW)
+
+
+def test_triggers_log_entity_writes(db_factory):
+    conn = db_factory()
+    start = latest_version(conn)
+    _note(db_factory, "n1")
+    _write(db_factory, "UPDATE notes SET title = 'Renamed' WHERE id = 'n1'")
+    _write(db_factory, "INSERT INTO projects (id, name, root_path, type, created_at, updated_at) "
+                       "VALUES ('p1', 'Atlas', '/tmp/atlas', 'general', ?, ?)", NOW, NOW)
+    _write(db_factory, "INSERT INTO project_notes (project_id, note_id) VALUES ('p1', 'n1')")
+    _write(db_factory, "DELETE FROM notes WHERE id = 'n1'")
+
+    changes = [(c.entity, c.id, c.op) for c in read_changes(conn, start)]
+    conn.close()
+    assert changes == [
+        ("note", "n1", "insert"),
+        ("note", "n1", "update"),
+        ("project", "p1", "insert"),
+        ("project", "p1", "update"),     # linking counts as a project change
+        ("note", "n1", "delete"),
+    ]
+
+
+def test_pruned_offsets_require_a_reset(db_factory):
+    for i in range(3):
+        _note(db_factory, f"n{i}")
+    conn = db_factory()
+    versions = [c.version for c in read_changes(conn, 0)]
+    with conn:
+        conn.execute("DELETE FROM changes WHERE version <= ?", (versions[1],))
+
+    assert [c.version for c in read_changes(conn, versions[1])] == versions[2:]
+    with pytest.raises(ResetRequired) as reset:
+        read_changes(conn, versions[0])
+    assert reset.value.version == versions[-1]
+
+    # An empty log is fine for a client that is up to date, not for one behind
+    with conn:
+        conn.execute("DELETE FROM changes")
+    assert read_changes(conn, versions[-1]) == []
+    with pytest.raises(ResetRequired):
+        read_changes(conn, versions[-2])
+    conn.close()
+
+
+def test_subscribers_get_the_backlog_then_live_batches(db_factory):
+    conn = db_factory()
+    since = latest_version(conn)
+    conn.close()
+    _note(db_factory, "before")
+
+    async def scenario():
+        hub = ChangeHub(connection_factory=db_factory)
+        everything = hub.subscribe(since)
+        tasks_only = hub.subscribe(entities={"task"})
+        assert [c.id for c in await everything.__anext__()] == ["before"]
+
+        pending = asyncio.ensure_future(tasks_only.__anext__())
+        await asyncio.sleep(0)
+        _note(db_factory, "after")
+        _write(db_factory, "INSERT INTO tasks (id, title, status, priority, created_at) "
+                           "VALUES ('t1', 'Task', 'todo', 'low', ?)", NOW)
+        assert [c.id for c in hub.poll()] == ["after", "t1"]
+        assert hub.poll() == []
+
+        assert [c.id for c in await everything.__anext__()] == ["after", "t1"]
+        assert [(c.entity, c.op) for c in await pending] == [("task", "insert")]
+        assert hub.stats()["subscribers"] == 2
+        await everything.aclose()
+        await tasks_only.aclose()
+        assert hub.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_changes_endpoint_pages_and_filters(client):
+    since = client.get("/api/changes").json()["version"]
+
+    note_id = client.post("/api/notes", json={"title": "Plan", "content": "", "tags": []}).json()["id"]
+    client.post("/api/tasks", json={"title": "Ship", "priority": "high"})
+    client.delete(f"/api/notes/{note_id}")
+
+    page = client.get("/api/changes", params={"since": since, "limit": 2}).json()
+    assert page["has_more"] is True and len(page["changes"]) == 2
+    rest = client.get("/api/changes", params={"since": page["version"]}).json()
+    assert rest["has_more"] is False
+    assert (rest["changes"][-1]["id"], rest["changes"][-1]["op"]) == (note_id, "delete")
+
+    notes = client.get("/api/changes", params={"since": since, "entities": "note"}).json()
+    assert {c["entity"] for c in notes["changes"]} == {"note"}
+    assert notes["version"] == rest["version"]
+    assert client.get("/api/changes", params={"entities": "bogus"}).status_code == 422
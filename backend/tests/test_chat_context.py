@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from atlas_api.ai.context import ContextAssembler
+from atlas_api.ai.orchestrator import AIOrchestrator
+from atlas_api.ai.tokens import estimate_tokens
+
+START = datetime(2025, 1, 6, 9, 0)
+
+
+def _conversation(connect, conversation_id: str, turns: int, words: int = 60):
+    conn = connect()
+    conn.execute(
+        "INSERT INTO conversations (id, title, created_at, updated_at) VALUES (?, 'Chat', ?, ?)",
+        (conversation_id, START.isoformat(), START.isoformat())
+    )
+    rows = []
+    for i in range(turns):
+        content = f"Turn {i}. " + " ".join(f"word{j}" for j in range(words))
+        rows.append((f"{conversation_id}-{i}", conversation_id, "user" if i % 2 == 0 else "assistant", content,
+                     (START + timedelta(seconds=i)).isoformat(), estimate_tokens(content)))
+    conn.executemany(
+        "INSERT INTO chat_messages (id, conversation_id, role, content, timestamp, token_count)"
+        " VALUES (?, ?, ?, ?, ?, ?)", rows
+    )
+    conn.commit()
+    return conn
+
+
+def test_history_and_excerpts_fit_the_budget(db_factory):
+    conn = _conversation(db_factory, "c1", turns=101)
+    assembler = ContextAssembler(budget_tokens=2000, retrieval_tokens=300, summary_tokens=100)
+    chunks = [
+        {"source_type": "note", "source_id": "n1", "content": "Plan > Goals\n\nShip the beta", "score": 0.9},
+        {"source_type": "note", "source_id": "n1", "content": "Plan > Risks\n\nTiming", "score": 0.8},
+        {"source_type": "note", "source_id": "n2", "content": "long " * 2000, "score": 0.7},
+        {"source_type": "task", "source_id": "t1", "content": "Book venue", "score": 0.5},
+    ]
+    context = assembler.assemble(conn, "c1", chunks)
+
+    assert context.tokens <= 2000
+    assert context.truncated and context.needs_summary
+    assert context.references == {"notes": ["n1"], "tasks": ["t1"]}
+    assert context.messages[0]["role"] == "system"
+    # Excerpts sit right before the newest user message, which is kept verbatim
+    assert "[Note n1] Plan > Goals Ship the beta" in context.messages[-2]["content"]
+    assert context.messages[-1]["content"].startswith("Turn 100.")
+    history = [m["content"] for m in context.messages[1:-2]]
+    assert [h.split(".")[0] for h in history] == [f"Turn {i}" for i in range(100 - len(history), 100)]
+
+
+def test_rolling_summary_bounds_history(db_factory):
+    conn = _conversation(db_factory, "c1", turns=101)
+    assembler = ContextAssembler(budget_tokens=2000, retrieval_tokens=400, summary_tokens=100,
+                                 connection_factory=db_factory)
+
+    assert asyncio.run(assembler.refresh_summary("c1", AIOrchestrator()))
+    row = conn.execute("SELECT summary, covers_until, message_count, model FROM conversation_summaries").fetchone()
+    assert row["model"] == "local" and row["message_count"] > 80
+    assert "Turn" in row["summary"]
+
+    context = assembler.assemble(conn, "c1")
+    assert not context.truncated and not context.needs_summary
+    assert "Summary of the earlier conversation" in context.messages[0]["content"]
+    assert context.history_messages == 101 - row["message_count"]
+    assert not asyncio.run(assembler.refresh_summary("c1", AIOrchestrator()))
+
+    # The rendered prefix is reused until the summary changes
+    assembler.assemble(conn, "c1")
+    assert assembler.prefix_hits == 1
+    conn.execute("DELETE FROM conversations WHERE id = 'c1'")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM conversation_summaries").fetchone()[0] == 0
+
+
+def test_assembly_cost_does_not_grow_with_conversation_length(db_factory):
+    def steps(conn, conversation_id):
+        counter = [0]
+
+        def tick():
+            counter[0] += 1
+        conn.set_progress_handler(tick, 1)
+        ContextAssembler(budget_tokens=2000).assemble(conn, conversation_id)
+        conn.set_progress_handler(None, 0)
+        return counter[0]
+
+    short = _conversation(db_factory, "short", turns=100)
+    long = _conversation(db_factory, "long", turns=5000)
+    assert steps(long, "long") <= steps(short, "short") * 1.1
@@ -0,0 +1,77 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from atlas_api.config import settings
+
+START = datetime(2025, 3, 1, 9, 0)
+
+
+def _seed(client, title, contents, same_time=False):
+    conversation = client.post("/api/conversations", json={"title": title}).json()
+    conn = sqlite3.connect(settings.database_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO chat_messages (id, conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"{title}-{i:03d}", conversation["id"], "user" if i % 2 == 0 else "assistant", content,
+                 (START + timedelta(seconds=0 if same_time else i)).isoformat())
+                for i, content in enumerate(contents)
+            ]
+        )
+    conn.close()
+    return conversation["id"]
+
+
+def _ids(page):
+    return [m["id"] for m in page["messages"]]
+
+
+def test_cursor_pages_in_both_directions(client):
+    # Identical timestamps: the id keeps the order total
+    conversation_id = _seed(client, "c", [f"message {i}" for i in range(25)], same_time=True)
+    url = f"/api/conversations/{conversation_id}/messages"
+
+    latest = client.get(url, params={"latest": True, "limit": 10}).json()
+    assert _ids(latest) == [f"c-{i:03d}" for i in range(15, 25)]
+    assert latest["cursors"]["newer"] is None
+
+    seen = _ids(latest)
+    page = latest
+    while page["cursors"]["older"]:
+        page = client.get(url, params={"before": page["cursors"]["older"], "limit": 10}).json()
+        seen = _ids(page) + seen
+    assert seen == [f"c-{i:03d}" for i in range(25)]
+    assert _ids(page) == [f"c-{i:03d}" for i in range(5)]
+
+    newer = client.get(url, params={"after": page["cursors"]["newer"], "limit": 10}).json()
+    assert _ids(newer) == [f"c-{i:03d}" for i in range(5, 15)]
+    assert newer["cursors"]["older"] and newer["cursors"]["newer"]
+
+    # Offset paging is unchanged
+    legacy = client.get(url, params={"limit": 10, "offset": 20}).json()
+    assert _ids(legacy) == [f"c-{i:03d}" for i in range(20, 25)]
+
+    assert client.get(url, params={"before": "not-a-cursor"}).status_code == 400
+
+
+def test_search_ranks_messages_across_conversations(client):
+    first = _seed(client, "trip", ["Book the train to Lyon", "The Lyon train leaves at 9, the Lyon hotel is booked"])
+    _seed(client, "work", ["Quarterly report is due", "Lyon office visit next week"])
+
+    body = client.get("/api/conversations/search", params={"q": "lyon"}).json()
+    assert [r["id"] for r in body["results"]] == ["trip-001", "trip-000", "work-001"]
+    top = body["results"][0]
+    assert top["conversation_title"] == "trip" and top["role"] == "assistant"
+    assert "<mark>Lyon</mark>" in top["snippet"]
+
+    scoped = client.get("/api/conversations/search", params={"q": "lyon", "conversation_id": first}).json()
+    assert {r["conversation_id"] for r in scoped["results"]} == {first}
+
+    conn = sqlite3.connect(settings.database_path)
+    with conn:
+        conn.execute("UPDATE chat_messages SET content = 'Cancelled' WHERE id = 'trip-001'")
+        conn.execute("DELETE FROM chat_messages WHERE id = 'work-001'")
+    conn.close()
+    body = client.get("/api/conversations/search", params={"q": "lyon"}).json()
+    assert [r["id"] for r in body["results"]] == ["trip-000"]
+    assert client.get("/api/conversations/search", params={"q": "?!"}).json()["total"] == 0
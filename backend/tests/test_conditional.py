@@ -0,0 +1,67 @@
+from atlas_api.routers import notes as notes_router
+
+
+def _note(client, title, content=""):
+    return client.post("/api/notes", json={"title": title, "content": content, "tags": []}).json()["id"]
+
+
+def test_unchanged_resources_answer_304_without_running_the_endpoint(client, monkeypatch):
+    note_id = _note(client, "Plan")
+    first = client.get(f"/api/notes/{note_id}")
+    etag = first.headers["etag"]
+    listing = client.get("/api/notes").headers["etag"]
+
+    def unreachable():
+        raise AssertionError("endpoint ran")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(notes_router, "get_db_connection", unreachable)
+        cached = client.get(f"/api/notes/{note_id}", headers={"If-None-Match": etag})
+        assert cached.status_code == 304 and cached.content == b""
+        assert cached.headers["etag"] == etag
+        assert client.get("/api/notes", headers={"If-None-Match": f'"0", W/{listing}'}).status_code == 304
+
+    # A new backlink changes the note's representation, and every list
+    _note(client, "Log", "see [[Plan]]")
+    fresh = client.get(f"/api/notes/{note_id}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert [b["title"] for b in fresh.json()["backlinks"]] == ["Log"]
+    assert client.get("/api/notes", headers={"If-None-Match": listing}).status_code == 200
+
+    assert "etag" not in client.get("/api/notes/missing").headers
+
+
+def test_if_match_makes_patch_optimistic(client):
+    task_id = client.post("/api/tasks", json={"title": "Ship", "priority": "high"}).json()["id"]
+    etag = client.get(f"/api/tasks/{task_id}").headers["etag"]
+
+    updated = client.patch(f"/api/tasks/{task_id}", json={"status": "done"}, headers={"If-Match": etag})
+    assert updated.status_code == 200
+    assert client.get(f"/api/tasks/{task_id}").headers["etag"] == updated.headers["etag"] != etag
+
+    # A second writer still holding the old tag loses
+    stale = client.patch(f"/api/tasks/{task_id}", json={"title": "Ship it"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert client.get(f"/api/tasks/{task_id}").json()["title"] == "Ship"
+
+    # Edits to other notes only change a note's backlinks part, not its own version
+    note_id = _note(client, "Plan")
+    note_etag = client.get(f"/api/notes/{note_id}").headers["etag"]
+    _note(client, "Unrelated")
+    assert client.get(f"/api/notes/{note_id}").headers["etag"] != note_etag
+    assert client.patch(f"/api/notes/{note_id}", json={"title": "Plan 2"},
+                        headers={"If-Match": note_etag}).status_code == 200
+    assert client.patch(f"/api/notes/{note_id}", json={"title": "Plan 3"},
+                        headers={"If-Match": note_etag}).status_code == 412
+
+
+def test_dashboard_tag_follows_the_day_and_its_entities(client):
+    day = {"target_date": "2025-01-06"}
+    etag = client.get("/api/dashboard/today", params=day).headers["etag"]
+    assert client.get("/api/dashboard/today", params=day, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/dashboard/today", params={"target_date": "2025-01-07"}).headers["etag"] != etag
+
+    client.post("/api/events", json={
+        "title": "Standup", "start_time": "2025-01-06T09:00:00", "end_time": "2025-01-06T09:15:00",
+    })
+    assert client.get("/api/dashboard/today", params=day, headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,107 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from atlas_api.config import settings
+from atlas_api.services import archive as archive_module
+from atlas_api.services.archive import ConversationArchive
+
+OLD = (datetime.now() - timedelta(days=200)).isoformat()
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(archive_module, "_archive", ConversationArchive(idle_days=90))
+    return client
+
+
+def _rows(sql, *params):
+    conn = sqlite3.connect(settings.database_path)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def _conversation(client, title, messages, updated_at=OLD, pinned=0):
+    conversation_id = client.post("/api/conversations", json={"title": title}).json()["id"]
+    for i in range(messages):
+        client.post(f"/api/conversations/{conversation_id}/messages",
+                    json={"role": "user", "content": f"{title} message {i} about gardening"})
+    conn = sqlite3.connect(settings.database_path)
+    with conn:
+        conn.execute("UPDATE conversations SET updated_at = ?, pinned = ? WHERE id = ?",
+                     (updated_at, pinned, conversation_id))
+    conn.close()
+    return conversation_id
+
+
+def test_idle_conversations_move_to_the_cold_store_and_back(client):
+    idle = _conversation(client, "idle", 30)
+    recent = _conversation(client, "recent", 3, updated_at=datetime.now().isoformat())
+    pinned = _conversation(client, "pinned", 3, pinned=1)
+    archive = archive_module.get_conversation_archive()
+
+    assert archive.archive_idle() == [idle]
+    assert _rows("SELECT COUNT(*) FROM chat_messages WHERE conversation_id = ?", idle) == [(0,)]
+    stats = client.get("/api/conversations/archive/stats").json()
+    assert stats["archived_conversations"] == 1 and stats["messages"] == 30
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+    assert archive.archive_path.exists()
+
+    # Still listed from its hot row
+    listed = {c["id"]: c for c in client.get("/api/conversations").json()["conversations"]}
+    assert listed[idle]["archived"] is True
+    assert listed[idle]["last_message_preview"].startswith("idle message 29")
+    assert listed[recent]["archived"] is False and listed[pinned]["archived"] is False
+
+    # Opening it rehydrates transparently, search included
+    page = client.get(f"/api/conversations/{idle}/messages", params={"latest": True, "limit": 5}).json()
+    assert [m["content"] for m in page["messages"]][-1] == "idle message 29 about gardening"
+    assert _rows("SELECT COUNT(*) FROM chat_messages WHERE conversation_id = ?", idle) == [(30,)]
+    assert client.get(f"/api/conversations/{idle}").json()["archived"] is False
+    assert client.get("/api/conversations/archive/stats").json()["messages"] == 0
+    hits = client.get("/api/conversations/search", params={"q": "idle gardening"}).json()["results"]
+    assert {h["conversation_id"] for h in hits} == {idle}
+
+    # Opening counts as use: not archived again until it idles once more
+    assert archive.archive_idle() == []
+    assert archive.archive_idle(now=datetime.now() + timedelta(days=91)) == [idle, recent]
+
+
+def test_sending_to_an_archived_conversation_keeps_its_history(client):
+    conversation_id = _conversation(client, "thread", 4)
+    assert client.post(f"/api/conversations/{conversation_id}/archive").json()["archived"] is True
+    assert client.post(f"/api/conversations/{conversation_id}/archive").json()["archived"] is False
+
+    client.post(f"/api/conversations/{conversation_id}/messages", json={"role": "user", "content": "back again"})
+    messages = client.get(f"/api/conversations/{conversation_id}/messages").json()["messages"]
+    assert len(messages) == 5 and messages[-1]["content"] == "back again"
+
+    client.post(f"/api/conversations/{conversation_id}/archive")
+    client.delete(f"/api/conversations/{conversation_id}")
+    assert client.get("/api/conversations/archive/stats").json()["messages"] == 0
+
+
+def test_compact_reclaims_space_after_archiving(tmp_path):
+    db_path = tmp_path / "hot.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE chat_messages (id TEXT PRIMARY KEY, conversation_id TEXT, content TEXT, timestamp TEXT)")
+    conn.execute("CREATE TABLE conversations (id TEXT PRIMARY KEY, updated_at TEXT, pinned INTEGER, archived_at TEXT, rehydrated_at TEXT)")
+    with conn:
+        conn.execute("INSERT INTO conversations VALUES ('c', ?, 0, NULL, NULL)", (OLD,))
+        conn.executemany("INSERT INTO chat_messages VALUES (?, 'c', ?, ?)", [(str(i), "x" * 2000, OLD) for i in range(500)])
+    conn.close()
+
+    def connect():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    archive = ConversationArchive(archive_path=tmp_path / "cold.db", connection_factory=connect)
+
+    size = db_path.stat().st_size
+    assert archive.archive_idle() == ["c"]
+    assert archive.compact() == {"hot": True, "cold": False}
+    assert db_path.stat().st_size < size / 10
+    assert archive.rehydrate("c") == 500
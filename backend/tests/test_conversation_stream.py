@@ -0,0 +1,98 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from atlas_api.ai import orchestrator as orchestrator_module
+from atlas_api.ai.orchestrator import AIOrchestrator
+from atlas_api.config import settings
+
+
+class SlowOrchestrator(AIOrchestrator):
+    """Slow local replies, so there is time to cancel"""
+
+    def __init__(self, words: int):
+        super().__init__()
+        self.words = words
+
+    async def stream_chat(self, history):
+        for i in range(self.words):
+            yield f"w{i} "
+            await asyncio.sleep(0.02)
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(orchestrator_module, "_orchestrator", AIOrchestrator())
+    return client
+
+
+def _rows(sql, *params):
+    conn = sqlite3.connect(settings.database_path)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def test_reply_is_streamed_and_stored_once(client):
+    conversation = client.post("/api/conversations", json={"title": "Chat"}).json()
+
+    with client.websocket_connect(f"/api/conversations/{conversation['id']}/stream") as ws:
+        ws.send_json({"type": "message", "content": "What is due today?"})
+        start = ws.receive_json()
+        assert start["type"] == "start"
+        assert start["user_message"]["content"] == "What is due today?"
+        deltas = []
+        while True:
+            frame = ws.receive_json()
+            if frame["type"] != "token":
+                break
+            deltas.append(frame["delta"])
+
+    assert frame["type"] == "done"
+    assert frame["message"]["content"] == "".join(deltas)
+    assert "What is due today?" in frame["message"]["content"]
+    assert frame["metrics"]["ttft_ms"] is not None
+    assert frame["metrics"]["deltas"] == len(deltas) > 1
+
+    assert _rows("SELECT role FROM chat_messages ORDER BY timestamp") == [("user",), ("assistant",)]
+    preview = _rows("SELECT last_message_preview FROM conversations")[0][0]
+    assert preview == frame["message"]["content"][:100]
+    assert client.get("/api/conversations/stream/metrics").json()["completed"] >= 1
+
+
+def test_cancel_keeps_partial_reply(client, monkeypatch):
+    monkeypatch.setattr(orchestrator_module, "_orchestrator", SlowOrchestrator(words=500))
+    conversation = client.post("/api/conversations", json={"title": "Chat"}).json()
+
+    with client.websocket_connect(f"/api/conversations/{conversation['id']}/stream") as ws:
+        ws.send_json({"type": "message", "content": "Tell me everything"})
+        assert ws.receive_json()["type"] == "start"
+        assert ws.receive_json()["type"] == "token"
+        ws.send_json({"type": "message", "content": "again"})
+        ws.send_json({"type": "cancel"})
+        frames = []
+        while not frames or frames[-1]["type"] in ("token", "error"):
+            frames.append(ws.receive_json())
+
+    assert frames[-1]["type"] == "cancelled"
+    assert any(f["type"] == "error" for f in frames[:-1])  # second message while streaming
+    partial = frames[-1]["message"]["content"]
+    assert partial.startswith("w0 ") and len(partial.split()) < 500
+    assert _rows("SELECT content FROM chat_messages WHERE role = 'assistant'") == [(partial,)]
+
+
+def test_unknown_conversation_is_rejected(client):
+    with client.websocket_connect("/api/conversations/missing/stream") as ws:
+        assert ws.receive_json() == {"type": "error", "detail": "Conversation not found"}
+
+
+def test_malformed_frames_get_an_error_reply(client):
+    conversation = client.post("/api/conversations", json={"title": "Chat"}).json()
+
+    with client.websocket_connect(f"/api/conversations/{conversation['id']}/stream") as ws:
+        for text in ("not json", "[1, 2]", '"message"'):
+            ws.send_text(text)
+            assert ws.receive_json() == {"type": "error", "detail": "Frames must be JSON objects"}
+        ws.send_json({"type": "message", "content": "Still here?"})
+        assert ws.receive_json()["type"] == "start"
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+
+import pytest
+
+from atlas_api.services.dashboard import OverviewCache, today_overview
+
+DAY = date(2025, 1, 6)
+NOW = "2025-01-06T08:00:00"
+
+
+@pytest.fixture
+def db_factory(db_factory):
+    conn = db_factory()
+    conn.executemany(
+        "INSERT INTO tasks (id, title, description, status, priority, due_date, tags, created_at) "
+        "VALUES (?, ?, '', ?, 'high', ?, '[\"work\"]', ?)",
+        [
+            ("late", "Late", "todo", "2025-01-02T17:00:00", NOW),
+            ("today", "Today", "in_progress", "2025-01-06T12:00:00", NOW),
+            ("done", "Done", "done", "2025-01-06T12:00:00", NOW),
+            ("later", "Later", "todo", "2025-01-20T12:00:00", NOW),
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO notes (id, title, content, tags, created_at, updated_at) VALUES (?, ?, '', '[]', ?, ?)",
+        [
+            ("edge", "Edge", NOW, "2025-01-03T00:00:00"),    # exactly three days before
+            ("stale", "Stale", NOW, "2025-01-02T23:59:59"),
+        ]
+    )
+    conn.execute(
+        "INSERT INTO events (id, title, start_time, end_time, source, created_at, updated_at) "
+        "VALUES ('standup', 'Standup', '2025-01-06T09:00:00', '2025-01-06T09:15:00', 'local', ?, ?)",
+        (NOW, NOW)
+    )
+    conn.commit()
+    conn.close()
+    return db_factory
+
+
+def _write(connect, sql, *params):
+    conn = connect()
+    with conn:
+        conn.execute(sql, params)
+    conn.close()
+
+
+def test_overview_sections(db_factory):
+    conn = db_factory()
+    overview = today_overview(conn, DAY)
+    conn.close()
+    assert [t["id"] for t in overview["tasks"]["overdue"]] == ["late"]
+    assert overview["tasks"]["due_today"] == [{
+        "id": "today", "title": "Today", "status": "in_progress", "priority": "high",
+        "due_date": "2025-01-06T12:00:00", "tags": ["work"],
+    }]
+    assert [n["id"] for n in overview["recent_notes"]] == ["edge"]
+    assert set(overview["recent_notes"][0]) == {"id", "title", "tags", "created_at", "updated_at"}
+    assert [e["id"] for e in overview["events"]] == ["standup"]
+
+
+def test_cache_evicts_only_days_a_write_can_change(db_factory):
+    cache = OverviewCache()
+    conn = db_factory()
+    days = [DAY + timedelta(days=i) for i in range(-1, 30)]
+
+    def cached():
+        for day in days:
+            cache.get(conn, day)
+        return {date.fromisoformat(d) for d in cache._overviews}
+
+    def refreshed(sql, *params):
+        cached()
+        misses = cache.misses
+        _write(db_factory, sql, *params)
+        cache._apply_invalidations(conn)
+        evicted = set(days) - {date.fromisoformat(d) for d in cache._overviews}
+        assert cache.misses == misses
+        return evicted
+
+    assert cached() == set(days)
+    first = cache.get(conn, DAY)
+    assert cache.get(conn, DAY) is first and cache.hits >= 2
+
+    # Not shown on the dashboard
+    assert refreshed("UPDATE tasks SET description = 'more' WHERE id = 'today'") == set()
+    assert refreshed("UPDATE tasks SET title = 'Renamed' WHERE id = 'done'") == set()
+    assert refreshed("INSERT INTO tasks (id, title, status, priority, created_at) "
+                     "VALUES ('undated', 'Undated', 'todo', 'low', ?)", NOW) == set()
+
+    # Due on the 20th: that day and every later one (where it would be overdue)
+    assert refreshed("UPDATE tasks SET priority = 'low' WHERE id = 'later'") == {
+        d for d in days if d >= date(2025, 1, 20)
+    }
+    # Moving a task moves both its old and new range
+    assert refreshed("UPDATE tasks SET due_date = '2025-01-25T09:00:00' WHERE id = 'today'") == {
+        d for d in days if d >= DAY
+    }
+    assert refreshed(
+        "INSERT INTO events (id, title, start_time, end_time, source, created_at, updated_at) "
+        "VALUES ('trip', 'Trip', '2025-01-10T09:00:00', '2025-01-12T18:00:00', 'local', ?, ?)", NOW, NOW
+    ) == {date(2025, 1, 10), date(2025, 1, 11), date(2025, 1, 12)}
+    # A note is recent until three days after its update
+    assert refreshed("UPDATE notes SET title = 'Edge 2' WHERE id = 'edge'") == {
+        d for d in days if d <= date(2025, 1, 6)
+    }
+
+    assert [t["title"] for t in cache.get(conn, DAY)["tasks"]["overdue"]] == ["Late"]
+    assert cache.get(conn, date(2025, 1, 25))["tasks"]["due_today"][0]["id"] == "today"
+    conn.close()
+
+
+def test_processed_invalidations_are_pruned(db_factory):
+    cache = OverviewCache(prune_after=5)
+    conn = db_factory()
+    cache.get(conn, DAY)
+    for i in range(6):
+        _write(db_factory, "UPDATE notes SET updated_at = ? WHERE id = 'stale'", f"2025-01-0{i + 1}T10:00:00")
+    cache.get(conn, DAY)
+    assert conn.execute("SELECT COUNT(*) FROM dashboard_invalidations").fetchone()[0] == 0
+
+    # Ids keep increasing after the log was emptied
+    _write(db_factory, "UPDATE tasks SET title = 'Later 2' WHERE id = 'later'")
+    cache.get(conn, date(2025, 1, 21))
+    _write(db_factory, "UPDATE tasks SET title = 'Later 3' WHERE id = 'later'")
+    assert cache.get(conn, date(2025, 1, 21))["tasks"]["overdue"][-1]["title"] == "Later 3"
+    conn.close()
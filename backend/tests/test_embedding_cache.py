@@ -0,0 +1,106 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from atlas_api.ai import embedding_cache
+from atlas_api.ai.embedding_cache import CachedEmbeddingProvider, EmbeddingCache, ROW_OVERHEAD, text_hash
+from atlas_api.ai.embeddings import LocalHashEmbeddingProvider
+from atlas_api.ai.indexing import EmbeddingIndexer
+
+
+class CountingProvider(LocalHashEmbeddingProvider):
+    def __init__(self, dimensions=16, model=None):
+        super().__init__(dimensions)
+        self.model = model or self.model
+        self.texts = []
+
+    async def embed(self, texts):
+        self.texts.extend(texts)
+        return await super().embed(texts)
+
+
+def test_cache_hits_skip_the_provider(db_factory):
+    upstream = CountingProvider(model="text-embedding-3-large")
+    cache = EmbeddingCache(connection_factory=db_factory)
+    provider = CachedEmbeddingProvider(upstream, cache)
+
+    first = asyncio.run(provider.embed(["Weekly sync agenda", "Weekly  sync\nagenda ", "Retro notes"]))
+    # Whitespace variants normalize to one upstream text
+    assert upstream.texts == ["Weekly sync agenda", "Retro notes"]
+    assert np.array_equal(first[0], first[1])
+
+    second = asyncio.run(provider.embed(["Retro notes", "Weekly sync agenda", "New text"]))
+    assert upstream.texts[2:] == ["New text"]
+    assert np.allclose(second[1], first[0])
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 4, 3)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+    assert stats["tokens_saved"] == 3 + 5
+    assert stats["dollars_saved"] == pytest.approx(8 * 0.13 / 1e6)
+
+    # Keys include the model
+    other = CachedEmbeddingProvider(CountingProvider(model="other"), cache)
+    asyncio.run(other.embed(["Retro notes"]))
+    assert other.provider.texts == ["Retro notes"]
+
+
+def test_lru_eviction_by_size(db_factory):
+    row_size = 16 * 4 + ROW_OVERHEAD
+    cache = EmbeddingCache(max_bytes=row_size * 10, connection_factory=db_factory)
+    provider = CachedEmbeddingProvider(CountingProvider(), cache)
+
+    asyncio.run(provider.embed([f"text {i}" for i in range(8)]))
+    asyncio.run(provider.embed(["text 0"]))      # Most recently used now
+    asyncio.run(provider.embed([f"text {i}" for i in range(8, 12)]))
+
+    stats = cache.stats()
+    assert stats["bytes"] <= row_size * 9 and stats["evictions"] >= 3
+    conn = db_factory()
+    kept = {row[0] for row in conn.execute("SELECT text_hash FROM embedding_cache")}
+    conn.close()
+    assert text_hash("text 0") in kept and text_hash("text 11") in kept
+    assert text_hash("text 1") not in kept
+
+
+def test_hits_are_written_in_batches(db_factory, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "TOUCH_FLUSH_ROWS", 3)
+    cache = EmbeddingCache(connection_factory=db_factory)
+    provider = CachedEmbeddingProvider(CountingProvider(), cache)
+    asyncio.run(provider.embed(["a", "b", "c"]))
+
+    def stored_hits():
+        conn = db_factory()
+        hits = dict(conn.execute("SELECT text_hash, hits FROM embedding_cache").fetchall())
+        conn.close()
+        return hits
+
+    asyncio.run(provider.embed(["a", "b"]))
+    asyncio.run(provider.embed(["a"]))
+    assert set(stored_hits().values()) == {0}
+    asyncio.run(provider.embed(["c"]))      # Third distinct row: one batched write
+    assert stored_hits() == {text_hash("a"): 2, text_hash("b"): 1, text_hash("c"): 1}
+
+    asyncio.run(provider.embed(["b"]))
+    assert cache.stats()["lifetime_hits"] == 5
+
+
+def test_pipeline_reuses_cached_chunks_across_sources(db_factory):
+    upstream = CountingProvider()
+    indexer = EmbeddingIndexer(CachedEmbeddingProvider(upstream, EmbeddingCache(connection_factory=db_factory)))
+    conn = db_factory()
+    now = "2025-01-01T00:00:00"
+    template = "# Agenda\nStatus updates\n\n# Action items\nNone yet"
+    conn.executemany(
+        "INSERT INTO notes (id, title, content, tags, created_at, updated_at) VALUES (?, 'Standup', ?, '[]', ?, ?)",
+        [("n1", template, now, now), ("n2", template, now, now)]
+    )
+    conn.commit()
+    asyncio.run(indexer.index_sources(conn, [("note", "n1")]))
+    conn.commit()
+    embedded = len(upstream.texts)
+    asyncio.run(indexer.index_sources(conn, [("note", "n2")]))
+    assert len(upstream.texts) == embedded
+    assert conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 2 * embedded
+    conn.close()
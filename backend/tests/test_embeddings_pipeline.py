@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from atlas_api.ai.chunking import chunk_markdown
+from atlas_api.ai.embeddings import LocalHashEmbeddingProvider, from_blob
+from atlas_api.ai.indexing import EmbeddingIndexer, build_worker, enqueue_embedding
+from atlas_api.services.job_queue import JobWorker, QueueFull, enqueue_job, enqueue_jobs, queue_stats
+
+NOTE = """Intro paragraph.
+
+# Goals
+Ship the sync engine.
+
+- fast
+- incremental
+
+# Risks
+Token expiry during long syncs.
+"""
+
+
+def _save_note(conn, note_id, content, title="Plan"):
+    now = datetime.now().isoformat()
+    conn.execute(
+        """
+        INSERT INTO notes (id, title, content, tags, created_at, updated_at) VALUES (?, ?, ?, '[]', ?, ?)
+        ON CONFLICT(id) DO UPDATE SET content = excluded.content, updated_at = excluded.updated_at
+        """,
+        (note_id, title, content, now, now)
+    )
+    enqueue_embedding(conn, "note", note_id)
+    conn.commit()
+
+
+def test_chunk_markdown_follows_headings():
+    chunks = chunk_markdown(NOTE, title="Plan")
+    assert [c.heading for c in chunks] == [None, "Goals", "Risks"]
+    assert chunks[1].text == "Plan > Goals\n\nShip the sync engine.\n\n- fast\n- incremental"
+
+    edited = chunk_markdown(NOTE.replace("long syncs", "very long syncs"), title="Plan")
+    assert [c.content_hash for c in edited[:2]] == [c.content_hash for c in chunks[:2]]
+    assert edited[2].content_hash != chunks[2].content_hash
+
+
+def test_chunk_markdown_splits_long_sections():
+    chunks = chunk_markdown("# Log\n" + "word " * 1000, max_chars=500)
+    assert len(chunks) > 1
+    assert all(len(c.text) <= 500 + len("Log\n\n") for c in chunks)
+
+
+def test_local_provider_is_deterministic_and_normalized():
+    provider = LocalHashEmbeddingProvider(dimensions=64)
+    a, b, c = asyncio.run(provider.embed(["sync engine tokens", "sync engine tokens", "grocery list"]))
+    assert np.array_equal(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert float(np.dot(a, b)) > float(np.dot(a, c))
+
+
+def test_edits_only_reembed_changed_chunks(db_factory):
+    provider = LocalHashEmbeddingProvider(dimensions=32)
+    indexer = EmbeddingIndexer(provider, batch_size=2)
+    worker = build_worker(indexer, connection_factory=db_factory)
+    conn = db_factory()
+
+    _save_note(conn, "n1", NOTE)
+    asyncio.run(worker.drain())
+    rows = conn.execute("SELECT * FROM embeddings ORDER BY chunk_index").fetchall()
+    assert len(rows) == 3
+    assert indexer.chunks_embedded == 3
+    assert indexer.provider_calls == 2  # 3 chunks in batches of 2
+    assert len(from_blob(rows[0]["embedding"])) == 32
+    original_ids = [row["id"] for row in rows]
+
+    _save_note(conn, "n1", NOTE.replace("long syncs", "very long syncs"))
+    asyncio.run(worker.drain())
+    rows = conn.execute("SELECT * FROM embeddings ORDER BY chunk_index").fetchall()
+    assert indexer.chunks_embedded == 4
+    assert indexer.chunks_reused == 2
+    assert [row["id"] for row in rows][:2] == original_ids[:2]
+    assert "very long syncs" in rows[2]["content"]
+
+    conn.execute("DELETE FROM notes WHERE id = 'n1'")
+    enqueue_embedding(conn, "note", "n1")
+    conn.commit()
+    asyncio.run(worker.drain())
+    assert conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 0
+    assert queue_stats(conn) == {}
+    conn.close()
+
+
+def test_reenqueue_while_running_keeps_job(db_factory):
+    conn = db_factory()
+    enqueue_job(conn, "demo", "k1")
+    conn.commit()
+
+    seen = []
+
+    async def handler(handler_conn, jobs):
+        seen.extend(job.key for job in jobs)
+        if len(seen) == 1:
+            # A new change arrives while the first run is in progress
+            other = db_factory()
+            enqueue_job(other, "demo", "k1")
+            other.commit()
+            other.close()
+
+    worker = JobWorker({"demo": handler}, connection_factory=db_factory)
+    asyncio.run(worker.drain())
+    assert seen == ["k1", "k1"]
+    assert queue_stats(conn) == {}
+    conn.close()
+
+
+def test_failed_jobs_back_off_then_park(db_factory):
+    conn = db_factory()
+    enqueue_job(conn, "demo", "k1")
+    conn.commit()
+
+    async def handler(handler_conn, jobs):
+        raise RuntimeError("provider down")
+
+    worker = JobWorker({"demo": handler}, max_attempts=2, base_delay=0, connection_factory=db_factory)
+    asyncio.run(worker.drain())
+    row = conn.execute("SELECT status, attempts, last_error FROM jobs").fetchone()
+    assert (row["status"], row["attempts"]) == ("failed", 2)
+    assert "provider down" in row["last_error"]
+    conn.close()
+
+
+def test_enqueue_jobs_applies_backpressure(db_factory):
+    conn = db_factory()
+    assert enqueue_jobs(conn, "demo", ["a", "b", "a"]) == 3
+    assert queue_stats(conn) == {"demo": {"pending": 2}}
+    with pytest.raises(QueueFull):
+        enqueue_jobs(conn, "demo", ["c"], max_pending=2)
+    # Queued keys are re-queued for free; new ones fill the free capacity only
+    assert enqueue_jobs(conn, "demo", ["a", "b", "c", "d", "e"], max_pending=4) == 4
+    assert queue_stats(conn) == {"demo": {"pending": 4}}
+    assert enqueue_jobs(conn, "demo", ["a", "b", "c", "d"], max_pending=4) == 4
+    conn.close()
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from atlas_api.ai.embeddings import LocalHashEmbeddingProvider
+from atlas_api.ai.hybrid import fts_query, hybrid_search, lexical_search, reciprocal_rank_fusion
+from atlas_api.ai.indexing import EmbeddingIndexer
+from atlas_api.ai.retrieval import VectorIndex
+
+NOTES = [
+    ("n1", "Garden", "# Tomatoes\nWater the tomato plants every morning.\n\n# Basil\nBasil needs sun."),
+    ("n2", "Irrigation", "Drip lines keep the vegetable beds watered while travelling."),
+    ("n3", "Taxes", "File the quarterly tax return before April."),
+    ("n4", "Tomato sauce", "Simmer crushed tomatoes with garlic for an hour."),
+]
+
+
+@pytest.fixture
+def db_factory(db_factory):
+    conn = db_factory()
+    conn.executemany(
+        "INSERT INTO notes (id, title, content, tags, created_at, updated_at)"
+        " VALUES (?, ?, ?, '[]', '2025-01-01', '2025-01-01')",
+        NOTES
+    )
+    conn.commit()
+    conn.close()
+    return db_factory
+
+
+@pytest.fixture
+def search_setup(db_factory):
+    provider = LocalHashEmbeddingProvider(dimensions=128)
+    conn = db_factory()
+    asyncio.run(EmbeddingIndexer(provider).index_sources(conn, [("note", n[0]) for n in NOTES]))
+    conn.commit()
+    index = VectorIndex(provider.dimensions, provider.model)
+    index.load(conn)
+    conn.close()
+    return db_factory, provider, index
+
+
+class SlowProvider(LocalHashEmbeddingProvider):
+    async def embed(self, texts):
+        await asyncio.sleep(0.5)
+        return await super().embed(texts)
+
+
+def test_fts_query_neutralizes_operators():
+    assert fts_query('tomato AND "basil" (NEAR') == '"tomato" OR "and" OR "basil" OR "near"*'
+    assert fts_query("  ?! ") is None
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [item for item, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+def test_lexical_search_ranks_title_matches_and_highlights(db_factory):
+    conn = db_factory()
+    hits = lexical_search(conn, "tomato", 10)
+    assert [h.note_id for h in hits] == ["n4", "n1"]
+    assert "<mark>tomato" in hits[1].snippet
+    conn.close()
+
+
+def test_hybrid_fuses_lexical_and_semantic_results(search_setup):
+    connect, provider, index = search_setup
+    result = asyncio.run(hybrid_search(
+        "water tomato plants", limit=3, index=index, provider=provider, connection_factory=connect
+    ))
+    assert result.mode == "hybrid" and result.fallback_reason is None
+    by_id = {r["note_id"]: r for r in result.results}
+    # Matched by both lists, so it ranks first
+    assert result.results[0]["note_id"] == "n1"
+    assert by_id["n1"]["lexical_rank"] and by_id["n1"]["vector_rank"]
+    assert len(result.results) == 3 and len(by_id) == 3
+
+    # Notes found only semantically get their chunk text as the snippet
+    semantic_only = [r for r in result.results if r["lexical_rank"] is None]
+    for r in semantic_only:
+        assert r["snippet"] and "<mark>" not in r["snippet"]
+
+
+def test_hybrid_falls_back_to_lexical(search_setup):
+    connect, provider, index = search_setup
+
+    index.ready = False
+    result = asyncio.run(hybrid_search("tomato", index=index, provider=provider, connection_factory=connect))
+    assert (result.mode, result.fallback_reason) == ("lexical", "index_warming")
+    assert [r["note_id"] for r in result.results] == ["n4", "n1"]
+
+    index.ready = True
+    result = asyncio.run(hybrid_search(
+        "tomato", budget_ms=50, index=index, provider=SlowProvider(128), connection_factory=connect
+    ))
+    assert (result.mode, result.fallback_reason) == ("lexical", "timeout")
+    assert [r["note_id"] for r in result.results] == ["n4", "n1"]
+    assert result.elapsed_ms < 400
@@ -0,0 +1,155 @@
+import pytest
+import sqlite3
+from datetime import datetime
+
+from atlas_api.services.ics import (
+    ICSReader,
+    export_query,
+    fold_line,
+    import_ics,
+    parse_duration,
+    row_to_vevent,
+    unfold_lines,
+)
+from atlas_api.services.event_service import query_occurrences
+
+SAMPLE_ICS = """BEGIN:VCALENDAR\r
+VERSION:2.0\r
+X-WR-CALNAME:Work\r
+BEGIN:VTIMEZONE\r
+TZID:Europe/Berlin\r
+END:VTIMEZONE\r
+BEGIN:VEVENT\r
+UID:weekly-sync\r
+DTSTART:20250106T090000\r
+DTEND:20250106T093000\r
+SUMMARY:Weekly sync\\, team\r
+DESCRIPTION:Line one\\nLine two\r
+RRULE:FREQ=WEEKLY;COUNT=4\r
+EXDATE:20250120T090000\r
+BEGIN:VALARM\r
+ACTION:DISPLAY\r
+DESCRIPTION:Reminder\r
+END:VALARM\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:weekly-sync\r
+RECURRENCE-ID:20250113T090000\r
+DTSTART:20250113T150000\r
+DURATION:PT1H\r
+SUMMARY:Weekly sync (moved)\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:offsite\r
+DTSTART;VALUE=DATE:20250110\r
+SUMMARY:Team offsite with a deliberately long title that needs to be folded acr\r
+ oss several lines\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+def test_unfold_lines():
+    assert list(unfold_lines(["SUMMARY:Hel", " lo", "UID:1"])) == ["SUMMARY:Hello", "UID:1"]
+
+
+def test_fold_line_round_trip():
+    line = "DESCRIPTION:" + "é" * 80
+    folded = fold_line(line)
+    assert all(len(part.encode("utf-8")) <= 75 for part in folded.rstrip("\r\n").split("\r\n"))
+    assert list(unfold_lines(folded.splitlines())) == [line]
+
+
+def test_parse_duration():
+    assert parse_duration("PT1H30M").total_seconds() == 5400
+    assert parse_duration("P1W").days == 7
+    with pytest.raises(ValueError):
+        parse_duration("1 hour")
+
+
+def test_reader_skips_nested_components():
+    reader = ICSReader(SAMPLE_ICS.splitlines())
+    events = list(reader)
+    assert len(events) == 3
+    assert events[0]["DESCRIPTION"].value == "Line one\\nLine two"
+    assert reader.calendar_props["X-WR-CALNAME"].value == "Work"
+
+
+def test_import_ics_upserts_and_links_overrides(in_memory_db: sqlite3.Connection):
+    conn = in_memory_db
+    stats = import_ics(conn, SAMPLE_ICS.splitlines(), batch_size=1)
+    assert stats["imported"] == 3
+    assert stats["overrides"] == 1
+    assert stats["calendar_id"] == "Work"
+
+    # Re-importing updates rows in place
+    import_ics(conn, SAMPLE_ICS.splitlines())
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 3
+
+    series = conn.execute("SELECT * FROM events WHERE external_id = 'weekly-sync'").fetchone()
+    assert series["title"] == "Weekly sync, team"
+    assert series["description"] == "Line one\nLine two"
+    override = conn.execute("SELECT * FROM events WHERE original_start_time IS NOT NULL").fetchone()
+    assert override["recurring_event_id"] == series["id"]
+
+    events = query_occurrences(conn, datetime(2025, 1, 1), datetime(2025, 2, 1))
+    assert [(e["title"], e["start_time"]) for e in events] == [
+        ("Weekly sync, team", "2025-01-06T09:00:00"),
+        ("Team offsite with a deliberately long title that needs to be folded across several lines",
+         "2025-01-10T00:00:00"),
+        ("Weekly sync (moved)", "2025-01-13T15:00:00"),
+        ("Weekly sync, team", "2025-01-27T09:00:00"),
+    ]
+
+
+def test_cancelled_occurrence_becomes_exdate(in_memory_db: sqlite3.Connection):
+    conn = in_memory_db
+    import_ics(conn, SAMPLE_ICS.splitlines())
+    cancellation = """BEGIN:VCALENDAR
+X-WR-CALNAME:Work
+BEGIN:VEVENT
+UID:weekly-sync
+RECURRENCE-ID:20250127T090000
+DTSTART:20250127T090000
+STATUS:CANCELLED
+END:VEVENT
+END:VCALENDAR
+"""
+    stats = import_ics(conn, cancellation.splitlines())
+    assert stats["cancelled"] == 1
+    events = query_occurrences(conn, datetime(2025, 1, 27), datetime(2025, 1, 28))
+    assert events == []
+
+
+def test_export_round_trip(in_memory_db: sqlite3.Connection):
+    conn = in_memory_db
+    import_ics(conn, SAMPLE_ICS.splitlines())
+    query, params = export_query(start_date="2025-01-01", end_date="2025-02-01")
+    exported = "".join(row_to_vevent(row) for row in conn.execute(query, params))
+
+    assert "RRULE:FREQ=WEEKLY;COUNT=4" in exported
+    assert "EXDATE:20250120T090000" in exported
+    assert "RECURRENCE-ID:20250113T090000" in exported
+    assert "SUMMARY:Weekly sync\\, team" in exported
+
+    events = list(ICSReader(("BEGIN:VCALENDAR\r\n" + exported + "END:VCALENDAR\r\n").splitlines()))
+    uids = sorted(e["UID"].value for e in events)
+    assert uids == ["offsite", "weekly-sync", "weekly-sync"]
+
+
+def test_all_day_events_export_as_dates(in_memory_db: sqlite3.Connection):
+    conn = in_memory_db
+    import_ics(conn, SAMPLE_ICS.splitlines())
+    query, params = export_query(calendar_id="Work")
+    exported = "".join(row_to_vevent(row) for row in conn.execute(query, params))
+
+    assert "DTSTART;VALUE=DATE:20250110\r\n" in exported
+    assert "DTEND;VALUE=DATE:20250111\r\n" in exported
+    assert "DTSTART:20250106T090000\r\n" in exported
+
+    # Re-importing the export keeps the event all-day, on the same key
+    count = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    import_ics(conn, ("BEGIN:VCALENDAR\r\n" + exported + "END:VCALENDAR\r\n").splitlines(), "Work")
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == count
+    offsite = conn.execute("SELECT start_time, end_time FROM events WHERE external_id = 'offsite'").fetchall()
+    assert [tuple(row) for row in offsite] == [("2025-01-10T00:00:00", "2025-01-11T00:00:00")]
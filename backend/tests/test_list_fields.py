@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.fixture
+def client(client):
+    client.post("/api/notes", json={"title": "Plan", "content": "- [ ] draft\n- [x] outline", "tags": ["work"]})
+    client.post("/api/notes", json={"title": "Log", "content": "see [[Plan]] and [[Ideas]]", "tags": []})
+    return client
+
+
+def _notes(client, **params):
+    response = client.get("/api/notes", params=params)
+    assert response.status_code == 200
+    return {n["title"]: n for n in response.json()["notes"]}
+
+
+def test_note_fields_select_columns_and_computed_extras(client):
+    default = _notes(client)
+    assert set(default["Plan"]) == {
+        "id", "title", "content", "tags", "created_at", "updated_at", "links", "backlinks", "task_count",
+    }
+    assert default["Plan"]["backlinks"] == []
+
+    summary = _notes(client, fields="summary")
+    assert set(summary["Plan"]) == {"id", "title", "tags", "updated_at"}
+    assert summary["Plan"]["tags"] == ["work"]
+
+    # Computed fields read content without returning it
+    extras = _notes(client, fields="title,links,task_count")
+    assert set(extras["Log"]) == {"id", "title", "links", "task_count"}
+    assert extras["Log"]["links"] == ["Plan", "Ideas"]
+    assert extras["Plan"]["task_count"] == {"total": 2, "open": 1, "done": 1}
+
+    # Backlinks are resolved only on request, in one query for the page
+    linked = _notes(client, fields="title,backlinks")
+    assert [b["title"] for b in linked["Plan"]["backlinks"]] == ["Log"]
+    assert linked["Log"]["backlinks"] == []
+
+    searched = client.get("/api/notes", params={"q": "Plan", "fields": "id", "sort": "title_asc"}).json()["notes"]
+    assert [set(n) for n in searched] == [{"id"}, {"id"}]
+    assert client.get("/api/notes", params={"fields": "title,secret"}).status_code == 422
+
+
+def test_task_fields(client):
+    client.post("/api/tasks", json={"title": "Ship", "description": "x" * 500, "priority": "high", "tags": ["a"]})
+    task = client.get("/api/tasks", params={"fields": "summary"}).json()["tasks"][0]
+    assert set(task) == {"id", "title", "status", "priority", "due_date", "tags", "project_id"}
+    assert task["tags"] == ["a"]
+    assert client.get("/api/tasks", params={"fields": "status"}).json()["tasks"] == [{"id": task["id"], "status": "todo"}]
+    assert "description" in client.get("/api/tasks").json()["tasks"][0]
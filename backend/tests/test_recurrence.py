@@ -0,0 +1,196 @@
+import pytest
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+from atlas_api.services.recurrence import RecurrenceRule, iter_occurrences, last_occurrence
+from atlas_api.services.event_service import (
+    OccurrenceCache,
+    compute_series_end,
+    expand_series,
+    get_occurrence,
+    occurrence_id,
+    query_occurrences,
+)
+from atlas_api.utils.dates import parse_datetime
+
+
+def test_parse_rule():
+    rule = RecurrenceRule.parse("RRULE:FREQ=MONTHLY;INTERVAL=2;BYDAY=-1FR;COUNT=5")
+    assert rule.freq == "MONTHLY"
+    assert rule.interval == 2
+    assert rule.by_day == ((-1, 4),)
+    assert rule.count == 5
+
+
+def test_parse_rule_rejects_unsupported_parts():
+    with pytest.raises(ValueError):
+        RecurrenceRule.parse("FREQ=HOURLY")
+    with pytest.raises(ValueError):
+        RecurrenceRule.parse("FREQ=DAILY;BYHOUR=9")
+
+
+def test_weekly_by_day():
+    rule = RecurrenceRule.parse("FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4")
+    start = datetime(2025, 1, 6, 9, 0)  # Monday
+    assert list(iter_occurrences(rule, start)) == [
+        datetime(2025, 1, 6, 9, 0),
+        datetime(2025, 1, 8, 9, 0),
+        datetime(2025, 1, 13, 9, 0),
+        datetime(2025, 1, 15, 9, 0),
+    ]
+
+
+def test_monthly_last_weekday_with_setpos():
+    rule = RecurrenceRule.parse("FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1;COUNT=3")
+    start = datetime(2025, 1, 31, 17, 0)
+    assert list(iter_occurrences(rule, start)) == [
+        datetime(2025, 1, 31, 17, 0),
+        datetime(2025, 2, 28, 17, 0),
+        datetime(2025, 3, 31, 17, 0),
+    ]
+
+
+def test_monthly_skips_short_months():
+    rule = RecurrenceRule.parse("FREQ=MONTHLY;COUNT=3")
+    start = datetime(2025, 1, 31, 8, 0)
+    assert list(iter_occurrences(rule, start)) == [
+        datetime(2025, 1, 31, 8, 0),
+        datetime(2025, 3, 31, 8, 0),
+        datetime(2025, 5, 31, 8, 0),
+    ]
+
+
+def test_until_is_inclusive():
+    rule = RecurrenceRule.parse("FREQ=DAILY;UNTIL=20250103")
+    start = datetime(2025, 1, 1, 9, 0)
+    assert list(iter_occurrences(rule, start)) == [
+        datetime(2025, 1, 1, 9, 0),
+        datetime(2025, 1, 2, 9, 0),
+        datetime(2025, 1, 3, 9, 0),
+    ]
+    assert last_occurrence(rule, start) == datetime(2025, 1, 3, 23, 59, 59)
+
+
+def test_window_far_from_dtstart_skips_ahead():
+    rule = RecurrenceRule.parse("FREQ=WEEKLY;INTERVAL=2;BYDAY=TU")
+    start = datetime(2000, 1, 4, 10, 0)  # Tuesday
+    after = datetime(2040, 6, 1)
+    occurrences = list(iter_occurrences(rule, start, after=after, before=after + timedelta(days=28)))
+    assert len(occurrences) == 2
+    assert all(o.weekday() == 1 for o in occurrences)
+    assert (occurrences[1] - occurrences[0]).days == 14
+    assert (occurrences[0] - start).days % 14 == 0
+
+
+def test_unbounded_rule_requires_window():
+    rule = RecurrenceRule.parse("FREQ=DAILY")
+    with pytest.raises(ValueError):
+        list(iter_occurrences(rule, datetime(2025, 1, 1)))
+
+
+def test_compute_series_end():
+    end = compute_series_end("FREQ=DAILY;COUNT=3", datetime(2025, 1, 1, 9), datetime(2025, 1, 1, 10))
+    assert end == datetime(2025, 1, 3, 10).isoformat()
+    assert compute_series_end("FREQ=DAILY", datetime(2025, 1, 1, 9), datetime(2025, 1, 1, 10)) is None
+
+
+def test_expand_series_applies_exdates_and_cache():
+    cache = OccurrenceCache()
+    series = {
+        "id": "standup",
+        "title": "Standup",
+        "start_time": datetime(2025, 1, 6, 9, 0).isoformat(),
+        "end_time": datetime(2025, 1, 6, 9, 15).isoformat(),
+        "rrule": "FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR",
+        "exdates": json.dumps([datetime(2025, 1, 8, 9, 0).isoformat()]),
+    }
+    window = (datetime(2025, 1, 6), datetime(2025, 1, 11))
+    occurrences = expand_series(series, *window, cache=cache)
+    assert [o["start_time"][:10] for o in occurrences] == [
+        "2025-01-06", "2025-01-07", "2025-01-09", "2025-01-10"
+    ]
+    assert occurrences[0]["id"] == occurrence_id("standup", datetime(2025, 1, 6, 9, 0))
+    assert occurrences[0]["recurring_event_id"] == "standup"
+
+    misses = cache.misses
+    expand_series(series, *window, cache=cache)
+    assert cache.misses == misses
+    assert cache.hits > 0
+
+
+def _insert_event(conn: sqlite3.Connection, event_id: str, start: datetime, end: datetime, **extra):
+    row = {
+        "id": event_id,
+        "title": extra.pop("title", event_id),
+        "start_time": start.isoformat(),
+        "end_time": end.isoformat(),
+        "source": "local",
+        "created_at": start.isoformat(),
+        "updated_at": start.isoformat(),
+        **extra,
+    }
+    columns = ", ".join(row)
+    placeholders = ", ".join("?" for _ in row)
+    conn.execute(f"INSERT INTO events ({columns}) VALUES ({placeholders})", list(row.values()))
+    conn.commit()
+
+
+def test_query_occurrences_merges_series_and_overrides(in_memory_db: sqlite3.Connection):
+    conn = in_memory_db
+    start = datetime(2025, 3, 3, 9, 0)  # Monday
+    _insert_event(conn, "weekly", start, start + timedelta(hours=1), rrule="FREQ=WEEKLY")
+    # Move the second occurrence to the afternoon
+    _insert_event(
+        conn, "moved", datetime(2025, 3, 10, 14, 0), datetime(2025, 3, 10, 15, 0),
+        recurring_event_id="weekly", original_start_time=datetime(2025, 3, 10, 9, 0).isoformat()
+    )
+    _insert_event(conn, "lunch", datetime(2025, 3, 11, 12, 0), datetime(2025, 3, 11, 13, 0))
+
+    events = query_occurrences(conn, datetime(2025, 3, 3), datetime(2025, 3, 17))
+    assert [(e["id"], e["start_time"]) for e in events] == [
+        (occurrence_id("weekly", start), "2025-03-03T09:00:00"),
+        ("moved", "2025-03-10T14:00:00"),
+        ("lunch", "2025-03-11T12:00:00"),
+    ]
+
+    assert get_occurrence(conn, occurrence_id("weekly", datetime(2025, 3, 17, 9, 0)))["start_time"] == "2025-03-17T09:00:00"
+    assert get_occurrence(conn, occurrence_id("weekly", datetime(2025, 3, 10, 9, 0))) is None
+
+
+def test_query_occurrences_skips_finished_series(in_memory_db: sqlite3.Connection):
+    conn = in_memory_db
+    start = datetime(2025, 1, 1, 9, 0)
+    _insert_event(
+        conn, "short", start, start + timedelta(hours=1),
+        rrule="FREQ=DAILY;COUNT=2",
+        series_end=compute_series_end("FREQ=DAILY;COUNT=2", start, start + timedelta(hours=1))
+    )
+    assert query_occurrences(conn, datetime(2025, 2, 1), datetime(2025, 3, 1)) == []
+    assert len(query_occurrences(conn, datetime(2025, 1, 1), datetime(2025, 1, 3))) == 2
+
+
+def test_event_api_stores_aware_times_as_local(client):
+    start = parse_datetime("2025-03-03T09:00:00+02:00")
+    event = client.post("/api/events", json={
+        "title": "Call", "start_time": "2025-03-03T09:00:00+02:00", "end_time": "2025-03-03T10:00:00+02:00",
+    }).json()
+    assert event["start_time"] == start.isoformat()
+
+    window = {"start_date": (start + timedelta(minutes=30)).isoformat(),
+              "end_date": (start + timedelta(minutes=45)).isoformat()}
+    assert [e["id"] for e in client.get("/api/events", params=window).json()["events"]] == [event["id"]]
+
+    moved = client.patch(f"/api/events/{event['id']}", json={
+        "start_time": "2025-03-03T12:00:00Z", "end_time": "2025-03-03T13:00:00Z",
+    }).json()
+    assert moved["start_time"] == parse_datetime("2025-03-03T12:00:00Z").isoformat()
+
+
+def test_event_api_keys_external_events_by_calendar(client):
+    body = {"title": "Synced", "start_time": "2025-03-03T09:00:00", "end_time": "2025-03-03T10:00:00",
+            "source": "google", "external_id": "abc"}
+    created = client.post("/api/events", json=body)
+    assert created.json()["calendar_id"] == "google"
+    assert client.post("/api/events", json=body).status_code == 409
+    assert client.post("/api/events", json={**body, "calendar_id": "work"}).status_code == 200
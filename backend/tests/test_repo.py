@@ -0,0 +1,65 @@
+import sqlite3
+from datetime import datetime
+
+from atlas_api.db import repo
+from atlas_api.services.event_service import occurrence_id
+
+
+def _seed(conn: sqlite3.Connection):
+    now = datetime(2025, 1, 6, 9).isoformat()
+    conn.executemany(
+        "INSERT INTO notes (id, title, content, tags, created_at, updated_at) VALUES (?, ?, ?, '[]', ?, ?)",
+        [("n1", "Agenda", "", now, now), ("n2", "Minutes", "", now, now)]
+    )
+    conn.executemany(
+        "INSERT INTO tasks (id, title, status, priority, tags, created_at) VALUES (?, ?, 'todo', 'high', '[]', ?)",
+        [("t1", "Prepare slides", now)]
+    )
+    conn.executemany(
+        "INSERT INTO events (id, title, start_time, end_time, source, created_at, updated_at, rrule)"
+        " VALUES (?, ?, ?, ?, 'local', ?, ?, ?)",
+        [
+            ("single", "Review", now, now, now, now, None),
+            ("series", "Standup", now, now, now, now, "FREQ=DAILY"),
+        ]
+    )
+    conn.executemany("INSERT INTO event_notes (event_id, note_id) VALUES (?, ?)",
+                     [("single", "n2"), ("single", "n1"), ("series", "n1"), ("gone", "n1")])
+    conn.execute("INSERT INTO event_tasks (event_id, task_id) VALUES ('series', 't1')")
+    conn.execute("INSERT INTO projects (id, name, root_path, type, created_at, updated_at)"
+                 " VALUES ('p1', 'Atlas', '/tmp', 'code', ?, ?)", (now, now))
+    conn.execute("INSERT INTO project_notes (project_id, note_id) VALUES ('p1', 'n2')")
+    conn.commit()
+
+
+def test_attach_event_links_uses_one_query_per_relation(in_memory_db: sqlite3.Connection, monkeypatch):
+    conn = in_memory_db
+    _seed(conn)
+    monkeypatch.setattr(repo, "CHUNK_SIZE", 2)
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    events = repo.attach_event_links(conn, [
+        {"id": "single"},
+        {"id": occurrence_id("series", datetime(2025, 1, 7, 9)), "recurring_event_id": "series"},
+        {"id": "unlinked"},
+    ])
+    conn.set_trace_callback(None)
+
+    # 4 distinct keys in chunks of 2, for two relations
+    assert len(statements) == 4
+    assert [n["title"] for n in events[0]["linked_notes"]] == ["Agenda", "Minutes"]
+    assert events[0]["linked_tasks"] == []
+    assert [n["id"] for n in events[1]["linked_notes"]] == ["n1"]
+    assert events[1]["linked_tasks"][0] == {
+        "id": "t1", "title": "Prepare slides", "status": "todo", "priority": "high", "due_date": None
+    }
+    assert events[2]["linked_notes"] == [] and events[2]["linked_tasks"] == []
+
+
+def test_attach_project_notes(in_memory_db: sqlite3.Connection):
+    conn = in_memory_db
+    _seed(conn)
+    projects = repo.attach_project_notes(conn, [{"id": "p1"}, {"id": "p2"}])
+    assert [n["title"] for n in projects[0]["linked_notes"]] == ["Minutes"]
+    assert projects[1]["linked_notes"] == []
@@ -0,0 +1,196 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from atlas_api.ai import response_cache
+from atlas_api.ai.orchestrator import AIOrchestrator, extract_summary
+from atlas_api.ai.response_cache import ResponseCache
+from atlas_api.services.dashboard import today_overview
+
+NOW = "2025-01-06T09:00:00"
+
+
+@pytest.fixture
+def db_factory(db_factory):
+    conn = db_factory()
+    conn.executemany(
+        "INSERT INTO notes (id, title, content, tags, created_at, updated_at) VALUES (?, ?, ?, '[]', ?, ?)",
+        [("n1", "Plan", "Ship it.", NOW, NOW), ("n2", "Ideas", "Later.", NOW, NOW)]
+    )
+    conn.commit()
+    conn.close()
+    return db_factory
+
+
+def _entries(connect):
+    conn = connect()
+    keys = {row[0] for row in conn.execute("SELECT kind FROM ai_response_cache")}
+    conn.close()
+    return keys
+
+
+def test_identical_requests_are_coalesced(db_factory):
+    cache = ResponseCache(connection_factory=db_factory)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"summary": ["done"]}
+
+    async def run():
+        requests = [
+            cache.get_or_compute("note_summary", "m", 1, {"content": "x"}, ["note:n1"], compute)
+            for _ in range(5)
+        ]
+        return await asyncio.gather(*requests)
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ["coalesced"] * 4 + ["miss"]
+    assert all(value == {"summary": ["done"]} for value, _ in results)
+
+    # Stored for later requests; other models or template versions miss
+    value, status = asyncio.run(cache.get_or_compute("note_summary", "m", 1, {"content": "x"}, [], compute))
+    assert (value, status) == ({"summary": ["done"]}, "hit")
+    asyncio.run(cache.get_or_compute("note_summary", "m", 2, {"content": "x"}, [], compute))
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["coalesced"]) == (1, 2, 4)
+    assert stats["entries"]["note_summary"]["count"] == 2
+
+
+def test_failures_propagate_and_are_not_cached(db_factory):
+    cache = ResponseCache(connection_factory=db_factory)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        requests = [cache.get_or_compute("note_summary", "m", 1, "x", [], fail) for _ in range(3)]
+        return await asyncio.gather(*requests, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert _entries(db_factory) == set()
+    assert cache.stats()["inflight"] == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers(db_factory):
+    cache = ResponseCache(connection_factory=db_factory)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"summary": ["done"]}
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_compute("note_summary", "m", 1, "x", [], compute))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(cache.get_or_compute("note_summary", "m", 1, "x", [], compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == ({"summary": ["done"]}, "coalesced")
+    assert len(calls) == 1
+    assert _entries(db_factory) == {"note_summary"}
+    assert cache.stats()["inflight"] == 0
+
+
+def test_hits_are_written_in_batches(db_factory, monkeypatch):
+    monkeypatch.setattr(response_cache, "HIT_FLUSH_KEYS", 2)
+    cache = ResponseCache(connection_factory=db_factory)
+
+    async def compute():
+        return "fresh"
+
+    def lookup(inputs):
+        return asyncio.run(cache.get_or_compute("note_summary", "m", 1, inputs, [], compute))
+
+    def stored_hits():
+        conn = db_factory()
+        hits = sorted(row[0] for row in conn.execute("SELECT hits FROM ai_response_cache"))
+        conn.close()
+        return hits
+
+    lookup("a"), lookup("b")
+    lookup("a"), lookup("a")
+    assert stored_hits() == [0, 0]
+    lookup("b")     # Second distinct entry: one batched write
+    assert stored_hits() == [1, 2]
+
+    lookup("b")
+    assert cache.stats()["entries"]["note_summary"]["lifetime_hits"] == 4
+
+
+def test_ttl_expiry_and_purge(db_factory):
+    cache = ResponseCache(ttl=timedelta(seconds=-1), connection_factory=db_factory)
+
+    async def compute():
+        return "fresh"
+
+    asyncio.run(cache.get_or_compute("daily_briefing", "m", 1, "x", ["tasks"], compute))
+    _, status = asyncio.run(cache.get_or_compute("daily_briefing", "m", 1, "x", ["tasks"], compute))
+    assert status == "miss"
+    assert cache.stats()["entries"]["daily_briefing"]["expired"] == 1
+    assert cache.purge(expired_only=True) == 1
+    conn = db_factory()
+    assert conn.execute("SELECT COUNT(*) FROM ai_response_deps").fetchone()[0] == 0
+    conn.close()
+
+
+def test_source_changes_invalidate_dependent_entries(db_factory):
+    cache = ResponseCache(connection_factory=db_factory)
+
+    async def compute():
+        return "ok"
+
+    asyncio.run(cache.get_or_compute("note_summary", "m", 1, "n1", ["note:n1"], compute))
+    asyncio.run(cache.get_or_compute("daily_briefing", "m", 1, "d", ["tasks", "events"], compute))
+
+    conn = db_factory()
+    conn.execute("UPDATE notes SET content = 'Edited' WHERE id = 'n2'")
+    conn.commit()
+    assert _entries(db_factory) == {"note_summary", "daily_briefing"}
+
+    conn.execute("UPDATE notes SET content = 'Edited' WHERE id = 'n1'")
+    conn.commit()
+    assert _entries(db_factory) == {"daily_briefing"}
+
+    # Rolled-back changes leave the cache alone
+    conn.execute(
+        "INSERT INTO tasks (id, title, status, priority, created_at) VALUES ('t1', 'Call', 'todo', 'high', ?)",
+        (NOW,)
+    )
+    conn.rollback()
+    assert _entries(db_factory) == {"daily_briefing"}
+
+    conn.execute(
+        "INSERT INTO events (id, title, start_time, end_time, source, created_at, updated_at)"
+        " VALUES ('e1', 'Standup', ?, ?, 'local', ?, ?)", (NOW, NOW, NOW, NOW)
+    )
+    conn.commit()
+    assert _entries(db_factory) == set()
+    conn.close()
+
+
+def test_local_orchestrator_outputs(db_factory):
+    result = extract_summary("Plan", "# Plan\nShip the beta. Then rest.\n\n- [ ] Email Sam by 2025-02-01\nTODO: book room")
+    assert result["summary"] == ["Ship the beta."]
+    assert result["action_items"] == [
+        {"title": "Email Sam by 2025-02-01", "due_date": "2025-02-01"},
+        {"title": "book room", "due_date": None},
+    ]
+
+    conn = db_factory()
+    overview = today_overview(conn, date(2025, 1, 6))
+    conn.close()
+    briefing = asyncio.run(AIOrchestrator().generate_daily_briefing(overview))
+    assert "## Top Priorities" in briefing["markdown"]
+    assert [n["note_id"] for n in briefing["references"]["notes"]] == ["n1", "n2"]
@@ -0,0 +1,67 @@
+import fastapi.routing
+import pytest
+
+from atlas_api.config import settings
+from atlas_api.responses import accepts_gzip
+
+
+@pytest.fixture
+def client(client):
+    for i in range(40):
+        client.post("/api/notes", json={"title": f"Note {i}", "content": "plan draft review " * 20, "tags": ["wörk"]})
+    return client
+
+
+def test_results_are_serialized_once(client, monkeypatch):
+    def encoded_only(obj, *args, **kwargs):
+        assert isinstance(obj, str), "jsonable_encoder walked the result"
+        return obj
+
+    monkeypatch.setattr(fastapi.routing, "jsonable_encoder", encoded_only)
+    response = client.get("/api/notes", params={"limit": 5})
+    assert response.status_code == 200
+    assert response.json()["notes"][0]["tags"] == ["wörk"]
+    assert response.headers["content-type"] == "application/json"
+    # Dependency headers still reach the response
+    assert response.headers["etag"]
+    assert client.get("/api/notes", params={"limit": 5},
+                      headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get("/api/notes/missing").status_code == 404
+
+
+def test_large_responses_are_gzipped_when_accepted(client, monkeypatch):
+    assert "content-encoding" not in client.get("/api/notes", headers={"Accept-Encoding": "gzip"}).headers
+
+    monkeypatch.setattr(settings, "compression_enabled", True)
+    plain = client.get("/api/notes", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    packed = client.get("/api/notes", headers={"Accept-Encoding": "br, gzip;q=0.5"})
+    assert packed.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in packed.headers["vary"].lower()
+    assert int(packed.headers["content-length"]) < len(plain.content) / 4
+    assert packed.json() == plain.json()
+
+    # Each representation has its own tag; either revalidates
+    assert packed.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    revalidated = client.get("/api/notes", headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["etag"]})
+    assert (revalidated.status_code, revalidated.headers["etag"]) == (304, packed.headers["etag"])
+    revalidated = client.get("/api/notes", headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]})
+    assert (revalidated.status_code, revalidated.headers["etag"]) == (304, plain.headers["etag"])
+    assert client.get("/api/notes", headers={"Accept-Encoding": "identity",
+                                             "If-None-Match": packed.headers["etag"]}).status_code == 304
+
+    refused = client.get("/api/notes", headers={"Accept-Encoding": "gzip;q=0, *"})
+    assert "content-encoding" not in refused.headers
+    assert "content-encoding" not in client.get("/health").headers
+
+
+def test_accept_encoding_negotiation():
+    assert accepts_gzip("gzip, deflate")
+    assert accepts_gzip("*")
+    assert accepts_gzip("GZIP;q=0.1")
+    assert not accepts_gzip("")
+    assert not accepts_gzip("br, deflate")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("*;q=0")
+    assert not accepts_gzip("gzip;q=oops")
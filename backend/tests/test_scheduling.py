@@ -0,0 +1,73 @@
+from datetime import datetime, time, timedelta
+
+from atlas_api.services.scheduling import (
+    event_intervals,
+    free_slots,
+    merge_busy,
+    suggest_slots,
+    working_windows,
+)
+
+
+def _at(hour, minute=0, day=6):
+    return datetime(2025, 1, day, hour, minute)
+
+
+def test_merge_busy_joins_overlapping_and_adjacent():
+    blocks = merge_busy([
+        (_at(11), _at(12), "c"),
+        (_at(9), _at(10), "a"),
+        (_at(9, 30), _at(10, 30), "b"),
+        (_at(12), _at(12, 30), "d"),   # touches c
+        (_at(14), _at(14), "empty"),
+    ])
+    assert [(b.start, b.end) for b in blocks] == [
+        (_at(9), _at(10, 30)),
+        (_at(11), _at(12, 30)),
+    ]
+    assert blocks[0].event_ids == ["a", "b"]
+    assert blocks[1].event_ids == ["c", "d"]
+
+
+def test_free_slots_within_working_hours():
+    windows = working_windows(_at(0), _at(0, day=8), time(9), time(17), weekdays_only=False)
+    assert len(windows) == 2
+    busy = merge_busy([(_at(8), _at(9, 30), "early"), (_at(16, 50), _at(18), "late")])
+    free = free_slots(busy, windows, min_duration=timedelta(minutes=15))
+    assert free == [
+        (_at(9, 30), _at(16, 50)),
+        (_at(9, day=7), _at(17, day=7)),
+    ]
+
+
+def test_working_windows_skip_weekends():
+    windows = working_windows(_at(0, day=10), _at(0, day=14), time(9), time(17), weekdays_only=True)
+    assert [w[0].day for w in windows] == [10, 13]
+
+
+def test_suggest_slots_orders_by_due_date_then_priority():
+    free = [(_at(9), _at(10)), (_at(13), _at(13, 20)), (_at(15), _at(17))]
+    tasks = [
+        {"id": "someday", "title": "Someday", "priority": "high", "due_date": None},
+        {"id": "low", "title": "Low", "priority": "low", "due_date": "2025-01-06T12:00:00"},
+        {"id": "high", "title": "High", "priority": "high", "due_date": "2025-01-06T12:00:00"},
+        {"id": "later", "title": "Later", "priority": "medium", "due_date": "2025-01-06T09:00:00"},
+        {"id": "overflow", "title": "Overflow", "priority": "low", "due_date": None},
+    ]
+    suggestions, unscheduled = suggest_slots(tasks, free, timedelta(minutes=45))
+    assert [(s["task_id"], s["start"]) for s in suggestions] == [
+        ("later", _at(9).isoformat()),
+        ("high", _at(15).isoformat()),
+        ("low", _at(15, 45).isoformat()),
+    ]
+    assert suggestions[0]["late"] is True
+    assert unscheduled == ["someday", "overflow"]
+
+
+def test_event_intervals_skips_all_day_events():
+    events = [
+        {"id": "holiday", "start_time": "2025-01-06T00:00:00", "end_time": "2025-01-07T00:00:00"},
+        {"id": "meeting", "start_time": "2025-01-06T10:00:00", "end_time": "2025-01-06T11:00:00"},
+    ]
+    assert [i[2] for i in event_intervals(events)] == ["meeting"]
+    assert len(event_intervals(events, include_all_day=True)) == 2
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import sqlite3
+import time
+
+from atlas_api.config import settings
+from atlas_api.routers.sync import sync as sync_endpoint
+from atlas_api.services.sync import compact_tombstones
+
+
+def _sync_all(client, since, **params):
+    """Follows pages until has_more is false"""
+    changes, reset = [], False
+    while True:
+        page = client.get("/api/sync", params={"since": since, **params}).json()
+        changes += page["changes"]
+        reset = reset or page["reset"]
+        since = page["version"]
+        if not page["has_more"]:
+            return changes, since, reset
+
+
+def test_sync_returns_changed_and_deleted_rows_across_entities(client):
+    note_id = client.post("/api/notes", json={"title": "Plan", "content": "", "tags": ["work"]}).json()["id"]
+    task_id = client.post("/api/tasks", json={"title": "Ship", "priority": "high"}).json()["id"]
+    event_id = client.post("/api/events", json={
+        "title": "Standup", "start_time": "2025-01-06T09:00:00", "end_time": "2025-01-06T09:15:00",
+    }).json()["id"]
+    client.post(f"/api/events/{event_id}/notes/{note_id}")
+
+    changes, version, reset = _sync_all(client, 0, limit=2)
+    assert reset is False
+    rows = {(c["entity"], c["id"]): c for c in changes}
+    assert set(rows) == {("settings", "1"), ("note", note_id), ("task", task_id), ("event", event_id)}
+    assert rows[("note", note_id)]["data"]["tags"] == ["work"]
+    assert [n["id"] for n in rows[("event", event_id)]["data"]["linked_notes"]] == [note_id]
+    assert [c["version"] for c in changes] == sorted(c["version"] for c in changes)
+
+    # Nothing new
+    assert _sync_all(client, version)[:2] == ([], version)
+
+    client.patch(f"/api/tasks/{task_id}", json={"status": "done"})
+    client.delete(f"/api/notes/{note_id}")
+    changes, _, _ = _sync_all(client, version)
+    delta = {(c["entity"], c["id"]): c for c in changes}
+    assert delta[("task", task_id)]["data"]["status"] == "done"
+    assert delta[("note", note_id)]["deleted"] is True and delta[("note", note_id)]["data"] is None
+
+    only_tasks, _, _ = _sync_all(client, version, entities="task")
+    assert [c["id"] for c in only_tasks] == [task_id]
+    assert client.get("/api/sync", params={"entities": "bogus"}).status_code == 422
+
+
+def test_compacted_tombstones_force_a_full_snapshot(client):
+    keep = client.post("/api/tasks", json={"title": "Keep", "priority": "low"}).json()["id"]
+    gone = client.post("/api/tasks", json={"title": "Gone", "priority": "low"}).json()["id"]
+    _, version, _ = _sync_all(client, 0)
+    client.delete(f"/api/tasks/{gone}")
+
+    conn = sqlite3.connect(settings.database_path)
+    assert compact_tombstones(conn, retention_days=1) == 0
+    assert compact_tombstones(conn, retention_days=0) == 1
+    conn.close()
+
+    # The delete can no longer be reported, so the client starts over
+    changes, _, reset = _sync_all(client, version)
+    assert reset is True
+    assert {c["id"] for c in changes if c["entity"] == "task"} == {keep}
+    assert not any(c["deleted"] for c in changes)
+
+    # A client from another database is reset as well
+    assert client.get("/api/sync", params={"since": 10 ** 9}).json()["reset"] is True
+
+
+def test_streamed_page_does_not_block_writers(client):
+    client.post("/api/notes", json={"title": "Before", "content": "", "tags": []})
+
+    async def read_while_writing():
+        response = await sync_endpoint(since=0, limit=1000)
+        chunks = response.body_iterator
+        body = await chunks.__anext__() + await chunks.__anext__()
+        # The page's read transaction is open; a write must not wait for it
+        started = time.monotonic()
+        assert client.post("/api/notes", json={"title": "During", "content": "", "tags": []}).status_code == 200
+        assert time.monotonic() - started < 1
+        async for chunk in chunks:
+            body += chunk
+        return json.loads(body)
+
+    page = asyncio.run(read_while_writing())
+    titles = {c["data"]["title"] for c in page["changes"] if c["entity"] == "note"}
+    assert titles == {"Before"}
@@ -0,0 +1,101 @@
+import asyncio
+import sqlite3
+
+import numpy as np
+
+from atlas_api.ai.embeddings import LocalHashEmbeddingProvider, to_blob
+from atlas_api.ai.indexing import EmbeddingIndexer, IndexChanges, IndexedRow
+from atlas_api.ai.retrieval import VectorIndex, apply_index_changes, semantic_search
+
+
+def _random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def test_search_matches_brute_force():
+    vectors = _random_vectors(500)
+    index = VectorIndex(initial_capacity=8)
+    ids = [f"e{i}" for i in range(500)]
+    types = ["note" if i % 3 else "task" for i in range(500)]
+    index.add(ids, types, ids, vectors)
+
+    query = _random_vectors(1, seed=1)[0]
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    expected = [f"e{i}" for i in np.argsort(-scores)[:10]]
+
+    hits = index.search(query, 10)
+    assert [h[0] for h in hits] == expected
+    assert np.isclose(hits[0][3], scores.max(), atol=1e-5)
+
+    task_hits = index.search(query, 5, source_types=["task"])
+    task_expected = [f"e{i}" for i in np.argsort(-scores) if i % 3 == 0][:5]
+    assert [h[0] for h in task_hits] == task_expected
+    assert index.search(query, 5, source_types=["event"]) == []
+
+
+def test_incremental_updates_reuse_slots():
+    index = VectorIndex()
+    vectors = _random_vectors(4)
+    index.add(["a", "b", "c", "d"], ["note"] * 4, ["n1", "n1", "n2", "n3"], vectors)
+    assert index.remove(["b", "missing"]) == 1
+    assert len(index) == 3
+
+    index.add(["e"], ["task"], ["t1"], vectors[1])
+    assert index.stats()["capacity"] == 1024
+    assert index.stats()["by_source_type"] == {"note": 3, "task": 1}
+    assert index.search(vectors[1], 1)[0][:3] == ("e", "task", "t1")
+
+    # Replacing a row moves it between type masks
+    index.add(["e"], ["note"], ["n9"], vectors[1])
+    assert index.search(vectors[1], 1, source_types=["task"]) == []
+    assert len(index) == 4
+
+
+def test_load_from_sqlite_and_apply_pipeline_changes(in_memory_db: sqlite3.Connection):
+    conn = in_memory_db
+    vectors = _random_vectors(30, dim=8)
+    conn.executemany(
+        "INSERT INTO embeddings (id, source_type, source_id, chunk_index, content, embedding, model, created_at)"
+        " VALUES (?, 'note', ?, 0, ?, ?, 'm', '2025-01-01')",
+        [(f"e{i}", f"n{i}", f"chunk {i}", to_blob(v)) for i, v in enumerate(vectors)]
+    )
+    conn.execute(
+        "INSERT INTO embeddings (id, source_type, source_id, chunk_index, content, embedding, model, created_at)"
+        " VALUES ('other', 'note', 'x', 0, '', ?, 'other-model', '2025-01-01')",
+        (to_blob(np.ones(4)),)
+    )
+    index = VectorIndex(model="m")
+    assert index.load(conn, batch_size=7) == 30
+    assert index.ready
+    assert index.search(vectors[12], 1)[0][0] == "e12"
+
+    apply_index_changes(index, IndexChanges(
+        upserted=[IndexedRow("new", "task", "t1", list(vectors[12] * 2))],
+        deleted=["e12"],
+    ))
+    assert index.search(vectors[12], 1)[0][0] == "new"
+
+
+def test_semantic_search_returns_best_chunk_per_source(in_memory_db: sqlite3.Connection, monkeypatch):
+    conn = in_memory_db
+    provider = LocalHashEmbeddingProvider(dimensions=128)
+    indexer = EmbeddingIndexer(provider)
+    monkeypatch.setattr("atlas_api.ai.indexing._indexer", indexer)
+
+    now = "2025-01-01T00:00:00"
+    conn.executemany(
+        "INSERT INTO notes (id, title, content, tags, created_at, updated_at) VALUES (?, ?, ?, '[]', ?, ?)",
+        [
+            ("n1", "Garden", "# Tomatoes\nWater the tomato plants daily.\n\n# Basil\nBasil likes sun.", now, now),
+            ("n2", "Taxes", "File the quarterly tax return before April.", now, now),
+        ]
+    )
+    asyncio.run(indexer.index_sources(conn, [("note", "n1"), ("note", "n2")]))
+    index = VectorIndex(provider.dimensions, provider.model)
+    index.load(conn)
+
+    results = asyncio.run(semantic_search(conn, "water tomato plants", ["note"], limit=5, index=index))
+    assert [r["source_id"] for r in results] == ["n1", "n2"]
+    assert "tomato" in results[0]["content"]
+    assert results[0]["score"] > results[1]["score"]
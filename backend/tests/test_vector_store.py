@@ -0,0 +1,143 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from atlas_api.ai.embeddings import to_blob
+from atlas_api.ai.retrieval import apply_index_changes
+from atlas_api.ai.indexing import IndexChanges, IndexedRow
+from atlas_api.ai.vector_store import MmapVectorStore, quantize, sidecar_path
+
+
+def _random_vectors(n, dim=32, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def _insert(conn, vectors, model="m", prefix="e"):
+    conn.executemany(
+        "INSERT INTO embeddings (id, source_type, source_id, chunk_index, content, embedding, model, created_at)"
+        " VALUES (?, ?, ?, 0, '', ?, ?, '2025-01-01')",
+        [
+            (f"{prefix}{i}", "note" if i % 3 else "task", f"s{i}", to_blob(v), model)
+            for i, v in enumerate(vectors)
+        ]
+    )
+    conn.commit()
+
+
+def _exact_top(vectors, query, k, keep=None):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    order = np.argsort(-(normalized @ (query / np.linalg.norm(query))))
+    return [f"e{i}" for i in order if keep is None or keep(i)][:k]
+
+
+def test_quantize_error_is_bounded():
+    vectors = _random_vectors(200, dim=256)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    half, ones = quantize(vectors, "float16")
+    assert half.dtype == np.float16 and np.all(ones == 1)
+    assert np.abs(half.astype(np.float32) - normalized).max() < 1e-3
+
+    codes, scales = quantize(vectors, "int8")
+    assert codes.dtype == np.int8 and np.abs(codes).max() == 127
+    restored = codes.astype(np.float32) * scales[:, None]
+    assert np.abs(restored - normalized).max() <= scales.max() / 2 + 1e-6
+
+    with pytest.raises(ValueError):
+        quantize(vectors, "int4")
+    assert sidecar_path("data/atlas.db") == Path("data/atlas.vectors")
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_search_reranks_to_exact_results(tmp_path, db_factory, dtype):
+    vectors = _random_vectors(3000)
+    conn = db_factory()
+    _insert(conn, vectors)
+    store = MmapVectorStore(tmp_path / "vectors", 32, "m", dtype=dtype, connection_factory=db_factory)
+    assert store.load(conn, batch_size=500) == 3000
+
+    for seed in range(5):
+        query = _random_vectors(1, seed=100 + seed)[0]
+        hits = store.search(query, 10, conn=conn)
+        assert [h[0] for h in hits] == _exact_top(vectors, query, 10)
+
+    query = vectors[7]
+    task_hits = store.search(query, 5, source_types=["task"])
+    assert [h[0] for h in task_hits] == _exact_top(vectors, query, 5, keep=lambda i: i % 3 == 0)
+    assert all(h[1] == "task" for h in task_hits)
+    assert store.search(query, 5, source_types=["event"]) == []
+    conn.close()
+
+
+def test_reopen_skips_rebuild_until_files_are_stale(tmp_path, db_factory, monkeypatch):
+    vectors = _random_vectors(100)
+    conn = db_factory()
+    _insert(conn, vectors)
+    path = tmp_path / "vectors"
+    store = MmapVectorStore(path, 32, "m", connection_factory=db_factory)
+    store.load(conn)
+
+    # Pipeline changes are written through and flushed
+    conn.execute("DELETE FROM embeddings WHERE id = 'e5'")
+    conn.execute(
+        "INSERT INTO embeddings (id, source_type, source_id, chunk_index, content, embedding, model, created_at)"
+        " VALUES ('new', 'task', 't1', 0, '', ?, 'm', '2025-01-01')",
+        (to_blob(vectors[5]),)
+    )
+    conn.commit()
+    apply_index_changes(store, IndexChanges(upserted=[IndexedRow("new", "task", "t1", list(vectors[5]))],
+                                            deleted=["e5"]))
+    assert store.stats()["free_slots"] == 0
+
+    added = []
+    original_add = MmapVectorStore.add
+    monkeypatch.setattr(MmapVectorStore, "add", lambda self, *a: added.append(len(a[0])) or original_add(self, *a))
+
+    reopened = MmapVectorStore(path, 32, "m", connection_factory=db_factory)
+    assert reopened.load(conn) == 100
+    assert added == []
+    assert reopened.search(vectors[5], 1, conn=conn)[0][:3] == ("new", "task", "t1")
+    assert reopened.stats()["by_source_type"] == {"task": 35, "note": 65}
+
+    # Another model invalidates the files; so does a row count mismatch
+    other = MmapVectorStore(path, 32, "m2", connection_factory=db_factory)
+    assert other.load(conn) == 0
+    _insert(conn, vectors[:10], prefix="x")
+    rebuilt = MmapVectorStore(path, 32, "m", connection_factory=db_factory)
+    assert rebuilt.load(conn) == 110
+    assert sum(added) == 110
+    conn.close()
+
+
+def test_reopen_rebuilds_when_ids_drift_at_the_same_count(tmp_path, db_factory):
+    vectors = _random_vectors(50)
+    conn = db_factory()
+    _insert(conn, vectors)
+    path = tmp_path / "vectors"
+    MmapVectorStore(path, 32, "m", connection_factory=db_factory).load(conn)
+
+    # A chunk re-embedded while the sidecar was not listening (e.g. a crash before flush)
+    conn.execute("UPDATE embeddings SET id = 'reembedded' WHERE id = 'e7'")
+    conn.commit()
+    reopened = MmapVectorStore(path, 32, "m", connection_factory=db_factory)
+    assert reopened.load(conn) == 50
+    assert reopened.search(vectors[7], 1, conn=conn)[0][0] == "reembedded"
+    conn.close()
+
+
+def test_growth_and_slot_reuse(tmp_path, db_factory):
+    vectors = _random_vectors(2500)
+    conn = db_factory()
+    store = MmapVectorStore(tmp_path / "vectors", 32, "m", connection_factory=db_factory)
+    store.load(conn)
+    assert store.stats()["capacity"] == 1024
+    store.add([f"e{i}" for i in range(2500)], ["note"] * 2500, [""] * 2500, vectors)
+    assert len(store) == 2500 and store.stats()["capacity"] == 4096
+    assert (tmp_path / "vectors" / "vectors.bin").stat().st_size == 4096 * 32
+
+    assert store.remove(["e1", "e2", "missing"]) == 2
+    store.add(["e1"], ["note"], ["s1"], vectors[1])
+    assert store.stats()["free_slots"] == 1
+    assert len(store) == 2499
+    conn.close()